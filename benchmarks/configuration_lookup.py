@@ -0,0 +1,124 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Per-lookup cost of scan configuration retrieval.
+
+The default configuration of an instrument is read and each benchmark
+retrieves a fixed set of keys, typical of those requested in the pipeline
+task loops, with the configuration lookup cache enabled and disabled.  The
+`track_*` benchmarks report the mean cost of a single lookup in
+microseconds.  Run with::
+
+    python -m benchmarks.configuration_lookup [--json results.json]
+"""
+
+import time
+import warnings
+
+from astropy import log
+
+from sofia_redux.scan.reduction.reduction import Reduction
+
+from benchmarks.utils import main
+
+__all__ = ['LOOKUP_KEYS', 'get_configuration', 'lookup_cost',
+           'ConfigurationLookupSuite']
+
+# Values, branches with values, deep keys and missing keys.
+LOOKUP_KEYS = ['estimator', 'despike', 'source.type', 'drifts',
+               'weighting.frames', 'correlated.obs-channels.resolution',
+               'write.spectrum', 'nonexistent.key']
+
+N_LOOKUPS = 2000
+
+
+def get_configuration(instrument):
+    """
+    Return the default configuration for an instrument at iteration 1.
+
+    Parameters
+    ----------
+    instrument : str
+
+    Returns
+    -------
+    Configuration
+    """
+    with warnings.catch_warnings(), log.log_to_list():
+        warnings.simplefilter('ignore')
+        configuration = Reduction(instrument).configuration
+        configuration.set_iteration(1)
+    return configuration
+
+
+def lookup_cost(method, keys=LOOKUP_KEYS, n=N_LOOKUPS):
+    """
+    Return the mean time of a single configuration lookup.
+
+    Parameters
+    ----------
+    method : function
+        The configuration method to call with each key.
+    keys : list (str), optional
+        The keys to retrieve.
+    n : int, optional
+        The number of times to retrieve every key.
+
+    Returns
+    -------
+    microseconds : float
+    """
+    t0 = time.perf_counter()
+    for _ in range(n):
+        for key in keys:
+            method(key)
+    return 1e6 * (time.perf_counter() - t0) / (n * len(keys))
+
+
+class ConfigurationLookupSuite(object):
+    """Configuration lookups with and without the lookup cache."""
+
+    params = (['example', 'hawc_plus'], [False, True])
+    quick_params = (['example'], [False, True])
+    param_names = ['instrument', 'cache_lookups']
+    timeout = 600
+    configurations = {}
+
+    def setup(self, instrument, cache_lookups):
+        if instrument not in ConfigurationLookupSuite.configurations:
+            ConfigurationLookupSuite.configurations[instrument] = (
+                get_configuration(instrument))
+        self.configuration = ConfigurationLookupSuite.configurations[
+            instrument].copy()
+        self.configuration.cache_lookups = cache_lookups
+        self.configuration.invalidate_lookups()
+
+    def track_get(self, instrument, cache_lookups):
+        return lookup_cost(self.configuration.get)
+
+    track_get.unit = 'microseconds'
+
+    def track_get_bool(self, instrument, cache_lookups):
+        return lookup_cost(self.configuration.get_bool)
+
+    track_get_bool.unit = 'microseconds'
+
+    def track_has_option(self, instrument, cache_lookups):
+        return lookup_cost(self.configuration.has_option)
+
+    track_has_option.unit = 'microseconds'
+
+    def track_is_configured(self, instrument, cache_lookups):
+        return lookup_cost(self.configuration.is_configured)
+
+    track_is_configured.unit = 'microseconds'
+
+    def time_iterations(self, instrument, cache_lookups):
+        configuration = self.configuration
+        for iteration in range(1, configuration.max_iteration + 1):
+            configuration.set_iteration(iteration)
+            lookup_cost(configuration.get_string, n=100)
+
+
+if __name__ == '__main__':
+    main([ConfigurationLookupSuite],
+         description='Benchmark configuration lookups.')
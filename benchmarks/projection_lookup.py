@@ -0,0 +1,122 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Cost of creating the source map lookup indices for a scan.
+
+A simulated example scan is read and validated once.  The map indices of
+every integration sample are then created with the standard projection
+(intermediate coordinate arrays with units) and with the compiled
+'indexing.fast' projection for several spherical projections.  The number
+of samples whose indices differ from the standard calculation is also
+recorded.  Run with::
+
+    python -m benchmarks.projection_lookup [--json results.json]
+"""
+
+import shutil
+import tempfile
+import warnings
+
+from astropy import log
+import numpy as np
+
+from sofia_redux.scan.coordinate_systems.projection.spherical_projection \
+    import SphericalProjection
+from sofia_redux.scan.reduction.reduction import Reduction
+
+from benchmarks.scan_precision import write_simulated_scan
+from benchmarks.utils import main
+
+__all__ = ['read_scan', 'create_lookups', 'ProjectionLookupSuite']
+
+
+def read_scan(filename):
+    """
+    Read and validate a scan, initializing the source model.
+
+    Parameters
+    ----------
+    filename : str
+
+    Returns
+    -------
+    Reduction
+    """
+    reduction = Reduction('example')
+    with warnings.catch_warnings(), log.log_to_list():
+        warnings.simplefilter('ignore')
+        reduction.read_scans([filename])
+        reduction.validate()
+    return reduction
+
+
+def create_lookups(reduction, fast):
+    """
+    Create the source lookup indices for all integrations.
+
+    Parameters
+    ----------
+    reduction : Reduction
+    fast : bool
+        The 'indexing.fast' configuration value.
+
+    Returns
+    -------
+    map_indices : list (numpy.ndarray)
+        The map indices of each integration.
+    """
+    source = reduction.source
+    source.configuration.parse_key_value('indexing.fast', str(fast))
+    map_indices = []
+    for scan in reduction.scans:
+        for integration in scan.integrations:
+            source.create_lookup(integration)
+            map_indices.append(integration.frames.map_index.coordinates)
+    return map_indices
+
+
+class ProjectionLookupSuite(object):
+    """Source lookup creation with the standard and fast projections."""
+
+    params = (['TAN', 'STG', 'SFL'], [False, True])
+    quick_params = (['TAN'], [False, True])
+    param_names = ['projection', 'fast']
+    timeout = 600
+    reduction = None
+
+    def setup(self, projection, fast):
+        if ProjectionLookupSuite.reduction is None:
+            directory = tempfile.mkdtemp(prefix='sofscan_lookup_')
+            try:
+                ProjectionLookupSuite.reduction = read_scan(
+                    write_simulated_scan(directory))
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        self.reduction = ProjectionLookupSuite.reduction
+        source = self.reduction.source
+        reference = source.projection.get_reference()
+        source.projection = SphericalProjection.for_name(projection)
+        source.projection.set_reference(reference)
+        # Compile numba functions and store the standard indices.
+        self.expected = [
+            indices.copy() for indices in create_lookups(self.reduction,
+                                                         False)]
+        create_lookups(self.reduction, fast)
+
+    def time_create_lookup(self, projection, fast):
+        create_lookups(self.reduction, fast)
+
+    def peakmem_create_lookup(self, projection, fast):
+        create_lookups(self.reduction, fast)
+
+    def track_mismatched_samples(self, projection, fast):
+        map_indices = create_lookups(self.reduction, fast)
+        return int(sum(np.sum(np.any(indices != expected, axis=0))
+                       for indices, expected in zip(map_indices,
+                                                    self.expected)))
+
+    track_mismatched_samples.unit = 'samples'
+
+
+if __name__ == '__main__':
+    main([ProjectionLookupSuite],
+         description='Benchmark source lookup index creation.')
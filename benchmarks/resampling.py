@@ -0,0 +1,355 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Benchmarks for the sofia_redux.toolkit.resampling engines.
+
+The suites follow the airspeed velocity (asv) conventions and may be run
+with ``asv run`` from the repository root, or directly with::
+
+    python -m benchmarks.resampling [--quick] [--json results.json]
+
+Synthetic samples are distributed uniformly with a density of one sample
+per unit volume, so the number of samples in each window is independent of
+the number of samples or dimensions.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from sofia_redux.toolkit.resampling.clean_image import clean_image
+from sofia_redux.toolkit.resampling.resample_kernel import ResampleKernel
+from sofia_redux.toolkit.resampling.resample_polynomial import (
+    ResamplePolynomial, resamp)
+from sofia_redux.toolkit.resampling.tree.base_tree import BaseTree
+
+from benchmarks.utils import main
+
+__all__ = ['make_samples', 'BlockTimer', 'TimedResamplePolynomial',
+           'TimedResampleKernel', 'ResamplePolynomialSuite',
+           'ResampleKernelSuite', 'ParallelSuite', 'BatchSolveSuite',
+           'AdaptiveSuite', 'BuildTreeSuite',
+           'CleanImageSuite', 'ResampSuite']
+
+WINDOW = 3.0
+
+
+def make_samples(n_features, n_samples, seed=0):
+    """
+    Create synthetic samples and a regular output grid.
+
+    Parameters
+    ----------
+    n_features : int
+        The number of dimensions.
+    n_samples : int
+        The number of samples.
+    seed : int, optional
+        The random seed.
+
+    Returns
+    -------
+    coordinates, data, error, grid
+        The sample coordinates of shape (n_features, n_samples), the data
+        and error values of shape (n_samples,), and a tuple of output grid
+        coordinates for each feature with a unit spacing.
+    """
+    rand = np.random.RandomState(seed)
+    extent = n_samples ** (1 / n_features)
+    coordinates = rand.random_sample((n_features, n_samples)) * extent
+    data = np.sum(np.sin(coordinates / 5), axis=0)
+    data += rand.normal(scale=0.05, size=n_samples)
+    error = np.full(n_samples, 0.05)
+    grid = tuple(np.arange(0, extent, 1.0) for _ in range(n_features))
+    return coordinates, data, error, grid
+
+
+class BlockTimer(object):
+    """
+    Mixin recording the processing time of each resampling block.
+
+    The elapsed time, process ID and thread ID are appended to the results
+    of `process_block`, which are ignored when combining blocks, so timings
+    are available regardless of the parallel backend.
+    """
+
+    block_times = []
+
+    @classmethod
+    def process_block(cls, args, block):
+        t0 = time.perf_counter()
+        result = super().process_block(args, block)
+        elapsed = time.perf_counter() - t0
+        return result + ((elapsed, os.getpid(), threading.get_ident()),)
+
+    @classmethod
+    def process_blocks(cls, *args, **kwargs):
+        blocks = super().process_blocks(*args, **kwargs)
+        BlockTimer.block_times = [block[-1] for block in blocks]
+        return blocks
+
+    @classmethod
+    def block_statistics(cls):
+        """
+        Return statistics on the block timings of the last reduction.
+
+        Returns
+        -------
+        statistics : dict
+        """
+        times = np.asarray([t[0] for t in cls.block_times], dtype=float)
+        if times.size == 0:
+            return {'n_blocks': 0, 'block_mean': 0.0, 'block_max': 0.0,
+                    'block_sum': 0.0, 'n_workers': 0}
+        workers = {t[1:] for t in cls.block_times}
+        return {'n_blocks': times.size, 'block_mean': times.mean(),
+                'block_max': times.max(), 'block_sum': times.sum(),
+                'n_workers': len(workers)}
+
+
+class TimedResamplePolynomial(BlockTimer, ResamplePolynomial):
+    """ResamplePolynomial recording per-block timings."""
+    pass
+
+
+class TimedResampleKernel(BlockTimer, ResampleKernel):
+    """ResampleKernel recording per-block timings."""
+    pass
+
+
+class ResamplePolynomialSuite(object):
+    """Initialization and fitting with ResamplePolynomial."""
+
+    params = ([1, 2, 3], [1000, 10000, 100000], [0, 1, 2])
+    quick_params = ([1, 2], [1000, 10000], [1])
+    param_names = ['n_features', 'n_samples', 'order']
+    timeout = 600
+
+    def setup(self, n_features, n_samples, order):
+        (self.coordinates, self.data, self.error,
+         self.grid) = make_samples(n_features, n_samples)
+        self.resampler = TimedResamplePolynomial(
+            self.coordinates, self.data, error=self.error, window=WINDOW,
+            order=order)
+        self.extra_results = {}
+
+    def time_init(self, n_features, n_samples, order):
+        TimedResamplePolynomial(self.coordinates, self.data,
+                                error=self.error, window=WINDOW, order=order)
+
+    def time_call(self, n_features, n_samples, order):
+        self.resampler(*self.grid, get_error=True, jobs=1)
+        self.extra_results = BlockTimer.block_statistics()
+
+    def peakmem_call(self, n_features, n_samples, order):
+        self.resampler(*self.grid, get_error=True, jobs=1)
+
+    def track_block_max(self, n_features, n_samples, order):
+        self.resampler(*self.grid, jobs=1)
+        return BlockTimer.block_statistics()['block_max']
+
+    track_block_max.unit = 'seconds'
+
+
+class ResampleKernelSuite(object):
+    """Initialization and convolution with ResampleKernel."""
+
+    params = ([1, 2, 3], [1000, 10000, 100000])
+    quick_params = ([1, 2], [1000, 10000])
+    param_names = ['n_features', 'n_samples']
+    timeout = 600
+
+    def setup(self, n_features, n_samples):
+        (self.coordinates, self.data, self.error,
+         self.grid) = make_samples(n_features, n_samples)
+        n_kernel = 7
+        spacing = 2 * WINDOW / (n_kernel - 1)
+        x = (np.arange(n_kernel) - n_kernel // 2) * spacing
+        r2 = np.zeros((n_kernel,) * n_features)
+        for xi in np.meshgrid(*([x] * n_features), indexing='ij'):
+            r2 += xi ** 2
+        self.kernel = np.exp(-r2 / 2)
+        self.spacing = spacing
+        self.resampler = TimedResampleKernel(
+            self.coordinates, self.data, self.kernel,
+            kernel_spacing=spacing, error=self.error)
+        self.extra_results = {}
+
+    def time_init(self, n_features, n_samples):
+        TimedResampleKernel(self.coordinates, self.data, self.kernel,
+                            kernel_spacing=self.spacing, error=self.error)
+
+    def time_call(self, n_features, n_samples):
+        self.resampler(*self.grid, jobs=1)
+        self.extra_results = BlockTimer.block_statistics()
+
+    def peakmem_call(self, n_features, n_samples):
+        self.resampler(*self.grid, jobs=1)
+
+
+class ParallelSuite(object):
+    """Compare serial, threaded and process based block processing."""
+
+    params = ([1, 2, 4], ['threads', 'processes'], [False, True])
+    quick_params = ([1, 2], ['threads', 'processes'], [False])
+    param_names = ['jobs', 'backend', 'shared_memory']
+    timeout = 600
+    n_features = 2
+    n_samples = 40000
+
+    def setup(self, jobs, backend, shared_memory):
+        (self.coordinates, self.data, self.error,
+         self.grid) = make_samples(self.n_features, self.n_samples)
+        self.resampler = TimedResamplePolynomial(
+            self.coordinates, self.data, error=self.error, window=WINDOW,
+            order=2)
+        self.extra_results = {}
+
+    def _call(self, jobs, backend, shared_memory):
+        return self.resampler(
+            *self.grid, jobs=jobs, get_error=True,
+            use_threading=backend == 'threads',
+            use_processes=backend == 'processes',
+            use_shared_memory=shared_memory)
+
+    def time_call(self, jobs, backend, shared_memory):
+        self._call(jobs, backend, shared_memory)
+        self.extra_results = BlockTimer.block_statistics()
+        info = self.resampler.dispatch_info
+        if info is not None:
+            self.extra_results['pickled_bytes'] = info['pickled_bytes']
+
+    def peakmem_call(self, jobs, backend, shared_memory):
+        self._call(jobs, backend, shared_memory)
+
+
+class BatchSolveSuite(object):
+    """Compare individual and batched solvers for polynomial surface fits."""
+
+    params = ([2, 3], [False, True])
+    param_names = ['order', 'batch_solve']
+    timeout = 600
+    n_features = 2
+    n_samples = 40000
+
+    def setup(self, order, batch_solve):
+        (self.coordinates, self.data, self.error,
+         self.grid) = make_samples(self.n_features, self.n_samples)
+        self.resampler = TimedResamplePolynomial(
+            self.coordinates, self.data, error=self.error, window=WINDOW,
+            order=order)
+        # Compile the solver before timing
+        self.resampler(*self.grid[:1], *(g[:2] for g in self.grid[1:]),
+                       batch_solve=batch_solve, get_error=True, jobs=1)
+        self.extra_results = {}
+
+    def time_call(self, order, batch_solve):
+        self.resampler(*self.grid, batch_solve=batch_solve, get_error=True,
+                       jobs=1)
+        self.extra_results = BlockTimer.block_statistics()
+
+    def peakmem_call(self, order, batch_solve):
+        self.resampler(*self.grid, batch_solve=batch_solve, get_error=True,
+                       jobs=1)
+
+
+class AdaptiveSuite(object):
+    """Adaptive smoothing with full, subsampled or precalculated kernels."""
+
+    params = (['scaled', 'shaped'], ['full', 'subsample', 'precalculated'])
+    param_names = ['algorithm', 'kernel']
+    timeout = 600
+    n_features = 2
+    n_samples = 10000
+
+    def setup(self, algorithm, kernel):
+        (self.coordinates, self.data, self.error,
+         self.grid) = make_samples(self.n_features, self.n_samples)
+        self.resampler = ResamplePolynomial(
+            self.coordinates, self.data, error=self.error, window=WINDOW,
+            order=2)
+        self.options = {'smoothing': 0.5, 'adaptive_threshold': 1.0,
+                        'adaptive_algorithm': algorithm, 'jobs': 1}
+        if kernel == 'subsample':
+            self.options['adaptive_subsample'] = 4
+        # Compile and calculate the kernel before timing
+        self.resampler(*self.grid, **self.options)
+        if kernel == 'precalculated':
+            self.options['adaptive_alpha'] = self.resampler.adaptive_alpha
+
+    def time_call(self, algorithm, kernel):
+        self.resampler(*self.grid, **self.options)
+
+    def peakmem_call(self, algorithm, kernel):
+        self.resampler(*self.grid, **self.options)
+
+
+class BuildTreeSuite(object):
+    """Construction of the ball and neighborhood trees."""
+
+    params = ([1, 2, 3], [1000, 10000, 100000])
+    quick_params = ([1, 2], [1000, 10000])
+    param_names = ['n_features', 'n_samples']
+    timeout = 300
+
+    def setup(self, n_features, n_samples):
+        coordinates = make_samples(n_features, n_samples)[0]
+        self.coordinates = coordinates / WINDOW
+        self.tree = BaseTree(self.coordinates, build_type='none')
+
+    def time_build_tree(self, n_features, n_samples):
+        self.tree.build_tree(self.coordinates)
+
+    def peakmem_build_tree(self, n_features, n_samples):
+        self.tree.build_tree(self.coordinates)
+
+
+class CleanImageSuite(object):
+    """Replacement of bad pixels in an image."""
+
+    params = ([64, 256, 1024], [0.1, 0.5])
+    quick_params = ([64, 256], [0.1])
+    param_names = ['size', 'bad_fraction']
+    timeout = 300
+
+    def setup(self, size, bad_fraction):
+        rand = np.random.RandomState(0)
+        y, x = np.mgrid[:size, :size]
+        image = np.sin(x / 10) + np.cos(y / 15)
+        image[rand.random_sample(image.shape) < bad_fraction] = np.nan
+        self.image = image
+
+    def time_clean_image(self, size, bad_fraction):
+        clean_image(self.image, window=WINDOW, order=1)
+
+    def peakmem_clean_image(self, size, bad_fraction):
+        clean_image(self.image, window=WINDOW, order=1)
+
+
+class ResampSuite(object):
+    """The resamp convenience function including window estimation."""
+
+    params = ([1, 2, 3], [1000, 10000])
+    quick_params = ([1, 2], [1000])
+    param_names = ['n_features', 'n_samples']
+    timeout = 300
+
+    def setup(self, n_features, n_samples):
+        (self.coordinates, self.data, self.error,
+         self.grid) = make_samples(n_features, n_samples)
+
+    def time_resamp(self, n_features, n_samples):
+        resamp(self.coordinates, self.data, *self.grid, error=self.error,
+               order=1)
+
+    def peakmem_resamp(self, n_features, n_samples):
+        resamp(self.coordinates, self.data, *self.grid, error=self.error,
+               order=1)
+
+
+if __name__ == '__main__':
+    main([ResamplePolynomialSuite, ResampleKernelSuite, ParallelSuite,
+          BatchSolveSuite, AdaptiveSuite, BuildTreeSuite, CleanImageSuite,
+          ResampSuite],
+         description='Benchmark the resampling engines.')
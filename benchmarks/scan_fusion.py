@@ -0,0 +1,135 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Memory traffic saved by fusing pipeline tasks in scan reductions.
+
+A simulated example scan is reduced with the 'fuse' option disabled and
+enabled, for the default task ordering and for an ordering in which channel
+weighting directly follows drift removal.  For each reduction, the number of
+fused passes over the time-stream data and the number of bytes that no longer
+need to be streamed from memory are recorded, together with the differences
+between the fused and unfused output maps (which should be zero).  Run with::
+
+    python -m benchmarks.scan_fusion [--json results.json]
+"""
+
+import shutil
+import tempfile
+import warnings
+
+from astropy import log
+
+from sofia_redux.scan.integration import integration_numba_functions as int_nf
+from sofia_redux.scan.reduction.reduction import Reduction
+
+from benchmarks.scan_precision import write_simulated_scan, compare_maps
+from benchmarks.utils import main
+
+__all__ = ['FusedPassCounter', 'reduce_scan', 'FusionSuite']
+
+ORDERINGS = {
+    'default': None,
+    'levelled': ['offsets', 'drifts', 'weighting', 'correlated.obs-channels',
+                 'weighting.frames', 'whiten', 'despike', 'source']}
+
+
+class FusedPassCounter(object):
+
+    def __init__(self):
+        """
+        Count the fused drift and weighting passes over time-stream data.
+
+        While active, calls to the fused drift removal and weighting kernel
+        are counted.  Each call replaces a separate weighting pass that would
+        otherwise read the full frame data and sample flag arrays.
+        """
+        self.passes = 0
+        self.saved_bytes = 0
+        self.function = None
+
+    def __enter__(self):
+        self.function = int_nf.remove_channel_drifts_with_rms_weights
+
+        def counted(frame_data, frame_weights, frame_valid, modeling_frames,
+                    sample_flags, *args, **kwargs):
+            self.passes += 1
+            self.saved_bytes += frame_data.nbytes + sample_flags.nbytes
+            return self.function(frame_data, frame_weights, frame_valid,
+                                 modeling_frames, sample_flags, *args,
+                                 **kwargs)
+
+        int_nf.remove_channel_drifts_with_rms_weights = counted
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        int_nf.remove_channel_drifts_with_rms_weights = self.function
+
+
+def reduce_scan(filename, ordering, fuse, outpath):
+    """
+    Reduce a scan with or without fused pipeline tasks.
+
+    Parameters
+    ----------
+    filename : str
+    ordering : str
+        The name of the task ordering in `ORDERINGS`.
+    fuse : bool
+        The 'fuse' configuration value.
+    outpath : str
+        The output directory.
+
+    Returns
+    -------
+    maps, counter : list (numpy.ndarray), FusedPassCounter
+        All 2-D images in the output HDU list, and the fused pass counts.
+    """
+    options = {'fuse': str(fuse)}
+    if ORDERINGS[ordering] is not None:
+        options['ordering'] = ORDERINGS[ordering]
+    reduction = Reduction('example')
+    with warnings.catch_warnings(), log.log_to_list(), \
+            FusedPassCounter() as counter:
+        warnings.simplefilter('ignore')
+        hdul = reduction.run(filename, outpath=outpath,
+                             write={'source': False}, **options)
+    maps = [hdu.data.copy() for hdu in hdul
+            if hdu.data is not None and hdu.data.ndim == 2]
+    return maps, counter
+
+
+class FusionSuite(object):
+    """Example scan reduction with and without fused pipeline tasks."""
+
+    params = [list(ORDERINGS.keys()), [False, True]]
+    param_names = ['ordering', 'fuse']
+    timeout = 1200
+    reference = {}
+
+    def setup(self, ordering, fuse):
+        self.directory = tempfile.mkdtemp(prefix='sofscan_fusion_')
+        self.filename = write_simulated_scan(self.directory)
+        if ordering not in FusionSuite.reference:
+            FusionSuite.reference[ordering] = reduce_scan(
+                self.filename, ordering, False, self.directory)[0]
+        # Compile numba functions before timing.
+        reduce_scan(self.filename, ordering, fuse, self.directory)
+        self.extra_results = None
+
+    def teardown(self, ordering, fuse):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def time_reduction(self, ordering, fuse):
+        maps, counter = reduce_scan(
+            self.filename, ordering, fuse, self.directory)
+        self.extra_results = {'fused_passes': counter.passes,
+                              'saved_bytes': counter.saved_bytes}
+        self.extra_results.update(
+            compare_maps(maps, self.reference[ordering]))
+
+    def peakmem_reduction(self, ordering, fuse):
+        reduce_scan(self.filename, ordering, fuse, self.directory)
+
+
+if __name__ == '__main__':
+    main([FusionSuite],
+         description='Measure the memory traffic saved by fused tasks.')
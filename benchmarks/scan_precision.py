@@ -0,0 +1,168 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Validation of single precision time-stream storage for scan reductions.
+
+A simulated example scan is reduced with the 'precision' option set to
+float64 and float32.  The wall time, peak memory and size of the stored
+time-stream arrays are recorded, together with the differences between the
+float32 and float64 output maps.  Run with::
+
+    python -m benchmarks.scan_precision [--json results.json]
+"""
+
+import os
+import shutil
+import tempfile
+import warnings
+
+from astropy import log, units
+import numpy as np
+
+from sofia_redux.scan.reduction.reduction import Reduction
+
+from benchmarks.utils import main
+
+__all__ = ['write_simulated_scan', 'reduce_scan', 'frame_bytes',
+           'compare_maps', 'PrecisionSuite']
+
+TIME_STREAM_FIELDS = ['data', 'relative_weight', 'dependents', 'temp_c',
+                      'temp_wc', 'temp_wc2']
+
+
+def write_simulated_scan(directory):
+    """
+    Write a simulated example scan.
+
+    Parameters
+    ----------
+    directory : str
+        The directory in which to write the scan.
+
+    Returns
+    -------
+    filename : str
+    """
+    filename = os.path.join(directory, 'simulated_scan.fits')
+    reduction = Reduction('example')
+    reduction.info.write_simulated_hdul(filename, fwhm=10 * units.arcsec)
+    return filename
+
+
+def reduce_scan(filename, precision, outpath):
+    """
+    Reduce a scan with the given time-stream precision.
+
+    Parameters
+    ----------
+    filename : str
+    precision : str
+        The 'precision' configuration value.
+    outpath : str
+        The output directory.
+
+    Returns
+    -------
+    reduction, maps : Reduction, list (numpy.ndarray)
+        The reduction and all 2-D images in the output HDU list.
+    """
+    reduction = Reduction('example')
+    with warnings.catch_warnings(), log.log_to_list():
+        warnings.simplefilter('ignore')
+        hdul = reduction.run(filename, outpath=outpath,
+                             write={'source': False}, precision=precision)
+    maps = [hdu.data.copy() for hdu in hdul
+            if hdu.data is not None and hdu.data.ndim == 2]
+    return reduction, maps
+
+
+def frame_bytes(reduction):
+    """
+    Return the number of bytes used to store the time-stream arrays.
+
+    Parameters
+    ----------
+    reduction : Reduction
+
+    Returns
+    -------
+    int
+    """
+    total = 0
+    for scan in reduction.scans:
+        for integration in scan.integrations:
+            for field in TIME_STREAM_FIELDS:
+                value = getattr(integration.frames, field, None)
+                if isinstance(value, np.ndarray):
+                    total += value.nbytes
+    return total
+
+
+def compare_maps(maps, reference):
+    """
+    Return the differences between output maps and reference maps.
+
+    Parameters
+    ----------
+    maps : list (numpy.ndarray)
+    reference : list (numpy.ndarray)
+
+    Returns
+    -------
+    differences : dict
+        The maximum absolute difference ('max_diff'), the maximum difference
+        relative to the standard deviation of each reference map
+        ('max_rel_diff'), and the number of pixels that are valid in only
+        one of the maps ('nan_mismatch').
+    """
+    max_diff = max_rel_diff = 0.0
+    nan_mismatch = 0
+    for image, expected in zip(maps, reference):
+        valid = np.isfinite(image)
+        expected_valid = np.isfinite(expected)
+        nan_mismatch += int(np.sum(valid != expected_valid))
+        both = valid & expected_valid
+        if not both.any():
+            continue
+        diff = np.max(np.abs(image[both] - expected[both]))
+        scale = np.std(expected[both])
+        max_diff = max(max_diff, diff)
+        if scale > 0:
+            max_rel_diff = max(max_rel_diff, diff / scale)
+    return {'max_diff': max_diff, 'max_rel_diff': max_rel_diff,
+            'nan_mismatch': nan_mismatch}
+
+
+class PrecisionSuite(object):
+    """Example scan reduction with float64 and float32 time-streams."""
+
+    params = ['float64', 'float32']
+    param_names = ['precision']
+    timeout = 1200
+    reference = None
+
+    def setup(self, precision):
+        self.directory = tempfile.mkdtemp(prefix='sofscan_precision_')
+        self.filename = write_simulated_scan(self.directory)
+        if PrecisionSuite.reference is None:
+            PrecisionSuite.reference = reduce_scan(
+                self.filename, 'float64', self.directory)[1]
+        # Compile numba functions for this precision before timing.
+        reduce_scan(self.filename, precision, self.directory)
+        self.extra_results = None
+
+    def teardown(self, precision):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def time_reduction(self, precision):
+        reduction, maps = reduce_scan(
+            self.filename, precision, self.directory)
+        self.extra_results = {'frame_bytes': frame_bytes(reduction)}
+        self.extra_results.update(compare_maps(maps, self.reference))
+
+    def peakmem_reduction(self, precision):
+        reduce_scan(self.filename, precision, self.directory)
+
+
+if __name__ == '__main__':
+    main([PrecisionSuite],
+         description='Validate single precision scan reductions.')
@@ -0,0 +1,332 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Throughput of full scan reductions on simulated data.
+
+Synthetic scans are generated with the example instrument simulation
+(:class:`SimulationInfo`) or the HAWC+ simulation
+(:class:`HawcPlusSimulation`), so no observational data are required.  The
+size of a simulated data set is defined by the entries of `SCAN_SIZES`,
+giving the HAWC+ subarrays to reduce (the number of channels), the number
+of frames per scan, and the number of scans.  The example instrument always
+has 121 channels.  Each data set is reduced with the standard 'default',
+'faint', 'deep' and 'bright' configurations.
+
+For every reduction, the wall time and peak memory are recorded, together
+with the wall time of each reduction round and a checksum of the output
+maps.  Simulated data are seeded, so checksums may be compared between
+runs to detect any change in the reduction results.  Run with::
+
+    python -m benchmarks.scan_simulation [--quick] [--json results.json]
+
+Other sizes may be benchmarked with :func:`reduce_simulated_scans`, or by
+adding entries to `SCAN_SIZES`.
+"""
+
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import warnings
+
+from astropy import log, units
+from astropy.io import fits
+from astropy.time import Time
+import numpy as np
+
+from sofia_redux.scan.custom.hawc_plus.simulation.simulation import \
+    HawcPlusSimulation
+from sofia_redux.scan.reduction.reduction import Reduction
+
+from benchmarks.utils import measure, main
+
+__all__ = ['SCAN_SIZES', 'REDUCTION_MODES', 'TimedReduction',
+           'write_simulated_scans', 'reduce_scans', 'map_checksum',
+           'reduce_simulated_scans', 'ScanSimulationSuite']
+
+# subarray: HAWC+ subarrays to reduce (None for all available subarrays).
+SCAN_SIZES = {
+    'small': {'subarray': 'R0', 'frames': 1000, 'scans': 1},
+    'medium': {'subarray': 'R0,T0', 'frames': 4000, 'scans': 2},
+    'large': {'subarray': None, 'frames': 10000, 'scans': 4}
+}
+
+REDUCTION_MODES = {
+    'default': {},
+    'faint': {'faint': True},
+    'deep': {'deep': True},
+    'bright': {'bright': True}
+}
+
+DATE_OBS = '2021-12-06T18:48:25.876'
+
+
+class TimedReduction(Reduction):
+
+    def __init__(self, instrument, **kwargs):
+        """
+        A reduction recording the wall time of each reduction round.
+
+        Parameters
+        ----------
+        instrument : str
+            The name of the instrument.
+        kwargs : dict, optional
+            Additional arguments passed to :class:`Reduction`.
+        """
+        super().__init__(instrument, **kwargs)
+        self.round_start_times = []
+        self.round_end_time = None
+
+    @property
+    def round_times(self):
+        """
+        Return the wall time of each completed reduction round.
+
+        Returns
+        -------
+        list (float)
+            The wall time of each round in seconds.
+        """
+        starts = self.round_start_times
+        if len(starts) == 0 or self.round_end_time is None:
+            return []
+        ends = starts[1:] + [self.round_end_time]
+        return [end - start for start, end in zip(starts, ends)]
+
+    def set_iteration(self, iteration, rounds=None, for_scans=True):
+        self.round_start_times.append(time.perf_counter())
+        super().set_iteration(iteration, rounds=rounds, for_scans=for_scans)
+
+    def write_products(self):
+        self.round_end_time = time.perf_counter()
+        super().write_products()
+
+
+def write_simulated_scans(instrument, directory, frames=1000, scans=1,
+                          seed=1):
+    """
+    Write simulated scans to file.
+
+    Parameters
+    ----------
+    instrument : str
+        The instrument to simulate ('example' or 'hawc_plus').
+    directory : str
+        The directory in which to write the scans.
+    frames : int, optional
+        The approximate number of frames in each scan.
+    scans : int, optional
+        The number of scans.
+    seed : int, optional
+        The seed for the simulated noise.  Scan i is simulated with the seed
+        `seed` + i.
+
+    Returns
+    -------
+    filenames : list (str)
+    """
+    filenames = []
+    start = Time(DATE_OBS, scale='utc')
+    for scan in range(scans):
+        filename = os.path.join(directory, f'{instrument}_{scan + 1}.fits')
+        with warnings.catch_warnings(), log.log_to_list():
+            warnings.simplefilter('ignore')
+            reduction = Reduction(instrument)
+        if instrument == 'hawc_plus':
+            rate = HawcPlusSimulation.default_value('SMPLFREQ')
+            length = frames / rate
+        else:
+            interval = reduction.info.instrument.sampling_interval
+            length = frames * interval.to('second').value
+        date_obs = start + (scan * 2 * length) * units.Unit('second')
+
+        with warnings.catch_warnings(), log.log_to_list():
+            warnings.simplefilter('ignore')
+            if instrument == 'hawc_plus':
+                np.random.seed(seed + scan)
+                header_options = fits.Header()
+                header_options['SRCAMP'] = 20.0
+                header_options['SRCS2N'] = 30.0
+                header_options['SRCSIZE'] = 20.0
+                header_options['SPECTEL1'] = 'HAW_C'
+                header_options['EXPTIME'] = length
+                header_options['DATE-OBS'] = date_obs.isot
+                simulation = HawcPlusSimulation(reduction.info)
+                simulation.write_simulated_hdul(
+                    filename, header_options=header_options)
+            else:
+                reduction.info.write_simulated_hdul(
+                    filename, date_obs=date_obs.isot, scan_id=scan + 1,
+                    fwhm=10 * units.Unit('arcsec'), s2n=30.0,
+                    seed=seed + scan, n_oscillations=22,
+                    radial_period=(length / 22) * units.Unit('second'))
+        filenames.append(filename)
+    return filenames
+
+
+def reduce_scans(instrument, filenames, outpath, mode='default',
+                 subarray=None):
+    """
+    Reduce scans, recording the wall time of each round.
+
+    Parameters
+    ----------
+    instrument : str
+    filenames : list (str)
+    outpath : str
+        The output directory.
+    mode : str, optional
+        The reduction configuration (a key of `REDUCTION_MODES`).
+    subarray : str, optional
+        The HAWC+ subarrays to reduce.  The default reduces all.
+
+    Returns
+    -------
+    reduction, hdul : TimedReduction, fits.HDUList or list
+        The reduction and its output.
+    """
+    options = REDUCTION_MODES[mode].copy()
+    if instrument == 'hawc_plus' and subarray is not None:
+        options['subarray'] = subarray
+    reduction = TimedReduction(instrument)
+    with warnings.catch_warnings(), log.log_to_list():
+        warnings.simplefilter('ignore')
+        hdul = reduction.run(filenames, outpath=outpath,
+                             write={'source': False}, **options)
+    return reduction, hdul
+
+
+def map_checksum(hdul):
+    """
+    Return a checksum of all image data in reduction output.
+
+    Parameters
+    ----------
+    hdul : fits.HDUList or list (fits.HDUList) or None
+
+    Returns
+    -------
+    checksum : str
+        The first 16 characters of the SHA-256 hex digest.
+    """
+    if hdul is None:
+        hdul = []
+    elif isinstance(hdul, fits.HDUList):
+        hdul = [hdul]
+    checksum = hashlib.sha256()
+    for hdu_list in hdul:
+        for hdu in hdu_list:
+            if hdu.data is None or not isinstance(hdu.data, np.ndarray):
+                continue
+            if hdu.data.ndim < 2:
+                continue
+            checksum.update(np.ascontiguousarray(hdu.data).tobytes())
+    return checksum.hexdigest()[:16]
+
+
+def reduce_simulated_scans(instrument='example', frames=1000, scans=1,
+                           subarray=None, mode='default', seed=1):
+    """
+    Simulate and reduce scans, returning throughput statistics.
+
+    Parameters
+    ----------
+    instrument : str, optional
+        The instrument to simulate ('example' or 'hawc_plus').
+    frames : int, optional
+        The approximate number of frames in each scan.
+    scans : int, optional
+        The number of scans.
+    subarray : str, optional
+        The HAWC+ subarrays to reduce.  The default reduces all.
+    mode : str, optional
+        The reduction configuration (a key of `REDUCTION_MODES`).
+    seed : int, optional
+        The seed for the simulated noise.
+
+    Returns
+    -------
+    result : dict
+        The reduction 'wall_time', 'peak_rss' and 'peak_increase' (see
+        :func:`measure`), the number of channels, frames and scans reduced,
+        the 'round_times' in seconds, and the 'map_checksum'.
+    """
+    directory = tempfile.mkdtemp(prefix='sofscan_simulation_')
+    try:
+        filenames = write_simulated_scans(
+            instrument, directory, frames=frames, scans=scans, seed=seed)
+        output = {}
+
+        def run():
+            output['reduction'], output['hdul'] = reduce_scans(
+                instrument, filenames, directory, mode=mode,
+                subarray=subarray)
+
+        result = measure(run)
+        result.update(reduction_statistics(output['reduction'],
+                                           output['hdul']))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return result
+
+
+def reduction_statistics(reduction, hdul):
+    """
+    Return the size, round times, and output checksum of a reduction.
+
+    Parameters
+    ----------
+    reduction : TimedReduction
+    hdul : fits.HDUList or list (fits.HDUList) or None
+
+    Returns
+    -------
+    statistics : dict
+    """
+    n_channels = n_frames = 0
+    scans = reduction.scans if reduction.scans is not None else []
+    for scan in scans:
+        for integration in scan.integrations:
+            n_channels = max(n_channels, integration.channels.size)
+            n_frames += integration.size
+    return {'channels': n_channels,
+            'frames': n_frames,
+            'scans': len(scans),
+            'round_times': [round(t, 4) for t in reduction.round_times],
+            'map_checksum': map_checksum(hdul)}
+
+
+class ScanSimulationSuite(object):
+    """Full reductions of simulated scans."""
+
+    params = (['example', 'hawc_plus'], list(SCAN_SIZES),
+              list(REDUCTION_MODES))
+    quick_params = (['example'], ['small'], ['default', 'faint'])
+    param_names = ['instrument', 'size', 'mode']
+    timeout = 3600
+    scan_files = {}
+
+    def setup(self, instrument, size, mode):
+        key = instrument, size
+        if key not in ScanSimulationSuite.scan_files:
+            directory = tempfile.mkdtemp(prefix='sofscan_simulation_')
+            atexit.register(shutil.rmtree, directory, True)
+            ScanSimulationSuite.scan_files[key] = directory, (
+                write_simulated_scans(instrument, directory,
+                                      frames=SCAN_SIZES[size]['frames'],
+                                      scans=SCAN_SIZES[size]['scans']))
+        self.directory, self.filenames = ScanSimulationSuite.scan_files[key]
+        self.extra_results = None
+
+    def time_reduction(self, instrument, size, mode):
+        reduction, hdul = reduce_scans(
+            instrument, self.filenames, self.directory, mode=mode,
+            subarray=SCAN_SIZES[size]['subarray'])
+        self.extra_results = reduction_statistics(reduction, hdul)
+
+
+if __name__ == '__main__':
+    main([ScanSimulationSuite],
+         description='Benchmark reductions of simulated scans.')
@@ -0,0 +1,312 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import argparse
+import inspect
+import itertools
+import json
+import threading
+import time
+
+import numpy as np
+import psutil
+
+__all__ = ['PeakMemory', 'measure', 'iterate_parameters', 'run_suite',
+           'format_table', 'write_json', 'main']
+
+
+class PeakMemory(object):
+
+    def __init__(self, interval=0.005, children=True):
+        """
+        Context manager recording the peak resident memory of a process.
+
+        The resident set size (RSS) of the current process, and optionally
+        all child processes, is sampled in a background thread.  `peak_rss`
+        gives the total peak RSS, while `increase` gives the peak increase
+        over the RSS at entry.
+
+        Parameters
+        ----------
+        interval : float, optional
+            The sampling interval in seconds.
+        children : bool, optional
+            If `True`, include the memory of all child processes (e.g.,
+            multiprocessing workers).
+        """
+        self.interval = interval
+        self.children = children
+        self.process = psutil.Process()
+        self.start_rss = 0
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def increase(self):
+        """int : The peak RSS increase in bytes since entry."""
+        return max(self.peak_rss - self.start_rss, 0)
+
+    def rss(self):
+        """
+        Return the current resident memory in bytes.
+
+        Returns
+        -------
+        int
+        """
+        try:
+            total = self.process.memory_info().rss
+            if self.children:
+                for child in self.process.children(recursive=True):
+                    try:
+                        total += child.memory_info().rss
+                    except psutil.Error:  # pragma: no cover
+                        pass
+        except psutil.Error:  # pragma: no cover
+            return 0
+        return total
+
+    def _sample(self):
+        """Update the peak memory until stopped."""
+        while not self._stop.is_set():
+            self.peak_rss = max(self.peak_rss, self.rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start_rss = self.peak_rss = self.rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, self.rss())
+
+
+def measure(func, *args, repeat=1, **kwargs):
+    """
+    Measure the wall time and peak memory of a function call.
+
+    Parameters
+    ----------
+    func : function
+        The function to call.
+    args : tuple, optional
+        Arguments to pass to `func`.
+    repeat : int, optional
+        The number of times to call `func`.  The minimum wall time is
+        reported.
+    kwargs : dict, optional
+        Keyword arguments to pass to `func`.
+
+    Returns
+    -------
+    result : dict
+        Contains 'wall_time' (seconds), 'peak_rss' and 'peak_increase'
+        (bytes).
+    """
+    times = []
+    peak = increase = 0
+    for _ in range(max(int(repeat), 1)):
+        with PeakMemory() as memory:
+            t0 = time.perf_counter()
+            func(*args, **kwargs)
+            times.append(time.perf_counter() - t0)
+        peak = max(peak, memory.peak_rss)
+        increase = max(increase, memory.increase)
+    return {'wall_time': min(times), 'peak_rss': peak,
+            'peak_increase': increase}
+
+
+def iterate_parameters(suite, quick=False):
+    """
+    Yield all parameter combinations for an asv-style benchmark suite.
+
+    Parameters
+    ----------
+    suite : class
+        A benchmark class defining `params` and `param_names` in the style
+        of airspeed velocity (asv).  If `quick` is `True` and the class
+        defines `quick_params`, those are used instead.
+    quick : bool, optional
+        If `True`, use a reduced set of parameters.
+
+    Yields
+    ------
+    parameters : dict
+    """
+    params = getattr(suite, 'params', [])
+    if quick:
+        params = getattr(suite, 'quick_params', params)
+    names = getattr(suite, 'param_names', [])
+    if len(names) == 0:
+        yield {}
+        return
+    if len(names) == 1 and not isinstance(params[0], (list, tuple)):
+        params = [params]
+    for values in itertools.product(*params):
+        yield dict(zip(names, values))
+
+
+def run_suite(suite, quick=False, repeat=1, pattern=None):
+    """
+    Run an asv-style benchmark suite without asv.
+
+    All `time_*` and `peakmem_*` methods are timed and their peak memory
+    recorded, and all `track_*` methods are called with their return
+    values recorded.  Methods are called after `setup` for each parameter
+    combination, and a `teardown` method is called if present.
+
+    Parameters
+    ----------
+    suite : class
+        The benchmark class.
+    quick : bool, optional
+        If `True`, run with a reduced parameter set.
+    repeat : int, optional
+        The number of repeats for timed benchmarks.
+    pattern : str, optional
+        If supplied, only run benchmarks whose names contain `pattern`.
+
+    Returns
+    -------
+    results : list (dict)
+        A result for each benchmark and parameter combination.
+    """
+    instance = suite()
+    methods = [name for name, _ in inspect.getmembers(
+        suite, predicate=inspect.isfunction)
+        if name.split('_')[0] in ['time', 'peakmem', 'track']]
+    if pattern is not None:
+        methods = [m for m in methods
+                   if pattern in f'{suite.__name__}.{m}']
+    if len(methods) == 0:
+        return []
+
+    results = []
+    for parameters in iterate_parameters(suite, quick=quick):
+        values = tuple(parameters.values())
+        for method in methods:
+            if hasattr(instance, 'setup'):
+                instance.setup(*values)
+            func = getattr(instance, method)
+            row = {'benchmark': f'{suite.__name__}.{method}'}
+            row.update(parameters)
+            if method.startswith('track'):
+                row['value'] = func(*values)
+                row['unit'] = getattr(func, 'unit', '')
+            else:
+                row.update(measure(func, *values, repeat=repeat))
+            extra = getattr(instance, 'extra_results', None)
+            if extra:
+                row.update(extra)
+            if hasattr(instance, 'teardown'):
+                instance.teardown(*values)
+            results.append(row)
+    return results
+
+
+def format_table(results):
+    """
+    Format benchmark results as a plain text table.
+
+    Parameters
+    ----------
+    results : list (dict)
+
+    Returns
+    -------
+    table : str
+    """
+    if len(results) == 0:
+        return ''
+    columns = []
+    for row in results:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+
+    def fmt(value):
+        if value is None:
+            return '-'
+        if isinstance(value, (float, np.floating)):
+            return f'{value:.4g}'
+        return str(value)
+
+    rows = [[fmt(row.get(c)) for c in columns] for row in results]
+    widths = [max(len(c), *(len(r[i]) for r in rows))
+              for i, c in enumerate(columns)]
+    lines = ['  '.join(c.ljust(w) for c, w in zip(columns, widths)),
+             '  '.join('-' * w for w in widths)]
+    for row in rows:
+        lines.append('  '.join(v.ljust(w) for v, w in zip(row, widths)))
+    return '\n'.join(lines)
+
+
+def write_json(results, filename):
+    """
+    Write benchmark results to a JSON file.
+
+    Parameters
+    ----------
+    results : list (dict)
+    filename : str
+
+    Returns
+    -------
+    None
+    """
+    def convert(value):
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        raise TypeError(f"Cannot serialize {type(value)}")
+
+    with open(filename, 'w') as f:
+        json.dump(results, f, indent=2, default=convert)
+
+
+def main(suites, description=None, args=None):
+    """
+    Command line entry point to run a set of benchmark suites.
+
+    Parameters
+    ----------
+    suites : list (class)
+        The benchmark classes to run.
+    description : str, optional
+        The description for the command line help.
+    args : list (str), optional
+        Command line arguments.  Taken from `sys.argv` if not supplied.
+
+    Returns
+    -------
+    results : list (dict)
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--quick', action='store_true',
+                        help='Run a reduced set of parameters.')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Number of repeats for timed benchmarks.')
+    parser.add_argument('--bench', '-b', default=None,
+                        help='Only run benchmarks containing this string.')
+    parser.add_argument('--json', default=None,
+                        help='Write results to this JSON file.')
+    options = parser.parse_args(args)
+
+    results = []
+    for suite in suites:
+        suite_results = run_suite(suite, quick=options.quick,
+                                  repeat=options.repeat,
+                                  pattern=options.bench)
+        if len(suite_results) > 0:
+            print(format_table(suite_results))
+            print()
+        results.extend(suite_results)
+
+    if options.json is not None:
+        write_json(results, options.json)
+    return results
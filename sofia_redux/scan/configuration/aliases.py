@@ -243,6 +243,7 @@ class Aliases(Options):
                         del configuration.options[key]
                     except KeyError:  # pragma: no cover
                         pass
+                    configuration.invalidate_lookups()
 
             changed = len(unaliased_options) > 0
             if changed:
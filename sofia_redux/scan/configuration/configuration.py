@@ -130,6 +130,18 @@ class Configuration(Options):
     The "fits" key is special and is used to refer to key/values in the
     FITS header.  For example, fits.SPECTEL1 will refer to the SPECTEL1
     value in the header, not the configuration.
+
+    *LOOKUPS*
+
+    Resolving a key requires unaliasing, checking for disabled branches,
+    walking the options tree, and substituting any referenced values.  Since
+    the same keys are retrieved many times during a reduction, the resolved
+    results of :func:`Configuration.get` and
+    :func:`Configuration.has_option` are stored in a lookup cache.  Any change
+    to the options, aliases, or disabled keys made through the Configuration
+    increments `options_version` and clears the cache, so that subsequent
+    lookups are resolved against the updated options.  Setting
+    `cache_lookups` to `False` disables the cache.
     """
 
     # The command keys are those found in the configuration contents that
@@ -155,6 +167,11 @@ class Configuration(Options):
     section_keys = {'aliases', 'conditionals', 'date', 'iteration', 'object'}
     handler_keys = section_keys.union(['fits'])
 
+    # Markers for the resolution of a key in the configuration.
+    VALUE_FOUND = 0
+    BRANCH_MISSING = 1
+    VALUE_MISSING = 2
+
     def __init__(self, configuration_path=None, allow_error=False,
                  verbose=False):
         """
@@ -173,6 +190,9 @@ class Configuration(Options):
             If `True`, issues a warning when a poorly specified option is
             encountered.
         """
+        self.cache_lookups = True
+        self.options_version = 0
+        self.lookup_cache = {}
         super().__init__(allow_error=allow_error, verbose=verbose)
         self.instrument_name = None
         self.enabled = False
@@ -238,6 +258,55 @@ class Configuration(Options):
         for handler in [self.aliases, self.conditions, self.dates,
                         self.iterations, self.objects, self.fits]:
             handler.clear()
+        self.invalidate_lookups()
+
+    @property
+    def options(self):
+        """
+        Return the configuration options.
+
+        Changes made directly to the returned options rather than through
+        the Configuration methods will not be seen by cached lookups until
+        :func:`Configuration.invalidate_lookups` is called.
+
+        Returns
+        -------
+        ConfigObj
+        """
+        return self._options
+
+    @options.setter
+    def options(self, options):
+        """
+        Set the configuration options.
+
+        Parameters
+        ----------
+        options : ConfigObj
+
+        Returns
+        -------
+        None
+        """
+        self._options = options
+        self.invalidate_lookups()
+
+    def invalidate_lookups(self):
+        """
+        Clear all cached lookups following a change to the options.
+
+        The `options_version` is incremented so that any values derived from
+        the configuration may also be checked for staleness.  A new cache
+        dictionary is created rather than clearing the old one so that a
+        lookup resolved against the old options in another thread cannot be
+        stored in the new cache.
+
+        Returns
+        -------
+        None
+        """
+        self.options_version += 1
+        self.lookup_cache = {}
 
     def __contains__(self, key):
         """
@@ -246,6 +315,27 @@ class Configuration(Options):
         Note that disabled (forgotten, blacklisted) keys will be returned as
         `False`.
 
+        Parameters
+        ----------
+        key : str
+            The key to check.
+
+        Returns
+        -------
+        bool
+        """
+        if not self.cache_lookups:
+            return self.resolve_contains(key)
+        cache = self.lookup_cache
+        lookup = ('contains', key)
+        if lookup not in cache:
+            cache[lookup] = self.resolve_contains(key)
+        return cache[lookup]
+
+    def resolve_contains(self, key):
+        """
+        Check if a key is available in the configuration without caching.
+
         Parameters
         ----------
         key : str
@@ -335,12 +425,66 @@ class Configuration(Options):
             The returned string value if found in the configuration, or
             `default` if not found.
         """
-        level = self.get_branch(*args, default=default, unalias=unalias)
-        if isinstance(level, dict):
-            result = level.get('value', default)
+        if not self.cache_lookups:
+            status, value = self.resolve_value(*args, unalias=unalias)
         else:
-            result = level  # is a final value
-        return result
+            cache = self.lookup_cache
+            lookup = ('get', args, unalias)
+            resolved = cache.get(lookup)
+            if resolved is None:
+                resolved = self.resolve_value(*args, unalias=unalias)
+                cache[lookup] = resolved
+            status, value = resolved
+            if unalias and isinstance(value, (list, dict)):
+                value = deepcopy(value)
+
+        if status == self.VALUE_FOUND:
+            return value
+        elif (status == self.BRANCH_MISSING and unalias
+              and default is not None):
+            return self.aliases.unalias_branch_values(self, default)
+        else:
+            return default
+
+    def resolve_value(self, *args, unalias=True):
+        """
+        Resolve a value from the configuration without caching.
+
+        Parameters
+        ----------
+        args : tuple (str)
+            The configuration key levels such as
+            ['correlated', 'sky', 'biasgains'].
+        unalias : bool, optional
+            If `True`, unalias all keys provided in `args` and the retrieved
+            value.
+
+        Returns
+        -------
+        status, value : int, str or object
+            The status is `VALUE_FOUND` if a value was found, `BRANCH_MISSING`
+            if the key was not found, and `VALUE_MISSING` if the key is
+            disabled or refers to a branch without a value.  The value is
+            `None` unless found.
+        """
+        key = self.aliases('.'.join(args))
+        if self.is_disabled(key):
+            return self.VALUE_MISSING, None
+
+        level = self.options
+        for branch in key.split('.'):
+            if branch not in level:
+                return self.BRANCH_MISSING, None
+            level = level[branch]
+
+        if isinstance(level, dict):
+            if 'value' not in level:
+                return self.VALUE_MISSING, None
+            level = level['value']
+
+        if unalias:
+            level = self.aliases.unalias_branch_values(self, level)
+        return self.VALUE_FOUND, level
 
     def get_branch(self, *args, default=None, unalias=True):
         """
@@ -474,6 +618,8 @@ class Configuration(Options):
         if section_handler is None:
             return False
         section_handler.update({key: value})
+        if section_handler is self.aliases:
+            self.invalidate_lookups()
         return True
 
     def set_instrument(self, instrument):
@@ -1031,6 +1177,8 @@ class Configuration(Options):
         for section in [
                 'aliases', 'date', 'iteration', 'object', 'conditionals']:
             self.get_section_handler(section).update(options)
+        if 'aliases' in options:
+            self.invalidate_lookups()
         if validate:
             self.validate()
 
@@ -1156,6 +1304,7 @@ class Configuration(Options):
         if set_key is None:
             return
         self.disabled.remove(set_key)
+        self.invalidate_lookups()
 
     def read_fits(self, header_or_file, extension=0, validate=True):
         """
@@ -1445,6 +1594,7 @@ class Configuration(Options):
                 in_handler = False
 
         barred_branches = self.locked | self.blacklisted
+        changed = False
 
         for key, value in merge_options.items():
             new_chain = chain + [key]
@@ -1462,6 +1612,7 @@ class Configuration(Options):
             # Add in the key-value if not already present.
             if key not in options:
                 options.merge({key: value})
+                changed = True
                 continue
 
             # Merge into the existing options.
@@ -1472,14 +1623,39 @@ class Configuration(Options):
                     self.merge_options(value, options=options_value,
                                        chain=new_chain)
                 else:
+                    changed |= not self.same_value(
+                        options_value.get('value'), value)
                     options_value['value'] = value
             else:
                 if isinstance(value, dict):
                     options[key] = {'value': options_value}
                     options[key].merge(value)
+                    changed = True
                 else:
+                    changed |= not self.same_value(options_value, value)
                     options[key] = value
 
+        if changed:
+            self.invalidate_lookups()
+
+    @staticmethod
+    def same_value(value1, value2):
+        """
+        Check if two configuration values are identical strings.
+
+        Parameters
+        ----------
+        value1 : str or object
+        value2 : str or object
+
+        Returns
+        -------
+        bool
+            `True` if both values are equal strings, and `False` otherwise.
+        """
+        return (isinstance(value1, str) and isinstance(value2, str)
+                and value1 == value2)
+
     def dot_key_in_set(self, key, test_set):
         """
         Check if a dot-separated key exists in a given set of strings.
@@ -1640,7 +1816,9 @@ class Configuration(Options):
             else:
                 log.debug(f"Cannot blacklist locked option: {key}")
             return
-        self.disabled.add(uk)
+        if uk not in self.disabled:
+            self.disabled.add(uk)
+            self.invalidate_lookups()
         self.locked.add(uk)
 
     def whitelist(self, key):
@@ -1748,7 +1926,10 @@ class Configuration(Options):
             self.conditions.clear()
             return
 
-        self.disabled.add(self.aliases(key))
+        uk = self.aliases(key)
+        if uk not in self.disabled:
+            self.disabled.add(uk)
+            self.invalidate_lookups()
 
     def recall(self, key):
         """
@@ -1775,7 +1956,8 @@ class Configuration(Options):
             try:
                 self.disabled.remove(self.aliases(key))
             except KeyError:
-                pass
+                return
+            self.invalidate_lookups()
 
     def has_option(self, key):
         """
@@ -1790,7 +1972,13 @@ class Configuration(Options):
         -------
         available : bool
         """
-        return self.aliases(key) in self
+        if not self.cache_lookups:
+            return self.aliases(key) in self
+        cache = self.lookup_cache
+        lookup = ('has_option', key)
+        if lookup not in cache:
+            cache[lookup] = self.aliases(key) in self
+        return cache[lookup]
 
     def is_configured(self, key):
         """
@@ -2050,6 +2238,7 @@ class Configuration(Options):
                 del options[branch]
                 break
             options = options[branch]
+        self.invalidate_lookups()
 
     def get_flat_alphabetical(self, options=None, unalias=True,
                               keep_value=False):
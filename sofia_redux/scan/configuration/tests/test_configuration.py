@@ -117,6 +117,132 @@ def test_get_branch(initialized_configuration):
     assert c.get_branch('options1.new_value', unalias=False) == default
 
 
+def test_options():
+    c = Configuration()
+    version = c.options_version
+    c.lookup_cache['a'] = 1
+    options = c.options
+    c.options = options.__class__()
+    assert c.options is not options
+    assert c.options_version == version + 1
+    assert len(c.lookup_cache) == 0
+
+
+def test_invalidate_lookups():
+    c = Configuration()
+    cache = c.lookup_cache
+    cache['a'] = 1
+    version = c.options_version
+    c.invalidate_lookups()
+    assert c.options_version == version + 1
+    assert c.lookup_cache is not cache and len(c.lookup_cache) == 0
+    assert cache == {'a': 1}
+
+
+def test_resolve_value(initialized_configuration):
+    c = initialized_configuration
+    assert c.resolve_value('testvalue1') == (c.VALUE_FOUND, 'foo')
+    assert c.resolve_value('options1') == (c.VALUE_FOUND, 'True')
+    assert c.resolve_value('nonexistent') == (c.BRANCH_MISSING, None)
+    c.put('options1.new_value', '{?testvalue1}')
+    assert c.resolve_value('options1', 'new_value') == (c.VALUE_FOUND, 'foo')
+    assert c.resolve_value('options1.new_value', unalias=False) == (
+        c.VALUE_FOUND, '{?testvalue1}')
+    c.forget('options1')
+    assert c.resolve_value('options1') == (c.VALUE_MISSING, None)
+    c.recall('options1')
+    del c.options['options1']['value']
+    assert c.resolve_value('options1') == (c.VALUE_MISSING, None)
+
+
+def test_resolve_contains(initialized_configuration):
+    c = initialized_configuration
+    assert c.resolve_contains('testvalue1')
+    assert not c.resolve_contains('nonexistent')
+
+
+@pytest.mark.parametrize('cache_lookups', [True, False])
+def test_lookup_cache(initialized_configuration, cache_lookups):
+    c = initialized_configuration
+    c.cache_lookups = cache_lookups
+    c.lookup_cache = {}
+    assert c.get('testvalue1') == 'foo'
+    assert c.get('nonexistent', default='default') == 'default'
+    assert c.get('nonexistent', default='{?testvalue1}') == 'foo'
+    assert c.get('nonexistent', default='{?testvalue1}',
+                 unalias=False) == '{?testvalue1}'
+    assert c.has_option('testvalue1')
+    assert 'testvalue1' in c
+    assert c.is_configured('testvalue1')
+    assert (len(c.lookup_cache) > 0) is cache_lookups
+
+    # Branches without values return the unaliased default
+    c.put('branch.sub', 'a')
+    assert c.get('branch', default='{?testvalue1}') == '{?testvalue1}'
+
+    # All changes are seen by subsequent lookups
+    c.put('testvalue1', 'bar')
+    assert c.get('testvalue1') == 'bar'
+    c.forget('testvalue1')
+    assert c.get('testvalue1') is None
+    assert not c.has_option('testvalue1')
+    c.recall('testvalue1')
+    assert c.get('testvalue1') == 'bar'
+    assert c.has_option('testvalue1')
+    c.blacklist('testvalue1')
+    assert not c.is_configured('testvalue1')
+    c.put('a.b', '1')
+    assert c.get_int('a.b') == 1
+    c.purge('a.b')
+    assert c.get('a.b') is None
+    c.update_sections({'aliases': {'tv2': 'testvalue2'}}, validate=False)
+    assert c.get('tv2') == 'bar'
+    c.options = c.options.copy()
+    assert c.get('tv2') == 'bar'
+    c.clear()
+    assert c.get('tv2') is None
+
+    # Returned lists may be modified without changing the configuration
+    c.put('alist', ['1', '2'])
+    values = c.get('alist')
+    values.append('3')
+    assert c.get('alist') == ['1', '2']
+    assert c.get_list('alist') == ['1', '2']
+
+
+def test_lookup_cache_iteration(initialized_configuration):
+    c = initialized_configuration
+    assert c['testvalue2'] == 'bar'
+    c.parse_key_value('add', 'jul2020')
+    c.validate()
+    version = c.options_version
+    assert c.get('testvalue2') == 'bar'
+    c.set_iteration(c.max_iteration, validate=True)
+    assert c.options_version > version
+    assert c.get('testvalue2') is None
+
+    # No changes do not invalidate the cache
+    c.get('testvalue1')
+    version = c.options_version
+    c.set_iteration(c.max_iteration, validate=True)
+    assert c.options_version == version
+    assert ('get', ('testvalue1',), True) in c.lookup_cache
+
+
+def test_lookup_cache_consistency():
+    c = Configuration()
+    c.read_configuration('default.cfg')
+    c.set_iteration(1)
+    keys = list(c.flatten(c.options).keys())
+    keys += [k.rsplit('.', 1)[0] for k in keys] + ['nonexistent.key']
+    for key in keys:
+        c.cache_lookups = False
+        expected = c.get(key), c.has_option(key)
+        c.cache_lookups = True
+        assert (c.get(key), c.has_option(key)) == expected
+        assert (c.get(key), c.has_option(key)) == expected
+
+
 def test_set_error_handling():
     c = Configuration()
     c.set_error_handling(False)
@@ -337,6 +463,7 @@ def test_priority_file():
     assert f is None
 
     configuration.options['foo'] = 'default.cfg'
+    configuration.invalidate_lookups()
     f = configuration.priority_file('foo')
     assert f.endswith('hawc_plus' + os.sep
                       + 'default.cfg') and os.path.isfile(f)
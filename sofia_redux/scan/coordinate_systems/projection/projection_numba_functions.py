@@ -3,13 +3,20 @@
 import numba as nb
 import numpy as np
 
+from sofia_redux.scan.utilities.numba_functions import round_value
+
 nb.config.THREADING_LAYER = 'threadsafe'
 two_pi = 2 * np.pi
 
+# Spherical projections supported by projected_offset, keyed by FITS ID.
+PROJECTION_IDS = {'SFL': 1, 'CAR': 2, 'TAN': 3, 'SIN': 4, 'ARC': 5,
+                  'ZEA': 6, 'STG': 7}
+
 __all__ = ['spherical_project_array', 'spherical_project',
            'spherical_deproject_array', 'spherical_deproject',
            'calculate_celestial_pole_array', 'calculate_celestial_pole',
-           'equal_angles', 'asin', 'asin_array', 'acos', 'acos_array']
+           'equal_angles', 'asin', 'asin_array', 'acos', 'acos_array',
+           'PROJECTION_IDS', 'projected_offset', 'project_frame_indices']
 
 
 @nb.njit(cache=True, nogil=False, parallel=False, fastmath=False)
@@ -701,3 +708,191 @@ def calculate_celestial_pole_array(native_reference_x,
             native_pole_y=flat_native_pole_y[pole_i],
             select_solution=select_solution)
     return x, y
+
+
+@nb.njit(cache=True, nogil=False, parallel=False, fastmath=False)
+def projected_offset(theta, phi, projection_id):  # pragma: no cover
+    """
+    Return the projection offsets for a single coordinate.
+
+    The offsets are calculated from the coordinates (theta, phi) about the
+    native pole as in the `get_offsets` method of the equivalent spherical
+    projection class.  The supported projections, identified by the values
+    in `PROJECTION_IDS`, are:
+
+        1 (SFL): x = phi cos(theta), y = theta
+        2 (CAR): x = phi, y = theta
+
+    and the zenithal projections, for which x = r sin(phi) and
+    y = -r cos(phi) with:
+
+        3 (TAN): r = 1 / tan(theta)
+        4 (SIN): r = cos(theta)
+        5 (ARC): r = pi/2 - theta
+        6 (ZEA): r = sqrt(2(1 - sin(theta)))
+        7 (STG): r = 2 tan((pi/2 - theta) / 2)
+
+    Parameters
+    ----------
+    theta : float
+        The native latitude in radians.
+    phi : float
+        The native longitude in radians.
+    projection_id : int
+        The projection identifier.
+
+    Returns
+    -------
+    x, y : float, float
+        The projection offsets in radians.  NaN values are returned for an
+        unknown projection.
+    """
+    right_angle = np.pi / 2
+    if projection_id == 1:
+        return phi * np.cos(theta), theta
+    elif projection_id == 2:
+        return phi, theta
+    elif projection_id == 3:
+        if equal_angles(theta, right_angle):
+            r = 0.0
+        else:
+            r = 1.0 / np.tan(theta)
+    elif projection_id == 4:
+        r = np.cos(theta)
+    elif projection_id == 5:
+        r = right_angle - theta
+    elif projection_id == 6:
+        r = np.sqrt(2 * (1 - np.sin(theta)))
+    elif projection_id == 7:
+        r = 2 * np.tan(0.5 * (right_angle - theta))
+    else:
+        return np.nan, np.nan
+    return r * np.sin(phi), -r * np.cos(phi)
+
+
+@nb.njit(cache=True, nogil=True, parallel=False, fastmath=False)
+def project_frame_indices(longitude, latitude, cos_a, sin_a, rotation,
+                          position_x, position_y, offset_scale, angle_scale,
+                          half_circle, celestial_pole_x, celestial_pole_y,
+                          celestial_cos_lat, celestial_sin_lat,
+                          native_pole_x, full_circle, projection_id,
+                          transform, reference_x, reference_y
+                          ):  # pragma: no cover
+    """
+    Project focal plane positions onto grid indices for all frames.
+
+    For each frame (i) and position (j), the position is rotated onto the
+    frame native offsets (dx, dy) and added to the frame coordinates such
+    that::
+
+        dx = cos_a_i * px_j - sin_a_i * py_j
+        dy = sin_a_i * px_j + cos_a_i * py_j
+        x = lon_i + s * (r00_i * dx + r01_i * dy)
+        y = fmod(lat_i + s * (r10_i * dx + r11_i * dy), half_circle)
+
+    where `s` is the `offset_scale` and r is the frame `rotation`.  The
+    resulting (x, y) coordinates are converted to radians, projected about
+    the celestial pole using :func:`spherical_project` and
+    :func:`projected_offset`, and converted to rounded grid indices (ix, iy)
+    by::
+
+        ix = round(t00 * x_off + t01 * y_off + reference_x)
+        iy = round(t10 * x_off + t11 * y_off + reference_y)
+
+    where t is the inverse grid `transform`.  This is equivalent to
+    projecting the coordinates using the spherical projection classes and
+    converting the offsets with the grid, but without creating any
+    intermediate arrays.
+
+    Parameters
+    ----------
+    longitude : numpy.ndarray (float)
+        The frame native longitudes of shape (n_frames,).
+    latitude : numpy.ndarray (float)
+        The frame native latitudes of shape (n_frames,) in the same units as
+        `longitude`.
+    cos_a : numpy.ndarray (float)
+        The cosine of the frame rotation angles of shape (n_frames,).
+    sin_a : numpy.ndarray (float)
+        The sine of the frame rotation angles of shape (n_frames,).
+    rotation : numpy.ndarray (float)
+        The matrices converting frame native offsets to offsets in the
+        longitude and latitude of shape (n_frames, 2, 2).
+    position_x : numpy.ndarray (float)
+        The focal plane x positions of shape (n_positions,).
+    position_y : numpy.ndarray (float)
+        The focal plane y positions of shape (n_positions,).
+    offset_scale : float
+        The factor converting position units to longitude units.
+    angle_scale : float
+        The factor converting longitude units to radians.
+    half_circle : float
+        The value of pi in longitude units.
+    celestial_pole_x : float
+        The celestial pole native longitude in radians.
+    celestial_pole_y : float
+        The celestial pole native latitude in radians.
+    celestial_cos_lat : float
+        The cosine of `celestial_pole_y`.
+    celestial_sin_lat : float
+        The sine of `celestial_pole_y`.
+    native_pole_x : float
+        The native pole longitude in radians.
+    full_circle : float
+        The value of 2 pi in radians.
+    projection_id : int
+        The projection identifier (see :func:`projected_offset`).
+    transform : numpy.ndarray (float)
+        The inverse grid transform of shape (2, 2) converting projection
+        offsets in radians to grid indices.
+    reference_x : float
+        The grid x reference index.
+    reference_y : float
+        The grid y reference index.
+
+    Returns
+    -------
+    indices : numpy.ndarray (int)
+        The (x, y) grid indices of shape (2, n_frames, n_positions).  NaN
+        coordinates result in the minimum integer value.
+    """
+    n_frames = longitude.size
+    n_positions = position_x.size
+    indices = np.empty((2, n_frames, n_positions), dtype=nb.int64)
+    t00, t01 = transform[0, 0], transform[0, 1]
+    t10, t11 = transform[1, 0], transform[1, 1]
+
+    for i in range(n_frames):
+        lon0 = longitude[i]
+        lat0 = latitude[i]
+        c = cos_a[i]
+        s = sin_a[i]
+        r00, r01 = rotation[i, 0, 0], rotation[i, 0, 1]
+        r10, r11 = rotation[i, 1, 0], rotation[i, 1, 1]
+        for j in range(n_positions):
+            px = position_x[j]
+            py = position_y[j]
+            dx = (c * px) - (s * py)
+            dy = (s * px) + (c * py)
+            x = lon0 + offset_scale * ((r00 * dx) + (r01 * dy))
+            y = lat0 + offset_scale * ((r10 * dx) + (r11 * dy))
+            y = np.fmod(y, half_circle)
+
+            x *= angle_scale
+            y *= angle_scale
+            theta, phi = spherical_project(
+                x=x, y=y, cos_lat=np.cos(y), sin_lat=np.sin(y),
+                celestial_pole_x=celestial_pole_x,
+                celestial_pole_y=celestial_pole_y,
+                celestial_cos_lat=celestial_cos_lat,
+                celestial_sin_lat=celestial_sin_lat,
+                native_pole_x=native_pole_x)
+            phi = np.fmod(phi, full_circle)
+
+            dx, dy = projected_offset(theta, phi, projection_id)
+            indices[0, i, j] = round_value(
+                (t00 * dx) + (t01 * dy) + reference_x)
+            indices[1, i, j] = round_value(
+                (t10 * dx) + (t11 * dy) + reference_y)
+
+    return indices
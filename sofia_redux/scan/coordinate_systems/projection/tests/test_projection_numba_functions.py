@@ -1,13 +1,18 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 
+from astropy import units
 import numpy as np
+import pytest
 
 from sofia_redux.scan.coordinate_systems.projection.\
     projection_numba_functions import (
         equal_angles, asin, acos, asin_array, acos_array, spherical_project,
         spherical_deproject, spherical_project_array,
         spherical_deproject_array, calculate_celestial_pole,
-        calculate_celestial_pole_array)
+        calculate_celestial_pole_array, PROJECTION_IDS, projected_offset,
+        project_frame_indices)
+from sofia_redux.scan.coordinate_systems.projection.spherical_projection \
+    import SphericalProjection
 
 
 def test_equal_angles():
@@ -407,3 +412,51 @@ def test_calculate_celestial_pole_array():
     assert cx.size == 3 and cy.size == 3
     assert np.allclose(np.rad2deg(cx), 30)
     assert np.allclose(np.rad2deg(cy), -30)
+
+
+@pytest.mark.parametrize('name', list(PROJECTION_IDS.keys()))
+def test_projected_offset(name):
+    projection = SphericalProjection.for_name(name)
+    radian = units.Unit('radian')
+    theta, phi = np.meshgrid(np.deg2rad([10.0, 45.0, 89.0, 90.0]),
+                             np.deg2rad([-170.0, -30.0, 0.0, 60.0]))
+    theta, phi = theta.ravel(), phi.ravel()
+    for t, p in zip(theta, phi):
+        expected = projection.get_offsets(t * radian, p * radian)
+        x, y = projected_offset(t, p, PROJECTION_IDS[name])
+        assert np.isclose(x, expected.x.to(radian).value, atol=1e-15)
+        assert np.isclose(y, expected.y.to(radian).value, atol=1e-15)
+
+    assert np.isnan(projected_offset(0.5, 0.5, 0)).all()
+
+
+def test_project_frame_indices():
+    rad = np.deg2rad(1.0)
+    resolution = rad / 3600  # 1 arcsecond pixels in radians
+    transform = np.eye(2) / resolution
+    rotation = np.zeros((2, 2, 2))
+    rotation[:, 0, 0] = rotation[:, 1, 1] = 1.0
+
+    # frames at the reference position, rotated by 0 and 90 degrees
+    longitude = np.full(2, 30.0)
+    latitude = np.zeros(2)
+    cos_a = np.array([1.0, 0.0])
+    sin_a = np.array([0.0, 1.0])
+    position_x = np.array([0.0, 10.0, np.nan])
+    position_y = np.array([0.0, 0.0, 0.0])
+
+    indices = project_frame_indices(
+        longitude=longitude, latitude=latitude, cos_a=cos_a, sin_a=sin_a,
+        rotation=rotation, position_x=position_x, position_y=position_y,
+        offset_scale=1 / 3600, angle_scale=rad, half_circle=180.0,
+        celestial_pole_x=30 * rad, celestial_pole_y=0.0,
+        celestial_cos_lat=1.0, celestial_sin_lat=0.0,
+        native_pole_x=np.pi, full_circle=2 * np.pi,
+        projection_id=PROJECTION_IDS['TAN'], transform=transform,
+        reference_x=5.0, reference_y=7.0)
+
+    assert indices.shape == (2, 2, 3)
+    assert np.allclose(indices[:, :, 0], [[5, 5], [7, 7]])
+    assert np.allclose(indices[:, 0, 1], [15, 7])
+    assert np.allclose(indices[:, 1, 1], [5, 17])
+    assert np.all(indices[:, :, 2] == np.iinfo(np.int64).min)
@@ -67,7 +67,7 @@ class ExampleFrames(HorizontalFrames):
         -------
         None
         """
-        table = hdu.data
+        table = self.get_hdu_table(hdu)
 
         if 'DAC' in table.columns.names:
             log.debug("Reading data from HDU")
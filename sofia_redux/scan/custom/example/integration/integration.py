@@ -44,7 +44,7 @@ class ExampleIntegration(Integration):
         """
         log.info("Processing scan data:")
         try:
-            n_records = hdul[1].data.size
+            n_records = int(hdul[1].header.get('NAXIS2', 0))
         except IndexError:
             log.warning('No data present.')
             return
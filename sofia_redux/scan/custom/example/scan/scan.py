@@ -58,12 +58,15 @@ class ExampleScan(Scan):
         filename : str
             The name of the file to read.
         read_fully : bool, optional
-            If `True`, perform a full read (default)
+            If `True`, perform a full read (default).  Otherwise, time-stream
+            tables are memory-mapped, and only the columns and frames used
+            are read from disk.
 
         Returns
         -------
         None
         """
+        self.lazy_read = not read_fully
         if isinstance(filename, fits.HDUList):
             self.hdul = filename
         else:
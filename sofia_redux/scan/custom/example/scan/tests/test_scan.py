@@ -1,6 +1,7 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 
 from astropy.io import fits
+import numpy as np
 import pytest
 
 from sofia_redux.scan.custom.example.integration.integration import \
@@ -40,6 +41,13 @@ def test_read(initialized_scan, scan_file):
     scan.read(hdul)
     assert isinstance(scan.integrations[0], ExampleIntegration)
     assert scan.hdul is None
+    assert not scan.lazy_read
+    data = scan.integrations[0].frames.data.copy()
+
+    scan.integrations = None
+    scan.read(scan_file, read_fully=False)
+    assert scan.lazy_read
+    assert np.allclose(scan.integrations[0].frames.data, data)
 
 
 def test_close_fits(initialized_scan, scan_file):
@@ -134,7 +134,7 @@ class FifiLsFrames(SofiaFrames):
         spexels = self.channels.data.spexel
         spaxels = self.channels.data.spaxel
         self.data = np.asarray(flux_hdu.data[:, spexels, spaxels],
-                               dtype=float)
+                               dtype=self.float_type)
 
         if do_uncorrected:
             variance = np.asarray(
@@ -142,7 +142,8 @@ class FifiLsFrames(SofiaFrames):
         else:
             variance = np.asarray(hdul['STDDEV'].data, dtype=float) ** 2
         variance = variance[:, spexels, spaxels]
-        self.relative_weight = fnf.get_relative_frame_weights(variance)
+        self.relative_weight = fnf.get_relative_frame_weights(
+            variance).astype(self.float_type)
 
         is_lab = self.configuration.get_bool('lab')
         self.has_telescope_info[...] = not is_lab
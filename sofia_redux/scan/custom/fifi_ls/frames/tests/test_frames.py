@@ -102,6 +102,21 @@ def test_read_hdul(fifi_simulated_frames, fifi_simulated_hdul):
     assert not np.isnan(frames.data).all()
 
 
+def test_read_hdul_precision(fifi_simulated_frames, fifi_simulated_hdul):
+    frames = fifi_simulated_frames.copy()
+    frames.configuration.parse_key_value('lab', 'True')
+    frames.configuration.parse_key_value('precision', 'float32')
+    frames.read_hdul(fifi_simulated_hdul)
+    assert frames.data.dtype == np.float32
+    assert frames.relative_weight.dtype == np.float32
+    assert not np.isnan(frames.data).all()
+
+    frames.configuration.parse_key_value('precision', 'float64')
+    frames.read_hdul(fifi_simulated_hdul)
+    assert frames.data.dtype == np.float64
+    assert frames.relative_weight.dtype == np.float64
+
+
 def test_validate(fifi_simulated_frames):
     frames = fifi_simulated_frames.copy()
     assert not frames.sample_flag.any()
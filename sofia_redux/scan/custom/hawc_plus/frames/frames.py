@@ -146,7 +146,7 @@ class HawcPlusFrames(SofiaFrames):
         """
         return self.sofia_location
 
-    def configure_hdu_columns(self, hdu):
+    def configure_hdu_columns(self, hdu, table=None):
         """
         Given an HDU and a scan, return columns to be read.
 
@@ -156,6 +156,9 @@ class HawcPlusFrames(SofiaFrames):
         ----------
         hdu : astropy.io.fits.hdu.table.BinTableHDU
             A data HDU containing "timestream" data.
+        table : astropy.io.fits.FITS_rec or LazyTable, optional
+            The table data of `hdu`.  If not supplied, it is retrieved using
+            :func:`HawcPlusFrames.get_hdu_table`.
 
         Returns
         -------
@@ -205,13 +208,16 @@ class HawcPlusFrames(SofiaFrames):
                 columns[key] = None
                 log.warning(f"Missing {name} KEY in HDU")
 
+        if table is None:
+            table = self.get_hdu_table(hdu)
+
         # Update astrometry if necessary
         for astrometry in [self.info.astrometry,
                            self.integration.info.astrometry]:
             if astrometry.equatorial is None:
                 try:
-                    ra = hdu.data[columns['ra']][0] * units.Unit('hourangle')
-                    dec = hdu.data[columns['dec']][0] * units.Unit('deg')
+                    ra = table[columns['ra']][0] * units.Unit('hourangle')
+                    dec = table[columns['dec']][0] * units.Unit('deg')
                     astrometry.equatorial = EquatorialCoordinates(
                         np.stack((ra, dec)), epoch=J2000)
                 except (KeyError, IndexError, ValueError):  # pragma: no cover
@@ -219,8 +225,8 @@ class HawcPlusFrames(SofiaFrames):
 
         if columns['ora'] is not None or columns['odec'] is not None:
             try:
-                obsra = hdu.data[columns['ora']][0]
-                obsdec = hdu.data[columns['odec']][0]
+                obsra = table[columns['ora']][0]
+                obsdec = table[columns['odec']][0]
             except (KeyError, IndexError, ValueError):
                 obsra = obsdec = np.nan
 
@@ -273,8 +279,8 @@ class HawcPlusFrames(SofiaFrames):
         deg = units.Unit('deg')
         hourangle = units.Unit('hourangle')
 
-        table = hdu.data
-        columns = self.configure_hdu_columns(hdu)
+        table = self.get_hdu_table(hdu)
+        columns = self.configure_hdu_columns(hdu, table=table)
         dac = table[columns['dac']]
         jump = table[columns['jump']]
         log.debug(f"FITS HDU has {dac.shape[1]} x {dac.shape[2]} arrays.")
@@ -140,6 +140,27 @@ def test_configure_hdu_columns(scan_before_frame_read):
             assert columns[key] is None
 
 
+def test_lazy_apply_hdu(scan_before_frame_read, hawc_scan_file):
+    scan = scan_before_frame_read
+    frames = scan[0].frames
+    scan.close_fits()
+    with fits.open(hawc_scan_file) as hdul:
+        hdu = hdul[2]
+        expected = frames.copy()
+        expected.apply_hdu(hdu)
+        assert 'data' in hdu.__dict__
+
+    scan.lazy_read = True
+    with fits.open(hawc_scan_file) as hdul:
+        hdu = hdul[2]
+        frames.info.astrometry.equatorial = None
+        frames.apply_hdu(hdu)
+        assert 'data' not in hdu.__dict__
+    assert frames.info.astrometry.equatorial is not None
+    assert np.allclose(frames.data, expected.data, equal_nan=True)
+    assert np.allclose(frames.utc, expected.utc)
+
+
 def test_read_hdus(no_data_frames, full_hdu):
     hdus = [full_hdu]
     frames = no_data_frames.copy()
@@ -18,6 +18,7 @@ from sofia_redux.scan.custom.hawc_plus.info.telescope import (
 from sofia_redux.scan.custom.hawc_plus.info.observation import (
     HawcPlusObservationInfo)
 from sofia_redux.scan.custom.sofia.info.info import SofiaInfo
+from sofia_redux.scan.utilities.lazy_table import LazyTable
 from sofia_redux.scan.custom.sofia.info.gyro_drifts import SofiaGyroDriftsInfo
 from sofia_redux.scan.custom.sofia.info.extended_scanning import (
     SofiaExtendedScanningInfo)
@@ -345,8 +346,9 @@ class HawcPlusInfo(SofiaInfo):
                     continue
                 if 'hwpCounts' not in hdu.columns.names:
                     continue
+                # Only read the HWP column rather than the entire table
                 hwp_counts = np.concatenate(
-                    (hwp_counts, hdu.data['hwpCounts'].ravel()))
+                    (hwp_counts, LazyTable(hdu)['hwpCounts'].ravel()))
 
         hdul.close()
 
@@ -266,7 +266,8 @@ class HawcPlusIntegration(SofiaIntegration):
             channel_jumps=self.channels.data.jump,
             jump_range=self.info.detector_array.JUMP_RANGE)
 
-    def remove_drifts(self, target_frame_resolution=None, robust=False):
+    def remove_drifts(self, target_frame_resolution=None, robust=False,
+                      weighting=False):
         """
         Remove drifts in frame data given a target frame resolution.
 
@@ -281,6 +282,9 @@ class HawcPlusIntegration(SofiaIntegration):
             The number of frames for the target resolution.
         robust : bool, optional
             If `True` use the robust (median) method to determine means.
+        weighting : bool, optional
+            If `True`, also derive RMS channel weights from the levelled data
+            in the same pass.
 
         Returns
         -------
@@ -301,7 +305,7 @@ class HawcPlusIntegration(SofiaIntegration):
         self.drift_dependents = self.get_dependents('drifts')
 
         super().remove_drifts(target_frame_resolution=target_frame_resolution,
-                              robust=robust)
+                              robust=robust, weighting=weighting)
 
     def get_mean_hwp_angle(self):
         """
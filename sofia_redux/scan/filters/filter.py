@@ -40,6 +40,7 @@ class Filter(ABC):
         self.frame_parms = None  # Frame dependents
         self.data = None  # Temporary or real filter data workspace
         self.points = None  # frame relative weight sums for each channel
+        self.fft_buffer = None  # Reusable complex spectrum workspace
         self.is_sub_filter = False  # Whether this is a sub-filter of main
 
         self.nt = 0   # pow2ceil of integration.size
@@ -75,6 +76,7 @@ class Filter(ABC):
                 setattr(new, attribute, value.copy())
             else:
                 setattr(new, attribute, deepcopy(value))
+        new.fft_buffer = None
         return new
 
     @property
@@ -227,6 +229,7 @@ class Filter(ABC):
             return
 
         self.data = None
+        self.fft_buffer = None
 
         keep_indices = self.channels.new_indices_in_old()
         self.channels.reindex()
@@ -327,6 +330,7 @@ class Filter(ABC):
         """
         self.data = None
         self.points = None
+        self.fft_buffer = None
 
     def is_enabled(self):
         """
@@ -362,6 +366,47 @@ class Filter(ABC):
         """
         self.data = data
 
+    def get_fft_workers(self):
+        """
+        Return the number of threads to use for Fourier transforms.
+
+        The number of threads is taken from the thread count of the filter
+        integration, which may be updated between pipeline tasks.
+
+        Returns
+        -------
+        workers : int
+        """
+        if self.integration is None:
+            return 1
+        threads = self.integration.get_thread_count()
+        if threads is None:
+            return 1
+        return max(1, int(threads))
+
+    def get_fft_buffer(self, shape):
+        """
+        Return a complex workspace array for filtered spectra.
+
+        The workspace is allocated on first use and reused for subsequent
+        filtering operations of the same shape, rather than allocating new
+        complex arrays each time the filter is applied.  The contents of the
+        returned array are undefined.
+
+        Parameters
+        ----------
+        shape : tuple (int)
+            The required shape of the spectrum (n_channels, nf + 1).
+
+        Returns
+        -------
+        buffer : numpy.ndarray (complex)
+        """
+        shape = tuple(shape)
+        if self.fft_buffer is None or self.fft_buffer.shape != shape:
+            self.fft_buffer = np.empty(shape, dtype=complex)
+        return self.fft_buffer
+
     def rejection_at(self, fch):
         """
         Return the filter rejection at given frequency channel(s).
@@ -788,7 +833,9 @@ class Filter(ABC):
             zero_fill = True
             self.data[:, self.integration.size:] = 0.0
 
-        self.data = scipy.fft.rfft(self.data, axis=1)
+        workers = self.get_fft_workers()
+        self.data = scipy.fft.rfft(self.data, axis=1, overwrite_x=True,
+                                   workers=workers)
         self.update_profile(channels=channels)
 
         self.data[:, 0].real = 0.0
@@ -799,7 +846,8 @@ class Filter(ABC):
             self.data[:, 0].imag *= rejection[:, self.nf]
             self.data[:, 1:] *= rejection[:, 1:]
 
-        self.data = scipy.fft.irfft(self.data, axis=1)
+        self.data = scipy.fft.irfft(self.data, axis=1, overwrite_x=True,
+                                    workers=workers)
         if zero_fill:
             self.data[:, self.integration.size:] = 0.0
 
@@ -344,7 +344,12 @@ class MultiFilter(VariedFilter):
         """
         Apply the FFT filter to the temporary data.
 
-        Converts data into a rejected (un-levelled) signal
+        Converts data into a rejected (un-levelled) signal.  All enabled
+        sub-filters are applied to the spectrum of a single forward
+        transform, followed by a single inverse transform of the rejected
+        spectrum.  The rejected spectrum is written to a complex workspace
+        that is reused between calls, and transforms are performed in
+        parallel using the integration thread count.
 
         Parameters
         ----------
@@ -359,21 +364,26 @@ class MultiFilter(VariedFilter):
         if channels is None:
             channels = self.get_channels()
 
-        data = self.get_temp_data().copy()
+        workers = self.get_fft_workers()
 
-        data = scipy.fft.rfft(data, axis=1)
+        # The temporary data is replaced by the rejected signal, so may be
+        # overwritten during the transform.
+        data = scipy.fft.rfft(self.get_temp_data(), axis=1,
+                              overwrite_x=True, workers=workers)
 
         # Remove the mean
         data[:, 0].real = 0.0
         n_freq = data.shape[1]
         f_channels = np.arange(n_freq)
 
-        filtered = np.zeros_like(data)
+        filtered = self.get_fft_buffer(data.shape)
+        enabled = [sub_filter for sub_filter in self.filters
+                   if sub_filter.is_enabled()]
+        if len(enabled) == 0:
+            filtered.fill(0.0)
 
         # Apply the filters sequentially
-        for sub_filter in self.filters:
-            if not sub_filter.is_enabled():
-                continue
+        for i, sub_filter in enumerate(enabled):
             log.debug(f"FFT filtering {sub_filter.get_config_name()}.")
 
             # Make sure that the filter uses the spectrum from the master array
@@ -385,14 +395,16 @@ class MultiFilter(VariedFilter):
             sub_filter.update_profile(channels=channels)
 
             response = sub_filter.response_at(f_channels)
-            rejection = 1.0 - response
-            filtered = data * rejection
+
+            # Only the signal rejected by the final filter is retained
+            if i == len(enabled) - 1:
+                np.multiply(data, 1.0 - response, out=filtered)
             data *= response
 
             sub_filter.post_filter_channels(channels=channels)
 
         # Convert to rejected signal
-        filtered = scipy.fft.irfft(filtered, axis=1)
+        filtered = scipy.fft.irfft(filtered, axis=1, workers=workers)
         self.set_temp_data(filtered)
 
     def response_at(self, fch):
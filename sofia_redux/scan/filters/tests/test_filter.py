@@ -243,6 +243,29 @@ def test_set_temp_data(initialized_filter):
     assert f.data is x
 
 
+def test_get_fft_workers(initialized_filter):
+    f = initialized_filter
+    assert NoFilter().get_fft_workers() == 1
+    f.integration.set_thread_count(None)
+    assert f.get_fft_workers() == 1
+    f.integration.set_thread_count(4)
+    assert f.get_fft_workers() == 4
+    f.integration.set_thread_count(0)
+    assert f.get_fft_workers() == 1
+
+
+def test_get_fft_buffer(initialized_filter):
+    f = initialized_filter
+    buffer = f.get_fft_buffer((3, 5))
+    assert buffer.shape == (3, 5) and buffer.dtype == complex
+    assert f.get_fft_buffer((3, 5)) is buffer
+    new = f.get_fft_buffer((2, 5))
+    assert new is not buffer and new.shape == (2, 5)
+    assert f.copy().fft_buffer is None
+    f.discard_temp_data()
+    assert f.fft_buffer is None
+
+
 def test_rejection_at():
     f = NoFilter()
     assert np.allclose(f.rejection_at(np.arange(10)), 0)
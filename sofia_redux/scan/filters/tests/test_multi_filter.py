@@ -302,6 +302,22 @@ def test_fft_filter(prepared_filter):
     assert np.allclose(f.integration.frames.data, f0)
 
 
+def test_fft_filter_buffer(prepared_filter):
+    f = prepared_filter
+    d0 = f.data.copy()
+    f.fft_filter()
+    buffer = f.fft_buffer
+    assert buffer.shape == (f.channels.size, f.nf + 1)
+    result = f.data.copy()
+
+    # The workspace is reused and the result is independent of threading
+    f.integration.set_thread_count(2)
+    f.data = d0.copy()
+    f.fft_filter()
+    assert f.fft_buffer is buffer
+    assert np.allclose(f.data, result)
+
+
 def test_response_at(prepared_filter):
     f = prepared_filter
     response = f.response_at(np.arange(f.nf))
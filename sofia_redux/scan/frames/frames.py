@@ -14,9 +14,14 @@ from sofia_redux.scan.coordinate_systems.coordinate import Coordinate
 from sofia_redux.scan.coordinate_systems.coordinate_2d import Coordinate2D
 from sofia_redux.scan.coordinate_systems.equatorial_coordinates import \
     EquatorialCoordinates
+from sofia_redux.scan.coordinate_systems.projection.spherical_projection \
+    import SphericalProjection
+from sofia_redux.scan.coordinate_systems.projection import \
+    projection_numba_functions as pnf
 from sofia_redux.scan.coordinate_systems.epoch.epoch import J2000
 from sofia_redux.scan.flags.mounts import Mount
 from sofia_redux.scan.coordinate_systems.index_2d import Index2D
+from sofia_redux.scan.utilities.lazy_table import LazyTable
 
 __all__ = ['Frames']
 
@@ -51,6 +56,7 @@ class Frames(FlaggedData):
         self.sample_flag = None
         self.source_index = None
         self.map_index = None
+        self.source_projection = None  # Cached map projection of samples
         self.sample_equatorial = None
 
         # Vectors
@@ -117,13 +123,13 @@ class Frames(FlaggedData):
             'sin_a': np.nan,
             'cos_a': np.nan,
             'dof': 1.0,
-            'dependents': 0.0,
-            'relative_weight': 1.0,
+            'dependents': self.float_type(0.0),
+            'relative_weight': self.float_type(1.0),
             'sign': 1,
             'transmission': 1.0,
-            'temp_c': float,
-            'temp_wc': float,
-            'temp_wc2': float,
+            'temp_c': self.float_type,
+            'temp_wc': self.float_type,
+            'temp_wc2': self.float_type,
             'has_telescope_info': True,
             'valid': True,
             'validated': False,
@@ -145,12 +151,35 @@ class Frames(FlaggedData):
         -------
         fields : dict
         """
-        return {'data': float,
+        return {'data': self.float_type,
                 'sample_flag': 0,
                 'source_index': -1,
                 'map_index': (Index2D, -1),
                 'sample_equatorial': units.Unit('deg')}
 
+    @property
+    def float_type(self):
+        """
+        Return the floating point type used to store time-stream data.
+
+        Time-stream data, relative weights, dependents and temporary frame
+        fields are stored in single precision if the 'precision'
+        configuration option is set to 'float32' (or 'single'), halving the
+        memory required.  Otherwise, double precision is used.  Sums over
+        frames or channels are always accumulated in double precision.
+
+        Returns
+        -------
+        type
+        """
+        configuration = self.configuration
+        if configuration is None:
+            return np.float64
+        precision = configuration.get_string('precision', default='float64')
+        if precision.strip().lower() in ['float32', 'single', '32']:
+            return np.float32
+        return np.float64
+
     @property
     def internal_attributes(self):
         """
@@ -317,11 +346,31 @@ class Frames(FlaggedData):
         -------
         None
         """
-        self.set_frame_size(size)
         self.integration = integration
+        self.set_frame_size(size)
         self.set_channels(self.channels)  # self.channels are from integration
         self.equatorial.set_epoch(self.integration.info.telescope.epoch)
 
+    def get_hdu_table(self, hdu):
+        """
+        Return the table data from a time-stream HDU.
+
+        If the parent scan is being read lazily (`read_fully=False`), the
+        table is memory-mapped so that only the columns and frames accessed
+        are read from disk.  Otherwise, the HDU data are returned.
+
+        Parameters
+        ----------
+        hdu : astropy.io.fits.BinTableHDU
+
+        Returns
+        -------
+        table : astropy.io.fits.FITS_rec or LazyTable
+        """
+        if self.scan is not None and getattr(self.scan, 'lazy_read', False):
+            return LazyTable(hdu)
+        return hdu.data
+
     def set_default_channel_values(self, channel_size):
         """
         Populate channel data fields with default values.
@@ -521,6 +570,7 @@ class Frames(FlaggedData):
             self.set_channels(channels)
         self.source_index = None
         self.map_index = None
+        self.source_projection = None
 
     def validate_channel_indices(self):
         """
@@ -656,6 +706,39 @@ class Frames(FlaggedData):
 
         return equatorial
 
+    def get_equatorial_rotation(self, indices=None):
+        """
+        Return the terms converting native offsets to equatorial coordinates.
+
+        The equatorial coordinates (lon, lat) of native (x, y) offsets, as
+        calculated by :func:`Frames.get_equatorial`, are given by::
+
+            lon = lon0 + (r00 * x) + (r01 * y)
+            lat = lat0 + (r10 * x) + (r11 * y)
+
+        For the base frames, lon0 = base_lon / cos(scan.lat), lat0 = base_lat,
+        and r is the identity matrix.
+
+        Parameters
+        ----------
+        indices : slice or numpy.ndarray (int or bool), optional
+            The frame indices that apply.  The default is all indices.
+
+        Returns
+        -------
+        longitude, latitude, rotation : Quantity, Quantity, numpy.ndarray
+            The base longitude (lon0) and latitude (lat0) of shape (n,), and
+            the rotation matrices (r) of shape (n, 2, 2).
+        """
+        indices, _ = self.get_index_size(indices)
+        longitude = np.atleast_1d(self.equatorial.x[indices]
+                                  / self.info.astrometry.equatorial.cos_lat)
+        latitude = np.atleast_1d(self.equatorial.y[indices])
+        rotation = np.zeros((longitude.size, 2, 2), dtype=float)
+        rotation[:, 0, 0] = 1.0
+        rotation[:, 1, 1] = 1.0
+        return longitude, latitude, rotation
+
     def get_equatorial_native_offset(self, position, indices=None,
                                      offset=None):
         """
@@ -1218,6 +1301,108 @@ class Frames(FlaggedData):
 
         return projector.offset
 
+    def project_to_indices(self, position, projector, grid, indices=None):
+        """
+        Project focal plane offsets directly onto grid indices.
+
+        This is a fast alternative to :func:`Frames.project` followed by
+        conversion of the projected offsets to rounded grid indices for the
+        common case of a sidereal equatorial projection.  All units are
+        resolved once, after which the rotation, projection, and indexing of
+        every sample is performed in a single compiled loop without creating
+        intermediate coordinate arrays.  The results are equal to those of the
+        standard route to within floating point precision.
+
+        Parameters
+        ----------
+        position : Coordinate2D
+            The (x, y) focal plane positions of shape (n_positions,).
+        projector : AstroProjector
+            The projector defining the projection.  Unlike
+            :func:`Frames.project`, the projector offsets are not updated.
+        grid : Grid2D
+            The grid on which to calculate indices.
+        indices : slice or numpy.ndarray (int or bool), optional
+            The frame indices to project.  The default is all frames.
+
+        Returns
+        -------
+        map_indices : numpy.ndarray (int) or None
+            The (x, y) grid indices of shape (2, n_frames, n_positions).
+            Invalid coordinates are assigned the minimum integer value.  `None`
+            is returned if the fast projection cannot be applied, in which case
+            :func:`Frames.project` should be used instead.
+        """
+        projection = projector.projection
+        if (projector.celestial is not None
+                or not isinstance(projector.coordinates,
+                                  EquatorialCoordinates)
+                or self.info.astrometry.is_nonsidereal
+                or self.is_singular
+                or not isinstance(projection, SphericalProjection)
+                or position.singular
+                or position.unit is None):
+            return None
+
+        projection_id = pnf.PROJECTION_IDS.get(projection.get_fits_id())
+        if projection_id is None:
+            return None
+
+        celestial_pole = projection.celestial_pole
+        if celestial_pole.size > 1 or not projection.native_pole.singular:
+            return None
+
+        inverse = getattr(grid, 'i', None)
+        if inverse is None or np.shape(inverse) != (2, 2):
+            return None
+        elif not grid.reference_index.singular:
+            return None
+
+        indices, _ = self.get_index_size(indices)
+        unit = self.equatorial.unit
+        radian = units.Unit('radian')
+        longitude, latitude, rotation = self.get_equatorial_rotation(
+            indices=indices)
+        longitude = longitude.to(unit)
+        latitude = latitude.to(unit)
+        offset_unit = self.equatorial.offset_unit
+
+        if celestial_pole.size == 0:
+            pole_x = pole_y = 0.0
+            pole_cos_lat, pole_sin_lat = 1.0, 0.0
+        else:
+            pole_x = celestial_pole.x.to(radian).value
+            pole_y = celestial_pole.y.to(radian).value
+            pole_cos_lat = celestial_pole.cos_lat
+            pole_sin_lat = celestial_pole.sin_lat
+
+        if isinstance(inverse, units.Quantity):
+            inverse = inverse.to(1 / radian).value
+
+        return pnf.project_frame_indices(
+            longitude=np.atleast_1d(longitude.value).astype(float),
+            latitude=np.atleast_1d(latitude.value).astype(float),
+            cos_a=np.atleast_1d(self.cos_a[indices]).astype(float),
+            sin_a=np.atleast_1d(self.sin_a[indices]).astype(float),
+            rotation=np.asarray(rotation, dtype=float).reshape(-1, 2, 2),
+            position_x=np.atleast_1d(
+                position.x.to(offset_unit).value).astype(float),
+            position_y=np.atleast_1d(
+                position.y.to(offset_unit).value).astype(float),
+            offset_scale=float(offset_unit.to(unit)),
+            angle_scale=float(unit.to(radian)),
+            half_circle=float(projector.equatorial.pi.to(unit).value),
+            celestial_pole_x=float(np.ravel(pole_x)[0]),
+            celestial_pole_y=float(np.ravel(pole_y)[0]),
+            celestial_cos_lat=float(np.ravel(pole_cos_lat)[0]),
+            celestial_sin_lat=float(np.ravel(pole_sin_lat)[0]),
+            native_pole_x=float(projection.native_pole.x.to(radian).value),
+            full_circle=float(projection.full_circle.to(radian).value),
+            projection_id=projection_id,
+            transform=np.asarray(inverse, dtype=float),
+            reference_x=float(grid.reference_index.x),
+            reference_y=float(grid.reference_index.y))
+
     def native_to_native_equatorial_offset(
             self, offset, indices=None, in_place=True):
         """
@@ -1731,6 +1916,6 @@ class Frames(FlaggedData):
             window=window,
             start_indices=start_indices
         )
-        self.data = data
+        self.data = np.asarray(data, dtype=self.float_type)
         self.sample_flag = sample_flag
         self.valid = valid.copy()
@@ -151,6 +151,53 @@ class HorizontalFrames(Frames):
         equatorial.set_native_latitude(y + ry)
         return equatorial
 
+    def get_equatorial_rotation(self, indices=None):
+        """
+        Return the terms converting native offsets to equatorial coordinates.
+
+        The equatorial coordinates (lon, lat) of native (x, y) offsets, as
+        calculated by :func:`HorizontalFrames.get_equatorial`, are given by::
+
+            lon = lon0 + (r00 * x) + (r01 * y)
+            lat = lat0 + (r10 * x) + (r11 * y)
+
+        where lon0 and lat0 are the base equatorial coordinates and r rotates
+        the offsets by the parallactic angle, with the longitude offsets
+        scaled by 1 / cos(scan.lat).
+
+        Parameters
+        ----------
+        indices : slice or numpy.ndarray (int or bool), optional
+            The frame indices that apply.  The default is all indices.
+
+        Returns
+        -------
+        longitude, latitude, rotation : Quantity, Quantity, numpy.ndarray
+            The base longitude (lon0) and latitude (lat0) of shape (n,), and
+            the rotation matrices (r) of shape (n, 2, 2).
+        """
+        if indices is None:
+            indices = slice(None)
+        if not self.is_singular:
+            cos_pa = self.cos_pa[indices]
+            sin_pa = self.sin_pa[indices]
+            x = self.equatorial.x[indices]
+            y = self.equatorial.y[indices]
+        else:
+            cos_pa = self.cos_pa
+            sin_pa = self.sin_pa
+            x = self.equatorial.x
+            y = self.equatorial.y
+
+        longitude, latitude = np.atleast_1d(x), np.atleast_1d(y)
+        cos_lat = self.astrometry.equatorial.cos_lat
+        rotation = np.empty((longitude.size, 2, 2), dtype=float)
+        rotation[:, 0, 0] = cos_pa / cos_lat
+        rotation[:, 0, 1] = -sin_pa / cos_lat
+        rotation[:, 1, 0] = sin_pa
+        rotation[:, 1, 1] = cos_pa
+        return longitude, latitude, rotation
+
     def get_horizontal(self, offsets, indices=None, horizontal=None):
         """
         Return horizontal coordinates given offsets from the base horizontal.
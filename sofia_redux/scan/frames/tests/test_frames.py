@@ -1,6 +1,7 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 
 from astropy import units
+from astropy.io import fits
 import pytest
 import numpy as np
 
@@ -11,7 +12,12 @@ from sofia_redux.scan.coordinate_systems.projector.astro_projector import \
     AstroProjector
 from sofia_redux.scan.coordinate_systems.projection.default_projection_2d \
     import DefaultProjection2D
+from sofia_redux.scan.coordinate_systems.projection.spherical_projection \
+    import SphericalProjection
+from sofia_redux.scan.coordinate_systems.grid.spherical_grid import \
+    SphericalGrid
 from sofia_redux.scan.frames.frames import Frames
+from sofia_redux.scan.utilities.lazy_table import LazyTable
 
 
 class FramesCheck(Frames):
@@ -138,6 +144,17 @@ class TestFrames(object):
         assert not frames.valid[4 + 1]
         assert not frames.valid[6 + 2]
 
+    def test_get_hdu_table(self, populated_integration, scan_file):
+        frames = FramesCheck()
+        with fits.open(scan_file) as hdul:
+            assert isinstance(frames.get_hdu_table(hdul[1]), fits.FITS_rec)
+            frames.integration = populated_integration
+            assert isinstance(frames.get_hdu_table(hdul[1]), fits.FITS_rec)
+            populated_integration.scan.lazy_read = True
+            table = frames.get_hdu_table(hdul[1])
+            assert isinstance(table, LazyTable)
+            assert table.is_memory_mapped
+
     def test_set_default_channel_values(self):
         frames = DefaultsCheck()
         nframe = 10
@@ -155,6 +172,29 @@ class TestFrames(object):
         assert frames.tuple_coord_unit.shape == (nframe, nchannel)
         assert frames.tuple_coord_str.shape == (nframe, nchannel)
 
+    def test_float_type(self, populated_integration):
+        integ = populated_integration
+        frames = FramesCheck()
+        assert frames.float_type is np.float64
+        frames.integration = integ
+        assert frames.float_type is np.float64
+        for value in ['float32', 'single', ' Float32 ']:
+            frames.configuration.parse_key_value('precision', value)
+            assert frames.float_type is np.float32
+        frames.configuration.parse_key_value('precision', 'float64')
+        assert frames.float_type is np.float64
+
+        frames.configuration.parse_key_value('precision', 'float32')
+        frames.initialize(integ, 10)
+        assert frames.data.dtype == np.float32
+        assert frames.data.shape == (10, integ.channels.size)
+        for field in ['relative_weight', 'dependents', 'temp_c', 'temp_wc',
+                      'temp_wc2']:
+            assert getattr(frames, field).dtype == np.float32
+        assert frames.mjd.dtype == np.float64
+        assert np.allclose(frames.relative_weight, 1)
+        assert np.allclose(frames.dependents, 0)
+
     def test_set_channels(self, populated_integration):
         nframe = 20
         channels = populated_integration.channels
@@ -337,6 +377,19 @@ class TestFrames(object):
         assert eq.x.shape == (nframe, offsets.x.size)
         assert eq.y.shape == (nframe, offsets.y.size)
 
+    def test_get_equatorial_rotation(self, validated_frames):
+        frames = validated_frames
+        positions = Coordinate2D([[-10, 0, 20], [5, 0, -15]], unit='arcsec')
+        expected = frames.get_equatorial(positions)
+        native = frames.get_native_xy(positions)
+        lon, lat, rotation = frames.get_equatorial_rotation()
+        assert rotation.shape == (frames.size, 2, 2)
+        r = rotation[..., None]
+        x = lon[:, None] + (r[:, 0, 0] * native.x) + (r[:, 0, 1] * native.y)
+        y = lat[:, None] + (r[:, 1, 0] * native.x) + (r[:, 1, 1] * native.y)
+        assert np.allclose(x, expected.x)
+        assert np.allclose(y, expected.y)
+
     def test_get_equatorial_native_offset(self, validated_frames, offsets):
         nframe = validated_frames.size
 
@@ -557,6 +610,39 @@ class TestFrames(object):
         assert offset.y == 5
         m1.assert_called_once()
 
+    def test_project_to_indices(self, validated_frames, projector):
+        frames = validated_frames
+        positions = Coordinate2D([[-10, 0, 20], [5, 0, -15]], unit='arcsec')
+        projection = SphericalProjection.for_name('TAN')
+        projection.set_reference(frames.equatorial[0])
+        grid = SphericalGrid()
+        grid.set_resolution(2 * units.Unit('arcsec'))
+        grid.reference_index = Coordinate2D([10, 20])
+
+        offsets = frames.project(positions, AstroProjector(projection))
+        expected = grid.offset_to_index(offsets)
+        indices = frames.project_to_indices(
+            positions, AstroProjector(projection), grid)
+        assert indices.shape == (2, frames.size, 3)
+        assert np.allclose(indices, np.round(expected.coordinates))
+
+        indices = frames.project_to_indices(
+            positions, AstroProjector(projection), grid,
+            indices=np.arange(3))
+        assert indices.shape == (2, 3, 3)
+
+        # unsupported projection
+        assert frames.project_to_indices(positions, projector, grid) is None
+        projection = SphericalProjection.for_name('MER')
+        projection.set_reference(frames.equatorial[0])
+        assert frames.project_to_indices(
+            positions, AstroProjector(projection), grid) is None
+
+        # nonsidereal
+        frames.info.astrometry.is_nonsidereal = True
+        assert frames.project_to_indices(
+            positions, AstroProjector(projection), grid) is None
+
     def test_native_to_native_equatorial_offset(self):
         frames = FramesCheck()
         offset = Coordinate2D([[1, 2, 3], [4, 5, 6]])
@@ -95,6 +95,26 @@ class TestHorizontalFrames(object):
         assert eq.x.shape == (1, offsets.x.size)
         assert eq.y.shape == (1, offsets.y.size)
 
+    def test_get_equatorial_rotation(self, validated_frames):
+        frames = validated_frames
+        positions = Coordinate2D([[-10, 0, 20], [5, 0, -15]], unit='arcsec')
+        expected = frames.get_equatorial(positions)
+        native = frames.get_native_xy(positions)
+        lon, lat, rotation = frames.get_equatorial_rotation()
+        assert rotation.shape == (frames.size, 2, 2)
+        r = rotation[..., None]
+        x = lon[:, None] + (r[:, 0, 0] * native.x) + (r[:, 0, 1] * native.y)
+        y = lat[:, None] + (r[:, 1, 0] * native.x) + (r[:, 1, 1] * native.y)
+        assert np.allclose(x, expected.x)
+        assert np.allclose(y, expected.y)
+
+        # indices and singular
+        lon, lat, rotation = frames.get_equatorial_rotation(
+            indices=np.arange(4))
+        assert lon.shape == (4,) and rotation.shape == (4, 2, 2)
+        lon, lat, rotation = frames[0].get_equatorial_rotation()
+        assert lon.shape == (1,) and rotation.shape == (1, 2, 2)
+
     def test_get_horizontal(self, validated_frames, offsets):
         nframe = validated_frames.size
         hz = validated_frames.get_horizontal(offsets)
@@ -5,6 +5,7 @@ from astropy import log, units
 from astropy.io import fits
 from astropy.table import Column, Table
 from copy import deepcopy
+import numba as nb
 import numpy as np
 import os
 import pandas as pd
@@ -27,6 +28,8 @@ from sofia_redux.scan.filters.whitening_filter import WhiteningFilter
 from sofia_redux.scan.channels.modality.correlated_modality import (
     CorrelatedModality)
 from sofia_redux.scan.integration import integration_numba_functions as int_nf
+from sofia_redux.scan.integration.streaming_statistics import (
+    CovarianceAccumulator, SpectrumAccumulator)
 from sofia_redux.scan.coordinate_systems.coordinate_2d import Coordinate2D
 from sofia_redux.scan.coordinate_systems.spherical_coordinates import \
     SphericalCoordinates
@@ -80,6 +83,7 @@ class Integration(ABC):
         self.is_valid = False
         self.zenith_tau = 0.0
         self.parallelism = None
+        self.despike_buffer = None  # Reusable despiking workspace
         if scan is not None:
             self.set_scan(scan)
 
@@ -265,6 +269,7 @@ class Integration(ABC):
             if hasattr(value, 'integration'):
                 value.integration = new
 
+        new.despike_buffer = None
         return new
 
     def clone(self):
@@ -1822,7 +1827,11 @@ class Integration(ABC):
                 'write.spectrum.size',
                 default=2 * self.frames_for(self.filter_time_scale))
 
-        freq, power = self.get_spectra(
+        if self.configuration.get_bool('write.streaming'):
+            get_spectra = self.get_streaming_spectra
+        else:
+            get_spectra = self.get_spectra
+        freq, power = get_spectra(
             window_function=window_name.lower().strip(),
             window_size=window_size)
 
@@ -1852,7 +1861,6 @@ class Integration(ABC):
         -------
         None
         """
-        covariance = self.get_covariance()
         specs = self.configuration.get_list('write.covar', default=[])
         if len(specs) == 0:
             specs.append('full')
@@ -1860,8 +1868,19 @@ class Integration(ABC):
         prefix = os.path.join(self.configuration.work_path, 'covar')
         prefix += f'-{self.get_file_id()}'
 
+        # With streaming, division covariances are calculated directly,
+        # and the full covariance is only calculated if required.
+        streaming = self.configuration.get_bool('write.streaming')
+        if streaming:
+            covariance = None
+        else:
+            covariance = self.get_covariance()
+
         for name in specs:
             name = name.lower().strip()
+            if name in ['full', 'reduced'] and covariance is None:
+                covariance = self.get_streaming_covariance()
+
             if name == 'full':
                 filename = f'{prefix}.fits'
                 self.write_covariance_to_file(
@@ -1878,8 +1897,13 @@ class Integration(ABC):
                                 f"Undefined grouping.")
                     return
                 filename = f'{prefix}.{name}.fits'
-                self.write_covariance_to_file(
-                    filename, self.get_group_covariance(division, covariance))
+                if streaming:
+                    group_covariance = self.get_streaming_group_covariance(
+                        division)
+                else:
+                    group_covariance = self.get_group_covariance(
+                        division, covariance)
+                self.write_covariance_to_file(filename, group_covariance)
 
     def write_covariance_to_file(self, filename, covariance):
         """
@@ -1999,6 +2023,146 @@ class Integration(ABC):
             frame_flags=self.frames.flag,
             source_flags=self.flagspace.convert_flag('SOURCE_FLAGS').value)
 
+    def get_streaming_chunk_size(self):
+        """
+        Return the number of frames processed at once by streaming products.
+
+        The chunk size is read from the 'write.streaming.frames'
+        configuration option (default 4096).
+
+        Returns
+        -------
+        chunk_size : int
+        """
+        chunk_size = self.configuration.get_int('write.streaming.frames',
+                                                default=4096)
+        return int(np.clip(chunk_size, 1, max(self.size, 1)))
+
+    def get_streaming_covariance(self, channel_indices=None):
+        """
+        Return the channel covariance accumulated in chunks of frames.
+
+        The result is equivalent to :func:`Integration.get_covariance`, but
+        the product sums are accumulated over chunks of frames (see
+        :class:`CovarianceAccumulator`) rather than one channel pair at a
+        time.  If `channel_indices` are supplied, the covariance is
+        calculated for those channels only, so that the covariance matrix of
+        all channels is never formed.  The BLAS syrk update is used unless
+        the 'write.streaming.syrk' option is set to False.
+
+        Parameters
+        ----------
+        channel_indices : numpy.ndarray (int), optional
+            The channel indices for which to calculate the covariance.  The
+            default is all channels.
+
+        Returns
+        -------
+        covariance : numpy.ndarray (float)
+            The covariance matrix of shape (n_channels, n_channels).
+        """
+        if channel_indices is None:
+            channel_indices = np.arange(self.channels.size)
+        channel_indices = np.asarray(channel_indices, dtype=int)
+        log.info(f"Calculating covariance matrix for {channel_indices.size} "
+                 f"channels in streaming mode.")
+
+        use_syrk = self.configuration.get_bool('write.streaming.syrk',
+                                               default=True)
+        accumulator = CovarianceAccumulator(channel_indices.size,
+                                            use_syrk=use_syrk)
+        source_flags = self.flagspace.convert_flag('SOURCE_FLAGS').value
+        valid_frames = self.frames.valid & (
+            (self.frames.flag & source_flags) == 0)
+        valid_channels = self.channels.data.flag[channel_indices] == 0
+        chunk_size = self.get_streaming_chunk_size()
+
+        for start in range(0, self.size, chunk_size):
+            end = min(start + chunk_size, self.size)
+            valid = self.frames.sample_flag[start:end, channel_indices] == 0
+            valid &= valid_channels[None]
+            valid &= valid_frames[start:end, None]
+            accumulator.add(self.frames.data[start:end, channel_indices],
+                            valid, self.frames.relative_weight[start:end])
+
+        return accumulator.get_covariance(
+            self.channels.data.weight[channel_indices])
+
+    def get_streaming_group_covariance(self, division):
+        """
+        Return the covariance for all groups in a division using streaming.
+
+        Unlike :func:`Integration.get_group_covariance`, only the covariance
+        between channels in the division is calculated.
+
+        Parameters
+        ----------
+        division : ChannelDivision
+            The channel division for which to calculate covariances.
+
+        Returns
+        -------
+        group_covariance : numpy.ndarray (float)
+            The covariance for channels in the division.
+        """
+        channel_indices = np.empty(0, dtype=int)
+        for group in division:
+            channel_indices = np.concatenate((channel_indices, group.indices))
+        return self.get_streaming_covariance(channel_indices=channel_indices)
+
+    def get_streaming_spectra(self, window_function='hamming',
+                              window_size=None):
+        """
+        Return the power spectrum of the data accumulated in chunks.
+
+        The result is equivalent to :func:`Integration.get_spectra`, but the
+        Welch periodograms are accumulated over chunks of frames (see
+        :class:`SpectrumAccumulator`), so that a masked copy of the entire
+        time-stream is never created.
+
+        Parameters
+        ----------
+        window_function : str or function, optional
+            The window filter name.  The default is "hamming".  Must be an
+            available function in `scipy.signal.windows`.
+        window_size : int, optional
+            The size of the filter in frames.  The default is twice the number
+            of frames in the filtering time scale.
+
+        Returns
+        -------
+        frequency, spectrum : Quantity, Quantity
+            The frequency spectrum is of shape (nf2,) in units of Hertz.  The
+            spectrum is of shape (nf2, n_channels) in units of Janskys.
+        """
+        if window_size is None:
+            window_size = 2 * self.frames_for(self.filter_time_scale)
+        window_size = int(np.clip(window_size, 1, self.size))
+
+        sampling_frequency = (1.0 / self.info.instrument.sampling_interval
+                              ).decompose().value
+        accumulator = SpectrumAccumulator(
+            self.frames.data.shape[1], window_function=window_function,
+            window_size=window_size, sampling_frequency=sampling_frequency)
+
+        invalid_frames = ~self.frames.valid
+        invalid_frames |= self.frames.is_flagged(
+            self.flagspace.flags.MODELING_FLAGS)
+        chunk_size = max(self.get_streaming_chunk_size(), window_size)
+
+        for start in range(0, self.size, chunk_size):
+            end = min(start + chunk_size, self.size)
+            invalid = invalid_frames[start:end, None] | (
+                self.frames.sample_flag[start:end] != 0)
+            accumulator.add(np.where(invalid, 0.0,
+                                     self.frames.data[start:end]))
+
+        janskys = self.gain * self.info.instrument.jansky_per_beam()
+        spectrum = (np.sqrt(accumulator.get_power()) / janskys
+                    ) * units.Unit('Jy')
+        frequency = accumulator.frequency * units.Unit('Hz')
+        return frequency, spectrum
+
     def write_ascii_time_stream(self, filename=None):
         """
         Write the frame data to a text file.
@@ -3323,25 +3487,72 @@ class Integration(ABC):
         valid_frames = self.frames.valid & self.frames.is_unflagged(
             'MODELING_FLAGS')
 
-        timestream_data, timestream_weight = int_nf.get_weighted_timestream(
-            self.frames.data, self.frames.sample_flag,
-            valid_frames, self.frames.relative_weight,
-            channel_indices=live_channels.indices)
-
-        n_flagged = int_nf.despike_multi_resolution(
-            timestream_data=timestream_data,
-            timestream_weight=timestream_weight,
-            sample_flags=self.frames.sample_flag,
-            channel_indices=live_channels.indices,
-            frame_valid=self.frames.valid,
-            level=level,
-            spike_flag=self.flagspace.flags.SAMPLE_SPIKE.value,
-            max_block_size=max_block_size)
+        if self.configuration.get_bool('despike.blocked'):
+            n_flagged = int_nf.despike_multi_resolution_blocked(
+                frame_data=self.frames.data,
+                sample_flags=self.frames.sample_flag,
+                channel_indices=live_channels.indices,
+                frame_valid=self.frames.valid,
+                weight_valid=valid_frames,
+                frame_weight=self.frames.relative_weight,
+                level=level,
+                spike_flag=self.flagspace.flags.SAMPLE_SPIKE.value,
+                max_block_size=max_block_size,
+                workspace=self.get_despike_buffer(live_channels.size))
+        else:
+            timestream_data, timestream_weight = (
+                int_nf.get_weighted_timestream(
+                    self.frames.data, self.frames.sample_flag,
+                    valid_frames, self.frames.relative_weight,
+                    channel_indices=live_channels.indices))
+
+            n_flagged = int_nf.despike_multi_resolution(
+                timestream_data=timestream_data,
+                timestream_weight=timestream_weight,
+                sample_flags=self.frames.sample_flag,
+                channel_indices=live_channels.indices,
+                frame_valid=self.frames.valid,
+                level=level,
+                spike_flag=self.flagspace.flags.SAMPLE_SPIKE.value,
+                max_block_size=max_block_size)
 
         percent_flagged = 100 * n_flagged / (live_channels.size * self.size)
         log.debug(f"{n_flagged} live channel frames ({percent_flagged:.2f}%) "
                   f"flagged as spikes.")
 
+    def get_despike_buffer(self, n_channels, tile_size=8):
+        """
+        Return a scratch workspace for channel-blocked despiking.
+
+        The workspace is shaped (n_workers, 2, tile_size, n_frames), holding
+        the weighted time-stream data and weights of `tile_size` channels for
+        each parallel worker.  The number of workers is limited by the
+        integration thread count, the number of Numba threads, and the number
+        of channel tiles.  The same array is returned on subsequent calls
+        unless the required shape changes.
+
+        Parameters
+        ----------
+        n_channels : int
+            The number of channels to be despiked.
+        tile_size : int, optional
+            The number of channels processed together by each worker.
+
+        Returns
+        -------
+        workspace : numpy.ndarray (float)
+        """
+        tile_size = int(np.clip(tile_size, 1, max(n_channels, 1)))
+        n_tiles = max(1, -(-n_channels // tile_size))
+        threads = self.get_thread_count()
+        threads = 1 if threads is None else threads
+        n_workers = int(np.clip(threads, 1, min(nb.config.NUMBA_NUM_THREADS,
+                                                n_tiles)))
+        shape = (n_workers, 2, tile_size, self.size)
+        if self.despike_buffer is None or self.despike_buffer.shape != shape:
+            self.despike_buffer = np.empty(shape, dtype=float)
+        return self.despike_buffer
+
     def flag_spiky_frames(self, frame_spikes=None):
         """
         Flag frames with excessive spiky channels as FLAG_SPIKY.
@@ -3674,7 +3885,7 @@ class Integration(ABC):
         log.debug(f"Removing DC offsets{' (robust)' if robust else ''}.")
         self.remove_offsets(robust=robust)
 
-    def remove_offsets(self, robust=None):
+    def remove_offsets(self, robust=None, weighting=False):
         """
         Remove the DC offsets from the frame data.
 
@@ -3682,14 +3893,19 @@ class Integration(ABC):
         ----------
         robust : bool
             If `True`, use the robust (median) method to determine means.
+        weighting : bool, optional
+            If `True`, also derive RMS channel weights from the levelled data
+            in the same pass (see :func:`Integration.remove_drifts`).
 
         Returns
         -------
         None
         """
-        self.remove_drifts(target_frame_resolution=self.size, robust=robust)
+        self.remove_drifts(target_frame_resolution=self.size, robust=robust,
+                           weighting=weighting)
 
-    def remove_drifts(self, target_frame_resolution=None, robust=None):
+    def remove_drifts(self, target_frame_resolution=None, robust=None,
+                      weighting=False):
         """
         Remove drifts in frame data given a target frame resolution.
 
@@ -3706,6 +3922,12 @@ class Integration(ABC):
             If `True` use the robust (median) method to determine means.  If
             not supplied determined from the 'estimator' configuration option
             (robust=median).
+        weighting : bool, optional
+            If `True`, derive RMS channel weights for the live channels while
+            the drifts are removed, rather than reading the frame data again
+            afterwards.  This is equivalent to calling
+            :func:`Integration.get_rms_channel_weights` once the drifts have
+            been removed.
 
         Returns
         -------
@@ -3734,19 +3956,30 @@ class Integration(ABC):
         self.comments.append(msg)
         self.comments.append(' ')
 
+        weight_channels = None
+        if weighting:
+            weight_channels = self.channels.get_live_channels()
+
         # Remove the 1/f drifts from all channels
-        self.remove_channel_drifts(self.channels.create_channel_group(),
-                                   parms, drift_n, robust=robust)
+        weight_stats = self.remove_channel_drifts(
+            self.channels.create_channel_group(), parms, drift_n,
+            robust=robust, weight_channels=weight_channels)
 
         # Remove the drifts from all signals also to match bandpass
         if self.signals is not None:
             for signal in self.signals.values():
                 signal.remove_drifts(n_frames=drift_n, is_reconstructable=True)
 
+        if weight_stats is not None:
+            self.comments.append('W')
+            self.set_weights_from_var_stats(weight_channels, *weight_stats)
+            self.flag_weights()
+
         return True
 
     def remove_channel_drifts(
-            self, channel_group, parms, drift_n, robust=False):
+            self, channel_group, parms, drift_n, robust=False,
+            weight_channels=None):
         """
         Remove drifts from channels.
 
@@ -3755,6 +3988,10 @@ class Integration(ABC):
         block, then channel filtering time scales and source filtering are
         updated to account for the new length of the drift.
 
+        If `weight_channels` are supplied, the RMS channel weight statistics
+        (see :func:`Integration.get_rms_channel_weights`) are accumulated
+        from the levelled data during the same pass.
+
         Parameters
         ----------
         channel_group : ChannelGroup
@@ -3766,28 +4003,61 @@ class Integration(ABC):
         robust : bool, optional
             If `True`, use the robust (median) method to calculate means.
             Otherwise, use a simple mean.
+        weight_channels : ChannelGroup, optional
+            The channels for which to derive RMS weight statistics.  These
+            must be a subset of `channel_group`.
 
         Returns
         -------
-        None
+        weight_stats : tuple or None
+            The channel variance sum and variance weight sum for
+            `weight_channels`, each of shape (n_weight_channels,), or `None`
+            if `weight_channels` were not supplied.
         """
         parms.clear(channel_group, start=0, end=self.size)
         modeling_frames = self.frames.is_flagged('MODELING_FLAGS')
 
         self.update_inconsistencies(channel_group, parms.for_frame, drift_n)
 
-        average_drifts, average_drift_weights = int_nf.remove_channel_drifts(
-            frame_data=self.frames.data,
-            frame_weights=self.frames.relative_weight,
-            frame_valid=self.frames.valid,
-            modeling_frames=modeling_frames,
-            sample_flags=self.frames.sample_flag,
-            drift_frame_size=drift_n,
-            channel_filtering=channel_group.get_filtering(self),
-            frame_dependents=parms.for_frame,
-            channel_dependents=parms.for_channel,
-            channel_indices=channel_group.indices,
-            robust=robust)
+        weight_stats = None
+        if weight_channels is None:
+            average_drifts, average_drift_weights = \
+                int_nf.remove_channel_drifts(
+                    frame_data=self.frames.data,
+                    frame_weights=self.frames.relative_weight,
+                    frame_valid=self.frames.valid,
+                    modeling_frames=modeling_frames,
+                    sample_flags=self.frames.sample_flag,
+                    drift_frame_size=drift_n,
+                    channel_filtering=channel_group.get_filtering(self),
+                    frame_dependents=parms.for_frame,
+                    channel_dependents=parms.for_channel,
+                    channel_indices=channel_group.indices,
+                    robust=robust)
+        else:
+            weight_frames = self.frames.is_unflagged(
+                'CHANNEL_WEIGHTING_FLAGS') & self.frames.valid
+            weight_lookup = np.full(self.frames.data.shape[1], -1)
+            weight_lookup[weight_channels.indices] = np.arange(
+                weight_channels.size)
+            (average_drifts, average_drift_weights,
+             var_sum, var_weight) = \
+                int_nf.remove_channel_drifts_with_rms_weights(
+                    frame_data=self.frames.data,
+                    frame_weights=self.frames.relative_weight,
+                    frame_valid=self.frames.valid,
+                    modeling_frames=modeling_frames,
+                    sample_flags=self.frames.sample_flag,
+                    drift_frame_size=drift_n,
+                    channel_filtering=channel_group.get_filtering(self),
+                    frame_dependents=parms.for_frame,
+                    channel_dependents=parms.for_channel,
+                    channel_indices=channel_group.indices,
+                    weight_frames=weight_frames,
+                    weight_index=weight_lookup[channel_group.indices],
+                    n_weights=weight_channels.size,
+                    robust=robust)
+            weight_stats = var_sum, var_weight
 
         # self.update_inconsistencies(channel_group, parms.for_frame, drift_n)
 
@@ -3815,6 +4085,8 @@ class Integration(ABC):
         if tot_inc > 0:
             self.comments.append(f"!{inconsistent_channels}:{tot_inc}")
 
+        return weight_stats
+
     def set_tau(self, spec=None, value=None):
         """
         Set the tau values for the integration.
@@ -4325,6 +4597,8 @@ class Integration(ABC):
         """
         if self.comments is None:
             self.comments = []
+        if '+' in task:
+            return self.perform_fused(task.split('+'))
         robust = self.configuration.get_string('estimator') == 'median'
         if task == 'dejump':
             self.dejump_frames()
@@ -4354,6 +4628,49 @@ class Integration(ABC):
         self.comments.append(' ')
         return True
 
+    def perform_fused(self, tasks):
+        """
+        Perform a sequence of reduction tasks in fused passes over the data.
+
+        Consecutive tasks that would each read the full frame data are
+        combined into a single pass where possible.  Currently, the removal
+        of offsets or drifts followed by RMS channel weighting is performed
+        as one pass, accumulating the weight statistics from the levelled
+        data.  The results are identical to performing each task in turn.
+        Any other sequence of tasks is performed one task at a time.
+
+        Parameters
+        ----------
+        tasks : list (str)
+            The names of the tasks to perform, in order.
+
+        Returns
+        -------
+        performed : bool
+            Indicates whether any task was performed.
+        """
+        method = self.configuration.get_string(
+            'weighting.method', default='rms')
+        method = str(method).strip().lower()
+        if (len(tasks) != 2 or tasks[0] not in ['offsets', 'drifts']
+                or tasks[1] != 'weighting'
+                or method in ['robust', 'differential']):
+            performed = False
+            for task in tasks:
+                performed |= self.perform(task)
+            return performed
+
+        log.debug(f"Performing fused tasks: {', '.join(tasks)}")
+        robust = self.configuration.get_string('estimator') == 'median'
+        if tasks[0] == 'offsets':
+            target_frame_resolution = self.size
+        else:
+            target_frame_resolution = None
+        self.remove_drifts(target_frame_resolution=target_frame_resolution,
+                           robust=robust, weighting=True)
+        self.comments.append(' ')
+        return True
+
     def get_fits_data(self):
         """
         Return integration data as an astropy table.
@@ -11,11 +11,14 @@ __all__ = ['determine_time_weights', 'get_time_weights_by_block',
            'robust_channel_weights', 'differential_channel_weights',
            'rms_channel_weights', 'set_weights_from_var_stats',
            'despike_neighbouring', 'despike_absolute', 'despike_gradual',
-           'despike_multi_resolution', 'flagged_channels_per_frame',
+           'despike_multi_resolution', 'despike_multi_resolution_blocked',
+           'flagged_channels_per_frame',
            'flagged_frames_per_channel', 'frame_block_expand_flag',
            'next_weight_transit', 'get_mean_frame_level',
            'weighted_mean_frame_level', 'weighted_median_frame_level',
-           'remove_channel_drifts', 'level', 'apply_drifts_to_channel_data',
+           'remove_channel_drifts', 'level',
+           'remove_channel_drifts_with_rms_weights', 'level_with_rms_weights',
+           'apply_drifts_to_channel_data',
            'detector_stage', 'readout_stage', 'search_corners',
            'get_weighted_timestream', 'calculate_2d_velocities',
            'calculate_2d_accelerations', 'classify_scanning_speeds',
@@ -873,6 +876,146 @@ def despike_multi_resolution(timestream_data, timestream_weight, sample_flags,
     return n_flagged
 
 
+@nb.njit(cache=True, nogil=True, parallel=True, fastmath=False)
+def despike_multi_resolution_blocked(frame_data, sample_flags, channel_indices,
+                                     frame_valid, weight_valid, frame_weight,
+                                     level, spike_flag, max_block_size,
+                                     workspace):  # pragma: no cover
+    """
+    Despike frame samples using the multi-resolution method in channel tiles.
+
+    This produces identical results to :func:`get_weighted_timestream`
+    followed by :func:`despike_multi_resolution`, but processes the channels
+    in tiles.  For each tile, the weighted time-stream of every channel is
+    gathered into a contiguous row of a reusable workspace, and all
+    resolutions are then processed for that channel before moving on to the
+    next, rather than striding through the full (n_frames, n_channels)
+    time-stream once for each resolution.  Tiles are distributed between
+    parallel workers, each of which uses its own section of the workspace.
+
+    Parameters
+    ----------
+    frame_data : numpy.ndarray (float)
+        The frame data of shape (n_frames, all_channels).
+    sample_flags : numpy.ndarray (int)
+        The sample flags of shape (n_frames, all_channels).  Spike flags are
+        updated in-place.
+    channel_indices : numpy.ndarray (int)
+        The channel indices for which to perform the despiking of shape
+        (n_channels,).
+    frame_valid : numpy.ndarray (bool)
+        A boolean mask of shape (n_frames,) where `True` indicates that
+        a frame is valid and may be included in the calculation.
+    weight_valid : numpy.ndarray (bool)
+        A boolean mask of shape (n_frames,) where `True` indicates that a
+        frame may contribute to the weighted time-stream.
+    frame_weight : numpy.ndarray (float)
+        The frame relative weights of shape (n_frames,).
+    level : float
+        The sigma level above which spike flagging occurs.
+    spike_flag : int
+        The spike flag integer identifier.
+    max_block_size : int
+        The maximum block size which determines the minimum resolution.
+        This should be no larger than n_frames // 2 and no smaller than 1.
+    workspace : numpy.ndarray (float)
+        A scratch array of shape (n_workers, 2, tile_size, >=n_frames).  The
+        number of parallel workers and the number of channels in each tile
+        are taken from the workspace shape.
+
+    Returns
+    -------
+    n_flagged : int
+        The number of samples flagged as spikes.
+    """
+    n_frames = frame_data.shape[0]
+    n_channels = channel_indices.size
+    n_workers = workspace.shape[0]
+    tile_size = workspace.shape[2]
+    n_tiles = (n_channels + tile_size - 1) // tile_size
+    n_resolutions = int(np.log2(max_block_size)) + 1
+    worker_flagged = np.zeros(n_workers, dtype=nb.int64)
+
+    for worker in nb.prange(n_workers):
+        timestream_data = workspace[worker, 0]
+        timestream_weight = workspace[worker, 1]
+        n_flagged = 0
+
+        for tile in range(worker, n_tiles, n_workers):
+            start_channel = tile * tile_size
+            end_channel = min(start_channel + tile_size, n_channels)
+            tile_channels = end_channel - start_channel
+
+            # Gather the weighted time-stream and clear existing spike flags
+            for frame_index in range(n_frames):
+                w = frame_weight[frame_index]
+                valid = weight_valid[frame_index]
+                for j in range(tile_channels):
+                    channel_index = channel_indices[start_channel + j]
+                    flag = sample_flags[frame_index, channel_index]
+                    if valid and flag == 0:
+                        timestream_data[j, frame_index] = (
+                            w * frame_data[frame_index, channel_index])
+                        timestream_weight[j, frame_index] = w
+                    else:
+                        timestream_data[j, frame_index] = 0.0
+                        timestream_weight[j, frame_index] = 0.0
+                    if flag & spike_flag != 0:
+                        sample_flags[frame_index, channel_index] = (
+                            flag ^ spike_flag)
+
+            for j in range(tile_channels):
+                channel_index = channel_indices[start_channel + j]
+                data = timestream_data[j]
+                weight = timestream_weight[j]
+                resolution = 1
+                resolution_max_frame = n_frames
+                for _ in range(n_resolutions):
+                    v1 = data[0]
+                    w1 = weight[0]
+                    for frame_index in range(1, resolution_max_frame):
+                        new_frame = frame_index // 2
+                        if (not frame_valid[frame_index]
+                                or not frame_valid[new_frame]):
+                            continue
+                        v2 = data[frame_index]
+                        w2 = weight[frame_index]
+                        v_sum = v1 + v2
+                        v_diff = v1 - v2
+                        w_sum = w1 * w2
+                        v1 = v2
+                        w1 = w2
+                        if w_sum != 0:
+                            w_sum /= (w1 + w2)
+                        else:
+                            w_sum = 0.0
+                        data[new_frame] = v_sum
+                        weight[new_frame] = w_sum
+                        if w_sum <= 0:
+                            continue
+
+                        significance = np.abs(v_diff) * np.sqrt(w_sum)
+                        if significance > level:
+                            end_index = frame_index * resolution
+                            start_index = end_index - resolution
+                            for new_i in range(start_index, end_index):
+                                if not frame_valid[new_i]:
+                                    continue
+                                sample_flags[new_i, channel_index] |= (
+                                    spike_flag)
+
+                    resolution *= 2
+                    resolution_max_frame //= 2
+
+                for frame_index in range(n_frames):
+                    if sample_flags[frame_index, channel_index] & spike_flag:
+                        n_flagged += 1
+
+        worker_flagged[worker] = n_flagged
+
+    return worker_flagged.sum()
+
+
 @nb.njit(cache=True, nogil=False, parallel=False, fastmath=False)
 def flagged_channels_per_frame(sample_flags, flag, valid_frames,
                                channel_indices):  # pragma: no cover
@@ -1461,6 +1604,229 @@ def level(frame_data, frame_weights, frame_valid, modeling_frames,
             frame_dependents[frame] += fw * p_norm[i]
 
 
+@nb.njit(cache=True, nogil=False, parallel=False, fastmath=False)
+def remove_channel_drifts_with_rms_weights(
+        frame_data, frame_weights, frame_valid, modeling_frames,
+        sample_flags, drift_frame_size, channel_filtering, frame_dependents,
+        channel_dependents, channel_indices, weight_frames, weight_index,
+        n_weights, robust=False):  # pragma: no cover
+    """
+    Remove channel drifts and derive RMS channel weight statistics.
+
+    This is a fused version of :func:`remove_channel_drifts` followed by
+    :func:`rms_channel_weights`.  The variance statistics are accumulated
+    from the levelled data while the drifts are subtracted, so that the
+    frame data is not read again to determine the channel weights.  The
+    results are identical to those produced by calling both functions in
+    sequence.
+
+    Parameters
+    ----------
+    frame_data : numpy.ndarray (float)
+        The frame data of shape (n_frames, all_channels).  Will be updated
+        in-place.
+    frame_weights : numpy.ndarray (float)
+        The frame relative weights of shape (n_frames,).
+    frame_valid : numpy.ndarray (bool)
+        A boolean mask of shape (n_frames,) where `False` excludes a frame from
+        all processing.
+    modeling_frames : numpy.ndarray (bool)
+        A boolean mask of shape (n_frames,) where `True` marks a frame as
+        "modeling".
+    sample_flags : numpy.ndarray (int)
+        An array of integer flags of shape (n_frames, all_channels).
+    drift_frame_size : int
+        The size of each block of frames for which to calculate the average
+        channel values which will then be removed from that block.
+    channel_filtering : numpy.ndarray (float)
+        The channel filtering factor of shape (n_channels,).
+    frame_dependents : numpy.ndarray (float)
+        The frame dependents of shape (n_frames,).  Will be updated in-place.
+    channel_dependents : numpy.ndarray (float)
+        The channel dependents of shape (all_channels,).  Will be updated
+        in-place.
+    channel_indices : numpy.ndarray (int)
+        The channels for which to calculate and subtract the average offsets
+        of shape (n_channels,).
+    weight_frames : numpy.ndarray (bool)
+        A boolean mask of shape (n_frames,) where `False` excludes a frame
+        from the weight calculations.
+    weight_index : numpy.ndarray (int)
+        The index of each channel in `channel_indices` in the weight output
+        arrays of shape (n_channels,).  Negative values exclude a channel
+        from the weight calculations.
+    n_weights : int
+        The number of channels for which to derive weights.
+    robust : bool, optional
+        If `True`, use the robust method (median) to calculate the average
+        channel offset.  Otherwise, use the weighted mean.
+
+    Returns
+    -------
+    average_offset, offset_weights, variance_sum, variance_weight : 4-tuple
+        The average channel offset and associated weight sums of shape
+        (n_channels,), and the channel variance sum and variance weight sum
+        of shape (n_weights,).
+    """
+    n_frames = frame_data.shape[0]
+    n_channels = channel_indices.size
+    average_offset = np.zeros(n_channels, dtype=nb.float64)
+    average_offset_weight = np.zeros(n_channels, dtype=nb.float64)
+    var_sum = np.zeros(n_weights, dtype=nb.float64)
+    var_weight = np.zeros(n_weights, dtype=nb.float64)
+
+    for start_frame in range(0, n_frames, drift_frame_size):
+        stop_frame = start_frame + drift_frame_size
+        if stop_frame > n_frames:
+            stop_frame = n_frames
+
+        drifts, drift_weights = get_mean_frame_level(
+            frame_data=frame_data,
+            frame_weights=frame_weights,
+            frame_valid=frame_valid,
+            modeling_frames=modeling_frames,
+            sample_flags=sample_flags,
+            channel_indices=channel_indices,
+            start_frame=start_frame,
+            stop_frame=stop_frame,
+            robust=robust)
+
+        average_offset += drifts * drift_weights
+        average_offset_weight += drift_weights
+
+        level_with_rms_weights(
+            frame_data=frame_data,  # updated here
+            frame_weights=frame_weights,
+            frame_valid=frame_valid,
+            modeling_frames=modeling_frames,
+            sample_flags=sample_flags,
+            channel_indices=channel_indices,
+            start_frame=start_frame,
+            stop_frame=stop_frame,
+            offset=drifts,
+            offset_weight=drift_weights,
+            frame_dependents=frame_dependents,  # updated here
+            channel_filtering=channel_filtering,
+            weight_frames=weight_frames,
+            weight_index=weight_index,
+            var_sum=var_sum,  # updated here
+            var_weight=var_weight)  # updated here
+
+        for i, channel in enumerate(channel_indices):
+            if drift_weights[i] > 0:
+                channel_dependents[channel] += 1
+
+    for i in range(n_channels):
+        w = average_offset_weight[i]
+        if w > 0:
+            average_offset[i] /= w
+
+    return average_offset, average_offset_weight, var_sum, var_weight
+
+
+@nb.njit(cache=True, nogil=False, parallel=False, fastmath=False)
+def level_with_rms_weights(frame_data, frame_weights, frame_valid,
+                           modeling_frames, sample_flags, channel_indices,
+                           start_frame, stop_frame, offset, offset_weight,
+                           frame_dependents, channel_filtering, weight_frames,
+                           weight_index, var_sum,
+                           var_weight):  # pragma: no cover
+    """
+    Subtract channel offsets and accumulate the RMS weight statistics.
+
+    Performs the same operation as :func:`level`, while also adding the
+    levelled data for each frame to the variance sums used to derive RMS
+    channel weights (see :func:`rms_channel_weights`).
+
+    Parameters
+    ----------
+    frame_data : numpy.ndarray (float)
+        The frame data of shape (n_frames, all_channels).  Will be updated
+        in-place.
+    frame_weights : numpy.ndarray (float)
+        The frame weights of shape (n_frames,).
+    frame_valid : numpy.ndarray (bool)
+        A boolean mask of shape (n_frames,) where `False` excludes a frame from
+        all processing.
+    modeling_frames : numpy.ndarray (bool)
+        A boolean mask of shape (n_frames,) where `True` marks a flag as a
+        modelling frame.
+    sample_flags : numpy.ndarray (int)
+        The frame data flag mask of shape (n_frames, all_channels).
+    channel_indices : numpy.ndarray (int)
+        The channel indices to level of shape (n_channels,).
+    start_frame : int
+        The first frame to level.
+    stop_frame : int
+        The stop frame (non-inclusive) at which to terminate levelling.
+    offset : numpy.ndarray (float)
+        The offsets of shape (n_channels,) to remove from frame data between
+        the start and stop frame for the given channels.
+    offset_weight : numpy.ndarray (float)
+        The offset weights of shape (n_channels,) used to update the frame
+        dependents.
+    frame_dependents : numpy.ndarray (float)
+        The frame dependents of shape (n_frames,).  Will be updated in-place.
+    channel_filtering : numpy.ndarray (float)
+        The channel filtering factor of shape (n_channels,).
+    weight_frames : numpy.ndarray (bool)
+        A boolean mask of shape (n_frames,) where `False` excludes a frame
+        from the weight calculations.
+    weight_index : numpy.ndarray (int)
+        The index of each channel in the weight sums of shape (n_channels,).
+        Negative values exclude a channel from the weight calculations.
+    var_sum : numpy.ndarray (float)
+        The channel variance sums of shape (n_weights,).  Will be updated
+        in-place.
+    var_weight : numpy.ndarray (float)
+        The channel variance weight sums of shape (n_weights,).  Will be
+        updated in-place.
+
+    Returns
+    -------
+    None
+    """
+    n_channels = channel_indices.size
+    p_norm = np.empty(n_channels, dtype=nb.float64)
+    for i in range(n_channels):
+        w = offset_weight[i]
+        if w == 0:
+            p_norm[i] = 0.0
+        else:
+            p_norm[i] = channel_filtering[i] / w
+
+    for frame in range(start_frame, stop_frame):
+        if not frame_valid[frame]:
+            continue
+        for i, channel in enumerate(channel_indices):
+            frame_data[frame, channel] -= offset[i]
+
+        fw = frame_weights[frame]
+        if weight_frames[frame] and fw != 0:
+            for i, channel in enumerate(channel_indices):
+                k = weight_index[i]
+                if k < 0:
+                    continue
+                if sample_flags[frame, channel] != 0:
+                    continue
+                value = frame_data[frame, channel]
+                if np.isnan(value) or value == 0:
+                    continue
+                var_sum[k] += fw * value * value
+                var_weight[k] += fw
+
+        if modeling_frames[frame]:
+            continue
+
+        if fw == 0:
+            continue
+
+        for i, channel in enumerate(channel_indices):
+            if sample_flags[frame, channel] != 0:
+                continue
+            frame_dependents[frame] += fw * p_norm[i]
+
+
 @nb.njit(cache=True, nogil=False, parallel=False, fastmath=False)
 def apply_drifts_to_channel_data(channel_indices, offsets, average_drifts,
                                  inconsistencies, hardware_gain,
@@ -0,0 +1,224 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import numpy as np
+from scipy import fft
+from scipy.linalg import blas
+from scipy.signal import get_window
+
+__all__ = ['CovarianceAccumulator', 'SpectrumAccumulator']
+
+
+class CovarianceAccumulator(object):
+
+    def __init__(self, n_channels, use_syrk=True):
+        """
+        Accumulate a channel covariance matrix from chunks of frames.
+
+        The covariance between two channels i and j is given by::
+
+            C[i, j] = sqrt(w_i * w_j) * sum(fw * d_i * d_j) / n_ij
+
+        where the sum is over all frames in which both samples are valid, fw
+        are the frame relative weights, d are the sample data, w are the
+        channel weights, and n_ij is the number of frames in which both
+        samples are valid.  Only the weighted sums of products and the
+        counts of valid sample pairs are stored, so the covariance may be
+        accumulated one chunk of frames at a time without holding the full
+        time-stream of every channel in memory.
+
+        Parameters
+        ----------
+        n_channels : int
+            The number of channels for which to calculate covariances.
+        use_syrk : bool, optional
+            If `True`, use the BLAS symmetric rank-k update (syrk) to
+            accumulate the upper triangle of the product sums.  Otherwise,
+            the full matrix product is calculated.  syrk is only used if
+            all frame weights in a chunk are non-negative.
+        """
+        self.n_channels = int(n_channels)
+        self.use_syrk = use_syrk
+        shape = (self.n_channels, self.n_channels)
+        self.sums = np.zeros(shape, dtype=float, order='F')
+        self.counts = np.zeros(shape, dtype=float, order='F')
+        self.n_frames = 0
+
+    @property
+    def nbytes(self):
+        """
+        Return the memory used by the accumulated sums in bytes.
+
+        Returns
+        -------
+        int
+        """
+        return self.sums.nbytes + self.counts.nbytes
+
+    def add(self, data, valid, frame_weight):
+        """
+        Add a chunk of frames to the covariance sums.
+
+        Parameters
+        ----------
+        data : numpy.ndarray (float)
+            The sample data of shape (n_frames, n_channels).
+        valid : numpy.ndarray (bool)
+            A mask of shape (n_frames, n_channels) where `True` marks a sample
+            that may be included.
+        frame_weight : numpy.ndarray (float)
+            The frame relative weights of shape (n_frames,).
+
+        Returns
+        -------
+        None
+        """
+        if data.shape[0] == 0:
+            return
+        self.n_frames += data.shape[0]
+        frame_weight = np.asarray(frame_weight, dtype=float)
+        x = np.where(valid, data, 0.0).astype(float, copy=False)
+        mask = valid.astype(float)
+
+        if self.use_syrk and np.all(frame_weight >= 0):
+            x *= np.sqrt(frame_weight)[:, None]
+            self.sums = blas.dsyrk(1.0, x.T, beta=1.0, c=self.sums,
+                                   trans=0, lower=0, overwrite_c=1)
+            self.counts = blas.dsyrk(1.0, mask.T, beta=1.0, c=self.counts,
+                                     trans=0, lower=0, overwrite_c=1)
+        else:
+            self.sums += x.T @ (x * frame_weight[:, None])
+            self.counts += mask.T @ mask
+
+    def get_covariance(self, channel_weight):
+        """
+        Return the accumulated covariance matrix.
+
+        Diagonal elements, and pairs of channels with no valid frames in
+        common, are set to zero.
+
+        Parameters
+        ----------
+        channel_weight : numpy.ndarray (float)
+            The channel weights of shape (n_channels,).
+
+        Returns
+        -------
+        covariance : numpy.ndarray (float)
+            The covariance matrix of shape (n_channels, n_channels).
+        """
+        # Only the upper triangle is updated by syrk
+        sums = np.triu(self.sums, k=1)
+        sums += sums.T
+        counts = np.triu(self.counts, k=1)
+        counts += counts.T
+
+        channel_weight = np.asarray(channel_weight, dtype=float)
+        covariance = np.zeros((self.n_channels, self.n_channels))
+        nzi = counts > 0
+        scale = np.sqrt(channel_weight[:, None] * channel_weight[None])
+        covariance[nzi] = sums[nzi] * scale[nzi] / counts[nzi]
+        return covariance
+
+
+class SpectrumAccumulator(object):
+
+    def __init__(self, n_channels, window_function='hamming',
+                 window_size=256, sampling_frequency=1.0):
+        """
+        Accumulate channel power spectra from chunks of frames.
+
+        Power spectral densities are estimated using Welch's method, exactly
+        as :func:`scipy.signal.welch` with the default settings (segments
+        overlapping by half of the window size, constant detrending, and mean
+        averaging of one-sided density spectra).  Segments are processed as
+        frames are added, so that only a single chunk of frames and the
+        averaged spectra need to be held in memory.
+
+        Frames must be added in order.  Any frames at the end of the
+        time-stream that do not fill a complete segment are ignored, as for
+        :func:`scipy.signal.welch`.
+
+        Parameters
+        ----------
+        n_channels : int
+            The number of channels.
+        window_function : str or tuple, optional
+            The window function, which must be available to
+            :func:`scipy.signal.get_window`.
+        window_size : int, optional
+            The number of frames in each segment.
+        sampling_frequency : float, optional
+            The sampling frequency of the frames.
+        """
+        self.n_channels = int(n_channels)
+        self.window_size = max(1, int(window_size))
+        self.overlap = self.window_size // 2
+        self.step = self.window_size - self.overlap
+        self.sampling_frequency = float(sampling_frequency)
+        self.window = get_window(window_function, self.window_size)
+        self.power = np.zeros((self.window_size // 2 + 1, self.n_channels))
+        self.n_segments = 0
+        self.buffer = np.empty((0, self.n_channels))
+
+    @property
+    def frequency(self):
+        """
+        Return the frequencies of the spectra.
+
+        Returns
+        -------
+        numpy.ndarray (float)
+        """
+        return fft.rfftfreq(self.window_size, 1.0 / self.sampling_frequency)
+
+    def add(self, data):
+        """
+        Add the next chunk of frames to the spectra.
+
+        Parameters
+        ----------
+        data : numpy.ndarray (float)
+            The sample data of shape (n_frames, n_channels), where invalid
+            samples should be set to zero.
+
+        Returns
+        -------
+        None
+        """
+        data = np.asarray(data, dtype=float)
+        if self.buffer.shape[0] > 0:
+            data = np.concatenate((self.buffer, data), axis=0)
+
+        n_segments = 0
+        if data.shape[0] >= self.window_size:
+            n_segments = (data.shape[0] - self.window_size) // self.step + 1
+
+        if n_segments > 0:
+            segments = np.lib.stride_tricks.sliding_window_view(
+                data, self.window_size, axis=0)[::self.step][:n_segments]
+            segments = segments - segments.mean(axis=-1, keepdims=True)
+            segments *= self.window
+            spectra = fft.rfft(segments, axis=-1)
+            self.power += np.sum(spectra.real ** 2 + spectra.imag ** 2,
+                                 axis=0).T
+            self.n_segments += n_segments
+
+        self.buffer = data[n_segments * self.step:].copy()
+
+    def get_power(self):
+        """
+        Return the averaged power spectral densities.
+
+        Returns
+        -------
+        power : numpy.ndarray (float)
+            The one-sided power spectral density of shape
+            (window_size // 2 + 1, n_channels).
+        """
+        scale = 1.0 / (self.sampling_frequency * np.sum(self.window ** 2))
+        power = self.power * scale / max(self.n_segments, 1)
+        if self.window_size % 2:
+            power[1:] *= 2
+        else:
+            power[1:-1] *= 2
+        return power
@@ -5,6 +5,7 @@ import os
 import astropy.table
 from astropy import units
 from astropy.io import fits
+import numba as nb
 import numpy as np
 import pytest
 
@@ -960,6 +961,47 @@ class TestIntegration(object):
         freq, spec = integ.get_spectra()
         assert np.all(np.argmax(spec, axis=0) == idx)
 
+    def test_get_streaming_spectra(self, populated_integration):
+        integ = populated_integration
+        integ.velocity_clip(sigma_clip=1.5, strict=True)
+        integ.frames.sample_flag[10:20, 5] = 1
+        expected_freq, expected = integ.get_spectra(window_size=200)
+        for chunk_size in [1, 333]:
+            integ.configuration.parse_key_value('write.streaming.frames',
+                                                str(chunk_size))
+            freq, spec = integ.get_streaming_spectra(window_size=200)
+            assert np.allclose(freq, expected_freq)
+            assert np.allclose(spec, expected)
+
+        freq, spec = integ.get_streaming_spectra()
+        assert freq.shape == (551,) and spec.shape == (551, 121)
+
+    def test_get_streaming_covariance(self, populated_integration):
+        integ = populated_integration
+        integ.frames.sample_flag[10:20, 5] = 1
+        integ.channels.data.flag[7] = 1
+        integ.configuration.parse_key_value('write.streaming.frames', '100')
+        expected = integ.get_covariance()
+        for syrk in [True, False]:
+            integ.configuration.parse_key_value('write.streaming.syrk',
+                                                str(syrk))
+            covariance = integ.get_streaming_covariance()
+            assert np.allclose(covariance, expected, rtol=1e-10, atol=0)
+
+        division = integ.channels.divisions['bias']
+        expected_group = integ.get_group_covariance(division, expected)
+        group = integ.get_streaming_group_covariance(division)
+        assert group.shape == expected_group.shape
+        assert np.allclose(group, expected_group, rtol=1e-10, atol=0)
+
+    def test_get_streaming_chunk_size(self, populated_integration):
+        integ = populated_integration
+        assert integ.get_streaming_chunk_size() == integ.size
+        integ.configuration.parse_key_value('write.streaming.frames', '100')
+        assert integ.get_streaming_chunk_size() == 100
+        integ.configuration.parse_key_value('write.streaming.frames', '0')
+        assert integ.get_streaming_chunk_size() == 1
+
     def test_write_products(self, tmpdir, capsys, reduced_hawc_scan):
         integ = reduced_hawc_scan.integrations[0]
         integ.configuration.work_path = str(tmpdir)
@@ -1066,6 +1108,32 @@ class TestIntegration(object):
             fname = f'covar-{file_id}.bias.fits'
             assert os.path.isfile(fname)
 
+    def test_write_covariances_streaming(self, tmpdir, mocker,
+                                         populated_integration):
+        integ = populated_integration
+        integ.configuration.work_path = str(tmpdir)
+        integ.configuration.parse_key_value('write.streaming', 'True')
+        full = mocker.patch.object(integ, 'get_covariance')
+        stream = mocker.spy(integ, 'get_streaming_covariance')
+
+        file_id = 'Simulation.1-1'
+        # Division covariances do not require the full covariance
+        integ.configuration.set_option('write.covar', 'bias')
+        integ.write_covariances()
+        assert os.path.isfile(str(tmpdir.join(f'covar-{file_id}.bias.fits')))
+        indices = np.concatenate(
+            [group.indices for group in integ.channels.divisions['bias']])
+        assert np.array_equal(stream.call_args[1]['channel_indices'],
+                              indices)
+
+        integ.configuration.set_option('write.covar', ['full', 'reduced'])
+        integ.write_covariances()
+        assert os.path.isfile(str(tmpdir.join(f'covar-{file_id}.fits')))
+        assert os.path.isfile(
+            str(tmpdir.join(f'covar-{file_id}.reduced.fits')))
+        assert stream.call_count == 2
+        full.assert_not_called()
+
     def test_write_covariance_to_file(self, tmpdir, populated_integration):
         integ = populated_integration
         integ.configuration.work_path = str(tmpdir)
@@ -1417,6 +1485,32 @@ class TestIntegration(object):
         # none of the methods have any effect with default params
         assert np.sum(integ.frames.is_flagged()) == 0
 
+    def test_despike_multi_resolution_blocked(self, populated_integration):
+        integ = populated_integration
+        integ.frames.data[500, 10] += 100.0
+        flags = []
+        for blocked in [False, True]:
+            test = integ.copy()
+            test.configuration.parse_key_value('despike.blocked',
+                                               str(blocked))
+            test.despike_multi_resolution(5.0)
+            flags.append(test.frames.sample_flag.copy())
+            assert (test.despike_buffer is not None) is blocked
+        assert np.any(flags[0] != 0)
+        assert np.array_equal(flags[0], flags[1])
+
+    def test_get_despike_buffer(self, populated_integration):
+        integ = populated_integration.copy()
+        integ.set_thread_count(2)
+        buffer = integ.get_despike_buffer(20, tile_size=8)
+        n_workers = min(2, nb.config.NUMBA_NUM_THREADS)
+        assert buffer.shape == (n_workers, 2, 8, integ.size)
+        assert integ.get_despike_buffer(20, tile_size=8) is buffer
+        # Workers and tiles are limited by the number of channels
+        assert integ.get_despike_buffer(3, tile_size=8).shape == (
+            1, 2, 3, integ.size)
+        assert integ.copy().despike_buffer is None
+
     def test_despike_neighbouring(self, capsys, populated_integration):
         integ = populated_integration.copy()
 
@@ -1879,6 +1973,42 @@ class TestIntegration(object):
         assert integ.perform('test') is False
         assert integ.comments == expected
 
+    def test_perform_fused(self, populated_integration):
+        integ = populated_integration
+        integ.validate()
+        integ.comments = None
+
+        for first in ['offsets', 'drifts']:
+            expected, fused = integ.copy(), integ.copy()
+            # Dependents are shared between copies
+            expected.dependents, fused.dependents = {}, {}
+            expected.perform(first)
+            expected.perform('weighting')
+            assert fused.perform(f'{first}+weighting') is True
+            assert np.array_equal(fused.frames.data, expected.frames.data,
+                                  equal_nan=True)
+            assert np.array_equal(fused.channels.data.weight,
+                                  expected.channels.data.weight)
+            assert np.array_equal(fused.channels.data.dof,
+                                  expected.channels.data.dof)
+            assert np.array_equal(fused.channels.data.offset,
+                                  expected.channels.data.offset)
+            assert np.array_equal(fused.channels.data.flag,
+                                  expected.channels.data.flag)
+            assert 'W' in fused.comments
+
+        # Non-RMS weighting is performed one task at a time
+        integ.configuration.set_option('weighting.method', 'differential')
+        integ.comments = []
+        assert integ.perform('drifts+weighting') is True
+        assert 'w' in integ.comments
+
+        # As are tasks that cannot be fused
+        integ.comments = []
+        assert integ.perform('weighting+test') is True
+        assert integ.comments[0] == 'w'
+        assert integ.perform('test+test') is False
+
     def test_get_fits_data(self, populated_integration):
         integ = populated_integration
         integ.setup_filters()
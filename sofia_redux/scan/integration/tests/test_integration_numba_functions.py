@@ -631,6 +631,45 @@ def test_despike_multi_resolution():
     assert np.sum(sample_flags) == 0
 
 
+
+def test_despike_multi_resolution_blocked():
+    rand = np.random.RandomState(3)
+    nframe = 300
+    nchannel = 21
+    frame_data = rand.normal(size=(nframe, nchannel))
+    frames = rand.randint(0, nframe, 30)
+    channels = rand.randint(0, nchannel, 30)
+    frame_data[frames, channels] = 20.0
+    sample_flags = np.zeros((nframe, nchannel), dtype=int)
+    sample_flags[frames[:10], channels[:10]] = 2
+    sample_flags[rand.randint(0, nframe, 30), channels] |= 1
+    frame_valid = rand.random(nframe) > 0.05
+    weight_valid = frame_valid & (rand.random(nframe) > 0.05)
+    frame_weight = rand.random(nframe) + 0.5
+    channel_indices = np.array([0, 2, 3, 5, 8, 9, 10, 13, 14, 17, 20])
+    spike_flag = 1
+    level = 4.0
+    max_block_size = 16
+
+    expected_flags = sample_flags.copy()
+    timestream_data, timestream_weight = nf.get_weighted_timestream(
+        frame_data, expected_flags, weight_valid, frame_weight,
+        channel_indices)
+    expected = nf.despike_multi_resolution(
+        timestream_data, timestream_weight, expected_flags, channel_indices,
+        frame_valid, level, spike_flag, max_block_size)
+    assert expected > 0
+
+    # Results are independent of the number of workers and tile size
+    for workers, tile_size in [(1, 1), (1, 4), (3, 2), (2, 16)]:
+        flags = sample_flags.copy()
+        workspace = np.full((workers, 2, tile_size, nframe), np.nan)
+        nflag = nf.despike_multi_resolution_blocked(
+            frame_data, flags, channel_indices, frame_valid, weight_valid,
+            frame_weight, level, spike_flag, max_block_size, workspace)
+        assert nflag == expected
+        assert np.array_equal(flags, expected_flags)
+
 def test_flagged_channels_per_frame():
     nframe = 10
     nchannel = 20
@@ -952,6 +991,60 @@ def test_level():
     assert np.allclose(frame_dependents, 1)
 
 
+def test_remove_channel_drifts_with_rms_weights():
+    nframe = 50
+    nchannel = 20
+    rand = np.random.RandomState(1)
+    (frame_data, frame_dof, frame_weight,
+     frame_valid, frame_dependents, frame_flags,
+     frame_weight_flag, frame_dof_flag,
+     channel_weights, channel_indices, channel_flags,
+     time_weight_flag, sample_flags) = make_frame_data(nframe, nchannel)
+    frame_data = rand.normal(loc=2.0, size=(nframe, nchannel))
+    frame_data[3, 4] = np.nan
+    frame_weight = rand.uniform(0.5, 1.5, nframe)
+    frame_weight[7] = 0
+    frame_valid[-2:] = False
+    sample_flags[:, 0] = 1
+    sample_flags[10:12, 5] = 1
+    modeling_frames = np.full(nframe, False)
+    modeling_frames[20] = True
+    weight_frames = frame_valid.copy()
+    weight_frames[30] = False
+    channel_filtering = np.full(nchannel, 1.0)
+    weight_channels = np.arange(2, nchannel, 2)
+    weight_index = np.full(nchannel, -1)
+    weight_index[weight_channels] = np.arange(weight_channels.size)
+
+    for robust in [False, True]:
+        data1, data2 = frame_data.copy(), frame_data.copy()
+        fdep1, fdep2 = frame_dependents.copy(), frame_dependents.copy()
+        cdep1, cdep2 = np.zeros(nchannel), np.zeros(nchannel)
+
+        offset, weight = nf.remove_channel_drifts(
+            data1, frame_weight, frame_valid, modeling_frames,
+            sample_flags, 16, channel_filtering, fdep1, cdep1,
+            channel_indices, robust=robust)
+        var_sum, var_weight = nf.rms_channel_weights(
+            data1, frame_weight, weight_frames, sample_flags,
+            weight_channels)
+
+        result = nf.remove_channel_drifts_with_rms_weights(
+            data2, frame_weight, frame_valid, modeling_frames,
+            sample_flags, 16, channel_filtering, fdep2, cdep2,
+            channel_indices, weight_frames, weight_index,
+            weight_channels.size, robust=robust)
+
+        # identical results in a single pass
+        assert np.array_equal(result[0], offset, equal_nan=True)
+        assert np.array_equal(result[1], weight)
+        assert np.array_equal(result[2], var_sum)
+        assert np.array_equal(result[3], var_weight)
+        assert np.array_equal(data1, data2, equal_nan=True)
+        assert np.array_equal(fdep1, fdep2)
+        assert np.array_equal(cdep1, cdep2)
+
+
 def test_apply_drifts_to_channel_data():
     nframe = 30
     nchannel = 20
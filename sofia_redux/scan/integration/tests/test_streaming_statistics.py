@@ -0,0 +1,93 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import numpy as np
+import pytest
+from scipy.signal import welch
+
+from sofia_redux.scan.integration import integration_numba_functions as nf
+from sofia_redux.scan.integration.streaming_statistics import (
+    CovarianceAccumulator, SpectrumAccumulator)
+
+
+@pytest.fixture
+def samples():
+    rand = np.random.RandomState(2)
+    n_frames, n_channels = 500, 12
+    data = rand.normal(size=(n_frames, n_channels))
+    data += rand.normal(size=(n_frames, 1))  # correlated component
+    sample_flags = (rand.random((n_frames, n_channels)) < 0.05).astype(int)
+    frame_valid = rand.random(n_frames) > 0.05
+    frame_flags = (rand.random(n_frames) < 0.05).astype(int) * 4
+    frame_weight = rand.random(n_frames) + 0.5
+    channel_flags = np.zeros(n_channels, dtype=int)
+    channel_flags[3] = 1
+    channel_weight = rand.random(n_channels) + 1
+    return (data, sample_flags, frame_valid, frame_flags, frame_weight,
+            channel_flags, channel_weight)
+
+
+class TestCovarianceAccumulator(object):
+
+    @pytest.mark.parametrize('use_syrk', [True, False])
+    def test_get_covariance(self, samples, use_syrk):
+        (data, sample_flags, frame_valid, frame_flags, frame_weight,
+         channel_flags, channel_weight) = samples
+        expected = nf.get_covariance(
+            frame_data=data, frame_valid=frame_valid,
+            frame_weight=frame_weight, channel_flags=channel_flags,
+            channel_weight=channel_weight, sample_flags=sample_flags,
+            frame_flags=frame_flags, source_flags=4)
+
+        valid = (sample_flags == 0) & (channel_flags == 0)[None]
+        valid &= (frame_valid & (frame_flags & 4 == 0))[:, None]
+        n_channels = data.shape[1]
+        for chunk_size in [1, 64, 500]:
+            accumulator = CovarianceAccumulator(n_channels, use_syrk=use_syrk)
+            assert accumulator.nbytes == 2 * n_channels ** 2 * 8
+            for start in range(0, data.shape[0], chunk_size):
+                end = start + chunk_size
+                accumulator.add(data[start:end], valid[start:end],
+                                frame_weight[start:end])
+            accumulator.add(data[:0], valid[:0], frame_weight[:0])
+            assert accumulator.n_frames == data.shape[0]
+            covariance = accumulator.get_covariance(channel_weight)
+            assert np.allclose(covariance, expected, rtol=1e-12, atol=1e-14)
+            assert np.all(covariance[3] == 0)
+            assert np.all(np.diag(covariance) == 0)
+
+    def test_negative_weights(self, samples):
+        data, sample_flags = samples[:2]
+        valid = sample_flags == 0
+        frame_weight = np.full(data.shape[0], -1.0)
+        channel_weight = np.ones(data.shape[1])
+        syrk = CovarianceAccumulator(data.shape[1], use_syrk=True)
+        syrk.add(data, valid, frame_weight)
+        gemm = CovarianceAccumulator(data.shape[1], use_syrk=False)
+        gemm.add(data, valid, frame_weight)
+        assert np.allclose(syrk.get_covariance(channel_weight),
+                           gemm.get_covariance(channel_weight))
+
+
+class TestSpectrumAccumulator(object):
+
+    @pytest.mark.parametrize('window_size', [1, 31, 64])
+    def test_get_power(self, samples, window_size):
+        data = samples[0]
+        frequency, expected = welch(data, fs=10.0, window='hamming',
+                                    nperseg=window_size, scaling='density',
+                                    average='mean', axis=0)
+        for chunk_size in [7, 100, 500]:
+            accumulator = SpectrumAccumulator(
+                data.shape[1], window_function='hamming',
+                window_size=window_size, sampling_frequency=10.0)
+            for start in range(0, data.shape[0], chunk_size):
+                accumulator.add(data[start:start + chunk_size])
+            assert np.allclose(accumulator.frequency, frequency)
+            assert np.allclose(accumulator.get_power(), expected)
+
+    def test_short_data(self):
+        accumulator = SpectrumAccumulator(2, window_size=10)
+        accumulator.add(np.ones((5, 2)))
+        assert accumulator.n_segments == 0
+        assert accumulator.buffer.shape == (5, 2)
+        assert np.all(accumulator.get_power() == 0)
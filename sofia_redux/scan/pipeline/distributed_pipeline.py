@@ -0,0 +1,228 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+from astropy import log
+import cloudpickle
+import gc
+
+from sofia_redux.scan.pipeline.pipeline import Pipeline
+from sofia_redux.scan.reduction.distributed import run_tasks
+from sofia_redux.scan.reduction.profiler import (
+    ReductionProfiler, profile_step)
+
+__all__ = ['DistributedPipeline']
+
+
+class DistributedPipeline(Pipeline):
+
+    def __init__(self, reduction, transport=None):
+        """
+        Initialize a reduction pipeline running scans on distributed workers.
+
+        At each iteration, every scan is sent to a worker over a message
+        transport (see :mod:`sofia_redux.scan.reduction.distributed`)
+        together with the pipeline tasks to perform.  The worker performs
+        the tasks, processes a scan source model from the result, and returns
+        both the updated scan and the scan source model.  Scan source models
+        are then added onto the reduction source on the coordinator in scan
+        order, so that the source model is reduced exactly as it would be
+        for a serial reduction.  Source processing and synchronization
+        remain on the coordinator.
+
+        Parameters
+        ----------
+        reduction : sofia_redux.scan.reduction.reduction.Reduction
+        transport : Transport, optional
+            The transport over which scans are sent to workers.  If not
+            supplied, the transport of the reduction is used.
+        """
+        super().__init__(reduction)
+        self.transport = transport
+
+    def get_transport(self):
+        """
+        Return the transport over which scans are sent to workers.
+
+        Returns
+        -------
+        Transport or None
+        """
+        if self.transport is not None:
+            return self.transport
+        return getattr(self.reduction, 'transport', None)
+
+    def iterate(self):
+        """
+        Perform an iteration, processing each scan on a distributed worker.
+
+        If no transport is available, the iteration is performed locally.
+
+        Returns
+        -------
+        None
+        """
+        transport = self.get_transport()
+        if transport is None:
+            log.debug("No distributed transport: iterating locally.")
+            super().iterate()
+            return
+
+        timeout = self.configuration.get_float('distributed.timeout',
+                                               default=None)
+        delete = self.configuration.get_bool('source.delete_scan')
+        profiler = getattr(self.reduction, 'profiler', None)
+
+        source = None
+        if self.reduction.source is not None and self.scan_source is not None:
+            source = self.scan_source.copy()
+            source.renew()
+            source.reduction = None
+            source.scans = None
+            source.hdul = None
+            source.info = None
+
+        source_models = [scan.source_model for scan in self.scans]
+        arguments = []
+        try:
+            for scan in self.scans:
+                scan.source_model = source
+                if profiler is None:
+                    scan_profiler = None
+                else:
+                    scan_profiler = ReductionProfiler()
+                    scan_profiler.round = profiler.round
+                arguments.append(cloudpickle.dumps(
+                    (scan, self.ordering, self.parallel_tasks,
+                     scan_profiler, delete)))
+        finally:
+            for scan, source_model in zip(self.scans, source_models):
+                scan.source_model = source_model
+        del source
+
+        results = run_tasks(transport, self.process_scan_remote, arguments,
+                            timeout=timeout)
+        del arguments
+
+        scans = []
+        for i, (scan, model, scan_profiler) in enumerate(results):
+            if not (delete and model is not None):
+                scan.source_model = source_models[i]
+            scans.append(scan)
+            if scan_profiler is not None and profiler is not None:
+                with profiler.lock:
+                    profiler.records.extend(scan_profiler.records)
+        self.replace_scans(self.scans, scans)
+
+        del source_models
+        gc.collect()
+
+        with self.reduction.profile('source.update'):
+            for scan, model, _ in results:
+                if model is None:
+                    continue
+                self.reduction.source.add_model(cloudpickle.loads(model),
+                                                weight=scan.weight)
+        del results
+        gc.collect()
+
+    def replace_scans(self, old_scans, new_scans):
+        """
+        Replace all references to scans with their processed versions.
+
+        Scans returned by distributed workers are new objects, so must
+        replace the original scans in the pipeline, the reduction, and the
+        source models.  Each list of scans is updated in-place.
+
+        Parameters
+        ----------
+        old_scans : list (Scan)
+            The original scans.
+        new_scans : list (Scan)
+            The processed scans in the same order as `old_scans`.
+
+        Returns
+        -------
+        None
+        """
+        replacements = {id(old): new for old, new
+                        in zip(list(old_scans), new_scans)}
+        scan_lists = [self.scans, getattr(self.reduction, 'scans', None)]
+        for source in [getattr(self.reduction, 'source', None),
+                       self.scan_source]:
+            if source is not None:
+                scan_lists.append(source.scans)
+
+        updated = set()
+        for scans in scan_lists:
+            if not isinstance(scans, list) or id(scans) in updated:
+                continue
+            updated.add(id(scans))
+            for i, scan in enumerate(scans):
+                scans[i] = replacements.get(id(scan), scan)
+
+    @classmethod
+    def process_scan_remote(cls, payload):
+        """
+        Perform all pipeline tasks and source processing for a single scan.
+
+        This is run by distributed workers.  The pipeline tasks are performed
+        as in :func:`Pipeline.perform_tasks_for_scans`.  If the source should
+        be updated, the renewed source model sent with the scan is processed
+        as in :func:`Pipeline.update_source`, and pickled before scan
+        post-processing so that it may be added onto the reduction source by
+        the coordinator.
+
+        Parameters
+        ----------
+        payload : bytes
+            The pickled (scan, ordering, parallel_tasks, profiler, delete)
+            tuple, where the scan `source_model` attribute contains the
+            renewed source model (or `None`), and delete indicates whether to
+            clear certain data from the scan following source processing.
+
+        Returns
+        -------
+        scan, model, profiler : Scan, bytes or None, ReductionProfiler or None
+            The processed scan with no source model, the pickled scan source
+            model, or `None` if the source was not updated, and the profiler
+            containing any recorded steps.
+        """
+        scan, ordering, parallel_tasks, profiler, delete = cloudpickle.loads(
+            payload)
+        source = scan.source_model
+        if source is not None:
+            source.set_info(scan.info)
+        scan = cls.perform_tasks_for_scans(
+            ([scan], ordering, parallel_tasks, profiler, None), 0)
+
+        model = None
+        if (source is not None and 'source' in ordering
+                and scan.configuration.get_bool('source')):
+            with profile_step(profiler, 'source.scan', scan=scan.get_id()):
+                source.scans = [scan]
+                for integration in scan.integrations:
+                    if integration.has_option('jackknife'):
+                        sign = '+' if integration.gain > 0 else '-'
+                        integration.comments.append(sign)
+                    elif integration.gain < 0:
+                        integration.comments.append('-')
+                    source.add_integration(integration)
+
+                if scan.get_source_generation() > 0:
+                    source.enable_level = False
+
+                source.process_scan(scan)
+                source.info = None
+                source.scans = None
+                model = cloudpickle.dumps(source)
+
+                source.set_info(scan.info)
+                source.scans = [scan]
+                source.post_process_scan(scan)
+
+                if delete:
+                    for integration in scan.integrations:
+                        integration.frames.map_index = None
+
+        scan.source_model = None
+        scan.info.set_parent(scan)
+        return scan, model, profiler
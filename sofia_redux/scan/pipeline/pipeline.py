@@ -6,13 +6,21 @@ import gc
 import numpy as np
 import os
 import cloudpickle
+import queue
 import shutil
 import tempfile
 
+from sofia_redux.scan.pipeline.scheduler import ThreadScheduler
+from sofia_redux.scan.reduction.profiler import profile_step
 from sofia_redux.toolkit.utilities import multiprocessing
 
 __all__ = ['Pipeline']
 
+# Tasks that may be performed in a single pass over the frame data when
+# they immediately follow the keyed task.
+FUSIBLE_TASKS = {'offsets': ['weighting'],
+                 'drifts': ['weighting']}
+
 
 class Pipeline(ABC):
 
@@ -152,6 +160,35 @@ class Pipeline(ABC):
         """
         self.ordering = ordering
 
+    @staticmethod
+    def plan_tasks(tasks):
+        """
+        Group consecutive tasks that may be performed in a single pass.
+
+        Tasks that may be fused are joined by a '+' character, e.g.
+        ['drifts', 'weighting', 'despike'] becomes
+        ['drifts+weighting', 'despike'].  Fused tasks are passed to
+        :func:`Integration.perform_fused` by the scans.
+
+        Parameters
+        ----------
+        tasks : list (str)
+            The tasks to perform in order.
+
+        Returns
+        -------
+        planned_tasks : list (str)
+        """
+        planned = []
+        for task in tasks:
+            if len(planned) > 0:
+                last = planned[-1].split('+')[-1]
+                if task in FUSIBLE_TASKS.get(last, []):
+                    planned[-1] += f'+{task}'
+                    continue
+            planned.append(task)
+        return planned
+
     def update_source(self, scan):
         """
         Update the reduction source model with a scan.
@@ -199,7 +236,6 @@ class Pipeline(ABC):
         None
         """
         n_scans = len(self.scans)
-        args = self.scans, self.ordering, self.parallel_tasks
         kwargs = None
 
         if self.configuration.get_bool('parallel.scans'):
@@ -207,19 +243,36 @@ class Pipeline(ABC):
         else:
             scan_jobs = 1
 
+        if scan_jobs > 1 and self.configuration.get_bool('parallel.dynamic'):
+            scheduler = ThreadScheduler(self.available_jobs, scan_jobs,
+                                        n_scans)
+            order = scheduler.get_scan_order(self.scans)
+        else:
+            scheduler = None
+            order = list(range(n_scans))
+
+        args = (self.scans, self.ordering, self.parallel_tasks,
+                getattr(self.reduction, 'profiler', None), scheduler)
+
         # max_bytes set to None in order to disable memory mapping
         # Memory mapping does not allow numba to modify arrays in-place.
-        self.scans = multiprocessing.multitask(
-            self.perform_tasks_for_scans, range(n_scans), args, kwargs,
+        scans = multiprocessing.multitask(
+            self.perform_tasks_for_scans, order, args, kwargs,
             jobs=scan_jobs, max_nbytes=None, force_threading=True,
             logger=log)
 
+        self.scans = [None] * n_scans
+        for i, scan in zip(order, scans):
+            self.scans[i] = scan
+
         gc.collect()
 
         if self.configuration.get_bool('parallel.source'):
             if ('source' in self.ordering
                     and self.configuration.get_bool('source')):
-                self.update_source_parallel_scans()
+                with profile_step(getattr(self.reduction, 'profiler', None),
+                                  'source.update'):
+                    self.update_source_parallel_scans()
         else:
             self.update_source_serial_scans()
 
@@ -231,15 +284,126 @@ class Pipeline(ABC):
         -------
         None
         """
+        profiler = getattr(self.reduction, 'profiler', None)
         for i, scan in enumerate(self.scans):
             if ('source' in self.ordering
                     and scan.configuration.get_bool('source')):
-                self.update_source(scan)
+                with profile_step(profiler, 'source.update',
+                                  scan=scan.get_id()):
+                    self.update_source(scan)
 
     def update_source_parallel_scans(self):
         """
         Update the source in parallel.
 
+        If the source model supports merging of accumulated models (via a
+        `merge_accumulate` method), each parallel job adds processed scan
+        models into its own partial sum held in memory, and the partial sums
+        are then merged onto the reduction source.  Otherwise, processed scan
+        models are passed back to the main thread via temporary files.
+
+        Returns
+        -------
+        None
+        """
+        if not callable(getattr(self.reduction.source, 'merge_accumulate',
+                                None)):
+            self.update_source_parallel_files()
+            return
+
+        n_scans = len(self.scans)
+        scan_jobs = int(np.clip(n_scans, 1, self.parallel_scans))
+        delete = self.configuration.get_bool('source.delete_scan')
+
+        renewed_source = self.scan_source.copy()
+        renewed_source.renew()
+        workspaces = queue.Queue(maxsize=scan_jobs)
+        accumulators = []
+        for _ in range(scan_jobs):
+            accumulator = renewed_source.copy()
+            accumulators.append(accumulator)
+            workspaces.put((renewed_source.copy(), accumulator))
+        del renewed_source
+
+        multiprocessing.multitask(
+            self.do_accumulate, range(n_scans),
+            (self.scans, workspaces, delete), None,
+            jobs=scan_jobs, max_nbytes=None, force_threading=True, logger=log)
+
+        source = self.reduction.source
+        for accumulator in accumulators:
+            if accumulator.integration_time == 0:
+                continue
+            source.generation = max(source.generation, accumulator.generation)
+            source.integration_time += accumulator.integration_time
+            source.enable_level &= accumulator.enable_level
+            source.enable_weighting &= accumulator.enable_weighting
+            source.enable_bias &= accumulator.enable_bias
+            source.merge_accumulate(accumulator)
+
+        del accumulators
+        gc.collect()
+
+    @classmethod
+    def do_accumulate(cls, args, block):
+        """
+        Thread safe source processing of a scan onto a partial sum.
+
+        A scan source model and accumulator pair is taken from the
+        `workspaces` queue for the duration of the processing, so that no two
+        jobs ever write to the same arrays.  The scan source model is renewed
+        and processed for the scan, and then added onto the accumulator with
+        the scan weight, exactly as in :func:`Pipeline.update_source`.
+
+        Parameters
+        ----------
+        args : 3-tuple
+            args[0] = scans (list (Scan))
+            args[1] = workspaces (queue.Queue (tuple (SourceModel)))
+            args[2] = Whether to clear certain data from the scan (bool)
+        block : int
+            The index of the scan to process.
+
+        Returns
+        -------
+        None
+        """
+        scans, workspaces, delete = args
+        scan = scans[block]
+        source, accumulator = workspaces.get()
+        try:
+            source.renew()
+            source.set_info(scan.info)
+            for integration in scan.integrations:
+                if integration.has_option('jackknife'):
+                    sign = '+' if integration.gain > 0 else '-'
+                    integration.comments.append(sign)
+                elif integration.gain < 0:
+                    integration.comments.append('-')
+                source.add_integration(integration)
+
+            if scan.get_source_generation() > 0:
+                source.enable_level = False
+
+            source.process_scan(scan)
+            accumulator.add_model(source, weight=scan.weight)
+            source.post_process_scan(scan)
+
+            if delete:
+                scan.source_model = None
+                for integration in scan.integrations:
+                    integration.frames.map_index = None
+        finally:
+            workspaces.put((source, accumulator))
+
+    def update_source_parallel_files(self):
+        """
+        Update the source in parallel, passing scan models via files.
+
+        Processed scan source models are pickled to a temporary directory
+        and added to the reduction source in the main thread.  This is used
+        for source models that do not support merging of accumulated models.
+
         Returns
         -------
         None
@@ -362,19 +526,46 @@ class Pipeline(ABC):
         Perform a single iteration of all tasks for all scans for the
         pipeline.
 
+        If a thread scheduler is supplied, the number of threads available
+        to each integration is updated from the scheduler before each task,
+        so that scans still being processed make use of the threads released
+        by scans that have already finished.
+
+        Parameters
+        ----------
+        args : 5-tuple
+            args[0] = scans (list (Scan))
+            args[1] = ordering (list (str))
+            args[2] = The number of parallel tasks per scan (int)
+            args[3] = profiler (ReductionProfiler or None)
+            args[4] = scheduler (ThreadScheduler or None)
+        block : int
+            The index of the scan to process.
+
         Returns
         -------
-        None
+        scan : Scan
         """
-        scans, ordering, parallel_tasks = args
+        scans, ordering, parallel_tasks, profiler, scheduler = args
         scan = scans[block]
         for integration in scan.integrations:
             integration.next_iteration()
             integration.set_thread_count(parallel_tasks)
 
-        for task in ordering:
-            if scan.has_option(task):
+        tasks = [task for task in ordering if scan.has_option(task)]
+        if scan.configuration.get_bool('fuse'):
+            tasks = cls.plan_tasks(tasks)
+
+        try:
+            for task in tasks:
+                if scheduler is not None:
+                    threads = scheduler.get_thread_count()
+                    for integration in scan.integrations:
+                        integration.set_thread_count(threads)
                 log.debug(f"Performing task: {task}")
-                scan.perform(task)
+                scan.perform(task, profiler=profiler)
+        finally:
+            if scheduler is not None:
+                scheduler.finish()
 
         return scan
@@ -0,0 +1,111 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import numpy as np
+import threading
+
+__all__ = ['ThreadScheduler']
+
+
+class ThreadScheduler(object):
+
+    def __init__(self, threads, workers, n_scans):
+        """
+        Distribute threads between scans reduced in parallel.
+
+        The reduction assigns a fixed number of parallel scan jobs
+        (workers) and a fixed number of in-scan threads for each job.  Once
+        there are fewer scans remaining than workers, the threads belonging
+        to idle workers are wasted.  The scheduler keeps track of the scans
+        that are still being processed during an iteration, and reassigns
+        the total thread count evenly between them as others finish.
+
+        Parameters
+        ----------
+        threads : int
+            The total number of threads available for the iteration (the
+            number of parallel scans multiplied by the number of parallel
+            tasks).
+        workers : int
+            The number of scans processed in parallel.
+        n_scans : int
+            The total number of scans to process.
+        """
+        self.threads = max(1, int(threads))
+        self.workers = max(1, int(workers))
+        self.remaining = max(0, int(n_scans))
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_workload(scan):
+        """
+        Return an estimate of the processing workload for a scan.
+
+        Parameters
+        ----------
+        scan : Scan
+
+        Returns
+        -------
+        workload : int
+            The total number of samples (frames times channels) in all scan
+            integrations.
+        """
+        workload = 0
+        for integration in scan.integrations:
+            if integration.frames is None or integration.channels is None:
+                continue
+            workload += integration.size * integration.channels.size
+        return workload
+
+    @classmethod
+    def get_scan_order(cls, scans):
+        """
+        Return the order in which scans should be dispatched to workers.
+
+        Scans are processed in order of decreasing workload, so that the
+        largest scans are not left running alone at the end of an
+        iteration.
+
+        Parameters
+        ----------
+        scans : list (Scan)
+
+        Returns
+        -------
+        order : list (int)
+            The indices of `scans` in the order they should be processed.
+        """
+        workloads = np.asarray([cls.get_workload(scan) for scan in scans])
+        return [int(i) for i in np.argsort(-workloads, kind='stable')]
+
+    def get_thread_count(self):
+        """
+        Return the number of threads available to each remaining scan.
+
+        Returns
+        -------
+        threads : int
+        """
+        with self.lock:
+            active = max(1, min(self.workers, self.remaining))
+        return max(1, self.threads // active)
+
+    def finish(self):
+        """
+        Mark a scan as finished, releasing its threads to remaining scans.
+
+        Returns
+        -------
+        None
+        """
+        with self.lock:
+            self.remaining = max(0, self.remaining - 1)
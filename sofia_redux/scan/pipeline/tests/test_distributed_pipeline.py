@@ -0,0 +1,123 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import cloudpickle
+import numpy as np
+import threading
+
+from sofia_redux.scan.pipeline.distributed_pipeline import \
+    DistributedPipeline
+from sofia_redux.scan.pipeline.pipeline import Pipeline
+from sofia_redux.scan.reduction.distributed import QueueTransport, run_worker
+from sofia_redux.scan.reduction.profiler import ReductionProfiler
+from sofia_redux.scan.reduction.reduction import Reduction
+
+
+def two_scan_pipe(scan_file, pipeline_class=Pipeline):
+    reduction = Reduction('example')
+    reduction.read_scans([scan_file, scan_file])
+    reduction.validate()
+    pipe = pipeline_class(reduction)
+    pipe.set_source_model(reduction.source)
+    pipe.ordering = ['offsets', 'drifts', 'weighting', 'source']
+    pipe.scans = list(reduction.scans)
+    return pipe
+
+
+class TestDistributedPipeline(object):
+
+    def test_get_transport(self):
+        reduction = Reduction(None)
+        pipe = DistributedPipeline(reduction)
+        assert pipe.get_transport() is None
+        reduction.transport = 'a'
+        assert pipe.get_transport() == 'a'
+        pipe.transport = 'b'
+        assert pipe.get_transport() == 'b'
+
+    def test_iterate(self, scan_file):
+        serial = two_scan_pipe(scan_file)
+        serial.iterate()
+        expected = serial.reduction.source.map
+
+        transport = QueueTransport()
+        transport.start()
+        worker = threading.Thread(target=run_worker, args=(transport,),
+                                  daemon=True)
+        worker.start()
+
+        pipe = two_scan_pipe(scan_file, DistributedPipeline)
+        reduction = pipe.reduction
+        reduction.profiler = ReductionProfiler()
+        reduction.profiler.round = 1
+        pipe.transport = transport
+        old_scans = list(pipe.scans)
+        try:
+            pipe.iterate()
+        finally:
+            transport.send_task('stop', None)
+            worker.join(timeout=10)
+
+        # Processed scans replace the originals everywhere
+        for i, scan in enumerate(pipe.scans):
+            assert scan is not old_scans[i]
+            assert reduction.scans[i] is scan
+            assert scan.source_model is reduction.source
+            assert np.array_equal(scan[0].frames.data,
+                                  serial.scans[i][0].frames.data,
+                                  equal_nan=True)
+        assert reduction.source.scans == pipe.scans
+
+        source = reduction.source
+        expected_time = serial.reduction.source.integration_time
+        assert source.integration_time == expected_time
+        assert np.array_equal(source.map.data, expected.data, equal_nan=True)
+        assert np.array_equal(source.map.weight.data, expected.weight.data)
+        assert np.array_equal(source.map.exposure.data,
+                              expected.exposure.data)
+
+        # Worker profiles are returned to the coordinator
+        steps = set(record['step'] for record in reduction.profiler.records)
+        assert {'drifts', 'weighting', 'source.scan',
+                'source.update'}.issubset(steps)
+        assert all(record['round'] == 1
+                   for record in reduction.profiler.records)
+
+    def test_iterate_local(self, scan_file, mocker):
+        pipe = two_scan_pipe(scan_file, DistributedPipeline)
+        local = mocker.patch.object(Pipeline, 'iterate')
+        pipe.iterate()
+        local.assert_called_once()
+
+    def test_replace_scans(self):
+        reduction = Reduction(None)
+        pipe = DistributedPipeline(reduction)
+        reduction.scans = ['a', 'b', 'c']
+        pipe.scans = ['a', 'b']
+        pipe.replace_scans(pipe.scans, ['x', 'y'])
+        assert pipe.scans == ['x', 'y']
+        assert reduction.scans == ['x', 'y', 'c']
+
+    def test_process_scan_remote(self, scan_file):
+        pipe = two_scan_pipe(scan_file, DistributedPipeline)
+        scan = pipe.scans[0]
+        integration = scan[0]
+        integration.gain = -1.0
+        source = pipe.scan_source.copy()
+        source.renew()
+        source.reduction = source.scans = source.info = source.hdul = None
+        scan.source_model = source
+        payload = (scan, ['source'], 1, None, True)
+        result, model, profiler = pipe.process_scan_remote(
+            cloudpickle.dumps(payload))
+        assert profiler is None
+        assert result.source_model is None
+        assert '-' in result[0].comments
+        assert result[0].frames.map_index is None
+        model = cloudpickle.loads(model)
+        assert model.info is None and model.scans is None
+        assert np.nansum(model.map.weight.data) > 0
+
+        # No source update
+        result, model, _ = pipe.process_scan_remote(
+            cloudpickle.dumps((scan, ['offsets'], 1, None, True)))
+        assert model is None
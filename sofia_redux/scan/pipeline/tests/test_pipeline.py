@@ -1,11 +1,14 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 
 import cloudpickle
+import numpy as np
 import os
 import pytest
+import queue
 
 from sofia_redux.scan.configuration.configuration import Configuration
 from sofia_redux.scan.pipeline.pipeline import Pipeline
+from sofia_redux.scan.reduction.profiler import ReductionProfiler
 from sofia_redux.scan.reduction.reduction import Reduction
 from sofia_redux.scan.source_models.astro_intensity_map \
     import AstroIntensityMap
@@ -23,6 +26,17 @@ def start_pipe(scan_file):
     return pipe
 
 
+def two_scan_pipe(scan_file):
+    reduction = Reduction('example')
+    reduction.read_scans([scan_file, scan_file])
+    reduction.validate()
+    pipe = Pipeline(reduction)
+    pipe.set_source_model(reduction.source)
+    pipe.ordering = ['source']
+    pipe.scans = reduction.scans
+    return pipe
+
+
 class TestPipeline(object):
 
     def test_parallel_scans(self):
@@ -122,6 +136,61 @@ class TestPipeline(object):
         pipe.set_ordering(['test', 'value'])
         assert pipe.ordering == ['test', 'value']
 
+    def test_plan_tasks(self):
+        tasks = ['offsets', 'drifts', 'correlated.obs-channels', 'weighting',
+                 'despike', 'source']
+        assert Pipeline.plan_tasks(tasks) == tasks
+        tasks = ['offsets', 'weighting', 'drifts', 'weighting', 'weighting',
+                 'despike']
+        assert Pipeline.plan_tasks(tasks) == [
+            'offsets+weighting', 'drifts+weighting', 'weighting', 'despike']
+        assert Pipeline.plan_tasks([]) == []
+
+    def test_perform_tasks_for_scans(self, scan_file):
+        ordering = ['drifts', 'weighting', 'despike']
+        data, weights, steps = [], [], []
+        for fuse in [False, True]:
+            reduction = Reduction('example')
+            reduction.read_scans(scan_file)
+            reduction.validate()
+            scan = reduction.scans[0]
+            scan.configuration.parse_key_value('fuse', str(fuse))
+            profiler = ReductionProfiler()
+            scan = Pipeline.perform_tasks_for_scans(
+                (reduction.scans, ordering, 1, profiler, None), 0)
+            data.append(scan[0].frames.data.copy())
+            weights.append(scan[0].channels.data.weight.copy())
+            steps.append([record['step'] for record in profiler.records])
+            assert profiler.records[0]['integration'] == '1'
+
+        # Tasks are profiled for each integration
+        assert steps[0] == ordering
+        assert steps[1] == ['drifts+weighting', 'despike']
+        assert np.array_equal(data[0], data[1], equal_nan=True)
+        assert np.array_equal(weights[0], weights[1])
+
+    def test_perform_fused_tasks(self, scan_file, mocker):
+        ordering = ['offsets', 'drifts', 'weighting', 'despike']
+        data, weights, fused = [], [], []
+        for fuse in [False, True]:
+            reduction = Reduction('example')
+            reduction.read_scans(scan_file)
+            reduction.validate()
+            # scans hold a copy of the reduction configuration
+            scan = reduction.scans[0]
+            scan.configuration.parse_key_value('fuse', str(fuse))
+            spy = mocker.spy(scan[0], 'perform_fused')
+            scan = Pipeline.perform_tasks_for_scans(
+                (reduction.scans, ordering, 1, None, None), 0)
+            fused.append([c.args[0] for c in spy.call_args_list])
+            data.append(scan[0].frames.data.copy())
+            weights.append(scan[0].channels.data.weight.copy())
+
+        assert fused[0] == []
+        assert fused[1] == [['drifts', 'weighting']]
+        assert np.array_equal(data[0], data[1], equal_nan=True)
+        assert np.array_equal(weights[0], weights[1])
+
     def test_update_source(self, scan_file):
         # no op if no reduction
         pipe = Pipeline(None)
@@ -172,6 +241,22 @@ class TestPipeline(object):
         pipe.configuration.parse_key_value('parallel.source', False)
         pipe.iterate()
 
+    def test_iterate_dynamic(self, scan_file):
+        pipe = two_scan_pipe(scan_file)
+        pipe.reduction.parallel_scans = 2
+        pipe.reduction.parallel_tasks = 3
+        pipe.ordering = ['offsets']
+        pipe.configuration.parse_key_value('parallel.scans', True)
+        pipe.configuration.parse_key_value('parallel.source', False)
+        pipe.configuration.parse_key_value('parallel.dynamic', True)
+        scans = list(pipe.scans)
+        pipe.iterate()
+        assert pipe.scans == scans
+        # The last scan to start a task may use all threads
+        counts = sorted(scan[0].get_thread_count() for scan in pipe.scans)
+        assert counts[0] == 3
+        assert counts[1] in [3, 6]
+
     def test_update_source_serial_scans(self, start_pipe):
         pipe = start_pipe
         pipe.configuration.parse_key_value('source', True)
@@ -181,6 +266,17 @@ class TestPipeline(object):
         pipe.update_source_serial_scans()
         assert scan.source_model is None
 
+    def test_update_source_serial_scans_no_reduction(self, start_pipe):
+        pipe = start_pipe
+        scan = pipe.scans[0]
+        scan.configuration.parse_key_value('source', True)
+        scan.configuration.parse_key_value('source.delete_scan', True)
+        source_model = scan.source_model
+        assert source_model is not None
+        pipe.reduction = None
+        pipe.update_source_serial_scans()
+        assert scan.source_model is source_model
+
     def test_do_process(self, start_pipe, tmpdir):
         pipe = start_pipe
         scans = pipe.scans
@@ -221,3 +317,62 @@ class TestPipeline(object):
         integration.gain = -1
         Pipeline.do_process(args, 0)
         assert '-' in integration.comments
+
+    def test_update_source_parallel_scans(self, scan_file, mocker):
+        serial = two_scan_pipe(scan_file)
+        serial.update_source_serial_scans()
+        expected = serial.reduction.source.map
+
+        pipe = two_scan_pipe(scan_file)
+        pipe.reduction.parallel_scans = 2
+        files = mocker.patch.object(pipe, 'update_source_parallel_files')
+        pipe.update_source_parallel_scans()
+        files.assert_not_called()
+        source = pipe.reduction.source
+        expected_time = serial.reduction.source.integration_time
+        assert source.integration_time == expected_time
+        assert np.allclose(source.map.data, expected.data, equal_nan=True)
+        assert np.allclose(source.map.weight.data, expected.weight.data)
+        assert np.allclose(source.map.exposure.data, expected.exposure.data)
+        assert all(s.weight == e.weight for s, e in zip(
+            pipe.scans, serial.scans))
+
+        # Fall back to files if models cannot be merged
+        pipe = two_scan_pipe(scan_file)
+        mocker.patch.object(pipe.reduction.source, 'merge_accumulate', None)
+        files = mocker.patch.object(pipe, 'update_source_parallel_files')
+        pipe.update_source_parallel_scans()
+        files.assert_called_once()
+
+    def test_update_source_parallel_files(self, scan_file):
+        pipe = two_scan_pipe(scan_file)
+        pipe.reduction.parallel_scans = 2
+        pipe.update_source_parallel_files()
+        assert np.nansum(pipe.reduction.source.map.weight.data) > 0
+
+    def test_do_accumulate(self, start_pipe):
+        pipe = start_pipe
+        scan = pipe.scans[0]
+        integration = scan[0]
+        integration.gain = -1.0
+        integration.source_generation = 2
+        source = pipe.scan_source.copy()
+        accumulator = source.copy()
+        accumulator.renew()
+        workspaces = queue.Queue()
+        workspaces.put((source, accumulator))
+
+        Pipeline.do_accumulate((pipe.scans, workspaces, True), 0)
+        assert workspaces.qsize() == 1
+        assert workspaces.get() == (source, accumulator)
+        assert not source.enable_level and not accumulator.enable_level
+        assert '-' in integration.comments
+        assert accumulator.integration_time > 0
+        assert np.nansum(accumulator.map.weight.data) > 0
+        assert scan.source_model is None
+
+        # Workspaces are always returned
+        workspaces.put((None, accumulator))
+        with pytest.raises(AttributeError):
+            Pipeline.do_accumulate((pipe.scans, workspaces, True), 0)
+        assert workspaces.qsize() == 1
@@ -0,0 +1,50 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import cloudpickle
+
+from sofia_redux.scan.pipeline.scheduler import ThreadScheduler
+from sofia_redux.scan.reduction.reduction import Reduction
+
+
+def test_init():
+    scheduler = ThreadScheduler(16, 4, 10)
+    assert scheduler.threads == 16
+    assert scheduler.workers == 4
+    assert scheduler.remaining == 10
+    scheduler = ThreadScheduler(0, 0, -1)
+    assert scheduler.threads == 1
+    assert scheduler.workers == 1
+    assert scheduler.remaining == 0
+
+
+def test_get_thread_count():
+    scheduler = ThreadScheduler(16, 4, 6)
+    counts = [scheduler.get_thread_count()]
+    for _ in range(6):
+        scheduler.finish()
+        counts.append(scheduler.get_thread_count())
+    assert counts == [4, 4, 4, 5, 8, 16, 16]
+    assert scheduler.remaining == 0
+
+
+def test_pickle():
+    scheduler = ThreadScheduler(8, 2, 3)
+    scheduler.finish()
+    new = cloudpickle.loads(cloudpickle.dumps(scheduler))
+    assert new.remaining == 2
+    assert new.get_thread_count() == 4
+    assert new.lock is not scheduler.lock
+
+
+def test_get_scan_order(scan_file):
+    reduction = Reduction('example')
+    reduction.read_scans([scan_file, scan_file])
+    scans = reduction.scans
+    workload = ThreadScheduler.get_workload(scans[0])
+    integration = scans[0][0]
+    assert workload == integration.size * integration.channels.size
+    assert ThreadScheduler.get_scan_order(scans) == [0, 1]
+
+    integration.frames = None
+    assert ThreadScheduler.get_workload(scans[0]) == 0
+    assert ThreadScheduler.get_scan_order(scans) == [1, 0]
@@ -0,0 +1,335 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+from astropy import log, units
+import cloudpickle
+import json
+import numpy as np
+import os
+import pickle
+import shutil
+import time
+
+from sofia_redux.scan.reduction.version import ReductionVersion
+
+__all__ = ['write_checkpoint', 'read_checkpoint', 'read_checkpoint_info',
+           'is_checkpoint']
+
+CHECKPOINT_VERSION = 1
+INFO_FILE = 'checkpoint.json'
+STATE_FILE = 'state.pkl'
+ARRAY_FILE = 'arrays.bin'
+ALIGNMENT = 64
+
+
+class _CheckpointPickler(cloudpickle.CloudPickler):
+
+    def __init__(self, file, array_file, reduction, min_bytes=1024):
+        """
+        Pickle reduction state with large arrays written to a separate file.
+
+        Standard numpy arrays and astropy Quantities larger than
+        `min_bytes` are appended to `array_file` as raw binary data
+        aligned on 64 byte boundaries, and only their location, shape and
+        type is written to the pickle stream.  Arrays referenced multiple
+        times are only written once.  The reduction itself, and its parent
+        reduction, are written as references so that state may be restored
+        onto an existing reduction.
+
+        Parameters
+        ----------
+        file : file-like
+            The open file to which the pickle stream will be written.
+        array_file : file-like
+            The open binary file to which array data will be written.
+        reduction : Reduction
+            The reduction being saved.
+        min_bytes : int, optional
+            Arrays smaller than this are pickled as usual.
+        """
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.array_file = array_file
+        self.reduction = reduction
+        self.min_bytes = int(min_bytes)
+        self.written = {}
+        self.array_bytes = 0
+
+    def write_array(self, array):
+        """
+        Write an array to the array file.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+
+        Returns
+        -------
+        offset, shape, dtype, order
+            The location and layout of the array in the array file.
+        """
+        if array.flags.f_contiguous and not array.flags.c_contiguous:
+            order = 'F'
+            data = np.ascontiguousarray(array.T)
+        else:
+            order = 'C'
+            data = np.ascontiguousarray(array)
+
+        offset = self.array_file.tell()
+        padding = -offset % ALIGNMENT
+        if padding > 0:
+            self.array_file.write(b'\0' * padding)
+            offset += padding
+        self.array_file.write(data.data)
+        self.array_bytes += array.nbytes
+        return offset, array.shape, array.dtype.str, order
+
+    def persistent_id(self, obj):
+        """
+        Return a persistent ID for large arrays and reduction references.
+
+        Parameters
+        ----------
+        obj : object
+
+        Returns
+        -------
+        pid : tuple or None
+            `None` if `obj` should be pickled as usual.
+        """
+        if obj is self.reduction:
+            return 'reduction',
+        if (obj is not None
+                and obj is getattr(self.reduction, 'parent_reduction', None)):
+            return 'parent',
+
+        obj_type = type(obj)
+        if obj_type is np.ndarray:
+            unit = None
+        elif obj_type is units.Quantity:
+            unit = obj.unit
+        else:
+            return None
+
+        if obj.dtype.hasobject or obj.nbytes < self.min_bytes:
+            return None
+
+        key = id(obj)
+        if key in self.written:
+            return self.written[key][0]
+
+        array = obj.view(np.ndarray) if unit is not None else obj
+        pid = ('array',) + self.write_array(array) + (unit,)
+        # Keep a reference so that IDs are not reused during pickling.
+        self.written[key] = pid, obj
+        return pid
+
+
+class _CheckpointUnpickler(pickle.Unpickler):
+
+    def __init__(self, file, array_file, reduction):
+        """
+        Restore reduction state written by :class:`_CheckpointPickler`.
+
+        Array data is memory-mapped from the array file in copy-on-write
+        mode, so data is only read from disk when required, and changes are
+        never written back to the checkpoint.
+
+        Parameters
+        ----------
+        file : file-like
+            The open pickle file.
+        array_file : str
+            The path to the array file.
+        reduction : Reduction
+            The reduction onto which state is restored.
+        """
+        super().__init__(file)
+        self.reduction = reduction
+        if os.path.getsize(array_file) > 0:
+            self.buffer = np.memmap(array_file, mode='c')
+        else:
+            self.buffer = None
+        self.arrays = {}
+
+    def persistent_load(self, pid):
+        """
+        Restore an object from a persistent ID.
+
+        Parameters
+        ----------
+        pid : tuple
+
+        Returns
+        -------
+        object
+        """
+        kind = pid[0]
+        if kind == 'reduction':
+            return self.reduction
+        if kind == 'parent':
+            return self.reduction.parent_reduction
+        if kind != 'array':
+            raise pickle.UnpicklingError(f"Unknown persistent ID: {pid}")
+
+        offset, shape, dtype, order, unit = pid[1:]
+        if offset in self.arrays:
+            return self.arrays[offset]
+
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=self.buffer,
+                           offset=offset, order=order)
+        if unit is not None:
+            array = units.Quantity(array, unit, copy=False)
+        self.arrays[offset] = array
+        return array
+
+
+def is_checkpoint(path):
+    """
+    Return whether a path is a reduction checkpoint directory.
+
+    Parameters
+    ----------
+    path : str
+
+    Returns
+    -------
+    bool
+    """
+    return (isinstance(path, str)
+            and os.path.isfile(os.path.join(path, INFO_FILE))
+            and os.path.isfile(os.path.join(path, STATE_FILE))
+            and os.path.isfile(os.path.join(path, ARRAY_FILE)))
+
+
+def write_checkpoint(reduction, path, iteration, min_bytes=1024):
+    """
+    Write a snapshot of a reduction to a checkpoint directory.
+
+    The complete state of the reduction (scans, integrations, frames,
+    channels, signals, filters, source model and configuration) is saved to
+    three files in `path`:
+
+        - checkpoint.json : A description of the checkpoint.
+        - state.pkl : The reduction object state, excluding large arrays.
+        - arrays.bin : The raw data of all large arrays, which may be
+          memory-mapped on reading.
+
+    Files are written to a temporary directory which replaces `path` once
+    complete, so an interrupted write never corrupts an existing
+    checkpoint.
+
+    Parameters
+    ----------
+    reduction : Reduction
+        The reduction to save.
+    path : str
+        The checkpoint directory.  Any existing checkpoint at this location
+        will be replaced.
+    iteration : int
+        The last completed reduction round.
+    min_bytes : int, optional
+        Arrays smaller than this number of bytes are stored in the pickled
+        state rather than the array file.
+
+    Returns
+    -------
+    info : dict
+        The checkpoint description.
+    """
+    path = os.path.abspath(path)
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    temp_path = f'{path}.tmp'
+    if os.path.isdir(temp_path):
+        shutil.rmtree(temp_path)
+    os.makedirs(temp_path)
+
+    t0 = time.perf_counter()
+    with open(os.path.join(temp_path, STATE_FILE), 'wb') as state_file, \
+            open(os.path.join(temp_path, ARRAY_FILE), 'wb') as array_file:
+        pickler = _CheckpointPickler(state_file, array_file, reduction,
+                                     min_bytes=min_bytes)
+        pickler.dump(reduction.__dict__)
+        n_arrays = len(pickler.written)
+        array_bytes = pickler.array_bytes
+        del pickler
+
+    info = {
+        'checkpoint_version': CHECKPOINT_VERSION,
+        'sofscan_version': ReductionVersion.get_full_version(),
+        'round': int(iteration),
+        'rounds': reduction.rounds,
+        'instrument': reduction.instrument,
+        'reduction_id': reduction.reduction_id,
+        'n_scans': reduction.size,
+        'n_arrays': n_arrays,
+        'array_bytes': array_bytes,
+        'state_bytes': os.path.getsize(os.path.join(temp_path, STATE_FILE)),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'write_time': time.perf_counter() - t0}
+
+    with open(os.path.join(temp_path, INFO_FILE), 'w') as f:
+        json.dump(info, f, indent=2)
+
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.replace(temp_path, path)
+    log.debug(f"Wrote checkpoint for round {iteration} to {path} "
+              f"({n_arrays} arrays, {array_bytes} bytes) in "
+              f"{info['write_time']:.3f} seconds.")
+    return info
+
+
+def read_checkpoint_info(path):
+    """
+    Read the description of a checkpoint.
+
+    Parameters
+    ----------
+    path : str
+        The checkpoint directory.
+
+    Returns
+    -------
+    info : dict
+    """
+    if not is_checkpoint(path):
+        raise ValueError(f"{path} is not a valid reduction checkpoint.")
+    with open(os.path.join(path, INFO_FILE)) as f:
+        info = json.load(f)
+    version = info.get('checkpoint_version')
+    if version != CHECKPOINT_VERSION:
+        raise ValueError(f"Checkpoint version {version} is not supported "
+                         f"(expected {CHECKPOINT_VERSION}).")
+    return info
+
+
+def read_checkpoint(reduction, path):
+    """
+    Restore the state of a reduction from a checkpoint.
+
+    All reduction attributes are replaced by those stored in the checkpoint,
+    except for the parent reduction which is retained.  Large arrays are
+    memory-mapped from the checkpoint array file in copy-on-write mode.
+
+    Parameters
+    ----------
+    reduction : Reduction
+        The reduction to restore.
+    path : str
+        The checkpoint directory.
+
+    Returns
+    -------
+    info : dict
+        The checkpoint description.
+    """
+    info = read_checkpoint_info(path)
+    parent = reduction.parent_reduction
+    with open(os.path.join(path, STATE_FILE), 'rb') as f:
+        unpickler = _CheckpointUnpickler(
+            f, os.path.join(path, ARRAY_FILE), reduction)
+        state = unpickler.load()
+    state['parent_reduction'] = parent
+    reduction.__dict__.update(state)
+    log.debug(f"Restored round {info['round']} checkpoint from {path}.")
+    return info
@@ -0,0 +1,634 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+from abc import ABC, abstractmethod
+import argparse
+from astropy import log
+import cloudpickle
+import multiprocessing as mp
+from multiprocessing.managers import BaseManager
+import os
+import queue
+import traceback
+import uuid
+
+__all__ = ['Transport', 'QueueTransport', 'ManagerTransport', 'run_worker',
+           'run_tasks', 'start_local_workers', 'parse_address', 'main']
+
+_task_queue = None
+_result_queue = None
+
+
+def _get_task_queue():
+    """
+    Return the task queue served by a queue manager process.
+
+    Returns
+    -------
+    queue.Queue
+    """
+    global _task_queue
+    if _task_queue is None:
+        _task_queue = queue.Queue()
+    return _task_queue
+
+
+def _get_result_queue():
+    """
+    Return the result queue served by a queue manager process.
+
+    Returns
+    -------
+    queue.Queue
+    """
+    global _result_queue
+    if _result_queue is None:
+        _result_queue = queue.Queue()
+    return _result_queue
+
+
+class _QueueManager(BaseManager):
+    pass
+
+
+_QueueManager.register('get_task_queue', callable=_get_task_queue)
+_QueueManager.register('get_result_queue', callable=_get_result_queue)
+
+
+class Transport(ABC):
+
+    def __init__(self):
+        """
+        Initialize a message transport for distributed reductions.
+
+        A transport carries serialized tasks from a reduction (the
+        coordinator) to any number of workers, and carries serialized
+        results back again.  Tasks and results are passed as (task_id,
+        payload) pairs, where the payload is a `bytes` object, so that a
+        transport never needs to know anything about the reduction itself.
+
+        Subclasses may implement any message queue (e.g. multiprocessing
+        managers, or a ZeroMQ socket pair) by defining the abstract methods
+        below.  The coordinator calls :func:`Transport.start` before sending
+        any tasks, and workers call :func:`Transport.connect` before
+        receiving them.
+        """
+        self.started = False
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['started'] = False
+        return state
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @abstractmethod
+    def start(self):  # pragma: no cover
+        """
+        Start the transport on the coordinator.
+
+        Returns
+        -------
+        None
+        """
+        pass
+
+    @abstractmethod
+    def connect(self):  # pragma: no cover
+        """
+        Connect a worker to a started transport.
+
+        Returns
+        -------
+        None
+        """
+        pass
+
+    @abstractmethod
+    def close(self):  # pragma: no cover
+        """
+        Close the transport, releasing any resources.
+
+        Returns
+        -------
+        None
+        """
+        pass
+
+    @abstractmethod
+    def send_task(self, task_id, payload):  # pragma: no cover
+        """
+        Send a task from the coordinator to the next available worker.
+
+        Parameters
+        ----------
+        task_id : str
+            A unique identifier for the task.
+        payload : bytes or None
+            The serialized task.  `None` instructs a single worker to shut
+            down.
+
+        Returns
+        -------
+        None
+        """
+        pass
+
+    @abstractmethod
+    def receive_task(self, timeout=None):  # pragma: no cover
+        """
+        Receive the next task on a worker.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The maximum time to wait for a task in seconds.  The default
+            waits indefinitely.
+
+        Returns
+        -------
+        task_id, payload : str, bytes or None
+            A `None` payload indicates that the worker should shut down.
+
+        Raises
+        ------
+        queue.Empty
+            If no task was received before the timeout.
+        """
+        pass
+
+    @abstractmethod
+    def send_result(self, task_id, payload):  # pragma: no cover
+        """
+        Send the result of a task from a worker to the coordinator.
+
+        Parameters
+        ----------
+        task_id : str
+            The identifier of the completed task.
+        payload : bytes
+            The serialized result.
+
+        Returns
+        -------
+        None
+        """
+        pass
+
+    @abstractmethod
+    def receive_result(self, timeout=None):  # pragma: no cover
+        """
+        Receive the next task result on the coordinator.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The maximum time to wait for a result in seconds.  The default
+            waits indefinitely.
+
+        Returns
+        -------
+        task_id, payload : str, bytes
+
+        Raises
+        ------
+        queue.Empty
+            If no result was received before the timeout.
+        """
+        pass
+
+
+class QueueTransport(Transport):
+
+    def __init__(self):
+        """
+        Initialize a transport over a pair of task and result queues.
+
+        The base queue transport uses in-process queues, and is therefore
+        only suitable for workers running in threads of the coordinator
+        process (mainly for testing).  Subclasses may provide other queue
+        implementations by overriding :func:`QueueTransport.get_queues`.
+        """
+        super().__init__()
+        self.tasks = None
+        self.results = None
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['tasks'] = None
+        state['results'] = None
+        return state
+
+    def get_queues(self):
+        """
+        Return the task and result queues.
+
+        Returns
+        -------
+        tasks, results : queue.Queue, queue.Queue
+        """
+        return queue.Queue(), queue.Queue()
+
+    def start(self):
+        """
+        Create the task and result queues.
+
+        Returns
+        -------
+        None
+        """
+        if self.started:
+            return
+        self.tasks, self.results = self.get_queues()
+        self.started = True
+
+    def connect(self):
+        """
+        Connect a worker to the transport.
+
+        In-process queues are shared by all threads, so the coordinator
+        must have started the transport beforehand.
+
+        Returns
+        -------
+        None
+        """
+        if self.tasks is None or self.results is None:
+            raise RuntimeError("Transport has not been started.")
+
+    def close(self):
+        """
+        Close the transport.
+
+        Returns
+        -------
+        None
+        """
+        self.started = False
+
+    def send_task(self, task_id, payload):
+        """
+        Send a task from the coordinator to the next available worker.
+
+        Parameters
+        ----------
+        task_id : str
+        payload : bytes or None
+
+        Returns
+        -------
+        None
+        """
+        self.tasks.put((task_id, payload))
+
+    def receive_task(self, timeout=None):
+        """
+        Receive the next task on a worker.
+
+        Parameters
+        ----------
+        timeout : float, optional
+
+        Returns
+        -------
+        task_id, payload : str, bytes or None
+        """
+        return self.tasks.get(timeout=timeout)
+
+    def send_result(self, task_id, payload):
+        """
+        Send the result of a task from a worker to the coordinator.
+
+        Parameters
+        ----------
+        task_id : str
+        payload : bytes
+
+        Returns
+        -------
+        None
+        """
+        self.results.put((task_id, payload))
+
+    def receive_result(self, timeout=None):
+        """
+        Receive the next task result on the coordinator.
+
+        Parameters
+        ----------
+        timeout : float, optional
+
+        Returns
+        -------
+        task_id, payload : str, bytes
+        """
+        return self.results.get(timeout=timeout)
+
+
+class ManagerTransport(QueueTransport):
+
+    def __init__(self, address=('127.0.0.1', 0), authkey=None):
+        """
+        Initialize a transport over queues served by a manager process.
+
+        The coordinator starts a :class:`multiprocessing.managers.BaseManager`
+        server holding the task and result queues, listening on a network
+        address.  Workers in other processes, or on other machines, connect
+        to the same address with the same authentication key.
+
+        Parameters
+        ----------
+        address : tuple (str, int), optional
+            The (host, port) address of the manager.  A port of zero
+            selects any free port when the transport is started.  The
+            default listens on the local host only.
+        authkey : bytes or str, optional
+            The authentication key shared by the coordinator and workers.
+            If not supplied, a random key is generated, which is only
+            suitable for workers started by :func:`start_local_workers`.
+        """
+        super().__init__()
+        self.address = (str(address[0]), int(address[1]))
+        if authkey is None:
+            authkey = os.urandom(16)
+        elif isinstance(authkey, str):
+            authkey = authkey.encode()
+        self.authkey = authkey
+        self.manager = None
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['manager'] = None
+        return state
+
+    def get_queues(self):
+        """
+        Return proxies to the manager task and result queues.
+
+        Returns
+        -------
+        tasks, results : multiprocessing.managers.BaseProxy
+        """
+        return self.manager.get_task_queue(), self.manager.get_result_queue()
+
+    def start(self):
+        """
+        Start the manager server process on the coordinator.
+
+        Returns
+        -------
+        None
+        """
+        if self.started:
+            return
+        self.manager = _QueueManager(address=self.address,
+                                     authkey=self.authkey,
+                                     ctx=mp.get_context('spawn'))
+        self.manager.start()
+        self.address = self.manager.address
+        super().start()
+        log.debug(f"Distributed transport listening on "
+                  f"{self.address[0]}:{self.address[1]}.")
+
+    def connect(self):
+        """
+        Connect a worker to a running manager server.
+
+        Returns
+        -------
+        None
+        """
+        if self.manager is None:
+            self.manager = _QueueManager(address=self.address,
+                                         authkey=self.authkey)
+            self.manager.connect()
+        if self.tasks is None or self.results is None:
+            self.tasks, self.results = self.get_queues()
+
+    def close(self):
+        """
+        Shut down the manager server if started by this transport.
+
+        Returns
+        -------
+        None
+        """
+        if self.started and self.manager is not None:
+            self.manager.shutdown()
+        self.manager = None
+        self.tasks = None
+        self.results = None
+        super().close()
+
+
+def parse_address(address):
+    """
+    Parse a network address from a 'host:port' string.
+
+    Parameters
+    ----------
+    address : str or tuple or None
+        The address to parse.  A missing host defaults to the local host,
+        and a missing port defaults to zero (any free port).
+
+    Returns
+    -------
+    host, port : str, int
+    """
+    if address is None:
+        return '127.0.0.1', 0
+    if not isinstance(address, str):
+        return str(address[0]), int(address[1])
+    address = address.strip()
+    if ':' in address:
+        host, port = address.rsplit(':', 1)
+    else:
+        host, port = address, ''
+    host = host if host != '' else '127.0.0.1'
+    port = int(port) if port != '' else 0
+    return host, port
+
+
+def run_worker(transport, timeout=None):
+    """
+    Process tasks received over a transport until told to stop.
+
+    Each task payload is a pickled (function, args) pair.  The result of
+    `function(args)` is returned as a pickled (True, result) pair, or
+    (False, traceback) if an exception was raised, so that errors are
+    reported by the coordinator rather than silently killing the worker.
+
+    The worker stops when it receives a `None` payload, when no task arrives
+    within `timeout` seconds, or when the connection to the coordinator is
+    lost.
+
+    Parameters
+    ----------
+    transport : Transport
+    timeout : float, optional
+        The maximum time to wait for each task in seconds.  The default
+        waits indefinitely.
+
+    Returns
+    -------
+    n_tasks : int
+        The number of tasks processed.
+    """
+    transport.connect()
+    n_tasks = 0
+    while True:
+        try:
+            task_id, payload = transport.receive_task(timeout=timeout)
+        except queue.Empty:
+            break
+        except (EOFError, OSError):  # Coordinator has gone away
+            break
+        if payload is None:
+            break
+
+        try:
+            function, args = cloudpickle.loads(payload)
+            result = True, function(args)
+        except Exception:
+            result = False, traceback.format_exc()
+
+        try:
+            transport.send_result(task_id, cloudpickle.dumps(result))
+        except (EOFError, OSError):  # pragma: no cover
+            break
+        n_tasks += 1
+    return n_tasks
+
+
+def run_tasks(transport, function, arguments, timeout=None):
+    """
+    Run a function for each set of arguments on distributed workers.
+
+    Parameters
+    ----------
+    transport : Transport
+        A started transport.
+    function : function
+        A function taking a single argument that must be importable by (or
+        pickled by value for) the workers.
+    arguments : list
+        The arguments for each task.
+    timeout : float, optional
+        The maximum time to wait for each result in seconds.  The default
+        waits indefinitely.
+
+    Returns
+    -------
+    results : list
+        The result of each task in the same order as `arguments`.
+
+    Raises
+    ------
+    RuntimeError
+        If any task failed on a worker, or a result was not received before
+        the timeout.
+    """
+    batch = uuid.uuid4().hex
+    task_ids = [f'{batch}-{i}' for i in range(len(arguments))]
+    for task_id, args in zip(task_ids, arguments):
+        transport.send_task(task_id, cloudpickle.dumps((function, args)))
+
+    results = {}
+    while len(results) < len(task_ids):
+        try:
+            task_id, payload = transport.receive_result(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError(
+                f"Timed out waiting for {len(task_ids) - len(results)} "
+                f"distributed task(s).")
+        if not task_id.startswith(batch):
+            log.warning(f"Ignoring result for unknown task {task_id}.")
+            continue
+        results[task_id] = cloudpickle.loads(payload)
+
+    output = []
+    for task_id in task_ids:
+        success, result = results[task_id]
+        if not success:
+            raise RuntimeError(f"Distributed task {task_id} failed:\n{result}")
+        output.append(result)
+    return output
+
+
+def _local_worker(address, authkey):  # pragma: no cover
+    """
+    Run a worker connected to a manager transport in a child process.
+
+    Parameters
+    ----------
+    address : tuple (str, int)
+    authkey : bytes
+
+    Returns
+    -------
+    None
+    """
+    run_worker(ManagerTransport(address=address, authkey=authkey))
+
+
+def start_local_workers(transport, n_workers):
+    """
+    Start worker processes on the local machine for a manager transport.
+
+    Parameters
+    ----------
+    transport : ManagerTransport
+        A started transport.
+    n_workers : int
+        The number of worker processes to start.
+
+    Returns
+    -------
+    processes : list (multiprocessing.Process)
+    """
+    context = mp.get_context('spawn')
+    processes = []
+    for _ in range(n_workers):
+        process = context.Process(
+            target=_local_worker, args=(transport.address, transport.authkey),
+            daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def main(args=None):  # pragma: no cover
+    """
+    Run a distributed reduction worker from the command line.
+
+    Parameters
+    ----------
+    args : list (str), optional
+        The command line arguments.
+
+    Returns
+    -------
+    None
+    """
+    parser = argparse.ArgumentParser(
+        description='Process scans for a distributed scan map reduction.')
+    parser.add_argument('address', help='The coordinator address (host:port)')
+    parser.add_argument('--authkey', required=True,
+                        help='The authentication key set by the '
+                             'distributed.authkey option.')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='Stop after waiting this many seconds for a '
+                             'task.')
+    parsed = parser.parse_args(args)
+    transport = ManagerTransport(address=parse_address(parsed.address),
+                                 authkey=parsed.authkey)
+    n_tasks = run_worker(transport, timeout=parsed.timeout)
+    log.info(f"Worker processed {n_tasks} task(s).")
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
@@ -0,0 +1,190 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+from contextlib import contextmanager, nullcontext
+import json
+import psutil
+import threading
+import time
+
+__all__ = ['ReductionProfiler', 'profile_step']
+
+
+class ReductionProfiler(object):
+
+    def __init__(self):
+        """
+        Record the time and memory used by each step of a reduction.
+
+        Each measured step (a pipeline task performed on an integration, a
+        source model update, sync, or the writing of products) is stored as a
+        record containing the reduction round, the step name, the scan and
+        integration IDs (if applicable), the wall time in seconds, and the
+        change in the resident memory of the process in bytes.
+
+        Steps may be measured from multiple threads.  Note that memory
+        deltas are measured for the entire process, so will include memory
+        allocated by any steps running in parallel.
+        """
+        self.records = []
+        self.round = None
+        self.lock = threading.Lock()
+        self.process = psutil.Process()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        del state['process']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+        self.process = psutil.Process()
+
+    @property
+    def size(self):
+        """
+        Return the number of recorded steps.
+
+        Returns
+        -------
+        int
+        """
+        return len(self.records)
+
+    @contextmanager
+    def measure(self, step, scan=None, integration=None):
+        """
+        Measure the time and memory used by a reduction step.
+
+        Parameters
+        ----------
+        step : str
+            The name of the step (e.g. 'drifts', 'source.sync').
+        scan : str, optional
+            The ID of the scan to which the step applies.
+        integration : str, optional
+            The ID of the integration to which the step applies.
+
+        Yields
+        ------
+        None
+        """
+        memory = self.process.memory_info().rss
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            record = {'round': self.round,
+                      'step': str(step),
+                      'scan': scan,
+                      'integration': integration,
+                      'time': dt,
+                      'memory': int(self.process.memory_info().rss - memory)}
+            with self.lock:
+                self.records.append(record)
+
+    def summary(self):
+        """
+        Summarize the recorded steps.
+
+        Returns
+        -------
+        summary : list (dict)
+            One entry per step name, sorted by decreasing total time,
+            containing the number of calls, the total, mean, and maximum
+            wall time in seconds, the fraction of the total recorded time,
+            and the total and maximum memory delta in bytes.
+        """
+        steps = {}
+        for record in self.records:
+            entry = steps.setdefault(record['step'], {
+                'step': record['step'], 'calls': 0, 'time': 0.0,
+                'max_time': 0.0, 'memory': 0, 'max_memory': 0})
+            entry['calls'] += 1
+            entry['time'] += record['time']
+            entry['max_time'] = max(entry['max_time'], record['time'])
+            entry['memory'] += record['memory']
+            entry['max_memory'] = max(entry['max_memory'], record['memory'])
+
+        total_time = sum(entry['time'] for entry in steps.values())
+        summary = sorted(steps.values(), key=lambda x: -x['time'])
+        for entry in summary:
+            entry['mean_time'] = entry['time'] / entry['calls']
+            if total_time > 0:
+                entry['fraction'] = entry['time'] / total_time
+            else:
+                entry['fraction'] = 0.0
+        return summary
+
+    def format_summary(self):
+        """
+        Return the profile summary as a formatted table.
+
+        Returns
+        -------
+        str
+        """
+        header = ['Step', 'Calls', 'Total (s)', 'Mean (s)', 'Max (s)',
+                  'Time (%)', 'Memory (MB)', 'Max memory (MB)']
+        rows = []
+        for entry in self.summary():
+            rows.append([entry['step'],
+                         f"{entry['calls']}",
+                         f"{entry['time']:.3f}",
+                         f"{entry['mean_time']:.4f}",
+                         f"{entry['max_time']:.4f}",
+                         f"{100 * entry['fraction']:.1f}",
+                         f"{entry['memory'] / 2 ** 20:.1f}",
+                         f"{entry['max_memory'] / 2 ** 20:.1f}"])
+
+        widths = [max(len(row[i]) for row in [header] + rows)
+                  for i in range(len(header))]
+        lines = ['  '.join(value.ljust(width) if i == 0 else value.rjust(width)
+                           for i, (value, width)
+                           in enumerate(zip(row, widths))).rstrip()
+                 for row in [header] + rows]
+        lines.insert(1, '  '.join('-' * width for width in widths))
+        return '\n'.join(lines)
+
+    def write(self, filename):
+        """
+        Write the profile summary and all recorded steps to a JSON file.
+
+        Parameters
+        ----------
+        filename : str
+
+        Returns
+        -------
+        None
+        """
+        with open(filename, 'w') as f:
+            json.dump({'summary': self.summary(), 'records': self.records},
+                      f, indent=2)
+
+
+def profile_step(profiler, step, scan=None, integration=None):
+    """
+    Return a context manager measuring a reduction step if profiling.
+
+    Parameters
+    ----------
+    profiler : ReductionProfiler or None
+        The profiler with which to record the step.
+    step : str
+        The name of the step.
+    scan : str, optional
+        The ID of the scan to which the step applies.
+    integration : str, optional
+        The ID of the integration to which the step applies.
+
+    Returns
+    -------
+    context : contextlib.AbstractContextManager
+        A null context if `profiler` is `None`.
+    """
+    if profiler is None:
+        return nullcontext()
+    return profiler.measure(step, scan=scan, integration=integration)
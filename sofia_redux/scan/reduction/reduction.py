@@ -3,6 +3,7 @@
 from astropy import units
 from astropy.io import fits
 from configobj import ConfigObj
+from contextlib import contextmanager, nullcontext
 from copy import deepcopy
 import gc
 import json
@@ -16,10 +17,15 @@ import sys
 import tempfile
 import time
 
+from sofia_redux.scan.reduction import checkpoint, distributed
+from sofia_redux.scan.reduction.profiler import (
+    ReductionProfiler, profile_step)
 from sofia_redux.scan.reduction.version import ReductionVersion
 from sofia_redux.scan.info.info import Info
 from sofia_redux.scan.utilities import utils
 from sofia_redux.scan.pipeline.pipeline import Pipeline
+from sofia_redux.scan.pipeline.distributed_pipeline import \
+    DistributedPipeline
 from sofia_redux.scan.utilities.utils import insert_info_in_header
 from sofia_redux.toolkit.utilities import multiprocessing
 
@@ -72,6 +78,9 @@ class Reduction(ReductionVersion):
         self.reduce_start_time = None
         self.reduce_end_time = None
         self.stored_user_configuration = None
+        self.resume_round = None
+        self.profiler = None
+        self.transport = None
 
         if instrument is None:
             return
@@ -411,7 +420,8 @@ class Reduction(ReductionVersion):
             channels, _ = multiprocessing.unpickle_file(channels)
 
         log.info(f"Reading scan: {filename}")
-        scan = channels.read_scan(filename, read_fully=True)
+        read_fully = not channels.configuration.get_bool('lazyread')
+        scan = channels.read_scan(filename, read_fully=read_fully)
 
         if scan.size == 0:
             log.warning(f"Scan {scan.get_id()} contains no valid data. "
@@ -1159,7 +1169,10 @@ class Reduction(ReductionVersion):
 
         log.debug(info_str)
 
-        self.pipeline = Pipeline(reduction=self)
+        if self.configuration.get_bool('distributed'):
+            self.pipeline = DistributedPipeline(reduction=self)
+        else:
+            self.pipeline = Pipeline(reduction=self)
         self.pipeline.set_source_model(self.source)
         for scan in self.scans:
             self.pipeline.add_scan(scan)
@@ -1222,6 +1235,8 @@ class Reduction(ReductionVersion):
         """
         self.reduce_start_time = time.time()
         if self.sub_reductions is not None:
+            if self.configuration.get_bool('checkpoint'):
+                self.check_checkpoint_support()
             self.reduce_sub_reductions()
             self.reduce_end_time = time.time()
             return
@@ -1250,10 +1265,29 @@ class Reduction(ReductionVersion):
         if self.rounds is None or self.rounds < 0:
             raise ValueError("No rounds specified in configuration.")
 
-        for iteration in range(1, self.rounds + 1):
-            log.info(f"Round {iteration}/{self.rounds}:")
-            self.set_iteration(iteration, rounds=self.rounds)
-            self.iterate()
+        first_round = 1
+        if self.resume_round is not None:
+            first_round = self.resume_round + 1
+            self.resume_round = None
+            log.info(f"Resuming reduction from round {first_round}.")
+
+        if not self.configuration.get_bool('profile'):
+            self.profiler = None
+        elif self.profiler is None:
+            self.profiler = ReductionProfiler()
+
+        with self.get_multitask_pool(), self.get_distributed_backend():
+            for iteration in range(first_round, self.rounds + 1):
+                log.info(f"Round {iteration}/{self.rounds}:")
+                if self.profiler is not None:
+                    self.profiler.round = iteration
+                self.set_iteration(iteration, rounds=self.rounds)
+                self.iterate()
+                with self.profile('checkpoint'):
+                    self.write_checkpoint(iteration)
+
+        if self.profiler is not None:
+            self.profiler.round = None
 
         if self.configuration.get_bool('source') and self.solve_source():
             final_smooth = self.configuration.get_string('smooth.final')
@@ -1263,7 +1297,9 @@ class Reduction(ReductionVersion):
                 self.source.smooth()
                 self.source.add_process_brief('(smooth) ')
 
-        self.write_products()
+        with self.profile('write'):
+            self.write_products()
+        self.write_profile()
         self.reduce_end_time = time.time()
         reduce_time = self.reduce_end_time - self.reduce_start_time
 
@@ -1285,6 +1321,273 @@ class Reduction(ReductionVersion):
                           f'{self.pipeline.pickle_directory}')
                 shutil.rmtree(self.pipeline.pickle_directory)
 
+    def profile(self, step, scan=None, integration=None):
+        """
+        Return a context manager measuring the cost of a reduction step.
+
+        Parameters
+        ----------
+        step : str
+            The name of the step.
+        scan : str, optional
+            The ID of the scan to which the step applies.
+        integration : str, optional
+            The ID of the integration to which the step applies.
+
+        Returns
+        -------
+        context : contextlib.AbstractContextManager
+            A null context if profiling is not enabled by the 'profile'
+            configuration option.
+        """
+        return profile_step(getattr(self, 'profiler', None), step,
+                            scan=scan, integration=integration)
+
+    def write_profile(self):
+        """
+        Report the reduction profile and write it to file.
+
+        A summary of the time and memory used by each reduction step is
+        logged, and the full profile is written to a JSON file in the output
+        directory alongside the output products, named
+        <source name>.profile.json (or profile.json if there is no source
+        model).
+
+        Returns
+        -------
+        filename : str or None
+            The profile file, or `None` if profiling is not enabled.
+        """
+        if self.profiler is None or self.profiler.size == 0:
+            return None
+
+        log.info(f"Reduction profile:\n{self.profiler.format_summary()}")
+        name = 'profile.json'
+        if self.source is not None and self.source.n_scans > 0:
+            name = f'{self.source.get_default_core_name()}.profile.json'
+        filename = os.path.join(self.work_path, name)
+        self.profiler.write(filename)
+        log.info(f"Wrote reduction profile to {filename}")
+        return filename
+
+    def get_checkpoint_path(self, iteration):
+        """
+        Return the checkpoint directory for a given reduction round.
+
+        The base directory is given by the 'checkpoint.path' option, or
+        <outpath>/checkpoints by default.
+
+        Parameters
+        ----------
+        iteration : int
+            The reduction round.
+
+        Returns
+        -------
+        path : str
+        """
+        base = self.configuration.get_string('checkpoint.path')
+        if base is None:
+            base = os.path.join(self.work_path, 'checkpoints')
+        return os.path.join(base, f'round_{iteration:03d}')
+
+    def write_checkpoint(self, iteration):
+        """
+        Save the reduction state following a completed round if required.
+
+        Checkpoints are written if the 'checkpoint' option is set, and
+        `iteration` is one of the rounds listed in 'checkpoint.rounds' (all
+        rounds if not set).  Negative rounds are relative to the last round.
+        Only the 'checkpoint.keep' (default 1) most recently written
+        checkpoints are retained, or all if 'checkpoint.keep' is zero.  See
+        :func:`checkpoint.write_checkpoint` for details on the checkpoint
+        format.  Checkpoints are not available for reductions divided into
+        sub-reductions.
+
+        Parameters
+        ----------
+        iteration : int
+            The completed reduction round.
+
+        Returns
+        -------
+        path : str or None
+            The checkpoint directory, or `None` if no checkpoint was written.
+
+        Raises
+        ------
+        ValueError
+            If the reduction is, or is divided into, sub-reductions.
+        """
+        if not self.configuration.get_bool('checkpoint'):
+            return None
+        self.check_checkpoint_support()
+
+        rounds = self.configuration.get_int_list('checkpoint.rounds',
+                                                 default=None)
+        if rounds is not None:
+            rounds = [r + self.rounds + 1 if r < 0 else r for r in rounds]
+            if iteration not in rounds:
+                return None
+
+        path = self.get_checkpoint_path(iteration)
+        info = checkpoint.write_checkpoint(self, path, iteration)
+        log.info(f"Saved round {iteration} checkpoint to {path} "
+                 f"({info['array_bytes'] / 1024 ** 2:.1f} MB).")
+
+        keep = self.configuration.get_int('checkpoint.keep', default=1)
+        if keep > 0:
+            base = os.path.dirname(path)
+            previous = [os.path.join(base, name) for name in os.listdir(base)
+                        if re.fullmatch(r'round_\d+', name)]
+            previous = [p for p in previous if p != path
+                        and checkpoint.is_checkpoint(p)]
+            previous.sort(key=os.path.getmtime)
+            n_remove = len(previous) + 1 - keep
+            for old_path in previous[:max(n_remove, 0)]:
+                shutil.rmtree(old_path, ignore_errors=True)
+        return path
+
+    def check_checkpoint_support(self):
+        """
+        Check that the reduction state may be saved to a checkpoint.
+
+        A checkpoint holds the state of a single reduction.  The sub-reductions
+        of a parent reduction are reduced independently and combined when
+        complete, so no checkpoint can hold a resumable state of the whole
+        reduction.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If the reduction is, or is divided into, sub-reductions.
+        """
+        if self.sub_reductions is not None or self.is_sub_reduction:
+            raise ValueError("Checkpoints are not supported for reductions "
+                             "divided into sub-reductions.")
+
+    def resume(self, path):
+        """
+        Restore the reduction state from a checkpoint.
+
+        Following restoration, the next call to :func:`Reduction.reduce` will
+        continue from the round following that at which the checkpoint was
+        written.  Reductions divided into sub-reductions cannot be resumed.
+
+        Parameters
+        ----------
+        path : str
+            The checkpoint directory written by
+            :func:`Reduction.write_checkpoint`.
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If the checkpoint does not match this reduction, or this
+            reduction is divided into sub-reductions.
+        """
+        self.check_checkpoint_support()
+        info = checkpoint.read_checkpoint_info(path)
+        if info['instrument'] != self.instrument:
+            raise ValueError(f"Checkpoint instrument {info['instrument']} "
+                             f"does not match {self.instrument}.")
+        if info['sofscan_version'] != ReductionVersion.get_full_version():
+            log.warning(f"Checkpoint was written by SOFSCAN version "
+                        f"{info['sofscan_version']}.")
+        checkpoint.read_checkpoint(self, path)
+        self.resume_round = info['round']
+        log.info(f"Restored {self.size} scan(s) from round "
+                 f"{info['round']}/{info['rounds']} checkpoint {path}.")
+
+    def get_multitask_pool(self):
+        """
+        Return a persistent worker pool for use during the reduction rounds.
+
+        If the 'parallel.pool' option is set, a single
+        :class:`MultitaskPool` is created for all reduction rounds and used
+        by every parallel scan operation (via :func:`multitask`) so that
+        workers are not recreated for each call.
+
+        Returns
+        -------
+        pool : MultitaskPool or contextlib.nullcontext
+            A context manager for the reduction rounds.
+        """
+        if (self.max_jobs < 2
+                or not self.configuration.get_bool('parallel.pool')):
+            return nullcontext()
+        log.debug(f"Using a persistent pool of {self.max_jobs} workers.")
+        return multiprocessing.MultitaskPool(
+            jobs=self.max_jobs, force_threading=True)
+
+    @contextmanager
+    def get_distributed_backend(self):
+        """
+        Start the distributed backend for the reduction rounds if required.
+
+        If the 'distributed' option is set, pipeline iterations send each
+        scan to a worker over a message transport (see
+        :class:`DistributedPipeline`).  If no transport has been assigned to
+        the `transport` attribute, a :class:`ManagerTransport` is started on
+        the 'distributed.address' (host:port, default 127.0.0.1:0) using the
+        'distributed.authkey' authentication key, and 'distributed.workers'
+        (default `parallel_scans`) worker processes are started on the local
+        machine.  Additional workers may connect from other machines using::
+
+            python -m sofia_redux.scan.reduction.distributed host:port
+                --authkey <key>
+
+        The transport is closed once the reduction rounds are complete,
+        unless it was assigned by the user, in which case the user is
+        responsible for starting and closing it.
+
+        Yields
+        ------
+        transport : Transport or None
+            `None` if the distributed backend is not enabled.
+        """
+        if not self.configuration.get_bool('distributed'):
+            yield None
+            return
+
+        if self.transport is not None:
+            yield self.transport
+            return
+
+        address = distributed.parse_address(
+            self.configuration.get_string('distributed.address'))
+        transport = distributed.ManagerTransport(
+            address=address,
+            authkey=self.configuration.get_string('distributed.authkey'))
+        n_workers = self.configuration.get_int(
+            'distributed.workers', default=max(1, self.parallel_scans))
+        workers = []
+        transport.start()
+        self.transport = transport
+        try:
+            log.info(f"Distributed reduction listening on "
+                     f"{transport.address[0]}:{transport.address[1]} with "
+                     f"{n_workers} local worker(s).")
+            workers = distributed.start_local_workers(transport, n_workers)
+            yield transport
+        finally:
+            for _ in workers:
+                transport.send_task('stop', None)
+            for worker in workers:
+                worker.join(timeout=10)
+                if worker.is_alive():  # pragma: no cover
+                    worker.terminate()
+            transport.close()
+            self.transport = None
+
     def reduce_sub_reductions(self):
         """
         Reduce all sub-reductions.
@@ -1397,8 +1700,10 @@ class Reduction(ReductionVersion):
         self.summarize()
 
         if self.solve_source() and 'source' in tasks:
-            self.source.process()
-            self.source.sync()
+            with self.profile('source.process'):
+                self.source.process()
+            with self.profile('source.sync'):
+                self.source.sync()
             log.info(f" [Source] {' '.join(self.source.process_brief)}")
             self.source.clear_process_brief()
 
@@ -1677,7 +1982,7 @@ class Reduction(ReductionVersion):
         self.configuration.edit_header(header)
         ReductionVersion.add_history(header)
 
-    def run(self, filenames, **kwargs):
+    def run(self, filenames, resume_from=None, **kwargs):
         """
         Run the initialized reduction on a set of files.
 
@@ -1687,7 +1992,14 @@ class Reduction(ReductionVersion):
         Parameters
         ----------
         filenames : str or list (str)
-            The file or files to reduce.
+            The file or files to reduce.  Ignored if `resume_from` is set.
+        resume_from : str, optional
+            A checkpoint directory written during a previous reduction (see
+            the 'checkpoint' configuration option).  If supplied, the scans
+            and reduction state are restored from the checkpoint rather than
+            read from `filenames`, and the reduction continues from the
+            following round.  `kwargs` are applied after restoration, so may
+            be used to alter the remaining rounds.
         kwargs : dict, optional
             Optional configuration options to pass into the reduction.
 
@@ -1696,8 +2008,13 @@ class Reduction(ReductionVersion):
         hdul : fits.HDUList
             A list of HDU objects containing the reduced source map.
         """
-        self.add_user_configuration(**kwargs)
-        self.info.perform_reduction(self, filenames)
+        if resume_from is not None:
+            self.resume(resume_from)
+            self.add_user_configuration(**kwargs)
+            self.reduce()
+        else:
+            self.add_user_configuration(**kwargs)
+            self.info.perform_reduction(self, filenames)
         self.terminate_reduction()
 
         if self.sub_reductions is not None:
@@ -0,0 +1,91 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import json
+import os
+
+from astropy import units
+import numpy as np
+import pytest
+
+from sofia_redux.scan.reduction import checkpoint
+from sofia_redux.scan.reduction.reduction import Reduction
+
+
+class Holder(object):
+    pass
+
+
+@pytest.fixture
+def reduction():
+    reduction = Reduction(None)
+    reduction.parent_reduction = Reduction(None)
+    data = np.arange(1000, dtype=float).reshape(10, 100)
+    reduction.scans = [Holder(), Holder()]
+    reduction.scans[0].data = data
+    reduction.scans[0].view = data  # same object referenced twice
+    reduction.scans[0].fortran = np.asfortranarray(data)
+    reduction.scans[0].quantity = np.arange(500) * units.Unit('Jy')
+    reduction.scans[0].small = np.arange(3)
+    reduction.scans[0].objects = np.array([1, 'a', None], dtype=object)
+    reduction.scans[1].reduction = reduction
+    reduction.scans[1].parent = reduction.parent_reduction
+    reduction.scans[1].func = lambda x: x + 1
+    return reduction
+
+
+def test_write_read(reduction, tmpdir):
+    path = str(tmpdir.join('round_002'))
+    info = checkpoint.write_checkpoint(reduction, path, 2)
+    assert checkpoint.is_checkpoint(path)
+    assert not os.path.exists(f'{path}.tmp')
+    assert info['round'] == 2
+    assert info['n_arrays'] == 3
+    with open(os.path.join(path, 'checkpoint.json')) as f:
+        assert json.load(f) == info
+
+    # Overwrite an existing checkpoint
+    info = checkpoint.write_checkpoint(reduction, path, 3)
+    assert checkpoint.read_checkpoint_info(path)['round'] == 3
+
+    restored = Reduction(None)
+    parent = Reduction(None)
+    restored.parent_reduction = parent
+    checkpoint.read_checkpoint(restored, path)
+    assert restored.parent_reduction is parent
+    scan0, scan1 = restored.scans
+    assert np.allclose(scan0.data, reduction.scans[0].data)
+    assert isinstance(scan0.data.base, np.memmap)
+    assert scan0.view is scan0.data
+    assert scan0.fortran.flags.f_contiguous
+    assert np.allclose(scan0.fortran, scan0.data)
+    assert isinstance(scan0.quantity, units.Quantity)
+    assert scan0.quantity.unit == 'Jy'
+    assert np.allclose(scan0.quantity.value, np.arange(500))
+    assert np.allclose(scan0.small, [0, 1, 2])
+    assert scan0.objects[1] == 'a'
+    assert scan1.reduction is restored
+    assert scan1.parent is parent
+    assert scan1.func(1) == 2
+
+    # Arrays are copy-on-write
+    scan0.data[0, 0] = -1
+    checkpoint.read_checkpoint(restored, path)
+    assert restored.scans[0].data[0, 0] == 0
+
+
+def test_read_errors(reduction, tmpdir):
+    path = str(tmpdir.join('round_001'))
+    with pytest.raises(ValueError) as err:
+        checkpoint.read_checkpoint_info(path)
+    assert 'not a valid reduction checkpoint' in str(err.value)
+
+    checkpoint.write_checkpoint(reduction, path, 1)
+    info_file = os.path.join(path, 'checkpoint.json')
+    with open(info_file) as f:
+        info = json.load(f)
+    info['checkpoint_version'] = -1
+    with open(info_file, 'w') as f:
+        json.dump(info, f)
+    with pytest.raises(ValueError) as err:
+        checkpoint.read_checkpoint(Reduction(None), path)
+    assert 'version -1 is not supported' in str(err.value)
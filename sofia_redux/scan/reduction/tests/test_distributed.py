@@ -0,0 +1,136 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import cloudpickle
+import pytest
+import queue
+import threading
+
+from sofia_redux.scan.reduction import distributed
+from sofia_redux.scan.reduction.distributed import (
+    QueueTransport, ManagerTransport, run_worker, run_tasks,
+    start_local_workers, parse_address)
+
+
+def square(x):
+    return x * x
+
+
+def fail(x):
+    raise ValueError(f"bad value {x}")
+
+
+def start_thread_worker(transport, timeout=None):
+    thread = threading.Thread(target=run_worker, args=(transport,),
+                              kwargs={'timeout': timeout}, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_parse_address():
+    assert parse_address(None) == ('127.0.0.1', 0)
+    assert parse_address('localhost:5000') == ('localhost', 5000)
+    assert parse_address(':5000') == ('127.0.0.1', 5000)
+    assert parse_address('host') == ('host', 0)
+    assert parse_address(('host', '12')) == ('host', 12)
+
+
+def test_queue_transport():
+    transport = QueueTransport()
+    with pytest.raises(RuntimeError) as err:
+        transport.connect()
+    assert 'not been started' in str(err.value)
+
+    with transport:
+        assert transport.started
+        transport.connect()
+        transport.send_task('a', b'1')
+        assert transport.receive_task(timeout=1) == ('a', b'1')
+        transport.send_result('a', b'2')
+        assert transport.receive_result(timeout=1) == ('a', b'2')
+        with pytest.raises(queue.Empty):
+            transport.receive_result(timeout=0.01)
+
+        # Queues are not pickled
+        restored = cloudpickle.loads(cloudpickle.dumps(transport))
+        assert restored.tasks is None and not restored.started
+    assert not transport.started
+
+
+def test_run_worker():
+    transport = QueueTransport()
+    transport.start()
+    transport.send_task('a', cloudpickle.dumps((square, 3)))
+    transport.send_task('b', cloudpickle.dumps((fail, 1)))
+    transport.send_task('c', None)
+    assert run_worker(transport) == 2
+    task_id, result = transport.receive_result(timeout=1)
+    assert task_id == 'a' and cloudpickle.loads(result) == (True, 9)
+    task_id, result = transport.receive_result(timeout=1)
+    success, message = cloudpickle.loads(result)
+    assert task_id == 'b' and not success and 'bad value 1' in message
+
+    # Stops if no tasks are received
+    assert run_worker(transport, timeout=0.01) == 0
+
+
+def test_run_tasks():
+    transport = QueueTransport()
+    transport.start()
+    workers = [start_thread_worker(transport) for _ in range(2)]
+    assert run_tasks(transport, square, list(range(5))) == [
+        0, 1, 4, 9, 16]
+
+    # Results from unknown tasks are ignored
+    transport.send_result('unknown', cloudpickle.dumps((True, None)))
+    assert run_tasks(transport, square, [2]) == [4]
+
+    with pytest.raises(RuntimeError) as err:
+        run_tasks(transport, fail, [1, 2])
+    assert 'ValueError: bad value' in str(err.value)
+
+    for _ in workers:
+        transport.send_task('stop', None)
+    for worker in workers:
+        worker.join(timeout=5)
+        assert not worker.is_alive()
+
+    with pytest.raises(RuntimeError) as err:
+        run_tasks(transport, square, [1], timeout=0.01)
+    assert 'Timed out' in str(err.value)
+
+
+def test_manager_transport():
+    transport = ManagerTransport(authkey='secret')
+    assert transport.authkey == b'secret'
+    assert transport.address == ('127.0.0.1', 0)
+    transport.start()
+    try:
+        assert transport.address[1] > 0
+        transport.start()  # no op when started
+        restored = cloudpickle.loads(cloudpickle.dumps(transport))
+        assert restored.manager is None and restored.tasks is None
+
+        worker = ManagerTransport(address=transport.address,
+                                  authkey='secret')
+        thread = start_thread_worker(worker)
+        assert run_tasks(transport, square, [1, 2, 3]) == [1, 4, 9]
+        transport.send_task('stop', None)
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    finally:
+        transport.close()
+    assert transport.manager is None and not transport.started
+
+
+def test_start_local_workers():
+    transport = ManagerTransport()
+    transport.start()
+    try:
+        workers = start_local_workers(transport, 1)
+        assert run_tasks(transport, distributed.parse_address,
+                         ['host:1'], timeout=60) == [('host', 1)]
+        transport.send_task('stop', None)
+        workers[0].join(timeout=10)
+        assert workers[0].exitcode == 0
+    finally:
+        transport.close()
@@ -0,0 +1,94 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import json
+import pickle
+import threading
+
+import numpy as np
+import pytest
+
+from sofia_redux.scan.reduction.profiler import ReductionProfiler
+
+
+@pytest.fixture
+def profiler():
+    profiler = ReductionProfiler()
+    profiler.round = 1
+    with profiler.measure('drifts', scan='1', integration='1'):
+        pass
+    with profiler.measure('drifts', scan='1', integration='2'):
+        pass
+    with profiler.measure('source.update', scan='1'):
+        data = np.ones(2 ** 20)
+    profiler.round = None
+    with profiler.measure('write'):
+        data *= 2
+    return profiler
+
+
+def test_measure(profiler):
+    assert profiler.size == 4
+    record = profiler.records[0]
+    assert record['round'] == 1
+    assert record['step'] == 'drifts'
+    assert record['scan'] == '1' and record['integration'] == '1'
+    assert record['time'] >= 0
+    assert isinstance(record['memory'], int)
+    assert profiler.records[-1]['round'] is None
+    assert profiler.records[-1]['scan'] is None
+
+    # Steps are recorded on failure
+    with pytest.raises(ValueError):
+        with profiler.measure('despike'):
+            raise ValueError('test')
+    assert profiler.size == 5
+    assert profiler.records[-1]['step'] == 'despike'
+
+
+def test_summary(profiler):
+    summary = profiler.summary()
+    assert len(summary) == 3
+    steps = {entry['step']: entry for entry in summary}
+    assert steps['drifts']['calls'] == 2
+    assert steps['write']['calls'] == 1
+    times = [entry['time'] for entry in summary]
+    assert times == sorted(times, reverse=True)
+    assert np.isclose(sum(entry['fraction'] for entry in summary), 1)
+    for entry in summary:
+        assert np.isclose(entry['mean_time'],
+                          entry['time'] / entry['calls'])
+        assert entry['max_time'] <= entry['time']
+
+    profiler = ReductionProfiler()
+    assert profiler.summary() == []
+    profiler.records.append({'round': 1, 'step': 'test', 'scan': None,
+                             'integration': None, 'time': 0.0, 'memory': 0})
+    assert profiler.summary()[0]['fraction'] == 0
+
+
+def test_format_summary(profiler):
+    table = profiler.format_summary().splitlines()
+    assert len(table) == 5
+    assert table[0].startswith('Step')
+    assert set(table[1]) == {'-', ' '}
+    assert {line.split()[0] for line in table[2:]} == {
+        'drifts', 'source.update', 'write'}
+
+
+def test_write(profiler, tmpdir):
+    filename = str(tmpdir.join('profile.json'))
+    profiler.write(filename)
+    with open(filename) as f:
+        result = json.load(f)
+    assert result['records'] == profiler.records
+    assert [entry['step'] for entry in result['summary']] == [
+        entry['step'] for entry in profiler.summary()]
+
+
+def test_pickle(profiler):
+    new = pickle.loads(pickle.dumps(profiler))
+    assert new.records == profiler.records
+    assert isinstance(new.lock, type(threading.Lock()))
+    with new.measure('test'):
+        pass
+    assert new.size == profiler.size + 1
@@ -9,6 +9,7 @@ import time
 from astropy.io import fits
 from astropy import units as u
 from configobj import ConfigObj
+from contextlib import nullcontext
 import numpy as np
 
 from sofia_redux.scan.configuration.configuration import Configuration
@@ -17,11 +18,16 @@ from sofia_redux.scan.custom.example.info.info import ExampleInfo
 from sofia_redux.scan.custom.example.integration.integration \
     import ExampleIntegration
 from sofia_redux.scan.custom.example.scan.scan import ExampleScan
+from sofia_redux.scan.pipeline.distributed_pipeline import \
+    DistributedPipeline
 from sofia_redux.scan.pipeline.pipeline import Pipeline
+from sofia_redux.scan.reduction.distributed import (
+    ManagerTransport, QueueTransport, run_tasks)
 from sofia_redux.scan.reduction.reduction import Reduction
 from sofia_redux.scan.source_models.astro_intensity_map \
     import AstroIntensityMap
 from sofia_redux.toolkit.utilities.fits import set_log_level
+from sofia_redux.toolkit.utilities.multiprocessing import MultitaskPool
 
 
 class MockScan(object):
@@ -223,6 +229,14 @@ class TestReduction(object):
         scan = Reduction.return_scan_from_read_arguments(scan_file, 'test')
         assert isinstance(scan, ExampleScan)
         assert 'Successfully read scan' in capsys.readouterr().out
+        assert not scan.lazy_read
+
+        # lazy read
+        reduction.configuration.parse_key_value('lazyread', True)
+        scan = Reduction.return_scan_from_read_arguments(scan_file, 'test')
+        assert scan.lazy_read
+        capsys.readouterr()
+        reduction.configuration.parse_key_value('lazyread', False)
 
         # read a bad file
         scan = Reduction.return_scan_from_read_arguments(bad_file, 'test')
@@ -948,6 +962,174 @@ class TestReduction(object):
         reduction.reduce()
         assert 'Sub-reduction 0 complete' in capsys.readouterr().out
 
+    def test_get_multitask_pool(self):
+        reduction = Reduction('example')
+        reduction.max_jobs = 2
+        assert isinstance(reduction.get_multitask_pool(), nullcontext)
+
+        reduction.configuration.apply_configuration_options(
+            {'parallel': {'pool': True}})
+        pool = reduction.get_multitask_pool()
+        assert isinstance(pool, MultitaskPool)
+        assert pool.use_threads and pool.closed
+
+        reduction.max_jobs = 1
+        assert isinstance(reduction.get_multitask_pool(), nullcontext)
+
+    def test_get_distributed_backend(self):
+        reduction = Reduction('example')
+        with reduction.get_distributed_backend() as transport:
+            assert transport is None
+
+        # User transports are not started or closed
+        reduction.configuration.parse_key_value('distributed', 'True')
+        user_transport = QueueTransport()
+        reduction.transport = user_transport
+        with reduction.get_distributed_backend() as transport:
+            assert transport is user_transport and not transport.started
+        assert reduction.transport is user_transport
+
+        reduction.transport = None
+        reduction.configuration.parse_key_value('distributed.workers', '1')
+        reduction.configuration.parse_key_value('distributed.authkey', 'key')
+        with reduction.get_distributed_backend() as transport:
+            assert isinstance(transport, ManagerTransport)
+            assert reduction.transport is transport
+            assert transport.started and transport.authkey == b'key'
+            assert run_tasks(transport, len, ['abc'], timeout=60) == [3]
+        assert reduction.transport is None
+        assert not transport.started
+
+    def test_init_distributed_pipeline(self, scan_file):
+        reduction = Reduction('example')
+        reduction.configuration.parse_key_value('distributed', 'True')
+        reduction.read_scans(scan_file)
+        reduction.validate()
+        assert isinstance(reduction.pipeline, DistributedPipeline)
+        assert reduction.pipeline.scans == reduction.scans
+
+    def test_write_checkpoint(self, scan_file, tmpdir):
+        reduction = Reduction('example')
+        reduction.read_scans(scan_file)
+        reduction.validate()
+        conf = reduction.configuration
+        base = str(tmpdir.join('checkpoints'))
+
+        # not configured
+        assert reduction.write_checkpoint(1) is None
+        assert not os.path.isdir(base)
+
+        conf.apply_configuration_options(
+            {'checkpoint': {'value': True, 'path': base,
+                            'rounds': '2,-1', 'keep': 2}})
+        assert reduction.get_checkpoint_path(3) == os.path.join(
+            base, 'round_003')
+        reduction.reduce()
+        assert sorted(os.listdir(base)) == ['round_002', 'round_005']
+
+        # keep only the latest
+        conf.apply_configuration_options({'checkpoint.keep': 1,
+                                          'checkpoint.rounds': '1:3'})
+        reduction.reduce()
+        assert os.listdir(base) == ['round_003']
+
+        # default path in the output directory
+        conf.purge('checkpoint.path')
+        assert reduction.get_checkpoint_path(1) == os.path.join(
+            reduction.work_path, 'checkpoints', 'round_001')
+
+    def test_write_profile(self, scan_file, tmpdir, capsys):
+        reduction = Reduction('example')
+        reduction.read_scans(scan_file)
+        reduction.validate()
+        assert reduction.write_profile() is None
+
+        reduction.configuration.apply_configuration_options(
+            {'profile': True, 'outpath': str(tmpdir)})
+        reduction.update_runtime_config()
+        capsys.readouterr()
+        reduction.reduce()
+        assert 'Reduction profile' in capsys.readouterr().out
+        files = [f for f in os.listdir(reduction.work_path)
+                 if f.endswith('.profile.json')]
+        assert len(files) == 1
+        with open(os.path.join(reduction.work_path, files[0])) as f:
+            profile = json.load(f)
+
+        steps = {entry['step'] for entry in profile['summary']}
+        for step in ['drifts', 'correlated.obs-channels', 'weighting',
+                     'despike', 'source.update', 'source.process',
+                     'source.sync', 'checkpoint', 'write']:
+            assert step in steps
+        rounds = {record['round'] for record in profile['records']
+                  if record['step'] == 'drifts'}
+        assert rounds == {1, 2, 3, 4, 5}
+        drifts = [record for record in profile['records']
+                  if record['step'] == 'drifts']
+        assert drifts[0]['integration'] == '1'
+        assert drifts[0]['scan'] == reduction.scans[0].get_id()
+
+        # No profile if not configured
+        reduction.configuration.purge('profile')
+        reduction.reduce()
+        assert reduction.profiler is None
+
+    def test_resume(self, scan_file, tmpdir, capsys):
+        base = str(tmpdir.join('checkpoints'))
+        reduction = Reduction('example')
+        expected = reduction.run(
+            scan_file, checkpoint={'value': True, 'path': base,
+                                   'rounds': '3'})
+        path = os.path.join(base, 'round_003')
+        assert os.path.isdir(path)
+
+        resumed = Reduction('example')
+        capsys.readouterr()
+        output = resumed.run(None, resume_from=path)
+        capt = capsys.readouterr()
+        assert 'Resuming reduction from round 4' in capt.out
+        assert 'Round 3/5' not in capt.out
+        assert 'Round 4/5' in capt.out and 'Round 5/5' in capt.out
+        assert resumed.resume_round is None
+        assert len(resumed.scans) == 1
+        assert np.allclose(output[0].data, expected[0].data, equal_nan=True)
+
+        # configuration may be updated on resume
+        resumed = Reduction('example')
+        resumed.run(None, resume_from=path, rounds=4)
+        capt = capsys.readouterr()
+        assert 'Round 4/4' in capt.out and 'Round 5' not in capt.out
+
+        with pytest.raises(ValueError) as err:
+            Reduction('hawc_plus').resume(path)
+        assert 'does not match' in str(err.value)
+
+    def test_checkpoint_sub_reductions(self, scan_file, tmpdir):
+        base = str(tmpdir.join('checkpoints'))
+        reduction = Reduction('example')
+        reduction.run(scan_file, checkpoint={'value': True, 'path': base,
+                                             'rounds': '3'})
+        path = os.path.join(base, 'round_003')
+
+        parent = Reduction('example')
+        parent.sub_reductions = [Reduction('example')]
+        parent.configuration.parse_key_value('checkpoint', 'True')
+        with pytest.raises(ValueError) as err:
+            parent.reduce()
+        assert 'not supported' in str(err.value)
+        with pytest.raises(ValueError) as err:
+            parent.write_checkpoint(1)
+        assert 'not supported' in str(err.value)
+        with pytest.raises(ValueError) as err:
+            parent.resume(path)
+        assert 'not supported' in str(err.value)
+        assert parent.resume_round is None
+
+        reduction.parent_reduction = parent
+        with pytest.raises(ValueError) as err:
+            reduction.write_checkpoint(1)
+        assert 'not supported' in str(err.value)
+
     def test_reduce_subreductions(self, capsys, scan_file, mocker):
         reduction = Reduction('example')
 
@@ -33,6 +33,7 @@ from sofia_redux.scan.source_models.beams.instant_focus import InstantFocus
 from sofia_redux.scan.utilities.range import Range
 from sofia_redux.scan.utilities.class_provider import get_integration_class
 from sofia_redux.scan.utilities.utils import round_values, get_float_list
+from sofia_redux.scan.reduction.profiler import profile_step
 
 __all__ = ['Scan']
 
@@ -84,6 +85,7 @@ class Scan(ABC):
         self.channels = None
         self.reduction = reduction
         self.temp_source_file = None
+        self.lazy_read = False
         self.set_channels(channels)
 
     @property
@@ -987,7 +989,9 @@ class Scan(ABC):
         filename : str
             The name of the file to read.
         read_fully : bool, optional
-            If `True`, perform a full read (default)
+            If `True`, perform a full read (default).  Otherwise, time-stream
+            tables should be memory-mapped and only those columns and frames
+            actually required read from disk.
 
         Returns
         -------
@@ -1658,24 +1662,32 @@ class Scan(ABC):
             elif integration.comments[-1] != ' ':
                 integration.comments.append(' ')
 
-    def perform(self, task):
+    def perform(self, task, profiler=None):
         """
         Perform a reduction task on the scan.
 
         Parameters
         ----------
         task : str
-            The name of the task.
+            The name of the task.  Tasks joined by '+' (see
+            :func:`Pipeline.plan_tasks`) are performed in fused passes by each
+            integration.
+        profiler : ReductionProfiler, optional
+            If supplied, the time and memory used to perform the task on each
+            integration is recorded.
 
         Returns
         -------
         None
         """
         if task.startswith('correlated.'):
-            self.decorrelate(task.split('.')[1])
+            with profile_step(profiler, task, scan=self.get_id()):
+                self.decorrelate(task.split('.')[1])
         else:
             for integration in self.integrations:
-                integration.perform(task)
+                with profile_step(profiler, task, scan=self.get_id(),
+                                  integration=integration.get_id()):
+                    integration.perform(task)
 
     def get_id(self):
         """
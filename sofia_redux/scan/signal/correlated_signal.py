@@ -37,7 +37,8 @@ class CorrelatedSignal(Signal):
         self.generation = 0
 
         self.resolution = mode.get_frame_resolution(integration)
-        self.value = np.zeros(mode.signal_length(integration), dtype=float)
+        self.value = np.zeros(mode.signal_length(integration),
+                              dtype=integration.frames.float_type)
         self.weight = np.zeros(self.value.size, dtype=float)
         self.drift_n = self.value.size
 
@@ -38,6 +38,17 @@ class TestCorrelatedSignal(object):
         assert isinstance(mode, CorrelatedMode)
         assert integ.signals[mode] is example_signal
 
+    def test_init_precision(self, populated_integration):
+        integ = populated_integration
+        group = ExampleChannelGroup(integ.channels.data, name='test_group')
+        mode = CorrelatedMode(channel_group=group, name='test',
+                              gain_provider='gain')
+        assert CorrelatedSignal(integ, mode=mode).value.dtype == np.float64
+        integ.frames.configuration.parse_key_value('precision', 'float32')
+        signal = CorrelatedSignal(integ, mode=mode)
+        assert signal.value.dtype == np.float32
+        assert signal.weight.dtype == np.float64
+
     def test_copy(self, example_signal):
         new = example_signal.copy()
         assert new is not example_signal
@@ -10,6 +10,7 @@ from sofia_redux.scan.utilities.range import Range
 from sofia_redux.scan.source_models.beams.elliptical_source import (
     EllipticalSource)
 from sofia_redux.scan.source_models import source_numba_functions as snf
+from sofia_redux.scan.source_models.sample_projection import SampleProjection
 from sofia_redux.scan.coordinate_systems.index_2d import Index2D
 from sofia_redux.scan.coordinate_systems.coordinate_2d import Coordinate2D
 from sofia_redux.scan.coordinate_systems.projector.astro_projector import \
@@ -538,6 +539,12 @@ class AstroIntensityMap(AstroData2D):
         else:
             dt = float(dt)
 
+        if self.configuration.get_bool('indexing.projection'):
+            n = self.add_projected_points(
+                frames, pixels, frame_gains, source_gains, dt)
+            if n is not None:
+                return n
+
         n, frame_data, sample_gains, sample_weights, sample_indices = (
             self.get_sample_points(frames, pixels, frame_gains, source_gains))
 
@@ -548,6 +555,115 @@ class AstroIntensityMap(AstroData2D):
                                indices=sample_indices)
         return n
 
+    def get_sample_projection(self, frames):
+        """
+        Return the cached sparse projection of frame samples onto the map.
+
+        The projection is created from the frame map indices on first use
+        and stored in the `source_projection` attribute of the frames.  It is
+        recreated if the map indices or map shape have changed since.
+
+        Parameters
+        ----------
+        frames : Frames
+            The integration frames.
+
+        Returns
+        -------
+        projection : SampleProjection or None
+            `None` is returned if the frames have no map indices, or the map
+            indices do not contain one position per channel.
+        """
+        if frames.map_index is None:
+            return None
+        map_indices = frames.map_index.coordinates
+        map_shape = self.map.shape
+        if (map_indices.ndim != 3 or len(map_shape) != map_indices.shape[0]
+                or map_indices.shape[2] != frames.channel_size):
+            return None
+
+        projection = frames.source_projection
+        if projection is None or not projection.is_valid_for(
+                map_indices, map_shape):
+            projection = SampleProjection(map_indices, map_shape)
+            log.debug(f"Created sample projection of {projection.size} "
+                      f"samples ({projection.nbytes / 2 ** 20:.1f} MB)")
+            frames.source_projection = projection
+        return projection
+
+    def add_projected_points(self, frames, pixels, frame_gains, source_gains,
+                             dt):
+        """
+        Add points to the source model using a cached sparse projection.
+
+        The result is identical to that of :func:`AstroIntensityMap.add_points`
+        but map indices are not re-validated and no intermediate sample arrays
+        are created.  Instead, samples are accumulated onto each map pixel
+        via the sparse projection returned by
+        :func:`AstroIntensityMap.get_sample_projection`.
+
+        Parameters
+        ----------
+        frames : Frames
+            The frames to add to the source model.
+        pixels : ChannelGroup
+            The channels (pixels) to add to the source model.
+        frame_gains : numpy.ndarray (float)
+            The gain values for all frames of shape (n_frames,).
+        source_gains : numpy.ndarray (float)
+            The channel source gains for all channels of shape (all_channels,).
+        dt : float
+            The sampling interval in seconds.
+
+        Returns
+        -------
+        mapping_frames : int or None
+            The number of valid mapping frames added for the model, or `None`
+            if the projection could not be used.
+        """
+        weight_image = self.map.get_weight_image()
+        exposure_image = self.map.get_exposure_image()
+        images = [self.map, weight_image, exposure_image]
+        if not all(isinstance(image.data, np.ndarray)
+                   and image.data.flags['C_CONTIGUOUS']
+                   and image.data.dtype == float
+                   and image.data.shape == self.map.shape
+                   for image in images):
+            return None
+
+        projection = self.get_sample_projection(frames)
+        if projection is None:
+            return None
+
+        channel_variance = np.zeros(frames.channel_size, dtype=float)
+        channel_variance[pixels.indices] = pixels.variance
+        valid_frames = frames.is_unflagged('SOURCE_FLAGS') & frames.valid
+
+        added = projection.accumulate(
+            frames=frames,
+            channel_variance=channel_variance,
+            frame_gains=frame_gains,
+            source_gains=source_gains,
+            valid_frames=valid_frames,
+            exclude_sample_flag=self.exclude_samples.value,
+            sample_time=dt,
+            map_data=self.map.data,
+            map_weight=weight_image.data,
+            map_exposure=exposure_image.data)
+
+        # Record the same history as for accumulation at indices
+        messages = [f'added {(frames.size, pixels.size)} array'] * 2
+        messages.append(f'added {dt}')
+        for image, message in zip(images, messages):
+            image.unflag(image.flagspace.flags.DEFAULT, indices=added)
+            if hasattr(image, 'add_history'):
+                image.add_history(message)
+
+        mapping_frames = valid_frames & (frame_gains != 0)
+        mapping_frames &= ~np.isnan(frame_gains)
+        mapping_frames &= frames.relative_weight != 0
+        return int(np.sum(mapping_frames))
+
     def mask_samples(self, flag='SAMPLE_SKIP'):
         """
         Propagate masked source samples to integration sample flags.
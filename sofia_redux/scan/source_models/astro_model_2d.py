@@ -680,6 +680,7 @@ class AstroModel2D(SourceModel):
 
         frames = integration.frames
         channels = integration.channels
+        frames.source_projection = None
 
         if frames.source_index is None:
             frames.source_index = np.full((frames.size, channels.size), -1)
@@ -693,12 +694,18 @@ class AstroModel2D(SourceModel):
             frames.map_index.coordinates.fill(-1)
 
         projector = AstroProjector(self.projection)
-        offsets = frames.project(pixels.position, projector)
-        map_indices = self.grid.offset_to_index(offsets)
-        map_indices.coordinates = round_values(map_indices.coordinates)
+        map_indices = None
+        if self.configuration.get_bool('indexing.fast'):
+            map_indices = frames.project_to_indices(
+                pixels.position, projector, self.grid)
+
+        if map_indices is None:
+            offsets = frames.project(pixels.position, projector)
+            map_indices = round_values(
+                self.grid.offset_to_index(offsets).coordinates)
 
         bad_samples = snf.validate_pixel_indices(
-            indices=map_indices.coordinates,
+            indices=map_indices,
             x_size=self.size_x,
             y_size=self.size_y,
             valid_frame=frames.valid)
@@ -706,10 +713,8 @@ class AstroModel2D(SourceModel):
         if bad_samples > 0:
             log.warning(f"{bad_samples} samples have bad map indices")
 
-        frames.map_index.coordinates[..., pixels.indices] = (
-            map_indices.coordinates)
-        source_indices = self.pixel_index_to_source_index(
-            map_indices.coordinates)
+        frames.map_index.coordinates[..., pixels.indices] = map_indices
+        source_indices = self.pixel_index_to_source_index(map_indices)
         frames.source_index[..., pixels.indices] = source_indices
 
     def pixel_index_to_source_index(self, pixel_indices):
@@ -0,0 +1,160 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import numpy as np
+
+from sofia_redux.scan.source_models import source_numba_functions as snf
+
+__all__ = ['SampleProjection']
+
+
+class SampleProjection(object):
+
+    def __init__(self, map_indices, map_shape):
+        """
+        Initialize a sparse projection of integration samples onto a map.
+
+        The projection groups the samples (frame, channel) of an integration
+        by the map pixel on which they fall, in compressed sparse row (CSR)
+        format.  Since the map indices of samples remain fixed between
+        reduction rounds (unless a new lookup is created), the projection
+        may be created once and reused to accumulate samples onto the map in
+        each round, without re-validating the map indices of every sample.
+
+        Only map pixels that contain at least one sample are stored, so that
+        the projection size scales with the number of samples rather than the
+        size of the map.
+
+        Parameters
+        ----------
+        map_indices : numpy.ndarray (int)
+            The map indices of the integration frames of shape
+            (n_dimensions, n_frames, all_channels) in FITS (x, y) order.  A
+            reference is kept in order to check that the projection remains
+            valid.
+        map_shape : tuple (int)
+            The shape of the map data array in numpy (y, x) order.
+        """
+        self.map_indices = map_indices
+        self.map_shape = tuple(int(x) for x in map_shape)
+        self.n_channels = int(map_indices.shape[2])
+
+        flat_indices = snf.get_projection_indices(
+            map_indices[::-1], np.asarray(self.map_shape, dtype=int))
+        samples = np.argsort(flat_indices, kind='stable')
+        sorted_indices = flat_indices[samples]
+        start = np.searchsorted(sorted_indices, 0)
+        samples = samples[start:]
+        sorted_indices = sorted_indices[start:]
+
+        self.pixels, counts = np.unique(sorted_indices, return_counts=True)
+        self.sample_pointer = np.zeros(self.pixels.size + 1, dtype=int)
+        np.cumsum(counts, out=self.sample_pointer[1:])
+        self.samples = samples
+
+    def copy(self):
+        """
+        Return a copy of the projection.
+
+        Projections are not modified after creation, so the same object is
+        returned.
+
+        Returns
+        -------
+        SampleProjection
+        """
+        return self
+
+    @property
+    def size(self):
+        """
+        Return the number of samples in the projection.
+
+        Returns
+        -------
+        int
+        """
+        return self.samples.size
+
+    @property
+    def nbytes(self):
+        """
+        Return the memory used by the projection in bytes.
+
+        Returns
+        -------
+        int
+        """
+        return (self.pixels.nbytes + self.sample_pointer.nbytes
+                + self.samples.nbytes)
+
+    def is_valid_for(self, map_indices, map_shape):
+        """
+        Check whether the projection is valid for given map indices.
+
+        Parameters
+        ----------
+        map_indices : numpy.ndarray (int)
+            The current map indices of the integration frames.
+        map_shape : tuple (int)
+            The current shape of the map data array.
+
+        Returns
+        -------
+        bool
+        """
+        return (map_indices is self.map_indices
+                and tuple(map_shape) == self.map_shape)
+
+    def accumulate(self, frames, channel_variance, frame_gains, source_gains,
+                   valid_frames, exclude_sample_flag, sample_time, map_data,
+                   map_weight, map_exposure):
+        """
+        Accumulate frame samples onto map data, weight and exposure arrays.
+
+        Parameters
+        ----------
+        frames : Frames
+            The integration frames.
+        channel_variance : numpy.ndarray (float)
+            The channel variances of shape (all_channels,), where channels
+            that should not be mapped have zero variance.
+        frame_gains : numpy.ndarray (float)
+            The frame gains of shape (n_frames,).
+        source_gains : numpy.ndarray (float)
+            The channel source gains of shape (all_channels,).
+        valid_frames : numpy.ndarray (bool)
+            The frames that may be mapped of shape (n_frames,).
+        exclude_sample_flag : int
+            Samples flagged with this flag are not mapped.
+        sample_time : float
+            The exposure time for each sample.
+        map_data : numpy.ndarray (float)
+            The map data to update in-place of shape `map_shape`.
+        map_weight : numpy.ndarray (float)
+            The map weights to update in-place of shape `map_shape`.
+        map_exposure : numpy.ndarray (float)
+            The map exposures to update in-place of shape `map_shape`.
+
+        Returns
+        -------
+        added : numpy.ndarray (bool)
+            A mask of shape `map_shape` where `True` marks pixels that were
+            added to.
+        """
+        added = snf.accumulate_projected_samples(
+            frame_data=frames.data,
+            frame_gains=frame_gains,
+            frame_weights=frames.relative_weight,
+            source_gains=source_gains,
+            channel_variance=channel_variance,
+            valid_frames=valid_frames,
+            sample_flags=frames.sample_flag,
+            exclude_sample_flag=exclude_sample_flag,
+            map_pixels=self.pixels,
+            sample_pointer=self.sample_pointer,
+            samples=self.samples,
+            sample_time=sample_time,
+            map_data=map_data.reshape(-1),
+            map_weight=map_weight.reshape(-1),
+            map_exposure=map_exposure.reshape(-1))
+        return added.reshape(self.map_shape)
@@ -11,7 +11,8 @@ __all__ = ['calculate_coupling_increment', 'get_sample_points',
            'blank_sample_values', 'flag_out_of_range_coupling',
            'sync_map_samples', 'get_delta_sync_parms', 'flag_outside',
            'validate_pixel_indices', 'add_skydip_frames',
-           'get_source_signal']
+           'get_source_signal', 'get_projection_indices',
+           'accumulate_projected_samples']
 
 
 @nb.njit(cache=True, nogil=False, parallel=False, fastmath=False)
@@ -920,3 +921,146 @@ def add_skydip_frames(data, weight, signal_values, signal_weights,
             continue
         data[data_bin] += w * signal_values[frame]
         weight[data_bin] += w
+
+
+@nb.njit(cache=True, nogil=False, parallel=False, fastmath=False)
+def get_projection_indices(map_indices, map_shape):  # pragma: no cover
+    """
+    Return the flat map index for each sample.
+
+    Parameters
+    ----------
+    map_indices : numpy.ndarray (int)
+        The map indices of shape (n_dimensions, n_frames, all_channels).
+    map_shape : numpy.ndarray (int)
+        The shape of the map of size n_dimensions.  The dimensions of
+        `map_indices` correspond to the dimensions of the map array.
+
+    Returns
+    -------
+    flat_indices : numpy.ndarray (int)
+        The flat index on the map of each sample of shape
+        (n_frames * all_channels,).  Samples falling outside the map are
+        given a value of -1.
+    """
+    n_dimensions = map_indices.shape[0]
+    n_frames = map_indices.shape[1]
+    n_channels = map_indices.shape[2]
+    flat_indices = np.empty(n_frames * n_channels, dtype=nb.int64)
+    for frame in range(n_frames):
+        for channel in range(n_channels):
+            flat_index = 0
+            for dimension in range(n_dimensions):
+                index = map_indices[dimension, frame, channel]
+                if index < 0 or index >= map_shape[dimension]:
+                    flat_index = -1
+                    break
+                flat_index = flat_index * map_shape[dimension] + index
+            flat_indices[frame * n_channels + channel] = flat_index
+    return flat_indices
+
+
+@nb.njit(cache=True, nogil=False, parallel=False, fastmath=False)
+def accumulate_projected_samples(frame_data, frame_gains, frame_weights,
+                                 source_gains, channel_variance, valid_frames,
+                                 sample_flags, exclude_sample_flag,
+                                 map_pixels, sample_pointer, samples,
+                                 sample_time, map_data, map_weight,
+                                 map_exposure):  # pragma: no cover
+    """
+    Accumulate samples onto a map using a sparse projection.
+
+    The projection is stored in compressed sparse row format, where the
+    samples (flat frame/channel indices) falling onto map pixel
+    `map_pixels[i]` are given by
+    `samples[sample_pointer[i]:sample_pointer[i + 1]]` in increasing order.
+    Sample values are determined and added to the map exactly as in
+    :func:`get_sample_points` followed by an accumulation of::
+
+        data += frame_data * weight * gain
+        weight += weight * gain^2
+        exposure += sample_time
+
+        weight = frame_weight / channel_variance
+        gain = frame_gain * source_gain
+
+    Parameters
+    ----------
+    frame_data : numpy.ndarray (float)
+        The frame data of shape (n_frames, all_channels).
+    frame_gains : numpy.ndarray (float)
+        The frame gains of shape (n_frames,).
+    frame_weights : numpy.ndarray (float)
+        The frame relative weights of shape (n_frames,).
+    source_gains : numpy.ndarray (float)
+        The channel source gains of shape (all_channels,).
+    channel_variance : numpy.ndarray (float)
+        The channel variances of shape (all_channels,).  Channels with zero
+        variance (including those that should not be mapped) are skipped.
+    valid_frames : numpy.ndarray (bool)
+        A boolean mask of shape (n_frames,) where `False` indicates a frame
+        that should be excluded.
+    sample_flags : numpy.ndarray (int)
+        The sample flag array of shape (n_frames, all_channels).
+    exclude_sample_flag : int
+        Samples flagged with `exclude_sample_flag` are skipped.
+    map_pixels : numpy.ndarray (int)
+        The flat map pixel indices of shape (n_pixels,).
+    sample_pointer : numpy.ndarray (int)
+        The index pointer into `samples` of shape (n_pixels + 1,).
+    samples : numpy.ndarray (int)
+        The flat sample indices (frame * all_channels + channel).
+    sample_time : float
+        The exposure time to add for each sample.
+    map_data : numpy.ndarray (float)
+        The flattened map data to update in-place.
+    map_weight : numpy.ndarray (float)
+        The flattened map weights to update in-place.
+    map_exposure : numpy.ndarray (float)
+        The flattened map exposures to update in-place.
+
+    Returns
+    -------
+    added : numpy.ndarray (bool)
+        A flat array the same size as `map_data` where `True` indicates a
+        map pixel that was added to.
+    """
+    n_channels = source_gains.size
+    added = np.full(map_data.size, False)
+    for i in range(map_pixels.size):
+        pixel = map_pixels[i]
+        data = map_data[pixel]
+        weight = map_weight[pixel]
+        exposure = map_exposure[pixel]
+        pixel_added = False
+
+        for j in range(sample_pointer[i], sample_pointer[i + 1]):
+            sample = samples[j]
+            frame = sample // n_channels
+            channel = sample - (frame * n_channels)
+            frame_gain = frame_gains[frame]
+            frame_weight = frame_weights[frame]
+            if (not valid_frames[frame] or frame_gain == 0
+                    or frame_weight == 0 or np.isnan(frame_gain)):
+                continue
+            channel_gain = source_gains[channel]
+            var = channel_variance[channel]
+            if (channel_gain == 0 or var == 0
+                    or (sample_flags[frame, channel]
+                        & exclude_sample_flag != 0)):
+                continue
+
+            gain = frame_gain * channel_gain
+            wg = (frame_weight / var) * gain
+            data += wg * nb.float64(frame_data[frame, channel])
+            weight += wg * gain
+            exposure += sample_time
+            pixel_added = True
+
+        if pixel_added:
+            map_data[pixel] = data
+            map_weight[pixel] = weight
+            map_exposure[pixel] = exposure
+            added[pixel] = True
+
+    return added
@@ -444,6 +444,7 @@ class SpectralCube(AstroIntensityMap):
 
         frames = integration.frames
         channels = integration.channels
+        frames.source_projection = None
         if frames.source_index is None:
             frames.source_index = np.full((frames.size, channels.size), -1)
         else:
@@ -334,6 +334,79 @@ def test_add_points(data_source):
     assert np.allclose(source.map.exposure.data[inds], [14.2, 11.6])
 
 
+def test_get_sample_projection(data_source):
+    source = data_source.copy()
+    frames = source.scans[0][0].frames
+    projection = source.get_sample_projection(frames)
+    assert frames.source_projection is projection
+    assert projection.map_shape == source.map.shape
+    assert source.get_sample_projection(frames) is projection
+
+    # Recreated for a new lookup
+    source.create_lookup(source.scans[0][0])
+    assert frames.source_projection is None
+    new = source.get_sample_projection(frames)
+    assert new is not projection
+    assert np.array_equal(new.samples, projection.samples)
+
+    map_index = frames.map_index
+    frames.map_index = None
+    assert source.get_sample_projection(frames) is None
+    frames.map_index = map_index
+    frames.map_index.coordinates = frames.map_index.coordinates[..., :1]
+    assert source.get_sample_projection(frames) is None
+
+
+def test_add_projected_points(data_source):
+    source = data_source.copy()
+    integration = source.scans[0][0]
+    frames = integration.frames
+    pixels = integration.channels.get_mapping_pixels()
+    rand = np.random.RandomState(0)
+    frames.data = rand.normal(size=frames.data.shape)
+    frames.relative_weight[:10] = 0.0
+    frames.sample_flag[20:30, :5] = source.exclude_samples.value
+    frame_gains = rand.uniform(0.5, 1.0, frames.size)
+    frame_gains[40] = np.nan
+    source_gains = rand.uniform(0.5, 1.0, pixels.size)
+    source_gains[3] = 0.0
+    dt = pixels.info.instrument.sampling_interval.to('second').value
+
+    maps = []
+    for projected in [False, True]:
+        new = source.copy()
+        new.map.fill(0)
+        new.map.weight.fill(0)
+        new.map.exposure.fill(0)
+        new.map.flag.fill(1)
+        new.map.history = []
+        new.configuration.parse_key_value('indexing.projection',
+                                          str(projected))
+        n = new.add_points(frames, pixels, frame_gains, source_gains)
+        assert n == 1089
+        maps.append(new.map)
+
+    assert frames.source_projection is not None
+    for attribute in ['data', 'flag']:
+        assert np.array_equal(getattr(maps[0], attribute),
+                              getattr(maps[1], attribute))
+    for attribute in ['weight', 'exposure']:
+        assert np.array_equal(getattr(maps[0], attribute).data,
+                              getattr(maps[1], attribute).data)
+        assert np.array_equal(getattr(maps[0], attribute).flag,
+                              getattr(maps[1], attribute).flag)
+    assert maps[0].history == maps[1].history
+
+    # Falls back for inconsistent maps
+    new = source.copy()
+    new.map.weight.data = np.zeros((2, 2))
+    assert new.add_projected_points(
+        frames, pixels, frame_gains, source_gains, dt) is None
+    frames.map_index = None
+    assert source.add_projected_points(
+        frames, pixels, frame_gains, source_gains, dt) is None
+
+
 def test_mask_samples(data_source):
     source = data_source.copy()
     assert np.allclose(source.map.flag, 0)
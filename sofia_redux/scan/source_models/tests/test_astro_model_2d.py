@@ -493,6 +493,29 @@ def test_create_lookup(basic_with_projection, capsys):
     assert "5 samples have bad map indices" in capsys.readouterr().err
 
 
+@pytest.mark.parametrize('name', ['TAN', 'SIN', 'ARC', 'ZEA', 'STG'])
+def test_create_lookup_fast(basic_with_projection, populated_scan, name):
+    source = basic_with_projection.copy()
+    projection = SphericalProjection.for_name(name)
+    projection.set_reference(populated_scan.get_position_reference(
+        'equatorial'))
+    source.projection = projection
+    source.set_size()
+    integration = source.scans[0][0]
+    frames = integration.frames
+
+    source.configuration.parse_key_value('indexing.fast', 'False')
+    source.create_lookup(integration)
+    map_index = frames.map_index.coordinates.copy()
+    source_index = frames.source_index.copy()
+    assert np.any(source_index >= 0)
+
+    source.configuration.parse_key_value('indexing.fast', 'True')
+    source.create_lookup(integration)
+    assert np.array_equal(frames.map_index.coordinates, map_index)
+    assert np.array_equal(frames.source_index, source_index)
+
+
 def test_pixel_index_to_source_index(initialized_source):
     source = initialized_source.copy()
     pixel_indices = np.arange(10).reshape((2, 5))
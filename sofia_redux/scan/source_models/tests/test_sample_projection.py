@@ -0,0 +1,31 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import numpy as np
+
+from sofia_redux.scan.source_models.sample_projection import \
+    SampleProjection
+
+
+def test_init():
+    # (x, y) indices of shape (2, n_frames=2, n_channels=3)
+    map_indices = np.array([[[0, 1, 0], [1, 5, 0]],
+                            [[0, 2, 0], [2, 0, -1]]])
+    projection = SampleProjection(map_indices, (3, 2))
+    assert projection.map_indices is map_indices
+    assert projection.map_shape == (3, 2)
+    assert projection.n_channels == 3
+    # Flat (y, x) pixels: 0 for samples 0 and 2, 5 for samples 1 and 3
+    assert np.allclose(projection.pixels, [0, 5])
+    assert np.allclose(projection.sample_pointer, [0, 2, 4])
+    assert np.allclose(projection.samples, [0, 2, 1, 3])
+    assert projection.size == 4
+    assert projection.nbytes == 8 * (2 + 3 + 4)
+    assert projection.copy() is projection
+
+
+def test_is_valid_for():
+    map_indices = np.zeros((2, 3, 4), dtype=int)
+    projection = SampleProjection(map_indices, (5, 5))
+    assert projection.is_valid_for(map_indices, (5, 5))
+    assert not projection.is_valid_for(map_indices, (5, 6))
+    assert not projection.is_valid_for(map_indices.copy(), (5, 5))
@@ -6,7 +6,8 @@ import pytest
 from sofia_redux.scan.source_models.source_numba_functions import (
     calculate_coupling_increment, get_sample_points, blank_sample_values,
     flag_out_of_range_coupling, sync_map_samples, get_delta_sync_parms,
-    flag_outside, validate_pixel_indices, add_skydip_frames)
+    flag_outside, validate_pixel_indices, add_skydip_frames,
+    get_projection_indices, accumulate_projected_samples)
 
 
 @pytest.fixture
@@ -331,3 +332,49 @@ def test_add_skydip_frames():
 
     assert np.allclose(data, [12, 0, 66, 90, 114])
     assert np.allclose(weight, [6, 0, 12, 12, 12])
+
+
+def test_get_projection_indices():
+    map_indices = np.array([[[0, 1, 2], [3, -1, 4]],
+                            [[0, 1, 1], [2, 0, 0]]])
+    flat = get_projection_indices(map_indices, np.array([4, 3]))
+    assert np.allclose(flat, [0, 4, 7, 11, -1, -1])
+
+
+def test_accumulate_projected_samples():
+    n_frames, n_channels = 4, 3
+    frame_data = np.arange(12, dtype=float).reshape(n_frames, n_channels)
+    frame_gains = np.array([1.0, 2.0, 0.0, 1.0])
+    frame_weights = np.array([1.0, 1.0, 1.0, 0.5])
+    source_gains = np.array([1.0, 0.5, 1.0])
+    channel_variance = np.array([1.0, 2.0, 0.0])
+    valid_frames = np.array([True, True, True, True])
+    sample_flags = np.zeros((n_frames, n_channels), dtype=int)
+    sample_flags[3, 0] = 1
+
+    # All samples map onto pixel 1, except channel 1 onto pixel 3
+    map_pixels = np.array([1, 3])
+    samples = np.arange(n_frames * n_channels)
+    samples = np.concatenate([samples[samples % 3 != 1],
+                              samples[samples % 3 == 1]])
+    sample_pointer = np.array([0, 8, 12])
+    map_data = np.ones(4)
+    map_weight = np.ones(4)
+    map_exposure = np.zeros(4)
+    added = accumulate_projected_samples(
+        frame_data, frame_gains, frame_weights, source_gains,
+        channel_variance, valid_frames, sample_flags, 1, map_pixels,
+        sample_pointer, samples, 0.1, map_data, map_weight, map_exposure)
+    assert np.allclose(added, [False, True, False, True])
+
+    # Pixel 1: frames 0 and 1 of channel 0 (channel 2 has zero variance)
+    assert np.isclose(map_data[1], 1 + 0 + 2 * 3)
+    assert np.isclose(map_weight[1], 1 + 1 + 4)
+    assert np.isclose(map_exposure[1], 0.2)
+
+    # Pixel 3: frames 0, 1, and 3 of channel 1
+    assert np.isclose(map_data[3], 1 + 0.25 * 1 + 0.5 * 4 + 0.125 * 10)
+    assert np.isclose(map_weight[3], 1 + 0.125 + 0.5 + 0.0625)
+    assert np.isclose(map_exposure[3], 0.3)
+    assert map_data[0] == 1 and map_data[2] == 1
+
@@ -0,0 +1,216 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+from astropy import log
+import numpy as np
+
+__all__ = ['LazyTable']
+
+
+class LazyTable(object):
+
+    def __init__(self, hdu):
+        """
+        Lazy, memory-mapped access to the columns of a FITS binary table.
+
+        Reading `hdu.data` for a FITS binary table creates a record array
+        for the entire table, and scaled or logical columns are converted in
+        full as soon as they are accessed.  A LazyTable instead memory-maps
+        the raw table data directly from the FITS file, so that columns are
+        only read when accessed, and only those rows (frames) actually
+        indexed are paged in from disk.  Columns are returned as views of
+        the file in FITS (big-endian) byte order, in the same manner as
+        :class:`astropy.io.fits.FITS_rec`.  The memory map is copy-on-write,
+        so columns may be modified in place without affecting the file.
+
+        Scaled columns (TSCALn/TZEROn) and logical columns are converted on
+        access.  If the table cannot be memory-mapped (e.g. the HDU was not
+        read from an uncompressed file, or contains variable length arrays),
+        columns are read from `hdu.data` as usual.
+
+        Parameters
+        ----------
+        hdu : astropy.io.fits.BinTableHDU
+            The binary table HDU.
+        """
+        self.hdu = hdu
+        self.columns = hdu.columns
+        self.size = int(hdu.header.get('NAXIS2', 0))
+        self.cache = {}
+        self.table = self.memory_map(hdu)
+
+    @property
+    def names(self):
+        """
+        Return the column names in the table.
+
+        Returns
+        -------
+        list (str)
+        """
+        return self.columns.names
+
+    @property
+    def is_memory_mapped(self):
+        """
+        Return whether the table data is memory-mapped from the file.
+
+        Returns
+        -------
+        bool
+        """
+        return self.table is not None
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __getitem__(self, name):
+        """
+        Return a column of the table.
+
+        Parameters
+        ----------
+        name : str
+            The column name.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        if name not in self.cache:
+            self.cache[name] = self.read_column(name)
+        return self.cache[name]
+
+    @staticmethod
+    def memory_map(hdu):
+        """
+        Memory-map the raw record array of a binary table HDU.
+
+        Parameters
+        ----------
+        hdu : astropy.io.fits.BinTableHDU
+
+        Returns
+        -------
+        table : numpy.memmap or None
+            The raw records in FITS byte order, or `None` if the table
+            could not be memory-mapped.
+        """
+        info = hdu.fileinfo()
+        if info is None or info.get('file') is None:
+            return None
+        file = info['file']
+        if getattr(file, 'compression', None) is not None:
+            return None
+        filename = getattr(file, 'name', None)
+        if not isinstance(filename, str):
+            return None
+
+        header = hdu.header
+        n_rows = int(header.get('NAXIS2', 0))
+        row_size = int(header.get('NAXIS1', 0))
+        if n_rows == 0 or int(header.get('PCOUNT', 0)) != 0:
+            return None
+
+        dtype = hdu.columns.dtype
+        if dtype.itemsize != row_size:  # pragma: no cover
+            return None
+        formats = []
+        for column, name in zip(hdu.columns, dtype.names):
+            code = column.format.format
+            if code in ['X', 'P', 'Q']:
+                return None
+            field_type = dtype.fields[name][0]
+            if field_type.subdtype is not None:
+                base, shape = field_type.subdtype
+            else:
+                base, shape = field_type, ()
+            if code == 'L':
+                # Logical values are stored as 'T' or 'F' characters
+                base = np.dtype('S1')
+            elif base.kind in 'iufc':
+                base = base.newbyteorder('>')
+            formats.append((base, shape) if shape else base)
+
+        raw_dtype = np.dtype({'names': list(dtype.names),
+                              'formats': formats,
+                              'offsets': [dtype.fields[name][1]
+                                          for name in dtype.names],
+                              'itemsize': row_size})
+        try:
+            return np.memmap(filename, dtype=raw_dtype, mode='c',
+                             offset=info['datLoc'], shape=(n_rows,))
+        except (OSError, ValueError) as err:  # pragma: no cover
+            log.debug(f"Could not memory-map {filename}: {err}")
+            return None
+
+    def read_column(self, name):
+        """
+        Read a column from the table.
+
+        Parameters
+        ----------
+        name : str
+            The column name.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        if self.table is None:
+            return self.hdu.data[name]
+
+        column = self.columns[name]
+        values = self.table[name]
+        if column.format.format == 'L':
+            return values == b'T'
+        if values.dtype.kind == 'S':
+            return np.char.rstrip(np.char.decode(values, 'ascii'))
+
+        bscale = 1 if column.bscale in [None, ''] else column.bscale
+        bzero = 0 if column.bzero in [None, ''] else column.bzero
+        if bscale == 1 and bzero == 0:
+            return values
+
+        if (values.dtype.kind == 'i' and bscale == 1
+                and bzero == 2 ** (8 * values.dtype.itemsize - 1)):
+            # Pseudo-unsigned integers
+            unsigned = np.dtype(f'>u{values.dtype.itemsize}')
+            return values.view(unsigned) ^ unsigned.type(bzero)
+
+        return values * bscale + bzero
+
+    def get(self, name, start=None, end=None):
+        """
+        Return a native byte order copy of a range of rows from a column.
+
+        Only the requested rows are read from the file.
+
+        Parameters
+        ----------
+        name : str
+            The column name.
+        start : int, optional
+            The first row to read.
+        end : int, optional
+            The last row (exclusive) to read.
+
+        Returns
+        -------
+        numpy.ndarray
+        """
+        values = self[name][start:end]
+        return values.astype(values.dtype.newbyteorder('='))
+
+    def close(self):
+        """
+        Release the memory map and any cached columns.
+
+        Returns
+        -------
+        None
+        """
+        self.cache = {}
+        self.table = None
@@ -0,0 +1,90 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+from astropy.io import fits
+import numpy as np
+import pytest
+
+from sofia_redux.scan.utilities.lazy_table import LazyTable
+
+
+@pytest.fixture
+def table_file(tmpdir):
+    n = 20
+    rand = np.random.RandomState(0)
+    columns = [
+        fits.Column(name='DAC', format='6E', dim='(3,2)',
+                    array=rand.random((n, 2, 3)).astype(np.float32)),
+        fits.Column(name='Flag', format='I', bzero=32768,
+                    array=(np.arange(n) * 3000).astype(np.uint16)),
+        fits.Column(name='Valid', format='L', array=np.arange(n) % 3 == 0),
+        fits.Column(name='Name', format='8A',
+                    array=np.array([f'f{i}' for i in range(n)])),
+        fits.Column(name='MJD', format='D', array=rand.random(n))]
+    filename = str(tmpdir.join('table.fits'))
+    hdul = fits.HDUList([fits.PrimaryHDU(),
+                         fits.BinTableHDU.from_columns(columns)])
+    hdul.writeto(filename)
+    return filename
+
+
+def test_init(table_file):
+    with fits.open(table_file) as hdul:
+        table = LazyTable(hdul[1])
+        assert table.is_memory_mapped
+        assert len(table) == table.size == 20
+        assert table.names == ['DAC', 'Flag', 'Valid', 'Name', 'MJD']
+        assert 'DAC' in table and 'foo' not in table
+        assert table.cache == {}
+        # HDU data are never loaded
+        assert not hdul[1]._data_loaded
+
+
+def test_getitem(table_file):
+    with fits.open(table_file) as hdul:
+        table = LazyTable(hdul[1])
+        expected = fits.getdata(table_file, 1)
+        for name in table.names:
+            values = table[name]
+            assert values.shape == expected[name].shape
+            assert np.all(values == expected[name])
+        assert table['Flag'].dtype.kind == 'u'
+        assert table['Valid'].dtype == bool
+        assert table['Name'][1] == 'f1'
+        assert table['DAC'] is table['DAC']
+        assert not hdul[1]._data_loaded
+
+        # Copy-on-write does not change the file
+        table['MJD'][0] = -1
+        assert fits.getdata(table_file, 1)['MJD'][0] != -1
+
+
+def test_scaled(table_file):
+    with fits.open(table_file, mode='update') as hdul:
+        hdul[1].header['TSCAL5'] = 2.0
+        hdul[1].header['TZERO5'] = 1.0
+    with fits.open(table_file) as hdul:
+        table = LazyTable(hdul[1])
+        assert np.allclose(table['MJD'], hdul[1].data['MJD'])
+
+
+def test_get(table_file):
+    with fits.open(table_file) as hdul:
+        table = LazyTable(hdul[1])
+        values = table.get('DAC', 2, 5)
+        assert values.dtype == np.dtype('=f4')
+        assert np.allclose(values, fits.getdata(table_file, 1)['DAC'][2:5])
+
+
+def test_not_memory_mapped(table_file):
+    with fits.open(table_file) as hdul:
+        hdu = fits.BinTableHDU(data=hdul[1].data.copy(),
+                               header=hdul[1].header)
+    table = LazyTable(hdu)
+    assert not table.is_memory_mapped
+    assert np.allclose(table['MJD'], hdu.data['MJD'])
+
+    with fits.open(table_file) as hdul:
+        table = LazyTable(hdul[1])
+        table.close()
+        assert not table.is_memory_mapped
+        assert np.allclose(table['MJD'], hdul[1].data['MJD'])
@@ -1,9 +1,11 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 
 from sofia_redux.toolkit.resampling.clean_image import *
+from sofia_redux.toolkit.resampling.fit_plan import *
 from sofia_redux.toolkit.resampling.resample_polynomial import *
 from sofia_redux.toolkit.resampling.resample_kernel import *
 from sofia_redux.toolkit.resampling.resample_utils import *
 from sofia_redux.toolkit.resampling.grid.base_grid import *
 from sofia_redux.toolkit.resampling.tree.polynomial_tree import *
 from sofia_redux.toolkit.resampling.resample import *
+from sofia_redux.toolkit.resampling.resample_out_of_core import *
@@ -0,0 +1,197 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import copy
+import hashlib
+import numpy as np
+
+from sofia_redux.toolkit.utilities.multiprocessing import (
+    pickle_object, unpickle_file)
+
+__all__ = ['FitPlan']
+
+
+class FitPlan(object):
+
+    def __init__(self, resampler, args, reduction_kwargs, fit_grid, blocks):
+        """
+        A reusable plan for resampling onto a fixed set of fit coordinates.
+
+        A fit plan stores all geometry that depends only on the sample
+        coordinates, the fit coordinates, the window and the polynomial
+        order: the sample tree, the fit tree and its polynomial terms, and the
+        indices of all samples within the window of each fit point.  Applying
+        a plan to new data values only requires the weighted polynomial fits
+        to be solved.
+
+        Plans should be created using
+        :func:`ResamplePolynomial.create_fit_plan` rather than directly.
+
+        Parameters
+        ----------
+        resampler : ResamplePolynomial
+            The resampler used to create the plan.
+        args : tuple
+            The fit coordinates passed to the resampler.
+        reduction_kwargs : dict
+            The reduction options used to create the plan.  These are applied
+            whenever the plan is used.
+        fit_grid : PolynomialGrid
+            The fitting grid containing the fit tree.
+        blocks : dict
+            The fit geometry for each processed block of the fit tree of the
+            form {block: (fit_indices, fit_coordinates, fit_phi_terms,
+            sample_indices)}.
+        """
+        template = copy.copy(resampler)
+        template.data = None
+        template.error = None
+        template.mask = None
+        template.fit_grid = None
+        template._fit_settings = None
+        self.resampler = template
+        self.args = tuple(args)
+        self.reduction_kwargs = dict(reduction_kwargs)
+        self.fit_grid = fit_grid
+        self.blocks = blocks
+        self.fingerprint = self.coordinate_fingerprint(resampler.coordinates)
+
+    def __str__(self):
+        """Return a short description of the plan."""
+        return (f"FitPlan: {self.n_samples} samples, {self.n_fits} fits, "
+                f"{self.n_neighbors} neighbors in {len(self.blocks)} blocks")
+
+    @property
+    def n_samples(self):
+        """int : The number of samples in the plan."""
+        return self.resampler.n_samples
+
+    @property
+    def n_fits(self):
+        """int : The number of fit points in the plan."""
+        return self.fit_grid.tree.n_members
+
+    @property
+    def n_neighbors(self):
+        """int : The total number of sample neighbors over all fits."""
+        return int(sum(sum(len(x) for x in block[3])
+                       for block in self.blocks.values()))
+
+    @staticmethod
+    def coordinate_fingerprint(coordinates):
+        """
+        Return a hash identifying a set of coordinates.
+
+        Parameters
+        ----------
+        coordinates : numpy.ndarray (float)
+            The coordinates of shape (n_features, n_samples).
+
+        Returns
+        -------
+        fingerprint : str
+        """
+        coordinates = np.ascontiguousarray(coordinates, dtype=np.float64)
+        h = hashlib.sha1(str(coordinates.shape).encode())
+        h.update(coordinates.data)
+        return h.hexdigest()
+
+    def check_resampler(self, resampler):
+        """
+        Check that the plan may be applied with a given resampler.
+
+        Parameters
+        ----------
+        resampler : ResamplePolynomial
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        ValueError
+            If the resampler coordinates, window, or order do not match those
+            used to create the plan.
+        """
+        template = self.resampler
+        if resampler.features != template.features:
+            raise ValueError("Fit plan features do not match resampler.")
+        if resampler.n_samples != template.n_samples:
+            raise ValueError("Fit plan samples do not match resampler.")
+        if not np.allclose(resampler.window, template.window):
+            raise ValueError("Fit plan window does not match resampler.")
+        if not np.allclose(resampler.order, template.order):
+            raise ValueError("Fit plan order does not match resampler.")
+        if resampler.coordinates is not template.coordinates:
+            fingerprint = self.coordinate_fingerprint(resampler.coordinates)
+            if fingerprint != self.fingerprint:
+                raise ValueError(
+                    "Fit plan coordinates do not match resampler.")
+
+    def __call__(self, data, error=None, mask=None, robust=None,
+                 negthresh=None, **kwargs):
+        """
+        Resample new data values using the plan.
+
+        Parameters
+        ----------
+        data : array_like of float
+            (n_samples,) or (n_sets, n_samples) array of data values at the
+            sample coordinates used to create the plan.
+        error : float or array_like of float, optional
+            See :func:`ResamplePolynomial.__init__`.
+        mask : array_like of bool, optional
+            See :func:`ResamplePolynomial.__init__`.
+        robust : float, optional
+            See :func:`ResamplePolynomial.__init__`.
+        negthresh : float, optional
+            See :func:`ResamplePolynomial.__init__`.
+        kwargs : dict, optional
+            Additional keyword arguments passed into
+            :func:`ResamplePolynomial.__call__` such as `jobs` or the get_*
+            options.  Reduction options such as `smoothing` are always taken
+            from the plan.
+
+        Returns
+        -------
+        fit, [optional return values]
+            See :func:`ResamplePolynomial.__call__`.
+        """
+        resampler = copy.copy(self.resampler)
+        resampler.set_data(data, error=error, mask=mask, robust=robust,
+                           negthresh=negthresh)
+        return resampler(fit_plan=self, **kwargs)
+
+    def to_file(self, filename):
+        """
+        Save the plan to file for later use.
+
+        Parameters
+        ----------
+        filename : str
+            The path of the file to write.
+
+        Returns
+        -------
+        None
+        """
+        pickle_object(self, filename)
+
+    @classmethod
+    def from_file(cls, filename):
+        """
+        Load a plan previously saved with :func:`FitPlan.to_file`.
+
+        Parameters
+        ----------
+        filename : str
+            The path to the saved plan.
+
+        Returns
+        -------
+        FitPlan
+        """
+        plan, pickle_file = unpickle_file(filename)
+        if pickle_file is None or not isinstance(plan, cls):
+            raise ValueError(f"{filename} does not contain a valid fit plan.")
+        return plan
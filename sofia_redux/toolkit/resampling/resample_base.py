@@ -1,5 +1,6 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 
+from astropy import log
 import bottleneck as bn
 import numba
 import numpy as np
@@ -12,7 +13,7 @@ import time
 import warnings
 
 from sofia_redux.toolkit.utilities.multiprocessing import (
-    multitask, relative_cores, pickle_object)
+    multitask, relative_cores, pickle_object, SharedArrayStore)
 from sofia_redux.toolkit.stats.stats import robust_mask
 from sofia_redux.toolkit.resampling.grid.base_grid import BaseGrid
 from sofia_redux.toolkit.resampling.resample_utils import scale_coordinates
@@ -35,6 +36,7 @@ class ResampleBase(object):
                  large_data=None,
                  check_memory=True,
                  memory_buffer=None,
+                 neighbor_method='auto',
                  **distance_kwargs):
         """
         Class to resample data using local polynomial fits.
@@ -104,6 +106,13 @@ class ResampleBase(object):
             A fraction (positive or negative) with which to modify the memory
             estimates for the process memory requirements.  Memory estimates
             are scaled by the factor 1 + memory_buffer.
+        neighbor_method : str, optional
+            The method used to find samples within the window of each fit
+            point.  Must be one of {'auto', 'balltree', 'kdtree', 'grid'}.
+            The default ('auto') uses a grid search over neighboring blocks
+            for dense, low dimensional data, a kd-tree for sparse or high
+            dimensional data, and a ball-tree if the distance metric is not a
+            Minkowski distance.
         distance_kwargs : dict, optional
             Optional keyword arguments passed into
             :func:`sklearn.neighbors.DistanceMetric`.  The default is to use
@@ -143,7 +152,7 @@ class ResampleBase(object):
             window_estimate_oversample=window_estimate_oversample,
             leaf_size=leaf_size, large_data=large_data,
             check_memory=check_memory, memory_buffer=memory_buffer,
-            **distance_kwargs)
+            neighbor_method=neighbor_method, **distance_kwargs)
 
     @property
     def features(self):
@@ -177,6 +186,19 @@ class ResampleBase(object):
         r"""dict : Fit reduction settings applied during last call"""
         return self._fit_settings
 
+    @property
+    def dispatch_info(self):
+        """
+        Return the data transfer statistics for the last reduction.
+
+        Returns
+        -------
+        dict or None
+        """
+        if self._fit_settings is None:
+            return None
+        return self._fit_settings.get('dispatch_info')
+
     @property
     def fit_tree(self):
         """
@@ -364,6 +386,35 @@ class ResampleBase(object):
         self.error = error
         self.mask = np.logical_not(invalid, order='F')
 
+    def set_data(self, data, error=None, mask=None, robust=None,
+                 negthresh=None):
+        """
+        Replace the sample values while retaining the sample coordinates.
+
+        The sample tree is not rebuilt, so this allows a single resampler
+        to be applied to many data sets sharing the same coordinates.
+
+        Parameters
+        ----------
+        data : array_like of float
+            (n_samples,) or (n_sets, n_samples) array of new data values.
+        error : float or array_like of float, optional
+            The new error values.  See :func:`ResampleBase.__init__`.
+        mask : array_like of bool, optional
+            The new mask.  See :func:`ResampleBase.__init__`.
+        robust : float, optional
+            See :func:`ResampleBase.__init__`.
+        negthresh : float, optional
+            See :func:`ResampleBase.__init__`.
+
+        Returns
+        -------
+        None
+        """
+        self._process_input_data(data, self.coordinates, error=error,
+                                 mask=mask, negthresh=negthresh,
+                                 robust=robust)
+
     @classmethod
     def _check_input_arrays(cls, coordinates, data, error=None, mask=None):
         """Checks the validity of arguments to __init__
@@ -422,6 +473,7 @@ class ResampleBase(object):
                         check_memory=True,
                         memory_buffer=None,
                         memory_kwargs=None,
+                        neighbor_method='auto',
                         **distance_kwargs):
         """
         Build the sample tree from input coordinates.
@@ -460,6 +512,11 @@ class ResampleBase(object):
             estimates for the process memory requirements.  Memory estimates
             are scaled by the factor 1 + memory_buffer.
         memory_kwargs : dict, optional
+        neighbor_method : str, optional
+            The method used to find samples within the window of each fit
+            point.  Must be one of {'auto', 'balltree', 'kdtree', 'grid'}.
+            See :func:`BaseTree.select_neighbor_method` for the automatic
+            selection criteria.
         distance_kwargs : dict, optional
             Optional keyword arguments passed into
             :func:`sklearn.neighbors.DistanceMetric`.  The default is to use
@@ -480,8 +537,13 @@ class ResampleBase(object):
             oversample=window_estimate_oversample
         ).astype(np.float64)
 
+        tree_class = BaseTree.get_class_for(self)
+        neighbor_method = tree_class.select_neighbor_method(
+            scaled_coordinates, method=neighbor_method, **distance_kwargs)
+
         if memory_kwargs is None:
             memory_kwargs = {}
+        memory_kwargs['neighbor_method'] = neighbor_method
 
         if check_memory:
             full_process_size = self.estimate_max_bytes(
@@ -520,10 +582,10 @@ class ResampleBase(object):
             if large_data is None:
                 large_data = False
 
-        tree_class = BaseTree.get_class_for(self)
         self.sample_tree = tree_class(
             scaled_coordinates, build_type='all', leaf_size=leaf_size,
-            large_data=large_data, **distance_kwargs)
+            large_data=large_data, neighbor_method=neighbor_method,
+            **distance_kwargs)
         self.memory_info = memory_info
 
     def _scale_to_window(self, coordinates, radius=None,
@@ -755,7 +817,7 @@ class ResampleBase(object):
                            fit_threshold=0.0, cval=np.nan,
                            edge_threshold=0.0, edge_algorithm='distribution',
                            jobs=None, use_threading=None, use_processes=None,
-                           **kwargs):
+                           use_shared_memory=None, **kwargs):
         r"""
         Define a set of reduction instructions based on user input.
 
@@ -776,6 +838,9 @@ class ResampleBase(object):
             If `True`, force use of threads during multiprocessing.
         use_processes : bool, optional
             If `True`, force use of sub-processes during multiprocessing.
+        use_shared_memory : bool, optional
+            If `True`, place sample arrays and tree indices in shared memory
+            for access by sub-processes rather than pickling them to disk.
         kwargs : dict
             Optional keyword arguments to the reduction settings.
 
@@ -853,6 +918,7 @@ class ResampleBase(object):
             'jobs': jobs,
             'use_processes': use_processes,
             'use_threading': use_threading,
+            'use_shared_memory': bool(use_shared_memory),
             'block_memory_usage': block_memory_usage
         }
         return self._fit_settings
@@ -887,6 +953,7 @@ class ResampleBase(object):
                  fit_threshold=0.0, cval=np.nan, edge_threshold=0.0,
                  edge_algorithm='distribution', error_weighting=True,
                  jobs=None, use_threading=None, use_processes=None,
+                 use_shared_memory=None,
                  get_error=False, get_counts=False, get_weights=False,
                  get_distance_weights=False, get_rchi2=False,
                  get_cross_derivatives=False, get_offset_variance=False,
@@ -960,6 +1027,12 @@ class ResampleBase(object):
             If `True`, force use of threads during multiprocessing.
         use_processes : bool, optional
             If `True`, force use of sub-processes during multiprocessing.
+        use_shared_memory : bool, optional
+            If `True`, sub-processes attach to sample arrays and tree indices
+            placed in shared memory rather than reading a pickle file
+            containing a copy of all data.  The number of bytes transferred is
+            available in :func:`ResampleBase.dispatch_info` following the
+            reduction.
         get_error : bool, optional
             If `True`, If True returns the error which is given as the weighted
             RMS of the samples used for each resampling point.
@@ -1004,6 +1077,7 @@ class ResampleBase(object):
             jobs=jobs,
             use_threading=use_threading,
             use_processes=use_processes,
+            use_shared_memory=use_shared_memory,
             **kwargs)
 
         self.pre_fit(settings, *args)
@@ -1201,46 +1275,173 @@ class ResampleBase(object):
         hood_population = sample_tree.hood_population
 
         cores = relative_cores(jobs)
-        if cores > 1:
-            cache_dir = mkdtemp()
-            filename = os.path.join(
-                cache_dir,
-                f'resampling_cache_'
-                f'{id(args)}.{id(fit_tree)}.{time.time()}')
-            filename = pickle_object(args, filename)
-        else:
-            cache_dir = filename = None
-
-        _global_resampling_values['args'] = args
-        _global_resampling_values['iteration'] = iteration
-        _global_resampling_values['filename'] = filename
-        _global_resampling_values['block_memory_usage'] = settings.get(
-            'block_memory_usage')
-        task_args = filename, iteration
-
+        shared_store = None
+        cache_dir = filename = None
+        dispatch_info = {'mode': 'none', 'jobs': cores, 'pickled_bytes': 0,
+                         'shared_bytes': 0, 'shared_arrays': 0,
+                         'n_chunks': 0}
+        settings['dispatch_info'] = dispatch_info
         old_threading = numba.config.THREADING_LAYER
-        numba.config.THREADING_LAYER = 'threadsafe'
         force_threading = settings.get('use_threading', False)
         force_processes = settings.get('use_processes', False)
 
-        blocks = multitask(
-            cls.process_block, range(fit_tree.n_blocks), task_args, kwargs,
-            jobs=cores, skip=(block_population == 0) | (hood_population == 0),
-            force_threading=force_threading,
-            force_processes=force_processes)
+        try:
+            if cores > 1:
+                cache_dir = mkdtemp()
+                filename = os.path.join(
+                    cache_dir,
+                    f'resampling_cache_'
+                    f'{id(args)}.{id(fit_tree)}.{time.time()}')
+                if settings.get('use_shared_memory', False):
+                    shared_store = SharedArrayStore()
+                    filename = shared_store.pickle_object(args, filename)
+                    dispatch_info['mode'] = 'shared_memory'
+                    dispatch_info['shared_bytes'] = shared_store.shared_bytes
+                    dispatch_info['shared_arrays'] = shared_store.n_arrays
+                else:
+                    filename = pickle_object(args, filename)
+                    dispatch_info['mode'] = 'pickle'
+                dispatch_info['pickled_bytes'] = os.path.getsize(filename)
+                log.debug(f"Resampling dispatch ({dispatch_info['mode']}): "
+                          f"{dispatch_info['pickled_bytes']} bytes pickled, "
+                          f"{dispatch_info['shared_bytes']} bytes shared.")
+
+            _global_resampling_values['args'] = args
+            _global_resampling_values['iteration'] = iteration
+            _global_resampling_values['filename'] = filename
+            _global_resampling_values['block_memory_usage'] = settings.get(
+                'block_memory_usage')
+            task_args = filename, iteration
+
+            numba.config.THREADING_LAYER = 'threadsafe'
+
+            if cores > 1:
+                # Dispatch the most expensive blocks first in chunks of
+                # decreasing cost so that no single block delays the tail.
+                cost = cls.estimate_block_cost(sample_tree, fit_tree)
+                chunks = cls.schedule_blocks(cost, cores)
+                dispatch_info['n_chunks'] = len(chunks)
+                chunk_results = multitask(
+                    cls.process_block_chunk, chunks, task_args, kwargs,
+                    jobs=cores, force_threading=force_threading,
+                    force_processes=force_processes)
+                blocks = [block for chunk in chunk_results for block in chunk]
+            else:
+                blocks = multitask(
+                    cls.process_block, range(fit_tree.n_blocks), task_args,
+                    kwargs, jobs=cores,
+                    skip=(block_population == 0) | (hood_population == 0),
+                    force_threading=force_threading,
+                    force_processes=force_processes)
+        finally:
+            numba.config.THREADING_LAYER = old_threading
+            for key in ['args', 'iteration', 'filename',
+                        'block_memory_usage']:
+                _global_resampling_values.pop(key, None)
+            if shared_store is not None:
+                shared_store.close()
+            if cache_dir is not None:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+
+        return blocks
+
+    @staticmethod
+    def estimate_block_cost(sample_tree, fit_tree):
+        """
+        Estimate the relative processing cost of each block.
+
+        The cost of processing a block scales approximately with the number
+        of fit points in the block multiplied by the number of samples in the
+        surrounding neighborhood.
 
-        numba.config.THREADING_LAYER = old_threading
+        Parameters
+        ----------
+        sample_tree : BaseTree
+            The resampling tree in sample space.
+        fit_tree : BaseTree
+            The fitting tree.
 
-        if 'args' in _global_resampling_values:
-            del _global_resampling_values['args']
-            del _global_resampling_values['iteration']
-            del _global_resampling_values['filename']
-            del _global_resampling_values['block_memory_usage']
+        Returns
+        -------
+        cost : numpy.ndarray (n_blocks,)
+            The estimated cost of each block.  Blocks that do not need to be
+            processed have zero cost.
+        """
+        return (np.asarray(fit_tree.block_population, dtype=float)
+                * np.asarray(sample_tree.hood_population, dtype=float))
 
-        if cache_dir is not None:
-            shutil.rmtree(cache_dir)
+    @staticmethod
+    def schedule_blocks(cost, jobs, chunks_per_job=2):
+        """
+        Group blocks into chunks for dispatch in order of decreasing cost.
+
+        Blocks are sorted by decreasing cost, and consecutive blocks are
+        grouped such that each chunk costs approximately the remaining
+        total cost divided by `chunks_per_job` * `jobs`, or the cost of the
+        first block in the chunk if greater.  The most expensive blocks are
+        therefore dispatched first (and alone), followed by chunks of
+        progressively cheaper blocks whose size shrinks as work is consumed.
+        This guided scheduling keeps all workers busy until the end of the
+        reduction, while limiting the number of tasks dispatched for large
+        numbers of cheap blocks.
 
-        return blocks
+        Parameters
+        ----------
+        cost : numpy.ndarray (n_blocks,)
+            The estimated cost of each block.  Blocks with zero cost are not
+            scheduled.
+        jobs : int
+            The number of parallel jobs.
+        chunks_per_job : int or float, optional
+            Determines the chunk size relative to the remaining work.
+
+        Returns
+        -------
+        chunks : list (numpy.ndarray)
+            The block indices of each chunk in dispatch order.
+        """
+        cost = np.asarray(cost, dtype=float)
+        order = np.argsort(-cost, kind='stable')
+        order = order[cost[order] > 0]
+        if order.size == 0:
+            return []
+
+        sorted_cost = cost[order]
+        remaining = sorted_cost.sum()
+        divisor = max(float(chunks_per_job) * max(int(jobs), 1), 1.0)
+        cumulative = np.cumsum(sorted_cost)
+
+        chunks = []
+        start = 0
+        while start < order.size:
+            target = max(remaining / divisor, sorted_cost[start])
+            base = cumulative[start - 1] if start > 0 else 0.0
+            end = np.searchsorted(cumulative, base + target, side='right')
+            end = max(end, start + 1)
+            chunks.append(order[start:end])
+            remaining -= cumulative[end - 1] - base
+            start = end
+        return chunks
+
+    @classmethod
+    def process_block_chunk(cls, args, chunk):
+        """
+        Process a chunk of blocks.
+
+        Parameters
+        ----------
+        args : 2-tuple
+            The arguments to pass into :func:`ResampleBase.process_block`.
+        chunk : numpy.ndarray of int
+            The block indices to process.
+
+        Returns
+        -------
+        results : list
+            The :func:`ResampleBase.process_block` return value for each
+            block in `chunk`.
+        """
+        return [cls.process_block(args, int(block)) for block in chunk]
 
     @classmethod
     def process_block(cls, args, block):
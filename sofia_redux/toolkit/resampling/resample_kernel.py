@@ -11,7 +11,8 @@ from sofia_redux.toolkit.resampling.resample_kernel_utils import (
 from sofia_redux.toolkit.resampling.resample_base import (
     ResampleBase, _global_resampling_values)
 from sofia_redux.toolkit.resampling.tree.kernel_tree import KernelTree
-from sofia_redux.toolkit.utilities.multiprocessing import unpickle_file
+from sofia_redux.toolkit.utilities.multiprocessing import (
+    unpickle_file, release_shared_arrays)
 
 
 __all__ = ['ResampleKernel']
@@ -539,7 +540,8 @@ class ResampleKernel(ResampleBase):
                            fit_threshold=0.0, cval=np.nan,
                            edge_threshold=0.0, edge_algorithm='distribution',
                            is_covar=False, jobs=None, use_threading=None,
-                           use_processes=None, **kwargs):
+                           use_processes=None, use_shared_memory=None,
+                           **kwargs):
         r"""
         Define a set of reduction instructions based on user input.
 
@@ -600,6 +602,9 @@ class ResampleKernel(ResampleBase):
             If `True`, force use of threads during multiprocessing.
         use_processes : bool, optional
             If `True`, force use of sub-processes during multiprocessing.
+        use_shared_memory : bool, optional
+            If `True`, share sample arrays with sub-processes via shared
+            memory rather than pickle files.
         kwargs : dict
             Optional keyword arguments to the reduction settings.
 
@@ -617,7 +622,8 @@ class ResampleKernel(ResampleBase):
             edge_algorithm=edge_algorithm,
             jobs=jobs,
             use_threading=use_threading,
-            use_processes=use_processes)
+            use_processes=use_processes,
+            use_shared_memory=use_shared_memory)
         settings['is_covar'] = is_covar
 
         if absolute_weight is None:
@@ -633,7 +639,7 @@ class ResampleKernel(ResampleBase):
                  edge_algorithm='distribution',
                  error_weighting=True, absolute_weight=None, normalize=True,
                  is_covar=False, jobs=None, use_threading=None,
-                 use_processes=None,
+                 use_processes=None, use_shared_memory=None,
                  get_error=False, get_counts=False, get_weights=False,
                  get_distance_weights=False, get_rchi2=False,
                  get_offset_variance=False, **kwargs):
@@ -708,6 +714,10 @@ class ResampleKernel(ResampleBase):
             If `True`, force use of threads during multiprocessing.
         use_processes : bool, optional
             If `True`, force use of sub-processes during multiprocessing.
+        use_shared_memory : bool, optional
+            If `True`, sub-processes attach to sample arrays and tree indices
+            placed in shared memory rather than reading a pickle file
+            containing a copy of all data.
         get_error : bool, optional
             If `True`, If True returns the error which is given as the weighted
             RMS of the samples used for each resampling point.
@@ -750,6 +760,7 @@ class ResampleKernel(ResampleBase):
             jobs=jobs,
             use_threading=use_threading,
             use_processes=use_processes,
+            use_shared_memory=use_shared_memory,
             **kwargs)
 
         self.pre_fit(settings, *args)
@@ -1029,6 +1040,9 @@ class ResampleKernel(ResampleBase):
                 load_args = True
 
         if load_args:  # pragma: no cover
+            # Detach from any shared memory used by a previous reduction
+            _global_resampling_values.pop('args', None)
+            release_shared_arrays()
             _global_resampling_values['args'], _ = unpickle_file(filename)
             _global_resampling_values['iteration'] = iteration
             _global_resampling_values['filename'] = filename
@@ -0,0 +1,478 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+from astropy import log
+from astropy.io import fits
+import numpy as np
+import os
+import psutil
+import shutil
+import tempfile
+import warnings
+
+from sofia_redux.toolkit.resampling.resample_polynomial import \
+    ResamplePolynomial
+
+__all__ = ['resamp_out_of_core', 'open_sample_array', 'plan_tiles']
+
+
+def open_sample_array(source, extension=0):
+    """
+    Open an array of samples without reading it into memory.
+
+    Parameters
+    ----------
+    source : numpy.ndarray or str or None
+        An array (which may be a :class:`numpy.memmap`), or the path to a
+        .npy file or FITS file.  Files are memory-mapped.
+    extension : int or str, optional
+        The FITS extension containing the array if `source` is a FITS file.
+
+    Returns
+    -------
+    array : numpy.ndarray or None
+    """
+    if source is None:
+        return None
+    if isinstance(source, str):
+        if not os.path.isfile(source):
+            raise ValueError(f"File not found: {source}")
+        if source.lower().endswith('.npy'):
+            return np.load(source, mmap_mode='r')
+        return fits.getdata(source, ext=extension, memmap=True)
+    return source
+
+
+def _chunk_slices(n_samples, chunk_size):
+    """
+    Yield slices that divide the sample axis into chunks.
+
+    Parameters
+    ----------
+    n_samples : int
+    chunk_size : int
+
+    Yields
+    ------
+    slice
+    """
+    for start in range(0, n_samples, chunk_size):
+        yield slice(start, min(start + chunk_size, n_samples))
+
+
+def _sample_bins(coordinates, lower, bin_width, n_bins):
+    """
+    Return the bin index of coordinates along each feature.
+
+    Parameters
+    ----------
+    coordinates : numpy.ndarray (float)
+        Coordinates of shape (n_features, n).
+    lower : numpy.ndarray (float)
+        The lower edge of the first bin for each feature.
+    bin_width : numpy.ndarray (float)
+        The bin width for each feature.
+    n_bins : numpy.ndarray (int)
+        The number of bins for each feature.
+
+    Returns
+    -------
+    bins : numpy.ndarray (int)
+        The bin indices of shape (n_features, n).  Non-finite coordinates
+        are assigned a bin index of -1.
+    """
+    bins = np.floor((coordinates - lower[:, None]) / bin_width[:, None])
+    bins = np.clip(bins, 0, (n_bins - 1)[:, None])
+    bins[~np.isfinite(coordinates)] = -1
+    return bins.astype(int)
+
+
+def plan_tiles(histogram, bytes_per_sample, grid_bytes_per_bin, max_memory):
+    """
+    Divide a binned sample space into tiles that fit within a memory limit.
+
+    Tiles are created by recursive bisection of the bin space along the
+    feature containing the most bins.  Each tile must contain all samples
+    within one bin of its own bins so that all fits at grid points inside
+    the tile are complete.
+
+    Parameters
+    ----------
+    histogram : numpy.ndarray (int)
+        The number of samples in each bin of shape (n_bins[0], n_bins[1],...)
+        in feature order.
+    bytes_per_sample : float
+        The estimated number of bytes required to resample a single sample.
+    grid_bytes_per_bin : numpy.ndarray (float)
+        The number of bytes required to store output fits in each bin.  Must
+        be the same shape as `histogram`.
+    max_memory : int or float
+        The maximum number of bytes available for processing a single tile.
+
+    Returns
+    -------
+    tiles : list (tuple)
+        A list of (lower, upper) bin index tuples where lower and upper are
+        numpy arrays of shape (n_features,) giving the inclusive lower and
+        exclusive upper bin indices of each tile along each feature.
+    """
+    n_bins = np.asarray(histogram.shape)
+
+    def tile_bytes(lo, hi):
+        expanded = tuple(slice(max(a - 1, 0), min(b + 1, n))
+                         for (a, b, n) in zip(lo, hi, n_bins))
+        inner = tuple(slice(a, b) for (a, b) in zip(lo, hi))
+        n_samples = histogram[expanded].sum()
+        return n_samples * bytes_per_sample + grid_bytes_per_bin[inner].sum()
+
+    tiles = []
+    stack = [(np.zeros(n_bins.size, dtype=int), n_bins.copy())]
+    while len(stack) > 0:
+        lo, hi = stack.pop()
+        size = hi - lo
+        if tile_bytes(lo, hi) <= max_memory or np.all(size == 1):
+            if np.all(size == 1) and tile_bytes(lo, hi) > max_memory:
+                log.warning("Resampling tile exceeds the memory limit.")
+            tiles.append((lo, hi))
+            continue
+        dimension = np.argmax(size)
+        middle = lo[dimension] + size[dimension] // 2
+        hi_1, lo_2 = hi.copy(), lo.copy()
+        hi_1[dimension] = middle
+        lo_2[dimension] = middle
+        stack.append((lo_2, hi))
+        stack.append((lo, hi_1))
+
+    tiles.sort(key=lambda x: tuple(x[0][::-1]))
+    return tiles
+
+
+def resamp_out_of_core(coordinates, data, *grid, error=None, mask=None,
+                       window=None, order=1, fix_order=True,
+                       max_memory=None, chunk_size=None, max_bins=1000000,
+                       output_directory=None, temp_directory=None,
+                       coordinate_extension=0, data_extension=0,
+                       error_extension=0, mask_extension=0,
+                       cval=np.nan, get_error=False, get_counts=False,
+                       **kwargs):
+    """
+    Resample data that is too large to fit in memory onto a regular grid.
+
+    Samples are read in chunks from memory-mapped arrays or files and
+    distributed into spatial tiles of the output grid such that the
+    estimated memory required to resample each tile (including its sample
+    tree) is less than `max_memory`.  Each tile is then resampled using
+    :class:`ResamplePolynomial` and the fitted values are written directly
+    to the output arrays, which may themselves be memory-mapped .npy files.
+
+    Since every tile also includes all samples within one `window` of its
+    boundary, the results are equivalent to a single in-memory resampling
+    using the same `window`.
+
+    Parameters
+    ----------
+    coordinates : array_like or str
+        (n_features, n_samples) array of independent values, or the path to
+        a .npy or FITS file containing such an array.  Samples with
+        non-finite coordinates are ignored.
+    data : array_like or str
+        (n_sets, n_samples) or (n_samples,) array of dependent values, or the
+        path to a .npy or FITS file.
+    grid : n-tuple of array_like
+        The output grid coordinates for each feature.  Each array should be
+        one-dimensional.
+    error : array_like or str or float, optional
+        Error values matching the shape of `data`, a path to a file
+        containing the error array, or a single value for all samples.
+    mask : array_like or str, optional
+        Mask values matching the shape of `data` where `True` marks a valid
+        sample, or the path to a file containing the mask.
+    window : float or array_like (n_features,)
+        The resampling window in each dimension.  This must be supplied since
+        the window cannot be estimated without loading all samples.
+    order : int or array_like (n_features,), optional
+        The polynomial order to fit.
+    fix_order : bool, optional
+        See :class:`ResamplePolynomial`.
+    max_memory : int or float, optional
+        The maximum number of bytes to use when resampling a single tile.
+        The default is half of the currently available memory.
+    chunk_size : int, optional
+        The number of samples to read from file in each chunk.  The default
+        is determined from `max_memory`.
+    max_bins : int, optional
+        The maximum number of bins used to calculate the sample density over
+        all dimensions.  Bins are never smaller than `window`.
+    output_directory : str, optional
+        If supplied, the output fit (and error and counts if requested) will
+        be written to memory-mapped fit.npy, error.npy, and counts.npy files
+        in this directory.  Otherwise, output arrays are held in memory.
+    temp_directory : str, optional
+        The directory in which to store temporary tile samples.  A new
+        temporary directory is created and removed if not supplied.
+    coordinate_extension : int or str, optional
+        The FITS extension containing coordinates if read from file.
+    data_extension : int or str, optional
+        The FITS extension containing data if read from file.
+    error_extension : int or str, optional
+        The FITS extension containing error if read from file.
+    mask_extension : int or str, optional
+        The FITS extension containing the mask if read from file.
+    cval : float, optional
+        The value for grid points that could not be fit.
+    get_error : bool, optional
+        If `True`, also return the error on the fit.
+    get_counts : bool, optional
+        If `True`, also return the number of samples used in each fit.
+    kwargs : dict, optional
+        Optional keyword arguments passed to
+        :func:`ResamplePolynomial.__call__`.
+
+    Returns
+    -------
+    fit, [error], [counts] : numpy.ndarray
+        The fitted values of shape (n_sets, ny, nx,...) or (ny, nx,...) for
+        a single data set.  These are :class:`numpy.memmap` arrays if
+        `output_directory` was supplied.
+    """
+    if window is None:
+        raise ValueError("A window must be supplied for out-of-core "
+                         "resampling.")
+
+    coordinates = open_sample_array(coordinates, coordinate_extension)
+    data = open_sample_array(data, data_extension)
+    if isinstance(error, str):
+        error = open_sample_array(error, error_extension)
+    mask = open_sample_array(mask, mask_extension)
+
+    if coordinates.ndim == 1:
+        coordinates = coordinates[None]
+    n_features, n_samples = coordinates.shape
+    if len(grid) != n_features:
+        raise ValueError(f"{len(grid)}-feature grid passed to "
+                         f"{n_features}-feature resampler.")
+    grid = [np.atleast_1d(np.asarray(g, dtype=float)) for g in grid]
+    if any(g.ndim != 1 for g in grid):
+        raise ValueError("Out-of-core resampling requires a regular grid of "
+                         "one-dimensional coordinates for each feature.")
+
+    if data.shape[-1] != n_samples:
+        raise ValueError("Data sample size does not match coordinates")
+    multi_set = data.ndim == 2
+    n_sets = data.shape[0] if multi_set else 1
+
+    scalar_error = error is not None and np.asarray(error).size == 1
+    if scalar_error:
+        error = float(np.asarray(error).ravel()[0])
+
+    window = np.atleast_1d(np.asarray(window, dtype=float))
+    if window.size != n_features:
+        window = np.full(n_features, window[0])
+
+    if max_memory is None:
+        max_memory = psutil.virtual_memory().available / 2
+    max_memory = float(max_memory)
+
+    # Bytes read for each sample from all input arrays
+    row_bytes = 8 * (n_features + n_sets * (
+        1 + int(error is not None and not scalar_error)))
+    if mask is not None:
+        row_bytes += n_sets
+    if chunk_size is None:
+        chunk_size = int(np.clip(max_memory // (4 * row_bytes), 1, 1000000))
+    chunk_size = int(chunk_size)
+
+    # Pass 1: coordinate bounds
+    lower = np.asarray([g.min() for g in grid])
+    upper = np.asarray([g.max() for g in grid])
+    for chunk in _chunk_slices(n_samples, chunk_size):
+        c = np.array(coordinates[:, chunk], dtype=float)
+        c[~np.isfinite(c)] = np.nan
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            lower = np.fmin(lower, np.nanmin(c, axis=1))
+            upper = np.fmax(upper, np.nanmax(c, axis=1))
+
+    span = upper - lower
+    max_per_dimension = max(int(max_bins ** (1 / n_features)), 1)
+    bin_width = np.fmax(window, span / max_per_dimension)
+    bin_width[bin_width == 0] = 1.0
+    n_bins = np.floor(span / bin_width).astype(int) + 1
+
+    # Pass 2: sample density (samples with non-finite coordinates are
+    # excluded in the same way as masked samples)
+    histogram = np.zeros(n_bins, dtype=np.int64)
+    for chunk in _chunk_slices(n_samples, chunk_size):
+        c = np.asarray(coordinates[:, chunk], dtype=float)
+        bins = _sample_bins(c, lower, bin_width, n_bins)
+        bins = bins[:, np.all(bins >= 0, axis=0)]
+        np.add.at(histogram, tuple(bins), 1)
+
+    # Estimate the memory required per sample using a subsample
+    step = max(n_samples // 10000, 1)
+    sub = np.asarray(coordinates[:, ::step], dtype=float)
+    sub = sub[:, np.all(np.isfinite(sub), axis=0)]
+    sub = (sub - lower[:, None]) / window[:, None]
+    bytes_per_sample = ResamplePolynomial.estimate_max_bytes(
+        sub, window=1, n_sets=n_sets, order=order) / sub.shape[1]
+    bytes_per_sample += row_bytes
+
+    grid_bins = [_sample_bins(g[None], lower[i:i + 1], bin_width[i:i + 1],
+                              n_bins[i:i + 1])[0]
+                 for i, g in enumerate(grid)]
+    n_outputs = 1 + int(get_error) + int(get_counts)
+    grid_bytes = np.ones(())
+    for i in range(n_features):
+        axis_counts = np.bincount(grid_bins[i], minlength=n_bins[i])
+        grid_bytes = np.multiply.outer(grid_bytes, axis_counts)
+    grid_bytes = grid_bytes * 8.0 * n_sets * n_outputs
+
+    tiles = plan_tiles(histogram, bytes_per_sample, grid_bytes, max_memory)
+    log.debug(f"Out-of-core resampling of {n_samples} samples in "
+              f"{len(tiles)} tiles.")
+
+    # Create output arrays
+    shape = tuple(g.size for g in grid[::-1])
+    if multi_set:
+        shape = (n_sets,) + shape
+    outputs = {'fit': (float, cval)}
+    if get_error:
+        outputs['error'] = (float, np.nan)
+    if get_counts:
+        outputs['counts'] = (int, 0)
+    results = {}
+    for name, (dtype, fill) in outputs.items():
+        if output_directory is not None:
+            filename = os.path.join(output_directory, f'{name}.npy')
+            results[name] = np.lib.format.open_memmap(
+                filename, mode='w+', dtype=dtype, shape=shape)
+            results[name][...] = fill
+        else:
+            results[name] = np.full(shape, fill, dtype=dtype)
+
+    # Pass 3: distribute samples to each tile
+    remove_temp = temp_directory is None
+    if remove_temp:
+        temp_directory = tempfile.mkdtemp(prefix='resample_tiles_')
+
+    tile_arrays = []
+    try:
+        for index, (lo, hi) in enumerate(tiles):
+            expanded = tuple(slice(max(a - 1, 0), min(b + 1, n))
+                             for (a, b, n) in zip(lo, hi, n_bins))
+            count = int(histogram[expanded].sum())
+            arrays = {}
+            if count > 0:
+                def tile_array(name, array_shape, dtype):
+                    filename = os.path.join(temp_directory,
+                                            f'{name}_{index}.npy')
+                    return np.lib.format.open_memmap(
+                        filename, mode='w+', dtype=dtype, shape=array_shape)
+                arrays['coordinates'] = tile_array(
+                    'coordinates', (n_features, count), float)
+                arrays['data'] = tile_array('data', (n_sets, count), float)
+                if error is not None and not scalar_error:
+                    arrays['error'] = tile_array(
+                        'error', (n_sets, count), float)
+                if mask is not None:
+                    arrays['mask'] = tile_array('mask', (n_sets, count), bool)
+            tile_arrays.append((count, arrays))
+
+        offsets = np.zeros(len(tiles), dtype=int)
+        for chunk in _chunk_slices(n_samples, chunk_size):
+            c = np.asarray(coordinates[:, chunk], dtype=float)
+            bins = _sample_bins(c, lower, bin_width, n_bins)
+            valid = np.all(bins >= 0, axis=0)
+            d = np.asarray(data[..., chunk], dtype=float).reshape(n_sets, -1)
+            if error is not None and not scalar_error:
+                e = np.asarray(error[..., chunk], dtype=float).reshape(
+                    n_sets, -1)
+            else:
+                e = None
+            if mask is not None:
+                m = np.asarray(mask[..., chunk], dtype=bool).reshape(
+                    n_sets, -1)
+            else:
+                m = None
+
+            for index, (lo, hi) in enumerate(tiles):
+                count, arrays = tile_arrays[index]
+                if count == 0:
+                    continue
+                keep = valid & np.all((bins >= (lo - 1)[:, None])
+                                      & (bins < (hi + 1)[:, None]), axis=0)
+                n_keep = int(keep.sum())
+                if n_keep == 0:
+                    continue
+                put = slice(offsets[index], offsets[index] + n_keep)
+                arrays['coordinates'][:, put] = c[:, keep]
+                arrays['data'][:, put] = d[:, keep]
+                if e is not None:
+                    arrays['error'][:, put] = e[:, keep]
+                if m is not None:
+                    arrays['mask'][:, put] = m[:, keep]
+                offsets[index] += n_keep
+
+        # Resample each tile
+        for index, (lo, hi) in enumerate(tiles):
+            count, arrays = tile_arrays[index]
+            grid_indices = [np.nonzero((grid_bins[i] >= lo[i])
+                                       & (grid_bins[i] < hi[i]))[0]
+                            for i in range(n_features)]
+            if count == 0 or any(gi.size == 0 for gi in grid_indices):
+                continue
+
+            tile_data = np.asarray(arrays['data'])
+            tile_error = arrays.get('error')
+            if tile_error is not None:
+                tile_error = np.asarray(tile_error)
+            elif scalar_error:
+                tile_error = error
+            tile_mask = arrays.get('mask')
+            if tile_mask is not None:
+                tile_mask = np.asarray(tile_mask)
+            if not multi_set:
+                tile_data = tile_data[0]
+                if isinstance(tile_error, np.ndarray):
+                    tile_error = tile_error[0]
+                if tile_mask is not None:
+                    tile_mask = tile_mask[0]
+
+            if not np.isfinite(tile_data).any():
+                continue
+
+            resampler = ResamplePolynomial(
+                np.asarray(arrays['coordinates']), tile_data,
+                error=tile_error, mask=tile_mask, window=window, order=order,
+                fix_order=fix_order, check_memory=False)
+            tile_grid = [grid[i][grid_indices[i]]
+                         for i in range(n_features)]
+            tile_result = resampler(*tile_grid, cval=cval,
+                                    get_error=get_error,
+                                    get_counts=get_counts, **kwargs)
+            if not isinstance(tile_result, tuple):
+                tile_result = (tile_result,)
+
+            tile_shape = tuple(gi.size for gi in grid_indices[::-1])
+            if multi_set:
+                tile_shape = (n_sets,) + tile_shape
+            put = np.ix_(*grid_indices[::-1])
+            if multi_set:
+                put = (slice(None),) + put
+            for name, values in zip(results.keys(), tile_result):
+                results[name][put] = np.asarray(values).reshape(tile_shape)
+
+            del resampler, arrays
+            tile_arrays[index] = (count, None)
+    finally:
+        del tile_arrays
+        if remove_temp:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+
+    for result in results.values():
+        if isinstance(result, np.memmap):
+            result.flush()
+
+    result = tuple(results.values())
+    if len(result) == 1:
+        return result[0]
+    return result
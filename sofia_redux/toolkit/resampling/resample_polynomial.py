@@ -3,15 +3,18 @@
 import numba as nb
 import numpy as np
 import psutil
+from scipy.spatial import cKDTree
 
 from sofia_redux.toolkit.resampling.resample_utils import (
     scale_coordinates,
     shaped_adaptive_weight_matrices,
     scaled_adaptive_weight_matrices,
-    relative_density, solve_fits)
+    relative_density, solve_fits, solve_fits_batched)
 from sofia_redux.toolkit.resampling.resample_base import (
     ResampleBase, _global_resampling_values)
-from sofia_redux.toolkit.utilities.multiprocessing import unpickle_file
+from sofia_redux.toolkit.resampling.fit_plan import FitPlan
+from sofia_redux.toolkit.utilities.multiprocessing import (
+    unpickle_file, release_shared_arrays)
 
 
 __all__ = ['ResamplePolynomial', 'resamp']
@@ -19,6 +22,11 @@ __all__ = ['ResamplePolynomial', 'resamp']
 
 class ResamplePolynomial(ResampleBase):
 
+    _plan_options = ('smoothing', 'relative_smooth', 'adaptive_threshold',
+                     'adaptive_algorithm', 'fit_threshold', 'cval',
+                     'edge_threshold', 'edge_algorithm', 'order_algorithm',
+                     'error_weighting', 'estimate_covariance', 'is_covar')
+
     def __init__(self, coordinates, data,
                  error=None, mask=None, window=None,
                  robust=None, negthresh=None,
@@ -30,6 +38,7 @@ class ResamplePolynomial(ResampleBase):
                  large_data=None,
                  check_memory=True,
                  memory_buffer=0.25,
+                 neighbor_method='auto',
                  **distance_kwargs):
         """
         Class to resample data using local polynomial fits.
@@ -115,6 +124,13 @@ class ResamplePolynomial(ResampleBase):
             A fraction (positive or negative) with which to modify the memory
             estimates for the process memory requirements.  Memory estimates
             are scaled by the factor 1 + memory_buffer.
+        neighbor_method : str, optional
+            The method used to find samples within the window of each fit
+            point.  Must be one of {'auto', 'balltree', 'kdtree', 'grid'}.
+            The default ('auto') uses a grid search over neighboring blocks
+            for dense, low dimensional data, a kd-tree for sparse or high
+            dimensional data, and a ball-tree if the distance metric is not a
+            Minkowski distance.
         distance_kwargs : dict, optional
             Optional keyword arguments passed into
             :func:`sklearn.neighbors.DistanceMetric`.  The default is to use
@@ -136,7 +152,8 @@ class ResamplePolynomial(ResampleBase):
                          window_estimate_oversample=window_estimate_oversample,
                          leaf_size=leaf_size, large_data=large_data,
                          check_memory=check_memory,
-                         memory_buffer=memory_buffer, **distance_kwargs)
+                         memory_buffer=memory_buffer,
+                         neighbor_method=neighbor_method, **distance_kwargs)
 
     @property
     def order(self):
@@ -163,6 +180,28 @@ class ResamplePolynomial(ResampleBase):
         """
         return super().fit_tree
 
+    @property
+    def adaptive_alpha(self):
+        """
+        Return the adaptive smoothing kernel of the last reduction.
+
+        The kernel may be passed back into :func:`ResamplePolynomial.__call__`
+        via the `adaptive_alpha` keyword to avoid recalculation when
+        resampling different data values at the same sample coordinates.
+
+        Returns
+        -------
+        adaptive_alpha : numpy.ndarray (float) or None
+            The adaptive kernel of shape (n_samples, n_sets, 1 or n_features,
+            n_features), or `None` if adaptive smoothing was not applied.
+        """
+        if self._fit_settings is None:
+            return None
+        adaptive_alpha = self._fit_settings.get('adaptive_alpha')
+        if adaptive_alpha is None or adaptive_alpha.size == 0:
+            return None
+        return adaptive_alpha
+
     def set_sample_tree(self, coordinates,
                         radius=None,
                         window_estimate_bins=10,
@@ -307,7 +346,10 @@ class ResamplePolynomial(ResampleBase):
                            estimate_covariance=False, jobs=None,
                            adaptive_region_coordinates=None,
                            use_threading=None,
-                           use_processes=None):
+                           use_processes=None,
+                           use_shared_memory=None,
+                           fit_plan=None, batch_solve=False,
+                           adaptive_alpha=None, adaptive_subsample=1):
         r"""
         Define a set of reduction instructions based on user input.
 
@@ -336,6 +378,22 @@ class ResamplePolynomial(ResampleBase):
             If `True`, force use of threads during multiprocessing.
         use_processes : bool, optional
             If `True`, force use of sub-processes during multiprocessing.
+        use_shared_memory : bool, optional
+            If `True`, share sample arrays with sub-processes via shared
+            memory rather than pickle files.
+        fit_plan : FitPlan, optional
+            A previously calculated fit plan to apply during
+            :func:`ResamplePolynomial.pre_fit`.
+        batch_solve : bool, optional
+            If `True`, solve polynomial fits using
+            :func:`resample_utils.solve_fits_batched` where possible.
+        adaptive_alpha : numpy.ndarray (float), optional
+            A previously calculated adaptive smoothing kernel (see
+            :func:`ResamplePolynomial.adaptive_alpha`) to use in place of
+            :func:`ResamplePolynomial.calculate_adaptive_smoothing`.
+        adaptive_subsample : int, optional
+            If greater than 1, the adaptive smoothing kernel is only
+            calculated at every `adaptive_subsample` sample.
 
         Returns
         -------
@@ -351,7 +409,8 @@ class ResamplePolynomial(ResampleBase):
             edge_algorithm=edge_algorithm,
             jobs=jobs,
             use_threading=use_threading,
-            use_processes=use_processes)
+            use_processes=use_processes,
+            use_shared_memory=use_shared_memory)
 
         settings['estimate_covariance'] = estimate_covariance
 
@@ -465,7 +524,16 @@ class ResamplePolynomial(ResampleBase):
         settings['alpha'] = alpha
         settings['adaptive_threshold'] = adaptive_threshold
         settings['shaped'] = shaped
-        settings['adaptive_alpha'] = np.empty((0, 0, 0, 0), dtype=np.float64)
+        if adaptive_alpha is not None:
+            if not adaptive:
+                raise ValueError("Adaptive smoothing must be enabled to "
+                                 "apply an adaptive kernel.")
+            adaptive_alpha = self._check_adaptive_alpha(adaptive_alpha,
+                                                        shaped)
+        else:
+            adaptive_alpha = np.empty((0, 0, 0, 0), dtype=np.float64)
+        settings['adaptive_alpha'] = adaptive_alpha
+        settings['adaptive_subsample'] = max(int(adaptive_subsample), 1)
         settings['order'] = np.atleast_1d(order)
         settings['order_varies'] = order_varies
         settings['order_algorithm'] = order_algorithm
@@ -476,9 +544,47 @@ class ResamplePolynomial(ResampleBase):
         settings['mean_fit'] = mean_fit
         settings['relative_smooth'] = relative_smooth
         settings['adaptive_region_coordinates'] = region_coordinates
+        settings['fit_plan'] = fit_plan
+        settings['plan_blocks'] = None
+        settings['batch_solve'] = (batch_solve and not mean_fit
+                                   and not estimate_covariance
+                                   and settings['fit_threshold'] == 0)
         self._fit_settings = settings
         return settings
 
+    def _check_adaptive_alpha(self, adaptive_alpha, shaped):
+        """
+        Check a precalculated adaptive kernel is valid for the current data.
+
+        Parameters
+        ----------
+        adaptive_alpha : array_like (float)
+            The adaptive kernel of shape (n_samples, n_sets or 1,
+            1 or n_features, n_features).  Kernels calculated for a single
+            data set are applied to all data sets.
+        shaped : bool
+            `True` if the kernel should be of the shaped form.
+
+        Returns
+        -------
+        adaptive_alpha : numpy.ndarray (float)
+            The adaptive kernel of shape (n_samples, n_sets,
+            1 or n_features, n_features).
+        """
+        adaptive_alpha = np.asarray(adaptive_alpha, dtype=np.float64)
+        shape = (self.n_samples, self.n_sets, self.features if shaped else 1,
+                 self.features)
+        if (adaptive_alpha.ndim != 4
+                or adaptive_alpha.shape[1] not in [1, self.n_sets]
+                or adaptive_alpha.shape[::2] != shape[::2]
+                or adaptive_alpha.shape[-1] != shape[-1]):
+            raise ValueError(f"Adaptive kernel of shape "
+                             f"{adaptive_alpha.shape} does not match the "
+                             f"expected shape {shape}.")
+        if adaptive_alpha.shape[1] != self.n_sets:
+            adaptive_alpha = np.repeat(adaptive_alpha, self.n_sets, axis=1)
+        return np.ascontiguousarray(adaptive_alpha)
+
     def calculate_adaptive_smoothing(self, settings):
         r"""
         Calculate the adaptive distance weighting kernel.
@@ -549,7 +655,15 @@ class ResamplePolynomial(ResampleBase):
         respectively.
 
         The weighting kernels are stored in the "adaptive_alpha" keyword value
-        in `settings`.
+        in `settings`.  If `settings` already contains a precalculated
+        kernel, no further calculation is performed.
+
+        If the "adaptive_subsample" value in `settings` is greater than 1,
+        the initial fit is only performed at every n'th sample, and the
+        remaining samples are assigned the kernel of their nearest
+        neighbor from that subset.  This reduces the cost of the initial fit
+        by the same factor at the expense of spatial resolution in the
+        derived kernels.
 
         Parameters
         ----------
@@ -574,6 +688,10 @@ class ResamplePolynomial(ResampleBase):
             settings['adaptive_alpha'] = np.empty((0, 0, 0, 0))
             return
 
+        if settings['adaptive_alpha'].size > 0:
+            # A precalculated kernel was supplied
+            return
+
         sigma = np.atleast_1d(settings['alpha'])
         if sigma.size != self.features:
             sigma = np.full(self.features, sigma[0])
@@ -596,8 +714,13 @@ class ResamplePolynomial(ResampleBase):
 
         shaped = settings['shaped']
 
+        subsample = settings.get('adaptive_subsample', 1)
+        test_coordinates = self.sample_tree.coordinates
+        if subsample > 1:
+            test_coordinates = test_coordinates[:, ::subsample]
+
         test_reduction = self.__call__(
-            scale_coordinates(self.sample_tree.coordinates.copy(),
+            scale_coordinates(test_coordinates.copy(),
                               self._radius, self._scale_offsets, reverse=True),
             smoothing=scaled_test_alpha,
             relative_smooth=True,
@@ -649,7 +772,13 @@ class ResamplePolynomial(ResampleBase):
             gmat = scaled_adaptive_weight_matrices(
                 test_sigma, rchi2, fixed=fixed)
 
-        settings['adaptive_alpha'] = np.swapaxes(gmat, 0, 1).copy()
+        adaptive_alpha = np.swapaxes(gmat, 0, 1)
+        if subsample > 1:
+            nearest = cKDTree(test_coordinates.T).query(
+                self.sample_tree.coordinates.T)[1]
+            adaptive_alpha = adaptive_alpha[nearest]
+
+        settings['adaptive_alpha'] = adaptive_alpha.copy()
 
         self._fit_settings = settings
 
@@ -673,8 +802,17 @@ class ResamplePolynomial(ResampleBase):
         -------
         None
         """
+        fit_plan = settings.pop('fit_plan', None)
         settings['adaptive_region_coordinates'] = args
         self.calculate_adaptive_smoothing(settings)
+
+        if fit_plan is not None:
+            # Geometry was calculated when the plan was created
+            self.fit_grid = fit_plan.fit_grid
+            settings['plan_blocks'] = fit_plan.blocks
+            self._fit_settings = settings
+            return
+
         super().pre_fit(settings, *args)
 
         if adaptive_region_coordinates is not None:
@@ -694,6 +832,80 @@ class ResamplePolynomial(ResampleBase):
         self.fit_tree.set_order(o, fix_order=not settings['order_varies'])
         self.fit_tree.precalculate_phi_terms()
 
+    @staticmethod
+    def block_geometry(fit_tree, sample_tree, block):
+        """
+        Return the fit points and sample neighbors for a single block.
+
+        Parameters
+        ----------
+        fit_tree : PolynomialTree
+            The fitting tree.
+        sample_tree : PolynomialTree
+            The sample tree.
+        block : int
+            The block index.
+
+        Returns
+        -------
+        fit_indices, fit_coordinates, fit_phi_terms, sample_indices
+            The fit point indices, coordinates, and polynomial terms for all
+            fit points in the block, and an array of the sample indices
+            within the window of each fit point.
+        """
+        fit_indices, fit_coordinates, fit_phi_terms = \
+            fit_tree.block_members(block, get_locations=True, get_terms=True)
+        sample_indices = sample_tree.query_radius(
+            fit_coordinates, 1.0, block=block, return_distance=False)
+        return fit_indices, fit_coordinates, fit_phi_terms, sample_indices
+
+    def create_fit_plan(self, *args, **kwargs):
+        """
+        Create a reusable fit plan for the given fit coordinates.
+
+        The plan contains the fit tree and the sample neighbors of all fit
+        points such that subsequent resampling of different data values onto
+        the same coordinates does not need to repeat any neighborhood
+        searches.  Plans may be applied via
+        :func:`ResamplePolynomial.__call__` using the `fit_plan` keyword, or
+        by calling the plan directly with new data values.
+
+        Parameters
+        ----------
+        args : array_like or n-tuple of array_like
+            The fit coordinates.  See :func:`ResamplePolynomial.__call__`.
+        kwargs : dict, optional
+            Reduction options (smoothing, relative_smooth,
+            adaptive_threshold, adaptive_algorithm, fit_threshold, cval,
+            edge_threshold, edge_algorithm, order_algorithm,
+            error_weighting, estimate_covariance, is_covar).  See
+            :func:`ResamplePolynomial.__call__`.
+
+        Returns
+        -------
+        FitPlan
+        """
+        for key in kwargs:
+            if key not in self._plan_options:
+                raise ValueError(f"{key} is not a valid fit plan option.")
+        self._check_call_arguments(*args)
+        settings = self.reduction_settings(**kwargs)
+
+        # Adaptive smoothing depends on data values and is always
+        # recalculated when a plan is applied.
+        settings['adaptive_threshold'] = None
+        self.pre_fit(settings, *args)
+        fit_tree = self.fit_tree
+        skip = ((fit_tree.block_population == 0)
+                | (self.sample_tree.hood_population == 0))
+
+        blocks = {}
+        for block in np.nonzero(~skip)[0]:
+            blocks[block] = self.block_geometry(
+                fit_tree, self.sample_tree, block)
+
+        return FitPlan(self, args, kwargs, self.fit_grid, blocks)
+
     @classmethod
     def process_block(cls, args, block):
         r"""
@@ -744,6 +956,9 @@ class ResamplePolynomial(ResampleBase):
                 load_args = True
 
         if load_args:  # pragma: no cover
+            # Detach from any shared memory used by a previous reduction
+            _global_resampling_values.pop('args', None)
+            release_shared_arrays()
             _global_resampling_values['args'], _ = unpickle_file(filename)
             _global_resampling_values['iteration'] = iteration
             _global_resampling_values['filename'] = filename
@@ -761,11 +976,14 @@ class ResamplePolynomial(ResampleBase):
                     f"Estimated: {block_memory} bytes. "
                     f"Available: {psutil.virtual_memory().available} bytes.")
 
-        fit_indices, fit_coordinates, fit_phi_terms = \
-            fit_tree.block_members(block, get_locations=True, get_terms=True)
-
-        sample_indices = nb.typed.List(sample_tree.query_radius(
-            fit_coordinates, 1.0, block=block, return_distance=False))
+        plan_blocks = settings.get('plan_blocks')
+        if plan_blocks is not None:
+            (fit_indices, fit_coordinates, fit_phi_terms,
+             sample_indices) = plan_blocks[block]
+        else:
+            (fit_indices, fit_coordinates, fit_phi_terms,
+             sample_indices) = cls.block_geometry(fit_tree, sample_tree, block)
+        sample_indices = nb.typed.List(sample_indices)
 
         if not sample_tree.large_data:
             sample_phi_terms = sample_tree.phi_terms
@@ -776,6 +994,27 @@ class ResamplePolynomial(ResampleBase):
             sample_phi_terms = np.empty((n_coeffs, n), dtype=float)
             sample_phi_terms[:, phi_indices] = sample_tree.phi_terms
 
+        if settings.get('batch_solve') and not get_cross_derivatives:
+            return (fit_indices,
+                    *solve_fits_batched(
+                        sample_indices, sample_tree.coordinates,
+                        sample_phi_terms,
+                        sample_values, sample_error, sample_mask,
+                        fit_coordinates, fit_phi_terms, settings['order'],
+                        settings['alpha'], settings['adaptive_alpha'],
+                        cval=settings['cval'],
+                        error_weighting=settings['error_weighting'],
+                        order_algorithm_idx=settings['order_algorithm_idx'],
+                        order_term_indices=sample_tree.term_indices,
+                        edge_algorithm_idx=settings['edge_algorithm_idx'],
+                        edge_threshold=settings['edge_threshold'],
+                        minimum_points=settings['order_minimum_points'],
+                        get_error=get_error, get_counts=get_counts,
+                        get_weights=get_weights,
+                        get_distance_weights=get_distance_weights,
+                        get_rchi2=get_rchi2,
+                        get_offset_variance=get_offset_variance))
+
         return (fit_indices,
                 *solve_fits(
                     sample_indices, sample_tree.coordinates,
@@ -808,7 +1047,9 @@ class ResamplePolynomial(ResampleBase):
                  edge_algorithm='distribution', order_algorithm='bounded',
                  error_weighting=True, estimate_covariance=False,
                  is_covar=False, jobs=None, use_threading=None,
-                 use_processes=None, adaptive_region_coordinates=None,
+                 use_processes=None, use_shared_memory=None,
+                 adaptive_region_coordinates=None, fit_plan=None,
+                 batch_solve=False, adaptive_alpha=None, adaptive_subsample=1,
                  get_error=False, get_counts=False, get_weights=False,
                  get_distance_weights=False, get_rchi2=False,
                  get_cross_derivatives=False, get_offset_variance=False,
@@ -937,6 +1178,49 @@ class ResamplePolynomial(ResampleBase):
             If `True`, force use of threads during multiprocessing.
         use_processes : bool, optional
             If `True`, force use of sub-processes during multiprocessing.
+        use_shared_memory : bool, optional
+            If `True`, sub-processes attach to sample arrays and tree indices
+            placed in shared memory rather than reading a pickle file
+            containing a copy of all data.  The number of bytes transferred is
+            available in :func:`ResamplePolynomial.dispatch_info` following
+            the reduction.
+        adaptive_region_coordinates : array_like, optional
+            Coordinates used to limit the fitting region when calculating
+            adaptive smoothing kernels.
+        fit_plan : FitPlan, optional
+            A plan created by :func:`ResamplePolynomial.create_fit_plan` for
+            the same sample coordinates.  If supplied, `args` and all
+            reduction options used to create the plan are applied, and the
+            fit coordinates and sample neighbors are retrieved from the plan
+            rather than recalculated.
+        batch_solve : bool, optional
+            If `True`, the normal equations of all polynomial fits within
+            each block are stacked and solved simultaneously using a
+            vectorized Cholesky decomposition (see
+            :func:`resample_utils.solve_fits_batched`).  This is
+            significantly faster for higher order fits, and results are
+            equivalent to within numerical precision.  Fits of a reduced
+            order, or with singular normal matrices, are solved individually
+            as usual.  Batched solving is not available for mean fits,
+            covariance propagation, non-zero `fit_threshold`,
+            `estimate_covariance`, or `get_cross_derivatives`, in which case
+            this option is ignored.
+        adaptive_alpha : numpy.ndarray (float), optional
+            An adaptive smoothing kernel calculated during a previous
+            reduction, as given by :func:`ResamplePolynomial.adaptive_alpha`.
+            If supplied, the initial fit used to derive adaptive kernels is
+            skipped.  This allows kernels to be derived once and reused for
+            different data sets sharing the same sample coordinates, such as
+            multiple Stokes parameters or error maps.  A kernel derived for a
+            single data set is applied to all data sets.  Adaptive smoothing
+            must be enabled with the same `adaptive_threshold` and
+            `adaptive_algorithm` used to derive the kernel.
+        adaptive_subsample : int, optional
+            If greater than 1, the initial fit used to derive adaptive
+            smoothing kernels is only performed at every
+            `adaptive_subsample` sample, with remaining samples assigned the
+            kernel of the nearest fitted sample.  This provides an
+            approximate, but proportionally cheaper adaptive kernel.
         get_error : bool, optional
             If `True`, If True returns the error which is given as the weighted
             RMS of the samples used for each resampling point.
@@ -971,24 +1255,37 @@ class ResamplePolynomial(ResampleBase):
             `fit_error` will be of type np.float64, and `fit_counts` will
             be of type np.int64.
         """
+        reduction_kwargs = {
+            'smoothing': smoothing,
+            'relative_smooth': relative_smooth,
+            'adaptive_threshold': adaptive_threshold,
+            'adaptive_algorithm': adaptive_algorithm,
+            'fit_threshold': fit_threshold,
+            'cval': cval,
+            'edge_threshold': edge_threshold,
+            'edge_algorithm': edge_algorithm,
+            'order_algorithm': order_algorithm,
+            'error_weighting': error_weighting,
+            'estimate_covariance': estimate_covariance,
+            'is_covar': is_covar}
+
+        if fit_plan is not None:
+            fit_plan.check_resampler(self)
+            args = fit_plan.args
+            reduction_kwargs.update(fit_plan.reduction_kwargs)
+
         return super().__call__(
             *args,
-            smoothing=smoothing,
-            relative_smooth=relative_smooth,
-            adaptive_threshold=adaptive_threshold,
-            adaptive_algorithm=adaptive_algorithm,
-            fit_threshold=fit_threshold,
-            cval=cval,
-            edge_threshold=edge_threshold,
-            edge_algorithm=edge_algorithm,
-            order_algorithm=order_algorithm,
-            error_weighting=error_weighting,
-            estimate_covariance=estimate_covariance,
-            is_covar=is_covar,
+            **reduction_kwargs,
             jobs=jobs,
             adaptive_region_coordinates=adaptive_region_coordinates,
+            fit_plan=fit_plan,
+            batch_solve=batch_solve,
+            adaptive_alpha=adaptive_alpha,
+            adaptive_subsample=adaptive_subsample,
             use_threading=use_threading,
             use_processes=use_processes,
+            use_shared_memory=use_shared_memory,
             get_error=get_error,
             get_counts=get_counts,
             get_weights=get_weights,
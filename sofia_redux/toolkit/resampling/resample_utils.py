@@ -68,7 +68,9 @@ __all__ = ['polynomial_exponents', 'polynomial_derivative_map',
            'apply_mask_to_set_arrays', 'no_fit_solution',
            'solve_polynomial_fit', 'sigmoid', 'logistic_curve',
            'half_max_sigmoid', 'stretch_correction', 'solve_fits', 'solve_fit',
-           'convert_to_numba_list']
+           'batch_cholesky_factor', 'batch_forward_substitute',
+           'batch_cholesky_solve', 'batch_quadratic_inverse',
+           'solve_fits_batched', 'convert_to_numba_list']
 
 
 def polynomial_exponents(order, ndim=None, use_max_order=False):
@@ -5628,6 +5630,659 @@ def solve_fit(window_coordinates, window_phi, window_values, window_error,
             variance_offset)
 
 
+@njit(cache=True, nogil=False, parallel=False, fastmath=False)
+def batch_cholesky_factor(amat, valid, tolerance=1e-12):  # pragma: no cover
+    r"""
+    Cholesky decompose a stack of symmetric matrices in place.
+
+    The stacked matrices :math:`A_b` are decomposed such that
+    :math:`A_b = L_b L_b^T` where :math:`L_b` is lower triangular.  The
+    stack is arranged with the batch dimension last so that the innermost
+    loops run over contiguous memory for all matrices simultaneously,
+    allowing the compiler to vectorize the decomposition.
+
+    A matrix is flagged as invalid if any pivot is less than or equal to
+    `tolerance` multiplied by the corresponding diagonal element of the
+    original matrix, i.e., the matrix is not numerically positive definite.
+    Such matrices should be solved using a rank revealing method instead.
+
+    Parameters
+    ----------
+    amat : numpy.ndarray (n_terms, n_terms, n_batch)
+        The stacked symmetric matrices.  Only the lower triangle is used.
+        On exit, the lower triangle contains :math:`L`.
+    valid : numpy.ndarray of bool (n_batch,)
+        Matrices to decompose.  Updated in place to `False` for any matrix
+        that is not positive definite.
+    tolerance : float, optional
+        The relative pivot tolerance.
+
+    Returns
+    -------
+    None
+    """
+    m = amat.shape[0]
+    n = amat.shape[2]
+    s = np.empty(n, dtype=nb.float64)
+    for j in range(m):
+        for i in range(j, m):
+            for b in range(n):
+                s[b] = amat[i, j, b]
+            for k in range(j):
+                for b in range(n):
+                    s[b] -= amat[i, k, b] * amat[j, k, b]
+            if i == j:
+                for b in range(n):
+                    if not valid[b] or s[b] <= (tolerance * amat[j, j, b]):
+                        valid[b] = False
+                        s[b] = 1.0
+                    amat[j, j, b] = math.sqrt(s[b])
+            else:
+                for b in range(n):
+                    amat[i, j, b] = s[b] / amat[j, j, b]
+
+
+@njit(cache=True, nogil=False, parallel=False, fastmath=False)
+def batch_forward_substitute(lower, rhs):  # pragma: no cover
+    r"""
+    Solve :math:`L_b z_b = y_b` for a stack of lower triangular matrices.
+
+    Parameters
+    ----------
+    lower : numpy.ndarray (n_terms, n_terms, n_batch)
+        The stacked lower triangular Cholesky factors from
+        :func:`batch_cholesky_factor`.
+    rhs : numpy.ndarray (n_terms, n_batch)
+        The right hand side :math:`y` for each matrix.
+
+    Returns
+    -------
+    z : numpy.ndarray (n_terms, n_batch)
+    """
+    m, n = rhs.shape
+    z = np.empty((m, n), dtype=nb.float64)
+    for i in range(m):
+        for b in range(n):
+            z[i, b] = rhs[i, b]
+        for k in range(i):
+            for b in range(n):
+                z[i, b] -= lower[i, k, b] * z[k, b]
+        for b in range(n):
+            z[i, b] /= lower[i, i, b]
+    return z
+
+
+@njit(cache=True, nogil=False, parallel=False, fastmath=False)
+def batch_cholesky_solve(lower, rhs):  # pragma: no cover
+    r"""
+    Solve :math:`A_b x_b = y_b` for a stack of Cholesky decomposed matrices.
+
+    Parameters
+    ----------
+    lower : numpy.ndarray (n_terms, n_terms, n_batch)
+        The stacked lower triangular Cholesky factors of :math:`A` from
+        :func:`batch_cholesky_factor`.
+    rhs : numpy.ndarray (n_terms, n_batch)
+        The right hand side :math:`y` for each matrix.
+
+    Returns
+    -------
+    x : numpy.ndarray (n_terms, n_batch)
+    """
+    m, n = rhs.shape
+    x = batch_forward_substitute(lower, rhs)
+    for i in range(m - 1, -1, -1):
+        for k in range(i + 1, m):
+            for b in range(n):
+                x[i, b] -= lower[k, i, b] * x[k, b]
+        for b in range(n):
+            x[i, b] /= lower[i, i, b]
+    return x
+
+
+@njit(cache=True, nogil=False, parallel=False, fastmath=False)
+def batch_quadratic_inverse(lower, phi):  # pragma: no cover
+    r"""
+    Calculate :math:`\Phi_b^T A_b^{-1} \Phi_b` for a stack of matrices.
+
+    Parameters
+    ----------
+    lower : numpy.ndarray (n_terms, n_terms, n_batch)
+        The stacked lower triangular Cholesky factors of :math:`A` from
+        :func:`batch_cholesky_factor`.
+    phi : numpy.ndarray (n_terms, n_batch)
+        The polynomial terms for each matrix.
+
+    Returns
+    -------
+    q : numpy.ndarray (n_batch,)
+    """
+    m, n = phi.shape
+    z = batch_forward_substitute(lower, phi)
+    q = np.zeros(n, dtype=nb.float64)
+    for i in range(m):
+        for b in range(n):
+            q[b] += z[i, b] * z[i, b]
+    return q
+
+
+@njit(cache=True, nogil=False, parallel=False, fastmath=False)
+def solve_fits_batched(sample_indices, sample_coordinates, sample_phi_terms,
+                       sample_data, sample_error, sample_mask,
+                       fit_coordinates, fit_phi_terms, order, alpha,
+                       adaptive_alpha, cval=np.nan, error_weighting=True,
+                       order_algorithm_idx=1, order_term_indices=None,
+                       edge_algorithm_idx=1, edge_threshold=None,
+                       minimum_points=None, get_error=True, get_counts=True,
+                       get_weights=True, get_distance_weights=True,
+                       get_rchi2=True, get_offset_variance=True,
+                       tolerance=1e-12):  # pragma: no cover
+    r"""
+    Solve all polynomial fits within one block using a batched solver.
+
+    This is an alternative to :func:`solve_fits` for standard weighted
+    polynomial fits.  Rather than solving each least-squares system
+    separately with a rank revealing decomposition, the normal matrices
+    (:math:`A = \Phi W \Phi^T`) and vectors (:math:`\beta = \Phi W y`) of
+    every fit in the block are accumulated into stacked arrays.  All fits of
+    the full polynomial order share the same number of terms regardless of
+    the number of samples in each window, so the stacked systems are solved
+    together using a vectorized Cholesky decomposition
+    (:func:`batch_cholesky_factor`).  The covariance matrices required for
+    the error and reduced chi-squared statistic are derived in the same
+    manner, with the residual sums expanded in terms of the accumulated
+    moments such that samples need only be visited once.
+
+    The sample selection, edge and order checks are identical to
+    :func:`solve_fit`.  Fits that require a reduced order, have fewer samples
+    than polynomial terms, or whose normal matrices are not numerically
+    positive definite (see `tolerance`), are passed to :func:`solve_fit`.
+    Results are therefore equivalent to :func:`solve_fits` except for
+    poorly conditioned systems, for which the Cholesky solution is generally
+    closer to the exact least-squares solution.  Mean fits, covariance
+    propagation, fit thresholds, estimated covariances and derivative
+    cross-products are not supported and should be processed with
+    :func:`solve_fits`.
+
+    Parameters
+    ----------
+    sample_indices : numba.typed.List
+        A list of 1-dimensional numpy.ndarray (dtype=int) of length n_fits.
+        Each list element `sample_indices[i]`, contains the indices of samples
+        within the "window" region of `fit_indices[i]`.
+    sample_coordinates : numpy.ndarray (n_dimensions, n_samples)
+        The independent coordinates for each sample in n_dimensions
+    sample_phi_terms : numpy.ndarray (n_terms, n_samples)
+        The polynomial terms of `sample_coordinates`.
+    sample_data : numpy.ndarray (n_sets, n_samples)
+        The dependent values of the samples for n_sets, each containing
+        n_samples.
+    sample_error : numpy.ndarray (n_sets, n_samples)
+        The associated 1-sigma error values for each sample in each set of
+        shape (n_sets, n_samples), (n_sets, 1), or (n_sets, 0) if no error
+        values are available.
+    sample_mask : numpy.ndarray (n_sets, n_samples)
+        A mask where `False` indicates that the associated sample should be
+        excluded from all fits.
+    fit_coordinates : numpy.ndarray (n_dimensions, n_fits)
+        The independent variables at each fit coordinate in d_dimensions.
+    fit_phi_terms : numpy.ndarray (n_terms, n_fits)
+        The polynomial terms of `fit_coordinates`.
+    order : numpy.ndarray
+        The desired order of the fit as a (1,) or (n_dimensions,) array.
+    alpha : numpy.ndarray (n_dimensions,)
+        A distance weighting scaling factor per dimension.  See
+        :func:`solve_fits` for further details.
+    adaptive_alpha : numpy.ndarray
+        Shape = (n_samples, n_sets, [1 or n_dimensions], n_dimensions).  See
+        :func:`solve_fits` for further details.
+    cval : float, optional
+        The fill value for fits that could not be calculated.
+    error_weighting : bool, optional
+        If `True`, weight the samples in the fit by the inverse variance
+        (1 / sample_error^2) in addition to distance weighting.
+    order_algorithm_idx : int, optional
+        An integer specifying which polynomial order validation algorithm to
+        use.  See :func:`check_orders`.
+    order_term_indices : numpy.ndarray (> max(order) + 1,), optional
+        A 1-dimensional lookup array for use in determining the correct phi
+        terms to use for a given polynomial order if the order is allowed
+        to vary.  See :func:`solve_fits` for further details.
+    edge_algorithm_idx : int, optional
+        Integer specifying the algorithm used to determine whether a fit should
+        be attempted with respect to the sample distribution.  See
+        :func:`check_edges`.
+    edge_threshold : numpy.ndarray (n_dimensions,)
+        A threshold parameter determining how close an edge should be to the
+        center of the distribution during :func:`check_edges`.
+    minimum_points : int, optional
+        The minimum number of points required for a fit of `order`.
+    get_error : bool, optional
+        If `True`, return the error on the fit.
+    get_counts : bool, optional
+        If `True`, return the number of samples used when determining the fit
+        at each fitting point.
+    get_weights : bool, optional
+        If `True`, return the sum of all sample weights used in determining the
+        fit at each point.
+    get_distance_weights : bool, optional
+        If `True`, return the sum of only the distance weights used in
+        determining the fit at each point.
+    get_rchi2 : bool, optional
+        If `True`, return the reduced chi-squared statistic for each of the
+        fitted points.
+    get_offset_variance : bool optional
+        If `True`, return the offset of the fitting point from the sample
+        distribution.  See :func:`offset_variance` for further information.
+    tolerance : float, optional
+        The relative pivot tolerance below which a normal matrix is
+        considered singular.  See :func:`batch_cholesky_factor`.
+
+    Returns
+    -------
+    fit_results : 8-tuple of numpy.ndarray
+        Identical to the output of :func:`solve_fits`.  Derivative
+        mean-squared-cross-products are not calculated, so fit_results[6]
+        is always of shape (1, 0, 0, 0).
+    """
+    n_sets = sample_data.shape[0]
+    n_dimensions, n_fits = fit_coordinates.shape
+
+    fit_out = np.empty((n_sets, n_fits), dtype=nb.float64)
+
+    if get_error:
+        error_out = np.empty((n_sets, n_fits), dtype=nb.float64)
+    else:
+        error_out = np.empty((0, 0), dtype=nb.float64)
+
+    if get_counts:
+        counts_out = np.empty((n_sets, n_fits), dtype=nb.i8)
+    else:
+        counts_out = np.empty((0, 0), dtype=nb.i8)
+
+    if get_weights:
+        weights_out = np.empty((n_sets, n_fits), dtype=nb.float64)
+    else:
+        weights_out = np.empty((0, 0), dtype=nb.float64)
+
+    if get_distance_weights:
+        distance_weights_out = np.empty((n_sets, n_fits), dtype=nb.float64)
+    else:
+        distance_weights_out = np.empty((0, 0), dtype=nb.float64)
+
+    if get_rchi2:
+        rchi2_out = np.empty((n_sets, n_fits), dtype=nb.float64)
+    else:
+        rchi2_out = np.empty((0, 0), dtype=nb.float64)
+
+    cov_out = np.empty((1, 0, 0, 0), dtype=nb.float64)
+
+    if get_offset_variance:
+        offset_variance_out = np.empty((n_sets, n_fits), dtype=nb.float64)
+    else:
+        offset_variance_out = np.empty((0, 0), dtype=nb.float64)
+
+    if n_sets == 0 or n_fits == 0:  # pragma: no cover
+        return (fit_out, error_out,
+                counts_out, weights_out, distance_weights_out,
+                rchi2_out, cov_out, offset_variance_out)
+
+    adaptive_smoothing = adaptive_alpha.size > 0
+    if adaptive_smoothing:
+        shaped = adaptive_alpha.shape[-2] > 1
+    else:
+        shaped = False
+
+    if edge_threshold is None:
+        edge_thresh = np.empty(0, dtype=nb.float64)
+    else:
+        edge_thresh = np.asarray(edge_threshold, dtype=nb.float64)
+
+    # Select the phi terms for the full order
+    order_varies = order_term_indices is not None
+    if order_varies:
+        phi_term_indices = np.asarray(order_term_indices)
+        t0 = phi_term_indices[order[0]]
+        t1 = phi_term_indices[order[0] + 1]
+    else:
+        t0 = 0
+        t1 = sample_phi_terms.shape[0]
+    m = t1 - t0
+
+    # Determine which matrices are required
+    error_valid = sample_error.shape[1] > 0
+    single_error = sample_error.shape[1] == 1
+    weightsum_required = get_error or get_rchi2 or get_weights
+    variance_required = get_error or (error_valid and get_rchi2)
+    e_required = error_valid and variance_required
+    if error_valid:
+        r_required = get_rchi2
+    else:
+        r_required = get_error
+    e_separate = e_required and not error_weighting
+    r_separate = r_required and error_weighting
+
+    n_max = n_sets * n_fits
+    amat = np.zeros((m, m, n_max), dtype=nb.float64)
+    beta = np.zeros((m, n_max), dtype=nb.float64)
+    phi_batch = np.empty((m, n_max), dtype=nb.float64)
+    if e_separate:
+        e_amat = np.zeros((m, m, n_max), dtype=nb.float64)
+    else:
+        e_amat = np.zeros((m, m, 0), dtype=nb.float64)
+    if r_separate:
+        r_amat = np.zeros((m, m, n_max), dtype=nb.float64)
+    else:
+        r_amat = np.zeros((m, m, 0), dtype=nb.float64)
+    if r_required:
+        r_beta = np.zeros((m, n_max), dtype=nb.float64)
+    else:
+        r_beta = np.zeros((m, 0), dtype=nb.float64)
+    r_y2 = np.zeros(n_max, dtype=nb.float64)
+    batch_counts = np.empty(n_max, dtype=nb.i8)
+    batch_weightsum = np.empty(n_max, dtype=nb.float64)
+    batch_distance_weight = np.empty(n_max, dtype=nb.float64)
+    batch_fit = np.empty(n_max, dtype=nb.i8)
+    batch_set = np.empty(n_max, dtype=nb.i8)
+    fallback = np.full(n_max, False)
+
+    dummy_fixed_weights = np.empty(0, dtype=nb.float64)
+    dummy_adaptive_weights = np.empty((0, 0), dtype=nb.float64)
+    phi_k = np.empty(m, dtype=nb.float64)
+
+    n_batch = 0
+    for fit_index in range(len(sample_indices)):
+
+        fit_coordinate = fit_coordinates[:, fit_index]
+
+        window_indices = sample_indices[fit_index]
+        window_coordinates = sample_coordinates[:, window_indices]
+        window_mask = sample_mask[:, window_indices]
+
+        if adaptive_smoothing:
+            fixed_weights = dummy_fixed_weights
+            if shaped:
+                adaptive_weights = calculate_adaptive_distance_weights_shaped(
+                    window_coordinates, fit_coordinate,
+                    adaptive_alpha[window_indices])
+            else:
+                adaptive_weights = calculate_adaptive_distance_weights_scaled(
+                    window_coordinates, fit_coordinate,
+                    adaptive_alpha[window_indices])
+        else:
+            adaptive_weights = dummy_adaptive_weights
+            fixed_weights = calculate_distance_weights(
+                window_coordinates, fit_coordinate, alpha)
+
+        for data_set in range(n_sets):
+
+            if adaptive_smoothing:
+                window_distance_weights = adaptive_weights[data_set]
+            else:
+                window_distance_weights = fixed_weights
+
+            mask = window_mask[data_set]
+            counts = update_mask(window_distance_weights, mask)
+
+            if get_counts:
+                counts_out[data_set, fit_index] = counts
+
+            failed = counts == 0
+            if not failed:
+                failed = not check_edges(
+                    window_coordinates, fit_coordinate, mask, edge_thresh,
+                    algorithm=edge_algorithm_idx)
+
+            if not failed:
+                fit_order = check_orders(
+                    order, window_coordinates, fit_coordinate,
+                    order_algorithm_idx, mask=mask,
+                    minimum_points=minimum_points,
+                    required=not order_varies, counts=counts)
+                failed = fit_order[0] == -1
+                if not failed and counts < m:
+                    # Under-determined systems are solved by solve_fit
+                    fallback[n_batch] = True
+                elif not failed:
+                    for k in range(fit_order.size):
+                        if fit_order[k] != order[k]:
+                            # Reduced orders are solved by solve_fit
+                            fallback[n_batch] = True
+                            break
+
+            if not failed:
+                # Accumulate the normal matrices
+                ws = 0.0
+                dws = 0.0
+                for ii in range(window_indices.size):
+                    if not mask[ii]:
+                        continue
+                    sample_index = window_indices[ii]
+                    dw = window_distance_weights[ii]
+                    y = sample_data[data_set, sample_index]
+                    if error_valid:
+                        if single_error:
+                            e = sample_error[data_set, 0]
+                        else:
+                            e = sample_error[data_set, sample_index]
+                        ew = dw / (e * e)
+                    else:
+                        ew = dw
+
+                    w = ew if error_weighting else dw
+                    ws += w
+                    dws += dw
+
+                    for i in range(m):
+                        phi_k[i] = sample_phi_terms[t0 + i, sample_index]
+
+                    for i in range(m):
+                        pw = phi_k[i] * w
+                        beta[i, n_batch] += pw * y
+                        for j in range(i + 1):
+                            amat[i, j, n_batch] += pw * phi_k[j]
+
+                    if e_separate:
+                        for i in range(m):
+                            pw = phi_k[i] * ew
+                            for j in range(i + 1):
+                                e_amat[i, j, n_batch] += pw * phi_k[j]
+
+                    if r_required:
+                        r_y2[n_batch] += dw * y * y
+                        for i in range(m):
+                            pw = phi_k[i] * dw
+                            r_beta[i, n_batch] += pw * y
+                            if r_separate:
+                                for j in range(i + 1):
+                                    r_amat[i, j, n_batch] += pw * phi_k[j]
+
+                failed = weightsum_required and ws == 0
+
+            if failed:
+                fit_out[data_set, fit_index] = cval
+                if get_error:
+                    error_out[data_set, fit_index] = np.nan
+                if get_weights:
+                    weights_out[data_set, fit_index] = 0.0
+                if get_distance_weights:
+                    distance_weights_out[data_set, fit_index] = 0.0
+                if get_rchi2:
+                    rchi2_out[data_set, fit_index] = np.nan
+                if get_offset_variance:
+                    offset_variance_out[data_set, fit_index] = np.nan
+                fallback[n_batch] = False
+                for i in range(m):
+                    beta[i, n_batch] = 0.0
+                    for j in range(i + 1):
+                        amat[i, j, n_batch] = 0.0
+                        if e_separate:
+                            e_amat[i, j, n_batch] = 0.0
+                        if r_separate:
+                            r_amat[i, j, n_batch] = 0.0
+                    if r_required:
+                        r_beta[i, n_batch] = 0.0
+                r_y2[n_batch] = 0.0
+                continue
+
+            if get_offset_variance:
+                offset_variance_out[data_set, fit_index] = offset_variance(
+                    window_coordinates, fit_coordinate, mask=mask)
+
+            for i in range(m):
+                phi_batch[i, n_batch] = fit_phi_terms[t0 + i, fit_index]
+            batch_counts[n_batch] = counts
+            batch_weightsum[n_batch] = ws if weightsum_required else 0.0
+            batch_distance_weight[n_batch] = dws
+            batch_fit[n_batch] = fit_index
+            batch_set[n_batch] = data_set
+            n_batch += 1
+
+    # Solve all systems simultaneously
+    valid = np.empty(n_batch, dtype=nb.b1)
+    for b in range(n_batch):
+        valid[b] = not fallback[b]
+
+    lower = np.ascontiguousarray(amat[:, :, :n_batch])
+    batch_cholesky_factor(lower, valid, tolerance=tolerance)
+    if e_separate:
+        e_lower = np.ascontiguousarray(e_amat[:, :, :n_batch])
+        batch_cholesky_factor(e_lower, valid, tolerance=tolerance)
+    else:
+        e_lower = lower
+    if r_separate:
+        r_lower = np.ascontiguousarray(r_amat[:, :, :n_batch])
+        batch_cholesky_factor(r_lower, valid, tolerance=tolerance)
+    else:
+        r_lower = lower
+
+    phi_batch = np.ascontiguousarray(phi_batch[:, :n_batch])
+    coefficients = batch_cholesky_solve(
+        lower, np.ascontiguousarray(beta[:, :n_batch]))
+
+    if e_required:
+        e_variance = batch_quadratic_inverse(e_lower, phi_batch)
+    else:
+        e_variance = np.empty(0, dtype=nb.float64)
+
+    if r_required:
+        r_variance = batch_quadratic_inverse(r_lower, phi_batch)
+    else:
+        r_variance = np.empty(0, dtype=nb.float64)
+
+    for b in range(n_batch):
+        data_set = batch_set[b]
+        fit_index = batch_fit[b]
+
+        if not valid[b]:
+            # Solve the fit using a rank revealing method
+            window_indices = sample_indices[fit_index]
+            window_coordinates = sample_coordinates[:, window_indices]
+            fit_coordinate = fit_coordinates[:, fit_index]
+            if adaptive_smoothing:
+                if shaped:
+                    window_distance_weights = \
+                        calculate_adaptive_distance_weights_shaped(
+                            window_coordinates, fit_coordinate,
+                            adaptive_alpha[window_indices])[data_set]
+                else:
+                    window_distance_weights = \
+                        calculate_adaptive_distance_weights_scaled(
+                            window_coordinates, fit_coordinate,
+                            adaptive_alpha[window_indices])[data_set]
+            else:
+                window_distance_weights = calculate_distance_weights(
+                    window_coordinates, fit_coordinate, alpha)
+
+            if error_valid and not single_error:
+                window_error = sample_error[data_set, window_indices]
+            else:
+                window_error = sample_error[data_set]
+
+            (fitted_value, fitted_error, counts, weightsum, distance_weight,
+             rchi2, _, variance_offset) = solve_fit(
+                window_coordinates, sample_phi_terms[:, window_indices],
+                sample_data[data_set, window_indices], window_error,
+                sample_mask[data_set, window_indices],
+                window_distance_weights, fit_coordinate,
+                fit_phi_terms[:, fit_index], order,
+                cval=cval, error_weighting=error_weighting,
+                order_algorithm_idx=order_algorithm_idx,
+                term_indices=order_term_indices,
+                edge_algorithm_idx=edge_algorithm_idx,
+                edge_threshold=edge_threshold,
+                minimum_points=minimum_points,
+                get_error=get_error, get_weights=get_weights,
+                get_distance_weights=get_distance_weights,
+                get_rchi2=get_rchi2, get_cross_derivatives=False,
+                get_offset_variance=get_offset_variance)
+
+            fit_out[data_set, fit_index] = fitted_value
+            if get_error:
+                error_out[data_set, fit_index] = fitted_error
+            if get_weights:
+                weights_out[data_set, fit_index] = weightsum
+            if get_distance_weights:
+                distance_weights_out[data_set, fit_index] = distance_weight
+            if get_rchi2:
+                rchi2_out[data_set, fit_index] = rchi2
+            if get_offset_variance:
+                offset_variance_out[data_set, fit_index] = variance_offset
+            continue
+
+        fitted_value = 0.0
+        for i in range(m):
+            fitted_value += phi_batch[i, b] * coefficients[i, b]
+        fit_out[data_set, fit_index] = fitted_value
+
+        # Covariance scaling for the degrees of freedom
+        counts = batch_counts[b]
+        if m < counts:
+            scale = counts / (counts - m)
+        else:
+            scale = 1.0
+
+        if r_required:
+            # Weighted residual sum of squares from the accumulated
+            # moments: y'Wy - 2c'Phi.Wy + c'(LL')c
+            r2sum = r_y2[b]
+            for j in range(m):
+                r2sum -= 2 * coefficients[j, b] * r_beta[j, b]
+                lc = 0.0
+                for i in range(j, m):
+                    lc += r_lower[i, j, b] * coefficients[i, b]
+                r2sum += lc * lc
+            r_var = max(r2sum, 0.0) / batch_distance_weight[b]
+            r_var *= r_variance[b] * scale
+        else:
+            r_var = 0.0
+
+        if variance_required:
+            if error_valid:
+                variance = e_variance[b] * scale
+            else:
+                variance = r_var
+        else:
+            variance = 0.0
+
+        if get_error:
+            error_out[data_set, fit_index] = math.sqrt(variance)
+        if get_weights:
+            weights_out[data_set, fit_index] = batch_weightsum[b]
+        if get_distance_weights:
+            distance_weights_out[data_set, fit_index] = \
+                batch_distance_weight[b]
+        if get_rchi2:
+            if error_valid:
+                rchi2_out[data_set, fit_index] = r_var / variance
+            else:
+                rchi2_out[data_set, fit_index] = 1.0
+
+    return (fit_out, error_out,
+            counts_out, weights_out, distance_weights_out,
+            rchi2_out, cov_out, offset_variance_out)
+
+
 @nb.njit(cache=True, nogil=False, parallel=False, fastmath=False)
 def fasttrapz(y, x):  # pragma: no cover
     r"""
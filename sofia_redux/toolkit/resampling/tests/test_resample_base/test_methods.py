@@ -182,3 +182,43 @@ def test_process_block(test_resampler):
     filename = None
     iteration = 1
     assert r.process_block((filename, iteration), 0) is None
+
+
+def test_schedule_blocks():
+    cost = np.array([1.0, 0.0, 8.0, 2.0, 8.0, 1.0, 3.0, 0.0, 1.0, 1.0])
+    cost = np.concatenate([cost, np.full(40, 0.5)])
+    chunks = ResampleBase.schedule_blocks(cost, 2)
+    blocks = np.concatenate(chunks)
+    # All non-zero blocks scheduled once, in order of decreasing cost
+    assert np.allclose(np.sort(blocks), np.nonzero(cost)[0])
+    assert np.all(np.diff(cost[blocks]) <= 0)
+    # Most expensive blocks are dispatched individually
+    assert np.allclose(chunks[0], [2]) and np.allclose(chunks[1], [4])
+    # Cheap blocks are grouped together
+    assert len(chunks) < blocks.size
+    assert ResampleBase.schedule_blocks(np.zeros(5), 2) == []
+    chunks = ResampleBase.schedule_blocks(cost, 1, chunks_per_job=1)
+    assert len(chunks) == 1 and chunks[0].size == 48
+
+
+def test_process_block_chunk(test_resampler):
+    r = test_resampler
+    assert r.process_block_chunk((None, 1), np.arange(3)) == [None] * 3
+
+
+def test_set_data(test_resampler):
+    r = test_resampler
+    coordinates = r.coordinates
+    data = np.arange(r.n_samples, dtype=float)
+    mask = np.full(data.size, True)
+    mask[0] = False
+    r.set_data(data, error=2.0, mask=mask)
+    assert r.coordinates is coordinates
+    assert np.isnan(r.data[0, 0])
+    assert np.allclose(r.data[0, 1:], data[1:])
+    assert np.allclose(r.error, 2)
+    assert not r.mask[0, 0] and r.mask[0, 1:].all()
+
+    with pytest.raises(ValueError) as err:
+        r.set_data(data[:-1])
+    assert 'does not match' in str(err.value)
@@ -0,0 +1,145 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+from astropy.io import fits
+import numpy as np
+import os
+import pytest
+
+from sofia_redux.toolkit.resampling import resample_out_of_core
+from sofia_redux.toolkit.resampling.resample_out_of_core import (
+    resamp_out_of_core, open_sample_array, plan_tiles)
+from sofia_redux.toolkit.resampling.resample_polynomial import \
+    ResamplePolynomial
+
+
+@pytest.fixture
+def samples():
+    rand = np.random.RandomState(0)
+    coordinates = rand.rand(2, 5000) * 40
+    data = np.sin(coordinates[0] / 5) + np.cos(coordinates[1] / 7)
+    data += rand.normal(size=data.size) * 0.05
+    error = np.full(data.size, 0.05)
+    x = np.linspace(0, 40, 41)
+    y = np.linspace(0, 40, 31)
+    return coordinates, data, error, x, y
+
+
+def test_open_sample_array(tmpdir):
+    array = np.arange(10, dtype=float)
+    assert open_sample_array(None) is None
+    assert open_sample_array(array) is array
+
+    filename = str(tmpdir.join('array.npy'))
+    np.save(filename, array)
+    loaded = open_sample_array(filename)
+    assert isinstance(loaded, np.memmap)
+    assert np.allclose(loaded, array)
+
+    filename = str(tmpdir.join('array.fits'))
+    fits.HDUList([fits.PrimaryHDU(array)]).writeto(filename)
+    assert np.allclose(open_sample_array(filename), array)
+
+    with pytest.raises(ValueError) as err:
+        open_sample_array(str(tmpdir.join('missing.npy')))
+    assert 'not found' in str(err.value)
+
+
+def test_plan_tiles():
+    histogram = np.full((8, 4), 10)
+    grid_bytes = np.zeros(histogram.shape)
+    tiles = plan_tiles(histogram, 1.0, grid_bytes, 1e9)
+    assert len(tiles) == 1
+    assert np.allclose(tiles[0][0], 0) and np.allclose(tiles[0][1], [8, 4])
+
+    tiles = plan_tiles(histogram, 1.0, grid_bytes, 100)
+    assert len(tiles) > 1
+    covered = np.zeros(histogram.shape, dtype=int)
+    for lo, hi in tiles:
+        covered[lo[0]:hi[0], lo[1]:hi[1]] += 1
+    assert np.all(covered == 1)
+
+
+def test_matches_in_memory(samples, tmpdir):
+    coordinates, data, error, x, y = samples
+    r = ResamplePolynomial(coordinates, data, error=error, window=3.0,
+                           order=2)
+    expected, expected_error, expected_counts = r(
+        x, y, get_error=True, get_counts=True)
+
+    fit, fit_error, counts = resamp_out_of_core(
+        coordinates, data, x, y, error=error, window=3.0, order=2,
+        max_memory=2e5, chunk_size=700, get_error=True, get_counts=True)
+    assert fit.shape == (y.size, x.size)
+    assert np.allclose(fit, expected, equal_nan=True)
+    assert np.allclose(fit_error, expected_error, equal_nan=True)
+    assert np.allclose(counts, expected_counts)
+
+    # Read from and write to file
+    cfile = str(tmpdir.join('coordinates.npy'))
+    dfile = str(tmpdir.join('data.npy'))
+    np.save(cfile, coordinates)
+    np.save(dfile, data)
+    fit = resamp_out_of_core(cfile, dfile, x, y, error=0.05, window=3.0,
+                             order=2, max_memory=2e5,
+                             output_directory=str(tmpdir))
+    assert isinstance(fit, np.memmap)
+    assert np.allclose(fit, expected, equal_nan=True)
+    assert np.allclose(np.load(str(tmpdir.join('fit.npy'))), expected,
+                       equal_nan=True)
+
+
+def test_multiple_sets(samples):
+    coordinates, data, error, x, y = samples
+    data = np.stack([data, data * 2])
+    mask = np.ones(data.shape, dtype=bool)
+    mask[1, ::3] = False
+    r = ResamplePolynomial(coordinates, data, mask=mask, window=3.0)
+    expected = r(x, y)
+    fit = resamp_out_of_core(coordinates, data, x, y, mask=mask,
+                             window=3.0, max_memory=2e5)
+    assert fit.shape == (2, y.size, x.size)
+    assert np.allclose(fit, expected, equal_nan=True)
+
+
+def test_non_finite_coordinates(samples):
+    coordinates, data, error, x, y = samples
+    coordinates = coordinates.copy()
+    coordinates[0, 5] = np.nan
+    coordinates[1, 10] = np.inf
+    coordinates[:, 20] = np.nan
+    valid = np.all(np.isfinite(coordinates), axis=0)
+    r = ResamplePolynomial(coordinates[:, valid], data[valid], window=3.0)
+    expected, expected_counts = r(x, y, get_counts=True)
+    fit, counts = resamp_out_of_core(coordinates, data, x, y, window=3.0,
+                                     max_memory=2e4, get_counts=True)
+    assert np.allclose(fit, expected, equal_nan=True)
+    assert np.allclose(counts, expected_counts)
+
+
+def test_temp_directory_removed_on_error(samples, tmpdir, mocker):
+    coordinates, data, error, x, y = samples
+    temp_directory = str(tmpdir.mkdir('tiles'))
+    mocker.patch.object(resample_out_of_core.tempfile, 'mkdtemp',
+                        return_value=temp_directory)
+    mocker.patch.object(resample_out_of_core.ResamplePolynomial, '__call__',
+                        side_effect=RuntimeError('fit failed'))
+    with pytest.raises(RuntimeError) as err:
+        resamp_out_of_core(coordinates, data, x, y, window=3.0,
+                           max_memory=2e5)
+    assert 'fit failed' in str(err.value)
+    assert not os.path.isdir(temp_directory)
+
+
+def test_errors(samples):
+    coordinates, data, error, x, y = samples
+    with pytest.raises(ValueError) as err:
+        resamp_out_of_core(coordinates, data, x, y)
+    assert 'window must be supplied' in str(err.value)
+
+    with pytest.raises(ValueError) as err:
+        resamp_out_of_core(coordinates, data, x, window=3.0)
+    assert '1-feature grid' in str(err.value)
+
+    with pytest.raises(ValueError) as err:
+        resamp_out_of_core(coordinates, data[:10], x, y, window=3.0)
+    assert 'does not match' in str(err.value)
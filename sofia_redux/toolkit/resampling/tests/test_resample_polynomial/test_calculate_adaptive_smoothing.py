@@ -52,3 +52,56 @@ def test_shaped(data_2d):
                                     adaptive_algorithm='shaped')
     r.calculate_adaptive_smoothing(settings)
     assert r.fit_settings['adaptive_alpha'].shape == (121, 1, 2, 2)
+
+
+def test_precalculated(data_2d):
+    coordinates, data, error = data_2d
+    r = ResamplePolynomial(coordinates, data, error=error)
+    assert r.adaptive_alpha is None
+    kwargs = {'adaptive_threshold': 1.0, 'smoothing': 0.5,
+              'adaptive_algorithm': 'shaped'}
+    expected = r(coordinates, **kwargs)
+    alpha = r.adaptive_alpha
+    assert alpha.shape == (121, 1, 2, 2)
+
+    r.set_data(np.stack([data, data * 2]), error=error)
+    result = r(coordinates, adaptive_alpha=alpha, **kwargs)
+    assert np.allclose(result[0], expected, equal_nan=True)
+    assert r.adaptive_alpha.shape == (121, 2, 2, 2)
+
+    with pytest.raises(ValueError) as err:
+        r(coordinates, adaptive_alpha=alpha, smoothing=0.5)
+    assert 'must be enabled' in str(err.value)
+
+    with pytest.raises(ValueError) as err:
+        r(coordinates, adaptive_alpha=alpha[:, :, :1], **kwargs)
+    assert 'does not match' in str(err.value)
+
+
+def test_subsample():
+    rand = np.random.RandomState(0)
+    coordinates = rand.rand(2, 500) * 10
+    data = np.sin(coordinates[0]) + rand.normal(scale=0.05, size=500)
+    r = ResamplePolynomial(coordinates, data, error=0.05, window=2.0)
+    kwargs = {'adaptive_threshold': 1.0, 'smoothing': 0.5,
+              'adaptive_algorithm': 'scaled'}
+    r(coordinates, **kwargs)
+    full = r.adaptive_alpha
+    # Failed kernels are marked by NaN in the first element only
+    valid = np.isfinite(full[:, 0, 0, 0])
+    assert valid.sum() > 400
+
+    r(coordinates, adaptive_subsample=1, **kwargs)
+    assert np.allclose(r.adaptive_alpha[valid], full[valid])
+
+    r(coordinates, adaptive_subsample=3, **kwargs)
+    alpha = r.adaptive_alpha
+    assert alpha.shape == full.shape
+    # kernels are exact at fitted samples
+    assert np.allclose(alpha[::3][valid[::3]], full[::3][valid[::3]])
+    # all other samples are assigned a kernel from the fitted subset
+    subset = full[::3][valid[::3]]
+    for kernel in alpha[1::3]:
+        if np.isfinite(kernel[0, 0, 0]):
+            assert np.any(np.all(np.isclose(kernel, subset),
+                                 axis=(1, 2, 3)))
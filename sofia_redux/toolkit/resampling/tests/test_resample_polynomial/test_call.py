@@ -104,6 +104,9 @@ def test_multiprocessing(data_2d):
     r = ResamplePolynomial(coordinates, data, error=sigma, order=2, window=2.5)
     r(coordinates, jobs=-1, smoothing=0.5)  # jobs=2
     assert r.iteration == 1
+    n_blocks = np.sum((r.fit_tree.block_population > 0)
+                      & (r.sample_tree.hood_population > 0))
+    assert 0 < r.dispatch_info['n_chunks'] <= n_blocks
 
     # Assert 2 iterations for adaptive, plus the one from before
     data_jmax = r(coordinates, jobs=-1, smoothing=0.5, adaptive_threshold=1.0,
@@ -113,3 +116,29 @@ def test_multiprocessing(data_2d):
 
     assert np.allclose(data_jmax, data_j1, equal_nan=True)
     assert r.iteration == 5
+
+
+@pytest.mark.parametrize('fix_order', [True, False])
+def test_batch_solve(fix_order):
+    rand = np.random.RandomState(0)
+    coordinates = rand.uniform(0, 10, (2, 1000))
+    data = np.sin(coordinates[0] / 2) * np.cos(coordinates[1] / 3)
+    data += rand.normal(scale=0.01, size=data.size)
+    r = ResamplePolynomial(coordinates, data, error=0.01, order=2,
+                           window=1.5, fix_order=fix_order)
+    x = np.linspace(-0.5, 10.5, 23)
+    options = {'smoothing': 0.5, 'get_error': True, 'get_counts': True,
+               'get_weights': True, 'get_distance_weights': True,
+               'get_rchi2': True, 'get_offset_variance': True}
+    expected = r(x, x, **options)
+    result = r(x, x, batch_solve=True, **options)
+    assert r.fit_settings['batch_solve']
+    for e, v in zip(expected, result):
+        assert np.allclose(e, v, equal_nan=True)
+
+    # Unsupported options use the standard solver
+    r(x, x, batch_solve=True, fit_threshold=1.0)
+    assert not r.fit_settings['batch_solve']
+    expected = r(x, x, get_cross_derivatives=True)
+    result = r(x, x, batch_solve=True, get_cross_derivatives=True)
+    assert np.allclose(expected, result, equal_nan=True)
@@ -0,0 +1,108 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+from sofia_redux.toolkit.resampling.fit_plan import FitPlan
+from sofia_redux.toolkit.resampling.resample_polynomial import \
+    ResamplePolynomial
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def plan_data():
+    rand = np.random.RandomState(0)
+    coordinates = rand.rand(2, 2000) * 20
+    data = np.sin(coordinates[0] / 3) + rand.normal(size=2000) * 0.05
+    x = np.linspace(0, 20, 21)
+    y = np.linspace(0, 20, 16)
+    return coordinates, data, x, y
+
+
+def test_create_fit_plan(plan_data):
+    coordinates, data, x, y = plan_data
+    r = ResamplePolynomial(coordinates, data, error=0.05, window=2.0,
+                           order=2)
+    plan = r.create_fit_plan(x, y, smoothing=0.5)
+    assert isinstance(plan, FitPlan)
+    assert plan.n_samples == 2000
+    assert plan.n_fits == x.size * y.size
+    assert plan.n_neighbors > 0
+    assert 'FitPlan' in str(plan)
+    assert plan.resampler.data is None
+
+    expected = r(x, y, smoothing=0.5, get_error=True, get_counts=True)
+    result = r(fit_plan=plan, get_error=True, get_counts=True)
+    for e, v in zip(expected, result):
+        assert np.allclose(e, v, equal_nan=True)
+
+    with pytest.raises(ValueError) as err:
+        r.create_fit_plan(x, y, jobs=2)
+    assert 'not a valid fit plan option' in str(err.value)
+
+
+def test_apply_fit_plan(plan_data, tmpdir):
+    coordinates, data, x, y = plan_data
+    r = ResamplePolynomial(coordinates, data, window=2.0, order=2)
+    plan = r.create_fit_plan(x, y)
+
+    new_data = np.stack([np.cos(coordinates[1] / 4), data])
+    mask = np.full(new_data.shape, True)
+    mask[0, ::3] = False
+    expected = ResamplePolynomial(coordinates, new_data, mask=mask,
+                                  window=2.0, order=2)(x, y)
+    result = plan(new_data, mask=mask)
+    assert result.shape == (2, y.size, x.size)
+    assert np.allclose(result, expected, equal_nan=True)
+
+    filename = str(tmpdir.join('plan.pkl'))
+    plan.to_file(filename)
+    loaded = FitPlan.from_file(filename)
+    assert np.allclose(loaded(new_data, mask=mask), expected, equal_nan=True)
+
+    with pytest.raises(ValueError) as err:
+        FitPlan.from_file(str(tmpdir.join('missing.pkl')))
+    assert 'valid fit plan' in str(err.value)
+
+
+def test_adaptive_fit_plan(plan_data):
+    coordinates, data, x, y = plan_data
+    r = ResamplePolynomial(coordinates, data, error=0.05, window=2.0,
+                           order=2)
+    kwargs = {'smoothing': 0.5, 'adaptive_threshold': 1.0}
+    plan = r.create_fit_plan(x, y, **kwargs)
+    assert np.allclose(r(fit_plan=plan), r(x, y, **kwargs), equal_nan=True)
+
+
+def test_check_resampler(plan_data):
+    coordinates, data, x, y = plan_data
+    r = ResamplePolynomial(coordinates, data, window=2.0, order=2)
+    plan = r.create_fit_plan(x, y)
+
+    r2 = ResamplePolynomial(coordinates.copy(), data, window=2.0, order=2)
+    plan.check_resampler(r2)
+
+    r2 = ResamplePolynomial(coordinates[::-1], data, window=2.0, order=2)
+    with pytest.raises(ValueError) as err:
+        r2(fit_plan=plan)
+    assert 'coordinates do not match' in str(err.value)
+
+    r2 = ResamplePolynomial(coordinates, data, window=3.0, order=2)
+    with pytest.raises(ValueError) as err:
+        r2(fit_plan=plan)
+    assert 'window does not match' in str(err.value)
+
+    r2 = ResamplePolynomial(coordinates, data, window=2.0, order=1)
+    with pytest.raises(ValueError) as err:
+        r2(fit_plan=plan)
+    assert 'order does not match' in str(err.value)
+
+    r2 = ResamplePolynomial(coordinates[:, :100], data[:100], window=2.0,
+                            order=2)
+    with pytest.raises(ValueError) as err:
+        r2(fit_plan=plan)
+    assert 'samples do not match' in str(err.value)
+
+    r2 = ResamplePolynomial(coordinates[0], data, window=2.0, order=2)
+    with pytest.raises(ValueError) as err:
+        r2(fit_plan=plan)
+    assert 'features do not match' in str(err.value)
@@ -1,7 +1,11 @@
+from sofia_redux.toolkit.resampling import resample_base
 from sofia_redux.toolkit.resampling.resample_polynomial import \
     ResamplePolynomial
+from sofia_redux.toolkit.utilities.multiprocessing import SharedArrayStore
 
+import numba
 import numpy as np
+import os
 import psutil
 import pytest
 
@@ -37,3 +41,57 @@ def test_parallel():
                    order_algorithm='extrapolate', jobs=-1)
 
     assert np.allclose(d1, d2, equal_nan=True)
+
+
+@pytest.mark.skipif(psutil.cpu_count() < 2, reason='Require multiple CPUs')
+def test_parallel_shared_memory():
+    rand = np.random.RandomState(42)
+    coordinates = rand.random((2, 5000)) * 32
+    data = np.sin(coordinates[0] / 4) + np.cos(coordinates[1] / 4)
+    xout = np.arange(32)
+    yout = np.arange(32)
+
+    resampler = ResamplePolynomial(coordinates, data, window=3, order=2)
+    d1 = resampler(xout, yout, jobs=1)
+    assert resampler.dispatch_info['mode'] == 'none'
+
+    d2 = resampler(xout, yout, jobs=2, use_processes=True)
+    info = resampler.dispatch_info
+    assert info['mode'] == 'pickle'
+    assert info['shared_bytes'] == 0
+    pickled_bytes = info['pickled_bytes']
+
+    d3 = resampler(xout, yout, jobs=2, use_processes=True,
+                   use_shared_memory=True)
+    info = resampler.dispatch_info
+    assert info['mode'] == 'shared_memory'
+    assert info['shared_arrays'] > 0
+    assert info['shared_bytes'] > 0
+    assert info['pickled_bytes'] < pickled_bytes
+
+    assert np.allclose(d1, d2, equal_nan=True)
+    assert np.allclose(d1, d3, equal_nan=True)
+
+
+def test_parallel_cleanup_on_error(tmpdir, mocker):
+    rand = np.random.RandomState(42)
+    coordinates = rand.random((2, 5000)) * 32
+    data = np.sin(coordinates[0] / 4) + np.cos(coordinates[1] / 4)
+    resampler = ResamplePolynomial(coordinates, data, window=3, order=2)
+
+    cache_dir = str(tmpdir.mkdir('cache'))
+    mocker.patch.object(resample_base, 'relative_cores', return_value=2)
+    mocker.patch.object(resample_base, 'mkdtemp', return_value=cache_dir)
+    mocker.patch.object(resample_base, 'multitask',
+                        side_effect=RuntimeError('worker failed'))
+    close = mocker.spy(SharedArrayStore, 'close')
+    threading_layer = numba.config.THREADING_LAYER
+
+    with pytest.raises(RuntimeError) as err:
+        resampler(np.arange(32), np.arange(32), jobs=2,
+                  use_shared_memory=True)
+    assert 'worker failed' in str(err.value)
+    assert close.call_count >= 1
+    assert not os.path.isdir(cache_dir)
+    assert numba.config.THREADING_LAYER == threading_layer
+    assert 'args' not in resample_base._global_resampling_values
@@ -0,0 +1,55 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+from sofia_redux.toolkit.resampling.resample_utils import (
+    batch_cholesky_factor, batch_forward_substitute, batch_cholesky_solve,
+    batch_quadratic_inverse)
+
+import numpy as np
+
+
+def stacked_matrices(m=4, n=5):
+    rand = np.random.RandomState(0)
+    matrices = []
+    for _ in range(n):
+        x = rand.normal(size=(m, 3 * m))
+        matrices.append(x @ x.T)
+    # Batch dimension last
+    return np.moveaxis(np.array(matrices), 0, -1).copy()
+
+
+def test_batch_cholesky_factor():
+    amat = stacked_matrices()
+    lower = amat.copy()
+    valid = np.full(amat.shape[2], True)
+    batch_cholesky_factor(lower, valid)
+    assert valid.all()
+    for b in range(amat.shape[2]):
+        expected = np.linalg.cholesky(amat[:, :, b])
+        assert np.allclose(np.tril(lower[:, :, b]), expected)
+
+
+def test_batch_cholesky_invalid():
+    amat = stacked_matrices()
+    amat[:, :, 1] = 0.0
+    amat[:, :, 2] = np.outer(np.arange(4), np.arange(4)) + 1.0
+    valid = np.full(amat.shape[2], True)
+    valid[3] = False
+    batch_cholesky_factor(amat, valid)
+    assert np.allclose(valid, [True, False, False, False, True])
+
+
+def test_batch_solve():
+    amat = stacked_matrices()
+    m, _, n = amat.shape
+    rhs = np.random.RandomState(1).normal(size=(m, n))
+    lower = amat.copy()
+    batch_cholesky_factor(lower, np.full(n, True))
+
+    z = batch_forward_substitute(lower, rhs)
+    x = batch_cholesky_solve(lower, rhs)
+    q = batch_quadratic_inverse(lower, rhs)
+    for b in range(n):
+        assert np.allclose(np.tril(lower[:, :, b]) @ z[:, b], rhs[:, b])
+        assert np.allclose(x[:, b], np.linalg.solve(amat[:, :, b], rhs[:, b]))
+        expected = rhs[:, b] @ np.linalg.inv(amat[:, :, b]) @ rhs[:, b]
+        assert np.isclose(q[b], expected)
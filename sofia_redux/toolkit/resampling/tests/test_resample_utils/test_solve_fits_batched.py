@@ -0,0 +1,100 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+from sofia_redux.toolkit.resampling.resample_utils import (
+    solve_fits, solve_fits_batched, polynomial_exponents, polynomial_terms,
+    convert_to_numba_list)
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def sample_data():
+    rand = np.random.RandomState(0)
+    sample_coordinates = rand.uniform(-1, 1, (2, 500))
+    x, y = sample_coordinates
+    order = np.full(2, 2)
+    exponents = polynomial_exponents(order)
+    sample_phi_terms = polynomial_terms(sample_coordinates, exponents)
+    sample_data = np.stack([2 - x ** 2 - y ** 2, np.sin(x) * np.cos(y)])
+    sample_data += rand.normal(scale=0.01, size=sample_data.shape)
+    sample_error = rand.uniform(0.01, 0.02, sample_data.shape)
+    sample_mask = rand.random_sample(sample_data.shape) > 0.1
+
+    gx, gy = np.meshgrid(np.linspace(-1.2, 1.2, 9), np.linspace(-1, 1, 7))
+    fit_coordinates = np.stack([gx.ravel(), gy.ravel()])
+    fit_phi_terms = polynomial_terms(fit_coordinates, exponents)
+    sample_indices = convert_to_numba_list(
+        [np.nonzero(np.hypot(x - fx, y - fy) <= 0.5)[0]
+         for (fx, fy) in fit_coordinates.T])
+    alpha = np.full(2, 0.3)
+    return (sample_indices, sample_coordinates, sample_phi_terms,
+            sample_data, sample_error, sample_mask, fit_coordinates,
+            fit_phi_terms, order, alpha)
+
+
+def compare_solvers(args, adaptive_alpha, **kwargs):
+    options = {'get_error': True, 'get_counts': True, 'get_weights': True,
+               'get_distance_weights': True, 'get_rchi2': True,
+               'get_offset_variance': True}
+    options.update(kwargs)
+    expected = solve_fits(*args, adaptive_alpha,
+                          get_cross_derivatives=False, **options)
+    result = solve_fits_batched(*args, adaptive_alpha, **options)
+    assert len(result) == len(expected)
+    for e, r in zip(expected, result):
+        assert e.shape == r.shape
+        assert np.allclose(e, r, equal_nan=True)
+    return result
+
+
+@pytest.mark.parametrize('error_weighting', [True, False])
+def test_error(sample_data, error_weighting):
+    adaptive_alpha = np.empty((0, 0, 0, 0))
+    result = compare_solvers(sample_data, adaptive_alpha,
+                             error_weighting=error_weighting)
+    assert np.isfinite(result[0]).any() and np.isnan(result[0]).any()
+    assert result[6].shape == (1, 0, 0, 0)
+
+
+def test_no_error(sample_data):
+    sample_data = list(sample_data)
+    sample_data[4] = np.empty((2, 0))
+    adaptive_alpha = np.empty((0, 0, 0, 0))
+    result = compare_solvers(sample_data, adaptive_alpha,
+                             error_weighting=False)
+    assert np.allclose(result[5][np.isfinite(result[0])], 1)
+
+    sample_data[4] = np.full((2, 1), 0.01)
+    compare_solvers(sample_data, adaptive_alpha)
+
+
+def test_adaptive(sample_data):
+    n_samples = sample_data[1].shape[1]
+    scaled_alpha = np.full((n_samples, 2, 1, 2), 0.3)
+    compare_solvers(sample_data, scaled_alpha)
+    shaped_alpha = np.zeros((n_samples, 2, 2, 2))
+    shaped_alpha[..., 0, 0] = 0.3
+    shaped_alpha[..., 1, 1] = 0.4
+    compare_solvers(sample_data, shaped_alpha)
+
+
+def test_options(sample_data):
+    adaptive_alpha = np.empty((0, 0, 0, 0))
+    result = compare_solvers(sample_data, adaptive_alpha, get_error=False,
+                             get_counts=False, get_weights=False,
+                             get_distance_weights=False, get_rchi2=False,
+                             get_offset_variance=False)
+    assert result[0].shape == (2, 63)
+    for i in range(1, len(result)):
+        assert result[i].size == 0
+
+
+def test_fallback(sample_data):
+    adaptive_alpha = np.empty((0, 0, 0, 0))
+
+    # Under-determined fits are solved by solve_fit
+    sample_data = list(sample_data)
+    sample_data[5][:, 10:] = False
+    compare_solvers(sample_data, adaptive_alpha, order_algorithm_idx=0)
+
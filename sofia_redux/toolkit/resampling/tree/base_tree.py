@@ -6,6 +6,7 @@ import inspect
 import numpy as np
 
 from scipy.sparse import csr_matrix
+from scipy.spatial import cKDTree
 from sklearn.neighbors import BallTree
 import sofia_redux.toolkit.resampling.tree as tree_module
 from sofia_redux.toolkit.utilities.func import byte_size_of_object
@@ -13,11 +14,17 @@ from sofia_redux.toolkit.utilities.func import byte_size_of_object
 
 __all__ = ['BaseTree']
 
+# Distance metrics that may be evaluated by the kd-tree or grid backends
+_minkowski_metrics = {'minkowski': None, 'euclidean': 2.0, 'l2': 2.0,
+                      'manhattan': 1.0, 'cityblock': 1.0, 'l1': 1.0,
+                      'chebyshev': np.inf, 'infinity': np.inf}
+
 
 class BaseTree(object):
 
     def __init__(self, argument, shape=None, build_type='all', leaf_size=40,
-                 large_data=False, **distance_kwargs):
+                 large_data=False, neighbor_method='balltree',
+                 **distance_kwargs):
         r"""
         Create a tree structure for use with the resampling algorithm.
 
@@ -64,7 +71,11 @@ class BaseTree(object):
         Once all candidates have been identified, the next step is to keep
         only those that are within a radius :math:`\Omega` of the user supplied
         coordinate.  This can be accomplished quickly using the ball-tree
-        algorithm (see :func:`sklearn.neighbors.BallTree`.
+        algorithm (see :func:`sklearn.neighbors.BallTree`), a kd-tree (see
+        :class:`scipy.spatial.cKDTree`), or by directly calculating the
+        distance to every member of the neighborhood (the "grid" method).
+        The grid method requires no additional memory and is fastest for
+        densely and regularly sampled data in a few dimensions.
 
         In practice, the resampling algorithm loops through each block of
         the tree in parallel.  For each block, all user supplied coordinates
@@ -101,6 +112,10 @@ class BaseTree(object):
             If `True`, indicates that this resampling algorithm will run on
             a large set of data, and the tree should be created on subsets
             of the data only when necessary.
+        neighbor_method : str, optional
+            The neighbor search method.  Must be one of {'auto', 'balltree',
+            'kdtree', 'grid'}.  If 'auto', the method is selected using
+            :func:`BaseTree.select_neighbor_method` when the tree is built.
         distance_kwargs : dict, optional
             Optional keyword arguments passed into
             :func:`sklearn.neighbors.DistanceMetric`.  The default is to use
@@ -113,6 +128,8 @@ class BaseTree(object):
         self._search = None
         self._tree = None
         self._balltree = None
+        self._kdtree = None
+        self._neighbor_method = None
         self._ball_initialized = False
         self._hood_initialized = False
         self.block_offsets = None
@@ -124,7 +141,12 @@ class BaseTree(object):
         self.ball_tree_block = None
         self.ball_tree_members = None
         self.leaf_size = leaf_size
+        self.neighbor_method = str(neighbor_method).lower().strip()
         self.distance_kwargs = distance_kwargs
+        if self.neighbor_method not in ['auto', 'balltree', 'kdtree',
+                                        'grid']:
+            raise ValueError(
+                f"Unknown neighbor method: {neighbor_method}")
 
         arg = np.asarray(argument)
         if np.asarray(arg).ndim > 1:
@@ -200,6 +222,19 @@ class BaseTree(object):
         """
         return self._ball_initialized
 
+    @property
+    def neighbor_backend(self):
+        """
+        Return the neighbor search method used by the tree.
+
+        Returns
+        -------
+        str or None
+            One of {'balltree', 'kdtree', 'grid'}, or `None` if the search
+            structure has not been built.
+        """
+        return self._neighbor_method
+
     @property
     def hood_initialized(self):
         """
@@ -268,6 +303,124 @@ class BaseTree(object):
         n_elements = scale * correcting_factor
         return int(n_elements * float_bytes)
 
+    @classmethod
+    def estimate_kd_tree_bytes(cls, coordinates, leaf_size=40):
+        """
+        Estimate the maximum number of bytes used to construct the kd-tree.
+
+        A :class:`scipy.spatial.cKDTree` stores a copy of the coordinates, an
+        index array, and approximately 2n/leaf_size nodes each containing
+        the bounds of the node in every dimension.
+
+        Parameters
+        ----------
+        coordinates : numpy.ndarray
+            The coordinates of shape (n_dimensions, n)
+        leaf_size : int
+            The number of points at which to switch to brute-force.
+
+        Returns
+        -------
+        max_size : int
+            The maximum number of bytes used to construct the tree.
+        """
+        if leaf_size is None:
+            leaf_size = 16
+        float_bytes = np.empty(0, dtype=float).itemsize
+        if coordinates.ndim == 1:
+            coordinates = coordinates[None]
+        n_dimensions = coordinates.shape[0]
+        n = coordinates.size // n_dimensions
+        n_nodes = 2 * int(np.ceil(n / leaf_size))
+        node_elements = 2 * n_dimensions + 6
+        n_elements = n * (n_dimensions + 1) + n_nodes * node_elements
+        return int(n_elements * float_bytes)
+
+    @staticmethod
+    def minkowski_p(distance_kwargs):
+        """
+        Return the Minkowski power for a set of distance metric options.
+
+        Parameters
+        ----------
+        distance_kwargs : dict
+            Distance metric keyword arguments as passed to
+            :func:`sklearn.neighbors.DistanceMetric`.
+
+        Returns
+        -------
+        p : float or None
+            The Minkowski power p, or `None` if the distance metric cannot be
+            expressed as a Minkowski distance, in which case only the
+            'balltree' neighbor method may be used.
+        """
+        if distance_kwargs is None:
+            distance_kwargs = {}
+        if len(set(distance_kwargs.keys()) - {'metric', 'p'}) > 0:
+            return None
+        metric = distance_kwargs.get('metric', 'minkowski')
+        if not isinstance(metric, str):
+            return None
+        metric = metric.lower().strip()
+        if metric not in _minkowski_metrics:
+            return None
+        p = _minkowski_metrics[metric]
+        if p is None:
+            p = float(distance_kwargs.get('p', 2))
+        elif 'p' in distance_kwargs:
+            return None
+        if p < 1:
+            return None
+        return p
+
+    @classmethod
+    def select_neighbor_method(cls, coordinates, method='auto',
+                               **distance_kwargs):
+        """
+        Select the neighbor search method for a set of coordinates.
+
+        The 'grid' method calculates distances to every member of the
+        neighborhood surrounding a block and requires no additional tree
+        structure.  It has a fixed overhead for each block, but outperforms
+        the kd-tree for one to three dimensions when the average populated
+        neighborhood contains at least 256 samples.  Otherwise, a kd-tree
+        is used.  The ball-tree is only selected if the distance metric
+        cannot be evaluated by the other methods.
+
+        Parameters
+        ----------
+        coordinates : numpy.ndarray
+            The coordinates of shape (n_dimensions, n) scaled such that the
+            search radius is 1.
+        method : str, optional
+            The requested method.  If not 'auto', it is returned unless the
+            distance metric requires the 'balltree' method.
+        distance_kwargs : dict, optional
+            Distance metric keyword arguments.
+
+        Returns
+        -------
+        method : str
+            One of {'balltree', 'kdtree', 'grid'}.
+        """
+        method = str(method).lower().strip()
+        if cls.minkowski_p(distance_kwargs) is None:
+            return 'balltree'
+        if method != 'auto':
+            return method
+
+        coordinates = np.asarray(coordinates)
+        if coordinates.ndim == 1:
+            coordinates = coordinates[None]
+        n_dimensions = coordinates.shape[0]
+        if n_dimensions > 3 or coordinates.shape[1] == 0:
+            return 'kdtree'
+
+        bins = np.floor(coordinates).astype(np.int64)
+        _, populations = np.unique(bins, axis=1, return_counts=True)
+        hood_samples = populations.mean() * (3 ** n_dimensions)
+        return 'grid' if hood_samples >= 256 else 'kdtree'
+
     @classmethod
     def estimate_split_tree_bytes(cls, coordinates,
                                   window=1, leaf_size=40):
@@ -371,7 +524,8 @@ class BaseTree(object):
 
     @classmethod
     def estimate_max_bytes(cls, coordinates, window=1, leaf_size=40,
-                           full_tree=True, **kwargs):
+                           full_tree=True, neighbor_method='balltree',
+                           **kwargs):
         """
         Estimate the maximum number of bytes required by the tree.
 
@@ -387,6 +541,10 @@ class BaseTree(object):
             Calculate the maximum number of bytes if the full ball-tree is
             pre-calculated.  Otherwise, calculates the size of a single
             neighborhood sized ball-tree.
+        neighbor_method : str, optional
+            The neighbor search method {'balltree', 'kdtree', 'grid'}.  The
+            grid method requires no memory in addition to the neighborhood
+            tree.
         kwargs : dict, optional
             Additional keyword arguments to pass that may be used by subclasses
             of the BaseTree.
@@ -400,7 +558,12 @@ class BaseTree(object):
 
         # 1 for coordinates, 1 for coordinate offsets.
         coordinate_bytes = 2 * coordinates.size * float_bytes
-        if full_tree:
+        if neighbor_method == 'grid':
+            ball_tree_bytes = 0
+        elif neighbor_method == 'kdtree':
+            ball_tree_bytes = cls.estimate_kd_tree_bytes(
+                coordinates, leaf_size=leaf_size)
+        elif full_tree:
             ball_tree_bytes = cls.estimate_ball_tree_bytes(
                 coordinates, leaf_size=leaf_size)
         else:
@@ -631,6 +794,8 @@ class BaseTree(object):
         """
         Build a ball tree for a neighborhood around a single block.
 
+        If the neighbor method is 'kdtree', a kd-tree is built instead.
+
         Parameters
         ----------
         block : int
@@ -645,7 +810,10 @@ class BaseTree(object):
         self.ball_tree_block = int(block)
         self.ball_tree_members, coordinates = self.hood_members(
             self.ball_tree_block, get_locations=True)
-        if self.leaf_size is None:
+        if self._neighbor_method == 'kdtree':
+            self._kdtree = self._create_kd_tree(coordinates,
+                                                leaf_size=self.leaf_size)
+        elif self.leaf_size is None:
             self._balltree = BallTree(
                 coordinates.T, **self.distance_kwargs)
         else:
@@ -653,13 +821,36 @@ class BaseTree(object):
                 coordinates.T, leaf_size=self.leaf_size,
                 **self.distance_kwargs)
 
+    @staticmethod
+    def _create_kd_tree(coordinates, leaf_size=None):
+        """
+        Create a kd-tree from coordinates.
+
+        Parameters
+        ----------
+        coordinates : numpy.ndarray (float)
+            The coordinates of shape (n_features, n).
+        leaf_size : int, optional
+            The number of points at which to switch to brute-force.
+
+        Returns
+        -------
+        scipy.spatial.cKDTree
+        """
+        if leaf_size is None:
+            return cKDTree(coordinates.T)
+        return cKDTree(coordinates.T, leafsize=leaf_size)
+
     def _build_ball_tree(self, leaf_size=40, **distance_kwargs):
         r"""
-        Build the balltree structure.
+        Build the neighbor search structure.
 
-        The balltree is created using :func:`sklearn.neighbors.BallTree` and
-        allows rapid calculation of relative distances from a supplied set
-        of coordinates to those within the tree.
+        By default, the balltree is created using
+        :func:`sklearn.neighbors.BallTree` and allows rapid calculation of
+        relative distances from a supplied set of coordinates to those within
+        the tree.  Depending on the neighbor method, a kd-tree may be created
+        instead, or for the 'grid' method, the neighborhood tree is used
+        directly.
 
         Parameters
         ----------
@@ -679,10 +870,25 @@ class BaseTree(object):
         """
         self._ball_initialized = False
         self.ball_tree_block = None
+        self._balltree = None
+        self._kdtree = None
+        self._neighbor_method = self.select_neighbor_method(
+            self.coordinates, method=self.neighbor_method, **distance_kwargs)
+
+        if self._neighbor_method == 'grid':
+            if not self.hood_initialized:
+                self._build_hood_tree()
+            self._ball_initialized = True
+            return
+
         if self.large_data:
-            # Do not attempt to build a full ball tree for large data
+            # Do not attempt to build a full tree for large data
             return
-        if leaf_size is None:
+
+        if self._neighbor_method == 'kdtree':
+            self._kdtree = self._create_kd_tree(self.coordinates,
+                                                leaf_size=leaf_size)
+        elif leaf_size is None:
             self._balltree = BallTree(self.coordinates.T,
                                       **distance_kwargs)
         else:
@@ -755,6 +961,8 @@ class BaseTree(object):
             operating on large data.
         kwargs : dict, optional
             Keywords for :func:`sklearn.neighbors.BallTree.query_radius`.
+            Only `return_distance` is supported by the 'kdtree' and 'grid'
+            neighbor methods.
 
         Returns
         -------
@@ -770,12 +978,20 @@ class BaseTree(object):
         else:
             c = coordinates.T
 
+        if self.large_data and block is None:
+            raise ValueError("No block number for large data query has "
+                             "been supplied.")
+
+        if self._neighbor_method == 'grid':
+            return self._query_grid(
+                c, radius, return_distance=kwargs.get('return_distance'))
+
         if self.large_data:
-            if block is None:
-                raise ValueError("No block number for large data query has "
-                                 "been supplied.")
             self.build_ball_tree_for_block(block)
-            indices = self._balltree.query_radius(c, radius, **kwargs)
+            if self._neighbor_method == 'kdtree':
+                indices = self._query_kd_tree(c, radius, **kwargs)
+            else:
+                indices = self._balltree.query_radius(c, radius, **kwargs)
             if kwargs.get('return_distance'):
                 return_distance = True
                 indices, distances = indices
@@ -793,9 +1009,158 @@ class BaseTree(object):
 
         elif not self.balltree_initialized:
             raise RuntimeError("Ball tree not initialized")
+        elif self._neighbor_method == 'kdtree':
+            return self._query_kd_tree(c, radius, **kwargs)
         else:
             return self._balltree.query_radius(c, radius, **kwargs)
 
+    def _point_distances(self, points, members):
+        """
+        Return the distances between points and tree members.
+
+        Parameters
+        ----------
+        points : numpy.ndarray (float)
+            The points of shape (n_points, n_features).
+        members : numpy.ndarray (int)
+            The tree member indices of shape (n_members,).
+
+        Returns
+        -------
+        distances : numpy.ndarray (float)
+            The distances of shape (n_points, n_members).
+        """
+        p = self.minkowski_p(self.distance_kwargs)
+        offsets = points[:, :, None] - self.coordinates[None, :, members]
+        if p == 2:
+            return np.sqrt(np.einsum('ijk,ijk->ik', offsets, offsets))
+        offsets = np.abs(offsets)
+        if p == 1:
+            return offsets.sum(axis=1)
+        elif np.isinf(p):
+            return offsets.max(axis=1)
+        return (offsets ** p).sum(axis=1) ** (1 / p)
+
+    def _query_kd_tree(self, c, radius, return_distance=False, **kwargs):
+        """
+        Query the kd-tree for all members within a radius of points.
+
+        Parameters
+        ----------
+        c : numpy.ndarray (float)
+            The points of shape (n_points, n_features).
+        radius : float
+            The search radius.
+        return_distance : bool, optional
+            If `True`, also return the distance to each member.
+        kwargs : dict, optional
+            Unused keyword arguments for compatibility with
+            :func:`sklearn.neighbors.BallTree.query_radius`.
+
+        Returns
+        -------
+        indices, [distances] : numpy.ndarray of object (n_points,)
+        """
+        p = self.minkowski_p(self.distance_kwargs)
+        found = self._kdtree.query_ball_point(c, radius, p=p,
+                                              return_sorted=True)
+        n = c.shape[0]
+        indices = np.empty(n, dtype=object)
+        for i in range(n):
+            indices[i] = np.asarray(found[i], dtype=np.intp)
+        if not return_distance:
+            return indices
+
+        tree_coordinates = self._kdtree.data.T
+        distances = np.empty(n, dtype=object)
+        for i in range(n):
+            offsets = np.abs(tree_coordinates[:, indices[i]] - c[i][:, None])
+            if np.isinf(p):
+                distances[i] = offsets.max(axis=0)
+            else:
+                distances[i] = (offsets ** p).sum(axis=0) ** (1 / p)
+        return indices, distances
+
+    def _query_grid(self, c, radius, return_distance=False,
+                    max_elements=4194304):
+        """
+        Find all members within a radius of points using the block grid.
+
+        Points are grouped by tree block, and the distance from each point
+        to every member of the surrounding blocks is calculated.  Since
+        blocks have unit width, the surrounding blocks are the neighborhood
+        of each block if `radius` <= 1.
+
+        Parameters
+        ----------
+        c : numpy.ndarray (float)
+            The points of shape (n_points, n_features).
+        radius : float
+            The search radius.
+        return_distance : bool, optional
+            If `True`, also return the distance to each member.
+        max_elements : int, optional
+            The maximum number of distances to calculate at once.
+
+        Returns
+        -------
+        indices, [distances] : numpy.ndarray of object (n_points,)
+            Member indices are in ascending order.
+        """
+        if not self.hood_initialized:
+            self._build_hood_tree()
+        n = c.shape[0]
+        indices = np.empty(n, dtype=object)
+        distances = np.empty(n, dtype=object) if return_distance else None
+
+        reach = max(int(np.ceil(radius)), 1)
+        if reach > 1:
+            search = np.array(list(itertools.product(
+                range(-reach, reach + 1), repeat=self.features))).T
+        else:
+            search = self.search
+
+        point_blocks = self.to_index(np.floor(c.T))
+        if n > 0 and point_blocks.min() == point_blocks.max():
+            # Usual case where all points are in a single block
+            order = np.arange(n)
+            blocks, starts, ends = point_blocks[:1], [0], [n]
+        else:
+            order = np.argsort(point_blocks, kind='stable')
+            blocks, starts = np.unique(point_blocks[order],
+                                       return_index=True)
+            ends = np.append(starts[1:], n)
+
+        for block, start, end in zip(blocks, starts, ends):
+            point_indices = order[start:end]
+            expanded = self.from_index(block)[:, None] + search
+            keep = np.all((expanded >= 0)
+                          & (expanded < self._shape[:, None]), axis=0)
+            hood = self.to_index(expanded[:, keep])
+            members = np.sort(np.concatenate(
+                [self._tree[b] for b in hood] + [np.empty(0, dtype=int)]))
+
+            step = max(max_elements // max(members.size, 1), 1)
+            for i0 in range(0, point_indices.size, step):
+                points = point_indices[i0:i0 + step]
+                d = self._point_distances(c[points], members)
+                rows, cols = np.nonzero(d <= radius)
+                bounds = np.zeros(points.size + 1, dtype=int)
+                np.cumsum(np.bincount(rows, minlength=points.size),
+                          out=bounds[1:])
+                found = members[cols].astype(np.intp)
+                if return_distance:
+                    found_distances = d[rows, cols]
+                for j, point in enumerate(points):
+                    i0, i1 = bounds[j], bounds[j + 1]
+                    indices[point] = found[i0:i1]
+                    if return_distance:
+                        distances[point] = found_distances[i0:i1]
+
+        if return_distance:
+            return indices, distances
+        return indices
+
     def block_members(self, block, get_locations=False):
         if not self._hood_initialized:
             raise RuntimeError("Neighborhood tree not initialized.")
@@ -243,7 +243,7 @@ class PolynomialTree(BaseTree):
 
     @classmethod
     def estimate_max_bytes(cls, coordinates, window=1, leaf_size=40,
-                           full_tree=True, order=2):
+                           full_tree=True, order=2, neighbor_method='balltree'):
         """
         Estimate the maximum number of bytes required by the tree.
 
@@ -265,6 +265,8 @@ class PolynomialTree(BaseTree):
         order : int or numpy.ndarray (int), optional
             The order of polynomial to fit as an integer for all dimensions or
             an array of shape (n_dimensions,).
+        neighbor_method : str, optional
+            The neighbor search method {'balltree', 'kdtree', 'grid'}.
 
         Returns
         -------
@@ -274,7 +276,7 @@ class PolynomialTree(BaseTree):
         """
         tree_bytes = super().estimate_max_bytes(
             coordinates, window=window, leaf_size=leaf_size,
-            full_tree=full_tree)
+            full_tree=full_tree, neighbor_method=neighbor_method)
         float_bytes = np.empty(0, dtype=float).itemsize
         n_dimensions = coordinates.shape[0]
         n = coordinates.size // n_dimensions
@@ -9,6 +9,7 @@ from sofia_redux.toolkit.resampling.grid.polynomial_grid import \
 
 import numpy as np
 import pytest
+from scipy.spatial import cKDTree
 from sklearn.neighbors import BallTree
 
 
@@ -81,6 +82,93 @@ def test_estimate_max_bytes():
     assert np.isclose(n_bytes, 2886376, rtol=0.1)
 
 
+def test_estimate_kd_tree_bytes():
+    coordinates = np.zeros((3, 10000))
+    float_bytes = np.empty(0, dtype=float).itemsize
+    n_bytes = BaseTree.estimate_kd_tree_bytes(coordinates, leaf_size=16)
+    assert np.isclose(n_bytes / float_bytes, 40000 + 1250 * 12)
+    assert BaseTree.estimate_kd_tree_bytes(coordinates[0]) < n_bytes
+
+    ball_bytes = BaseTree.estimate_max_bytes(coordinates, leaf_size=40)
+    kd_bytes = BaseTree.estimate_max_bytes(
+        coordinates, leaf_size=40, neighbor_method='kdtree')
+    grid_bytes = BaseTree.estimate_max_bytes(
+        coordinates, leaf_size=40, neighbor_method='grid')
+    assert grid_bytes < kd_bytes
+    assert grid_bytes < ball_bytes
+
+
+def test_minkowski_p():
+    assert BaseTree.minkowski_p(None) == 2
+    assert BaseTree.minkowski_p({}) == 2
+    assert BaseTree.minkowski_p({'p': 3}) == 3
+    assert BaseTree.minkowski_p({'metric': 'manhattan'}) == 1
+    assert np.isinf(BaseTree.minkowski_p({'metric': 'chebyshev'}))
+    assert BaseTree.minkowski_p({'metric': 'haversine'}) is None
+    assert BaseTree.minkowski_p({'metric': 'euclidean', 'p': 3}) is None
+    assert BaseTree.minkowski_p({'p': 0.5}) is None
+    assert BaseTree.minkowski_p({'w': np.ones(2)}) is None
+
+
+def test_select_neighbor_method():
+    rand = np.random.RandomState(0)
+    dense = rand.random((2, 1000)) * 0.5
+    assert BaseTree.select_neighbor_method(dense) == 'grid'
+    sparse = rand.random((2, 1000)) * 10
+    assert BaseTree.select_neighbor_method(sparse) == 'kdtree'
+    high = rand.random((4, 1000)) * 10
+    assert BaseTree.select_neighbor_method(high) == 'kdtree'
+    assert BaseTree.select_neighbor_method(
+        dense, metric='haversine') == 'balltree'
+    assert BaseTree.select_neighbor_method(
+        dense, method='kdtree') == 'kdtree'
+
+    with pytest.raises(ValueError) as err:
+        BaseTree(dense, neighbor_method='foo')
+    assert 'Unknown neighbor method' in str(err.value)
+
+    tree = BaseTree(dense, neighbor_method='auto')
+    assert tree.neighbor_backend == 'grid'
+    assert BaseTree((2, 3)).neighbor_backend is None
+
+
+@pytest.mark.parametrize('metric', [{}, {'p': 1}, {'p': 3},
+                                    {'metric': 'chebyshev'}])
+def test_neighbor_methods(metric):
+    rand = np.random.RandomState(1)
+    coordinates = rand.random((2, 500)) * 10
+    points = rand.random((2, 40)) * 12 - 1
+    reference = BaseTree(coordinates, **metric)
+    trees = [BaseTree(coordinates, neighbor_method=method, **metric)
+             for method in ['kdtree', 'grid']]
+    assert isinstance(trees[0]._kdtree, cKDTree)
+    assert trees[1]._kdtree is None and trees[1]._balltree is None
+
+    for radius in [1.0, 2.5]:
+        expected, expected_distances = reference.query_radius(
+            points, radius=radius, return_distance=True)
+        for tree in trees:
+            assert tree.balltree_initialized
+            indices, distances = tree.query_radius(
+                points, radius=radius, return_distance=True)
+            for i in range(points.shape[1]):
+                order = np.argsort(expected[i])
+                assert np.allclose(indices[i], expected[i][order])
+                assert np.allclose(distances[i],
+                                   expected_distances[i][order])
+
+    # Large data
+    for tree in trees:
+        tree.large_data = True
+        with pytest.raises(ValueError) as err:
+            tree.query_radius(points[:, 0])
+        assert 'No block number' in str(err.value)
+        block = tree.to_index(points[:, 0])
+        expected = reference.query_radius(points[:, 0])[0]
+        indices = tree.query_radius(points[:, 0], block=block)[0]
+        assert np.allclose(np.sort(indices), np.sort(expected))
+
+
 def test_get_class_for():
     rand = np.random.RandomState(42).random
     resampler = ResamplePolynomial(rand(100), rand(100), rand(100))
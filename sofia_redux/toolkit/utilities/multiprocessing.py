@@ -1,11 +1,17 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 
+from concurrent.futures import (
+    FIRST_COMPLETED, ThreadPoolExecutor, wait)
 from contextlib import contextmanager
 from functools import partial
 import gc
+import importlib
+import json
 import logging
 import multiprocessing as mp
+from multiprocessing import resource_tracker, shared_memory
 import os
+import pickle
 import regex
 import shutil
 import signal
@@ -24,7 +30,21 @@ __all__ = ['get_core_number', 'relative_cores', 'valid_relative_jobs',
            'multitask', 'pickle_object', 'unpickle_file', 'pickle_list',
            'unpickle_list', 'in_main_thread', 'log_with_multi_handler',
            'log_for_multitask', 'purge_multitask_logs', 'wrapped_with_logger',
-           'log_records_to_pickle_file', 'MultitaskHandler', 'wrap_function']
+           'log_records_to_pickle_file', 'MultitaskHandler', 'wrap_function',
+           'SharedArrayStore', 'release_shared_arrays', 'MultitaskPool',
+           'get_active_pool', 'MultitaskProfiler', 'get_active_profiler']
+
+# Shared memory blocks created or attached by this process, keyed by name.
+_shared_memory_blocks = {}
+
+# Pools entered as context managers (last is active).
+_active_pools = []
+
+# Functions unpickled by MultitaskPool workers, keyed by pickle file.
+_pool_task_cache = {}
+
+# Profilers entered as context managers (last is active).
+_active_profilers = []
 
 
 def get_core_number(cores=True):
@@ -112,7 +132,7 @@ def valid_relative_jobs(jobs):
 
 def multitask(func, iterable, args, kwargs, jobs=None, skip=None,
               max_nbytes='1M', force_threading=False, force_processes=False,
-              logger=None):
+              logger=None, pool=None, profiler=None):
     """
     Process a series of tasks in serial, or in parallel using joblib.
 
@@ -170,6 +190,27 @@ def multitask(func, iterable, args, kwargs, jobs=None, skip=None,
     ...    multitask(add_ten, range(len(numbers)), numbers, None)
     [10, 11, 12, 13, 14]
 
+    Worker processes are normally created (and destroyed) on each call.  If
+    many calls are expected, a persistent :class:`MultitaskPool` may be
+    supplied via the `pool` argument, or entered as a context manager in
+    which case it will be used by all parallel calls to `multitask` within
+    the context:
+
+    >>> with MultitaskPool(jobs=2) as pool:
+    ...    multitask(add_ten, range(len(numbers)), numbers, None, jobs=2)
+    [10, 11, 12, 13, 14]
+
+    The start and stop time, worker, and serialized argument and result
+    sizes of each task may be recorded by a :class:`MultitaskProfiler`,
+    either supplied via the `profiler` argument or entered as a context
+    manager:
+
+    >>> with MultitaskProfiler() as profiler:
+    ...    multitask(add_ten, range(len(numbers)), numbers, None)
+    [10, 11, 12, 13, 14]
+    >>> profiler.n_tasks
+    5
+
     Parameters
     ----------
     func : function
@@ -218,6 +259,18 @@ def multitask(func, iterable, args, kwargs, jobs=None, skip=None,
     logger : logging.Logger, optional
         If supplied, will attempt to produce sensibly ordered logs for the
         multiprocessing tasks for all handlers.
+    pool : MultitaskPool, optional
+        A persistent pool of workers on which to run the tasks in parallel.
+        If not supplied, the currently active pool (see
+        :func:`get_active_pool`) will be used if it is compatible with the
+        `force_threading` and `force_processes` options.  Otherwise, a new
+        set of workers will be created for the duration of the call.
+    profiler : MultitaskProfiler or function, optional
+        If supplied, records timing and size information for each task.  A
+        function will be wrapped in a :class:`MultitaskProfiler` and called
+        with the record (dict) of each task on completion.  If not supplied,
+        the currently active profiler (see :func:`get_active_profiler`) will
+        be used if available.
 
     Returns
     -------
@@ -226,13 +279,36 @@ def multitask(func, iterable, args, kwargs, jobs=None, skip=None,
         of length len(`iterable`) if `skip` is None, otherwise
         len(iterable) - sum(skip).
     """
+    if profiler is None:
+        profiler = get_active_profiler()
+    elif not isinstance(profiler, MultitaskProfiler):
+        profiler = MultitaskProfiler(callback=profiler)
+
     if jobs in [None, 0, 1]:
-        return _serial(func, args, kwargs, iterable, skip=skip)
+        return _serial(func, args, kwargs, iterable, skip=skip,
+                       profiler=profiler)
+
+    if pool is None:
+        pool = get_active_pool()
+        if pool is not None:
+            if force_threading:
+                use_threads = True
+            elif force_processes:
+                use_threads = False
+            else:
+                use_threads = not in_main_thread()
+            if use_threads != pool.use_threads or pool.in_worker_thread():
+                # Nested calls from a pool thread must not wait on the pool
+                pool = None
+
+    if pool is not None:
+        return pool.multitask(func, iterable, args, kwargs, jobs=jobs,
+                              skip=skip, logger=logger, profiler=profiler)
 
     return _parallel(
         int(jobs), func, args, kwargs, iterable, skip=skip,
         max_nbytes=max_nbytes, force_threading=force_threading,
-        force_processes=force_processes, logger=logger)
+        force_processes=force_processes, logger=logger, profiler=profiler)
 
 
 def _wrap_function(func, args, kwargs):
@@ -400,7 +476,7 @@ def wrap_function(func, args, kwargs=None, logger=None, log_directory=None):
     return multi_func, pickle_file
 
 
-def _serial(func, args, kwargs, iterable, skip=None):
+def _serial(func, args, kwargs, iterable, skip=None, profiler=None):
     """
     Processes tasks serially without any multiprocessing.
 
@@ -425,6 +501,8 @@ def _serial(func, args, kwargs, iterable, skip=None):
         Should be of len(`iterable`), where a value of True signifies that
         processing should be skipped for that task and omitted from the
         final result.
+    profiler : MultitaskProfiler, optional
+        If supplied, records timing and size information for each task.
 
     Returns
     -------
@@ -434,6 +512,16 @@ def _serial(func, args, kwargs, iterable, skip=None):
         len(iterable) - sum(skip).
     """
     multi_func, _ = wrap_function(func, args, kwargs=kwargs)
+
+    if profiler is not None:
+        if skip is None:
+            run_args = list(iterable)
+        else:
+            run_args = [x[1] for x in zip(skip, iterable) if not x[0]]
+        multi_func, run_args = profiler.wrap(
+            multi_func, run_args, name=func, backend='serial', jobs=1)
+        return profiler.collect([multi_func(x) for x in run_args])
+
     result = []
 
     if skip is None:
@@ -451,7 +539,7 @@ def _serial(func, args, kwargs, iterable, skip=None):
 
 def _parallel(jobs, func, args, kwargs, iterable, skip=None,
               force_threading=False, force_processes=False, package=None,
-              logger=None, **joblib_kwargs):
+              logger=None, profiler=None, **joblib_kwargs):
     """
 
     Process a given list of jobs in parallel.
@@ -510,6 +598,8 @@ def _parallel(jobs, func, args, kwargs, iterable, skip=None,
         package at runtime.
     logger : Logger, optional
         The logger with which to emit any messages during `func`.
+    profiler : MultitaskProfiler, optional
+        If supplied, records timing and size information for each task.
     joblib_kwargs : dict, optional
         Optional keyword arguments to pass into :class:`joblib.Parallel` if
         applicable.  The `require` and `backend` options will be overwritten
@@ -527,7 +617,8 @@ def _parallel(jobs, func, args, kwargs, iterable, skip=None,
 
     # Check if this is just a single job.
     if jobs is None or jobs < 2:
-        return _serial(func, args, kwargs, iterable, skip=skip)
+        return _serial(func, args, kwargs, iterable, skip=skip,
+                       profiler=profiler)
     if skip is None:
         run_args = list(iterable)
     else:
@@ -535,7 +626,8 @@ def _parallel(jobs, func, args, kwargs, iterable, skip=None,
 
     required_jobs = int(np.clip(jobs, 1, len(run_args)))
     if required_jobs == 1:
-        return _serial(func, args, kwargs, iterable, skip=skip)
+        return _serial(func, args, kwargs, iterable, skip=skip,
+                       profiler=profiler)
 
     # Determine which package to use.
     if not in_windows_os():
@@ -566,7 +658,8 @@ def _parallel(jobs, func, args, kwargs, iterable, skip=None,
                 log.warning("Multiprocessing is not available from a child "
                             "thread for Python versions < 3.8.0: will process "
                             "serially")
-                return _serial(func, args, kwargs, iterable, skip=skip)
+                return _serial(func, args, kwargs, iterable, skip=skip,
+                               profiler=profiler)
 
             if package == 'joblib':
                 package = 'multiprocessing'
@@ -591,6 +684,15 @@ def _parallel(jobs, func, args, kwargs, iterable, skip=None,
     multi_func, log_pickle_file = wrap_function(
         func, args, kwargs=kwargs, logger=logger, log_directory=log_directory)
 
+    if profiler is not None:
+        if package == 'multiprocessing':
+            backend = 'threads' if use_threads else 'multiprocessing'
+        else:
+            backend = 'threading' if use_threads else 'loky'
+        multi_func, run_args = profiler.wrap(
+            multi_func, run_args, name=func, backend=backend,
+            jobs=required_jobs)
+
     if package == 'multiprocessing':
         pool_class = mp.pool.ThreadPool if use_threads else mp.Pool
         with pool_class(processes=required_jobs) as pool:
@@ -599,6 +701,8 @@ def _parallel(jobs, func, args, kwargs, iterable, skip=None,
             pool.join()
 
         purge_multitask_logs(log_directory, log_pickle_file, use_logger=logger)
+        if profiler is not None:
+            result = profiler.collect(result)
         return result
 
     # Joblib processing...
@@ -646,9 +750,694 @@ def _parallel(jobs, func, args, kwargs, iterable, skip=None,
     del executor
     gc.collect()
 
+    if profiler is not None:
+        processed_result = profiler.collect(processed_result)
     return processed_result
 
 
+def get_active_pool():
+    """
+    Return the currently active multitask pool.
+
+    A :class:`MultitaskPool` becomes active when entered as a context manager,
+    and will be used by :func:`multitask` for all parallel processing within
+    that context unless a different pool is explicitly supplied.
+
+    Returns
+    -------
+    MultitaskPool or None
+    """
+    for pool in reversed(_active_pools):
+        if not pool.closed:
+            return pool
+    return None
+
+
+def _initialize_pool_worker(modules, initializer,
+                            initargs):  # pragma: no cover
+    """
+    Initialize a :class:`MultitaskPool` worker process.
+
+    Parameters
+    ----------
+    modules : list (str)
+        The modules to import on worker start.  Numba functions compiled with
+        `cache=True` will be loaded from the on-disk cache at this point.
+    initializer : function or None
+        An optional function to call on worker start.
+    initargs : tuple
+        The arguments to pass into `initializer`.
+
+    Returns
+    -------
+    None
+    """
+    for module in modules:
+        importlib.import_module(module)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _run_pool_task(pickle_file, run_arg):  # pragma: no cover
+    """
+    Run a single :class:`MultitaskPool` task in a worker process.
+
+    The wrapped function is unpickled once per worker and map call, and
+    then reused for all further tasks.
+
+    Parameters
+    ----------
+    pickle_file : str
+        The pickle file containing the wrapped function.
+    run_arg : object
+        The run time argument passed to the wrapped function.
+
+    Returns
+    -------
+    result : object
+    """
+    func = _pool_task_cache.get(pickle_file)
+    if func is None:
+        _pool_task_cache.clear()
+        func, _ = unpickle_file(pickle_file)
+        _pool_task_cache[pickle_file] = func
+    return func(run_arg)
+
+
+class MultitaskPool(object):
+
+    def __init__(self, jobs=-1, force_threading=False, modules=None,
+                 initializer=None, initargs=(), env=None, timeout=None):
+        """
+        A persistent pool of workers for :func:`multitask`.
+
+        Creating new worker processes (and compiling or loading any numba
+        functions within them) is expensive.  A `MultitaskPool` starts a set
+        of workers once, and reuses them for every :func:`multitask` call
+        until the pool is closed.  The pool is best used as a context manager,
+        in which case it will also be used by default for any parallel
+        :func:`multitask` call made within the context:
+
+        >>> with MultitaskPool(jobs=4) as pool:  # doctest: +SKIP
+        ...     for i in range(1000):
+        ...         multitask(func, iterable, args, kwargs, jobs=4)
+
+        Parameters
+        ----------
+        jobs : int, optional
+            The number of workers in the pool.  Negative values are relative
+            to the number of available cores (see :func:`relative_cores`).
+        force_threading : bool, optional
+            If `True`, the pool uses threads rather than processes.
+        modules : list (str), optional
+            Modules to import in each worker process on startup.  This allows
+            any numba functions to be loaded or compiled once per worker
+            rather than once per task.
+        initializer : function, optional
+            A function to call in each worker process on startup.
+        initargs : tuple, optional
+            Arguments to pass into `initializer`.
+        env : dict, optional
+            Environment variables to set in each worker process before any
+            module is loaded (e.g., NUMBA_CACHE_DIR).
+        timeout : int or float, optional
+            Idle worker processes exit after `timeout` seconds and are
+            restarted when required.  The default keeps workers alive for the
+            lifetime of the pool.
+        """
+        self.jobs = relative_cores(jobs)
+        self.use_threads = bool(force_threading)
+        self.modules = [] if modules is None else list(modules)
+        self.initializer = initializer
+        self.initargs = tuple(initargs)
+        self.env = env
+        self.timeout = timeout
+        self.executor = None
+        self.cache_dir = None
+        self.n_calls = 0
+        self.n_tasks = 0
+
+    def __enter__(self):
+        self.start()
+        _active_pools.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self in _active_pools:
+            _active_pools.remove(self)
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def __str__(self):
+        kind = 'threads' if self.use_threads else 'processes'
+        return (f"MultitaskPool ({self.jobs} {kind}, "
+                f"{self.n_calls} calls, {self.n_tasks} tasks)")
+
+    @property
+    def closed(self):
+        """bool : `True` if the pool is not running."""
+        return self.executor is None
+
+    @property
+    def thread_prefix(self):
+        """str : The name prefix for all threads in a thread pool."""
+        return f'MultitaskPool_{id(self)}'
+
+    def in_worker_thread(self):
+        """
+        Return whether the current thread is a worker of this pool.
+
+        Returns
+        -------
+        bool
+        """
+        if not self.use_threads:
+            return False
+        return threading.current_thread().name.startswith(self.thread_prefix)
+
+    def start(self):
+        """
+        Start the pool workers.
+
+        Returns
+        -------
+        None
+        """
+        if self.executor is not None:
+            return
+        if self.use_threads:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.jobs, thread_name_prefix=self.thread_prefix)
+        else:
+            from joblib.externals.loky import ProcessPoolExecutor
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.jobs,
+                initializer=_initialize_pool_worker,
+                initargs=(self.modules, self.initializer, self.initargs),
+                env=self.env, timeout=self.timeout)
+        self.cache_dir = tempfile.mkdtemp(prefix='multitask_pool_')
+
+    def close(self):
+        """
+        Shut down all pool workers and remove temporary files.
+
+        Returns
+        -------
+        None
+        """
+        executor = getattr(self, 'executor', None)
+        if executor is not None:
+            executor.shutdown(wait=True)
+            self.executor = None
+        cache_dir = getattr(self, 'cache_dir', None)
+        if cache_dir is not None:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            self.cache_dir = None
+
+    def map(self, func, run_args, jobs=None):
+        """
+        Apply a function to each run argument using the pool workers.
+
+        Parameters
+        ----------
+        func : function
+            A function taking a single run time argument.
+        run_args : list
+            The run time arguments.
+        jobs : int, optional
+            The maximum number of tasks to run concurrently.  The default is
+            the number of workers in the pool.
+
+        Returns
+        -------
+        results : list
+            The function results in the same order as `run_args`.
+        """
+        self.start()
+        n_tasks = len(run_args)
+        self.n_calls += 1
+        self.n_tasks += n_tasks
+        if n_tasks == 0:
+            return []
+
+        max_running = self.jobs if jobs is None else relative_cores(jobs)
+        max_running = int(np.clip(max_running, 1, self.jobs))
+
+        pickle_file = None
+        if not self.use_threads:
+            pickle_file = os.path.join(
+                self.cache_dir, f'pool_task_{id(func)}_{self.n_calls}.p')
+            pickle_object(func, pickle_file)
+            task_func = partial(_run_pool_task, pickle_file)
+        else:
+            task_func = func
+
+        results = [None] * n_tasks
+        running = {}
+        try:
+            for index, run_arg in enumerate(run_args):
+                if len(running) >= max_running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[running.pop(future)] = future.result()
+                running[self.executor.submit(task_func, run_arg)] = index
+            for future in list(running.keys()):
+                results[running.pop(future)] = future.result()
+        finally:
+            for future in running:
+                future.cancel()
+            if pickle_file is not None and os.path.isfile(pickle_file):
+                os.remove(pickle_file)
+        return results
+
+    def multitask(self, func, iterable, args, kwargs, jobs=None, skip=None,
+                  logger=None, profiler=None):
+        """
+        Process a series of tasks using the pool workers.
+
+        Please see :func:`multitask` for a full description of the
+        arguments.
+
+        Parameters
+        ----------
+        func : function
+        iterable : iterable
+        args : object
+        kwargs : None or object
+        jobs : int, optional
+        skip : array_like of bool, optional
+        logger : logging.Logger, optional
+        profiler : MultitaskProfiler, optional
+
+        Returns
+        -------
+        result : list
+        """
+        if skip is None:
+            run_args = list(iterable)
+        else:
+            run_args = [x[1] for x in zip(skip, iterable) if not x[0]]
+
+        if logger is not None:
+            log_directory = tempfile.mkdtemp(prefix='multitask_temp_log_dir_')
+            run_args = [(x, i) for (i, x) in enumerate(run_args)]
+            initial_log_level = logger.level
+        else:
+            log_directory = None
+            initial_log_level = None
+
+        multi_func, log_pickle_file = wrap_function(
+            func, args, kwargs=kwargs, logger=logger,
+            log_directory=log_directory)
+
+        if profiler is not None:
+            max_running = self.jobs if jobs is None else relative_cores(jobs)
+            multi_func, run_args = profiler.wrap(
+                multi_func, run_args, name=func,
+                backend='pool-threads' if self.use_threads else 'pool',
+                jobs=int(np.clip(max_running, 1, self.jobs)))
+
+        result = self.map(multi_func, run_args, jobs=jobs)
+
+        if logger is not None:
+            logger.setLevel(initial_log_level)
+        purge_multitask_logs(log_directory, log_pickle_file, use_logger=logger)
+        if profiler is not None:
+            result = profiler.collect(result)
+        return result
+
+
+def get_active_profiler():
+    """
+    Return the currently active multitask profiler.
+
+    A :class:`MultitaskProfiler` becomes active when entered as a context
+    manager, and will record all tasks processed by :func:`multitask` within
+    that context unless a different profiler is explicitly supplied.
+
+    Returns
+    -------
+    MultitaskProfiler or None
+    """
+    if len(_active_profilers) == 0:
+        return None
+    return _active_profilers[-1]
+
+
+def _pickled_size(obj):
+    """
+    Return the size of an object once pickled.
+
+    Parameters
+    ----------
+    obj : object
+
+    Returns
+    -------
+    n_bytes : int
+        The size of the pickled object in bytes, or -1 if the object cannot
+        be pickled.
+    """
+    try:
+        return len(cloudpickle.dumps(obj))
+    except (TypeError, pickle.PicklingError, AttributeError):
+        return -1
+
+
+def _profile_task(func, call, measure_sizes, indexed_run_arg):
+    """
+    Run a single task, recording its timing, worker and memory usage.
+
+    Parameters
+    ----------
+    func : function
+        The wrapped function taking a single run time argument.
+    call : int
+        The :class:`MultitaskProfiler` call identifier.
+    measure_sizes : bool
+        If `True`, record the pickled size of the run argument and result
+        (-1 for objects that cannot be pickled).
+    indexed_run_arg : 2-tuple
+        The task index (int) and run time argument.
+
+    Returns
+    -------
+    result, record : object, dict
+        The function result and the task record.
+    """
+    index, run_arg = indexed_run_arg
+    process = psutil.Process()
+    rss_start = process.memory_info().rss
+    start = time.time()
+    result = func(run_arg)
+    stop = time.time()
+    rss = process.memory_info().rss
+    if measure_sizes:
+        arg_bytes = _pickled_size(run_arg)
+        result_bytes = _pickled_size(result)
+    else:
+        arg_bytes = result_bytes = -1
+    record = {'call': call, 'index': index,
+              'pid': os.getpid(),
+              'thread': threading.current_thread().name,
+              'start': start, 'stop': stop, 'duration': stop - start,
+              'arg_bytes': arg_bytes, 'result_bytes': result_bytes,
+              'rss': rss, 'rss_change': rss - rss_start}
+    return result, record
+
+
+class MultitaskProfiler(object):
+
+    process_backends = ('multiprocessing', 'loky', 'pool')
+
+    def __init__(self, measure_sizes=None, callback=None):
+        """
+        Record the timing and data transfer of :func:`multitask` tasks.
+
+        A record is created for each task processed by :func:`multitask`
+        containing the start and stop times, the worker process ID and
+        thread name, the size of the pickled run argument and result, and
+        the resident memory of the worker.  A summary of each
+        :func:`multitask` call is also kept, including the backend used and
+        the pickled size of the function and shared arguments sent to the
+        workers.  This allows slow reductions to be identified as CPU bound,
+        serialization bound, or poorly balanced across workers.
+
+        The profiler may be passed to :func:`multitask` directly, or entered
+        as a context manager in which case all tasks processed within the
+        context are recorded:
+
+        >>> with MultitaskProfiler() as profiler:  # doctest: +SKIP
+        ...     multitask(func, iterable, args, kwargs, jobs=4)
+        >>> print(profiler.table())  # doctest: +SKIP
+        >>> profiler.to_chrome_trace('trace.json')  # doctest: +SKIP
+
+        Chrome trace files may be viewed with chrome://tracing or
+        https://ui.perfetto.dev.
+
+        Parameters
+        ----------
+        measure_sizes : bool, optional
+            If `True`, pickle each run argument and result to measure its
+            size.  This adds some overhead to each task.  By default, sizes
+            are only measured for process backends, where the arguments and
+            results are actually transferred between processes.  Objects
+            that cannot be pickled are recorded with a size of -1.
+        callback : function, optional
+            A function called with the record (dict) of each task as it is
+            collected.
+        """
+        self.measure_sizes = measure_sizes
+        self.callback = callback
+        self.calls = []
+        self.records = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        _active_profilers.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self in _active_profilers:
+            _active_profilers.remove(self)
+
+    def __str__(self):
+        return (f"MultitaskProfiler ({len(self.calls)} calls, "
+                f"{self.n_tasks} tasks)")
+
+    @property
+    def n_tasks(self):
+        """int : The number of recorded tasks."""
+        return len(self.records)
+
+    def clear(self):
+        """
+        Remove all records.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self.calls = []
+            self.records = []
+
+    def wrap(self, func, run_args, name=None, backend=None, jobs=1):
+        """
+        Wrap a function and run arguments for profiling.
+
+        Parameters
+        ----------
+        func : function
+            The function taking a single run time argument (see
+            :func:`wrap_function`).
+        run_args : list
+            The run time arguments.
+        name : function or str, optional
+            The name of the function processed by :func:`multitask`.
+        backend : str, optional
+            The name of the processing backend.
+        jobs : int, optional
+            The number of parallel jobs.
+
+        Returns
+        -------
+        profiled_function, profiled_run_args : function, list
+            The function returns a (result, record) tuple, and should be
+            passed a profiled run argument.  The results should be passed
+            to :func:`MultitaskProfiler.collect`.
+        """
+        if name is not None and not isinstance(name, str):
+            name = getattr(name, '__qualname__',
+                           getattr(name, '__name__', str(name)))
+        measure_sizes = self.measure_sizes
+        if measure_sizes is None:
+            measure_sizes = backend in self.process_backends
+        if measure_sizes:
+            func_bytes = _pickled_size(func)
+        else:
+            func_bytes = -1
+
+        with self._lock:
+            call = len(self.calls)
+            self.calls.append({'call': call, 'name': name,
+                               'backend': backend, 'jobs': int(jobs),
+                               'n_tasks': len(run_args),
+                               'func_bytes': func_bytes,
+                               'dispatch': time.time(), 'stop': np.nan})
+
+        profiled = partial(_profile_task, func, call, measure_sizes)
+        return profiled, list(enumerate(run_args))
+
+    def collect(self, profiled_results):
+        """
+        Store the task records and return the task results.
+
+        Parameters
+        ----------
+        profiled_results : list (tuple)
+            The (result, record) output of each profiled task.
+
+        Returns
+        -------
+        results : list
+        """
+        stop = time.time()
+        results = []
+        records = []
+        call = None
+        for result, record in profiled_results:
+            results.append(result)
+            call = self.calls[record['call']]
+            record['name'] = call['name']
+            record['backend'] = call['backend']
+            record['queue_wait'] = record['start'] - call['dispatch']
+            records.append(record)
+        if call is not None:
+            call['stop'] = stop
+
+        with self._lock:
+            self.records.extend(records)
+        if self.callback is not None:
+            for record in records:
+                self.callback(record)
+        return results
+
+    def worker_summary(self):
+        """
+        Summarize the recorded tasks for each worker.
+
+        Returns
+        -------
+        summary : list (dict)
+            The number of tasks, total busy time, and total pickled argument
+            and result sizes for each worker, where a worker is identified
+            by its process ID and thread name.
+        """
+        workers = {}
+        for record in self.records:
+            key = record['pid'], record['thread']
+            if key not in workers:
+                workers[key] = {'pid': key[0], 'thread': key[1],
+                                'n_tasks': 0, 'busy': 0.0,
+                                'arg_bytes': 0, 'result_bytes': 0,
+                                'max_rss': 0}
+            worker = workers[key]
+            worker['n_tasks'] += 1
+            worker['busy'] += record['duration']
+            worker['arg_bytes'] += max(record['arg_bytes'], 0)
+            worker['result_bytes'] += max(record['result_bytes'], 0)
+            worker['max_rss'] = max(worker['max_rss'], record['rss'])
+        return list(workers.values())
+
+    def table(self, per_worker=False):
+        """
+        Format the task records as a plain text table.
+
+        Parameters
+        ----------
+        per_worker : bool, optional
+            If `True`, tabulate the :func:`MultitaskProfiler.worker_summary`
+            rather than each task.
+
+        Returns
+        -------
+        table : str
+        """
+        if per_worker:
+            columns = ['pid', 'thread', 'n_tasks', 'busy', 'arg_bytes',
+                       'result_bytes', 'max_rss']
+            rows = self.worker_summary()
+        else:
+            columns = ['call', 'index', 'name', 'backend', 'pid', 'thread',
+                       'start', 'duration', 'queue_wait', 'arg_bytes',
+                       'result_bytes', 'rss_change']
+            rows = self.records
+        if len(rows) == 0:
+            return ''
+
+        t0 = min(call['dispatch'] for call in self.calls)
+
+        def fmt(key, value):
+            if key == 'start':
+                value -= t0
+            if isinstance(value, (float, np.floating)):
+                return f'{value:.6f}'
+            return str(value)
+
+        values = [[fmt(c, row[c]) for c in columns] for row in rows]
+        widths = [max(len(c), *(len(v[i]) for v in values))
+                  for i, c in enumerate(columns)]
+        lines = ['  '.join(c.ljust(w) for c, w in zip(columns, widths)),
+                 '  '.join('-' * w for w in widths)]
+        for row in values:
+            lines.append('  '.join(v.ljust(w) for v, w in zip(row, widths)))
+        return '\n'.join(lines)
+
+    def chrome_trace(self):
+        """
+        Return the task records in the Chrome trace event format.
+
+        Each task is a complete ("X") event on a track for its worker
+        process and thread, and each :func:`multitask` call is an event on
+        the track of the calling process.
+
+        Returns
+        -------
+        trace : dict
+        """
+        threads = {}
+        events = []
+        for record in self.records:
+            key = record['pid'], record['thread']
+            tid = threads.setdefault(key, len(threads) + 1)
+            args = {k: record[k] for k in
+                    ['call', 'index', 'queue_wait', 'arg_bytes',
+                     'result_bytes', 'rss', 'rss_change']}
+            events.append({'name': f"{record['name']}[{record['index']}]",
+                           'cat': str(record['backend']), 'ph': 'X',
+                           'ts': record['start'] * 1e6,
+                           'dur': record['duration'] * 1e6,
+                           'pid': record['pid'], 'tid': tid, 'args': args})
+
+        pid = os.getpid()
+        for call in self.calls:
+            if not np.isfinite(call['stop']):
+                continue
+            args = {k: call[k] for k in
+                    ['backend', 'jobs', 'n_tasks', 'func_bytes']}
+            events.append({'name': f"multitask {call['name']}",
+                           'cat': 'multitask', 'ph': 'X',
+                           'ts': call['dispatch'] * 1e6,
+                           'dur': (call['stop'] - call['dispatch']) * 1e6,
+                           'pid': pid, 'tid': 0, 'args': args})
+
+        for (worker_pid, thread), tid in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M',
+                           'pid': worker_pid, 'tid': tid,
+                           'args': {'name': thread}})
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def to_chrome_trace(self, filename):
+        """
+        Write the task records to a Chrome trace JSON file.
+
+        Parameters
+        ----------
+        filename : str
+
+        Returns
+        -------
+        filename : str
+        """
+        with open(filename, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return filename
+
+
 def pickle_object(obj, filename):
     """
     Pickle a object and save to the given filename.
@@ -777,6 +1566,210 @@ def unpickle_list(pickle_files, delete=True):
             os.remove(filename)
 
 
+def _open_shared_memory(name):
+    """
+    Attach to an existing shared memory block without tracking it.
+
+    The creating process is responsible for unlinking the block, so the
+    resource tracker must not unlink it when an attaching process exits.
+
+    Parameters
+    ----------
+    name : str
+        The name of the shared memory block.
+
+    Returns
+    -------
+    multiprocessing.shared_memory.SharedMemory
+    """
+    if sys.version_info >= (3, 13):  # pragma: no cover
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _attach_shared_array(name, shape, dtype, order):
+    """
+    Reconstruct an array from a named shared memory block.
+
+    This is the unpickling counterpart to :class:`SharedArrayStore` and should
+    not be called directly.  The returned array is a view on the shared
+    memory buffer, so no data is copied.
+
+    Parameters
+    ----------
+    name : str
+        The name of the shared memory block.
+    shape : tuple (int)
+        The shape of the array.
+    dtype : numpy.dtype
+        The array data type.
+    order : str
+        The memory layout of the array ('C' or 'F').
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    block = _shared_memory_blocks.get(name)
+    if block is None:
+        block = _open_shared_memory(name)
+        _shared_memory_blocks[name] = block
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf,
+                      order=order)
+
+
+def release_shared_arrays():
+    """
+    Detach from all shared memory blocks attached (not created) by a process.
+
+    Blocks that are still referenced by an existing array cannot be closed and
+    will be left attached until the next call.
+
+    Returns
+    -------
+    None
+    """
+    gc.collect()
+    for name in list(_shared_memory_blocks.keys()):
+        block = _shared_memory_blocks[name]
+        if getattr(block, '_sofia_owner', False):
+            continue
+        try:
+            block.close()
+        except BufferError:  # pragma: no cover
+            continue
+        del _shared_memory_blocks[name]
+
+
+class SharedArrayStore(object):
+
+    def __init__(self, min_bytes=65536):
+        """
+        Pickle objects with large arrays placed in shared memory.
+
+        Objects pickled with :meth:`SharedArrayStore.pickle_object` have any
+        standard numpy array larger than `min_bytes` copied into a
+        :class:`multiprocessing.shared_memory.SharedMemory` block.  Only a
+        reference to the block is written to the pickle file, so child
+        processes unpickling the file (via :func:`unpickle_file`) attach to
+        the same memory rather than reading and copying the array data.
+
+        The store owns all shared memory blocks it creates, which are released
+        by :meth:`SharedArrayStore.close` or on exiting a context.  Child
+        processes should treat shared arrays as read-only.
+
+        Parameters
+        ----------
+        min_bytes : int, optional
+            Arrays smaller than this number of bytes are pickled as usual.
+        """
+        self.min_bytes = int(min_bytes)
+        self.blocks = []
+        self.shared_bytes = 0
+        self.pickled_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    @property
+    def n_arrays(self):
+        """int : The number of arrays placed in shared memory."""
+        return len(self.blocks)
+
+    def share_array(self, array):
+        """
+        Copy an array to a new shared memory block.
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+
+        Returns
+        -------
+        reduction : tuple
+            A pickle reduction tuple used to reconstruct the array.
+        """
+        if array.flags.f_contiguous and not array.flags.c_contiguous:
+            order = 'F'
+        else:
+            order = 'C'
+        block = shared_memory.SharedMemory(create=True,
+                                           size=max(array.nbytes, 1))
+        block._sofia_owner = True
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf,
+                            order=order)
+        shared[...] = array
+        del shared
+        _shared_memory_blocks[block.name] = block
+        self.blocks.append(block)
+        self.shared_bytes += array.nbytes
+        return _attach_shared_array, (block.name, array.shape,
+                                      array.dtype, order)
+
+    def pickle_object(self, obj, filename):
+        """
+        Pickle an object to file, placing large arrays in shared memory.
+
+        Parameters
+        ----------
+        obj : object
+            The object to pickle.
+        filename : str
+            The file path to which the pickled object will be written.
+
+        Returns
+        -------
+        filename : str
+        """
+        store = self
+
+        class SharedPickler(cloudpickle.CloudPickler):
+            def reducer_override(self, o):
+                if (type(o) is np.ndarray and not o.dtype.hasobject
+                        and o.nbytes >= store.min_bytes):
+                    return store.share_array(o)
+                return super().reducer_override(o)
+
+        with open(filename, 'wb') as f:
+            SharedPickler(f).dump(obj)
+        self.pickled_bytes += os.path.getsize(filename)
+        return filename
+
+    def close(self):
+        """
+        Release and unlink all shared memory blocks owned by the store.
+
+        Returns
+        -------
+        None
+        """
+        blocks = getattr(self, 'blocks', None)
+        if not blocks:
+            return
+        for block in blocks:
+            _shared_memory_blocks.pop(block.name, None)
+            try:
+                block.close()
+            except BufferError:  # pragma: no cover
+                pass
+            try:
+                block.unlink()
+            except FileNotFoundError:  # pragma: no cover
+                pass
+        self.blocks = []
+
+
 def in_main_thread():
     """
     Return whether the process is running in the main thread.
@@ -0,0 +1,101 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import os
+import threading
+
+from astropy import log
+import numpy as np
+import pytest
+
+from sofia_redux.toolkit.utilities.multiprocessing import (
+    MultitaskPool, get_active_pool, multitask)
+
+
+def adder(xy, i):
+    return xy[0, i] + xy[1, i]
+
+
+def get_pid(args, i):
+    return os.getpid()
+
+
+def nested(args, i):
+    # Nested calls from a pool thread must not block on the same pool
+    return sum(multitask(adder, range(3), args, None, jobs=2,
+                         force_threading=True))
+
+
+def log_message(args, i):
+    log.info(f'task {i}')
+    return i
+
+
+@pytest.fixture
+def adder_data():
+    n = 20
+    xy = np.arange(n)
+    xy = np.vstack((xy, xy + 100))
+    expected = np.sum(xy, axis=0)
+    iterable = list(range(n))
+    return xy, iterable, expected
+
+
+def test_process_pool(adder_data):
+    xy, iterable, expected = adder_data
+    with MultitaskPool(jobs=2) as pool:
+        assert get_active_pool() is pool
+        assert not pool.closed
+        assert not pool.use_threads
+        result = multitask(adder, iterable, xy, None, jobs=2)
+        assert np.allclose(result, expected)
+
+        # workers persist between calls
+        pids_1 = set(multitask(get_pid, iterable, None, None, jobs=2))
+        pids_2 = set(multitask(get_pid, iterable, None, None, jobs=2))
+        assert os.getpid() not in pids_1
+        assert len(pids_1 | pids_2) <= pool.jobs
+        assert pool.n_calls == 3
+        assert pool.n_tasks == 3 * len(iterable)
+        assert 'processes' in str(pool)
+
+        # threaded calls do not use a process pool
+        multitask(adder, iterable, xy, None, jobs=2, force_threading=True)
+        assert pool.n_calls == 3
+
+    assert pool.closed
+    assert get_active_pool() is None
+
+
+def test_thread_pool(adder_data):
+    xy, iterable, expected = adder_data
+    skip = np.full(len(iterable), False)
+    skip[0] = True
+    with MultitaskPool(jobs=2, force_threading=True) as pool:
+        result = multitask(adder, iterable, xy, None, jobs=2,
+                           force_threading=True, skip=skip)
+        assert np.allclose(result, expected[~skip])
+        assert pool.n_calls == 1
+
+        result = multitask(nested, iterable, xy, None, jobs=2,
+                           force_threading=True)
+        assert np.allclose(result, np.sum(expected[:3]))
+        assert not pool.in_worker_thread()
+        assert threading.current_thread().name != pool.thread_prefix
+
+
+def test_explicit_pool(adder_data, capsys):
+    xy, iterable, expected = adder_data
+    pool = MultitaskPool(jobs=2, force_threading=True)
+    assert pool.closed
+    assert get_active_pool() is None
+
+    result = multitask(adder, iterable, xy, None, jobs=2, pool=pool)
+    assert np.allclose(result, expected)
+    assert pool.map(abs, []) == []
+
+    result = multitask(log_message, range(3), None, None, jobs=2, pool=pool,
+                       logger=log)
+    assert result == [0, 1, 2]
+    assert 'task 2' in capsys.readouterr().out
+    pool.close()
+    assert pool.closed
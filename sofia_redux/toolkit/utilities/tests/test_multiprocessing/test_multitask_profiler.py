@@ -0,0 +1,169 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+
+import json
+import os
+import threading
+
+from astropy import log
+import numpy as np
+import pytest
+
+from sofia_redux.toolkit.utilities.multiprocessing import (
+    MultitaskPool, MultitaskProfiler, get_active_profiler, multitask)
+
+
+def adder(xy, i):
+    return xy[0, i] + xy[1, i]
+
+
+def log_message(args, i):
+    log.info(f'task {i}')
+    return i
+
+
+def make_lock(args, i):
+    return threading.Lock()
+
+
+@pytest.fixture
+def adder_data():
+    n = 10
+    xy = np.arange(n)
+    xy = np.vstack((xy, xy + 100))
+    expected = np.sum(xy, axis=0)
+    iterable = list(range(n))
+    return xy, iterable, expected
+
+
+def check_records(profiler, n_tasks, backend, sized=True):
+    records = [r for r in profiler.records if r['backend'] == backend]
+    assert len(records) == n_tasks
+    assert sorted(r['index'] for r in records) == list(range(n_tasks))
+    for record in records:
+        assert record['name'] == 'adder'
+        assert record['stop'] >= record['start']
+        assert record['queue_wait'] >= 0
+        if sized:
+            assert record['arg_bytes'] > 0
+            assert record['result_bytes'] > 0
+        else:
+            assert record['arg_bytes'] == -1
+            assert record['result_bytes'] == -1
+        assert record['rss'] > 0
+    return records
+
+
+def test_serial(adder_data):
+    xy, iterable, expected = adder_data
+    profiler = MultitaskProfiler()
+    result = multitask(adder, iterable, xy, None, profiler=profiler)
+    assert np.allclose(result, expected)
+    records = check_records(profiler, len(iterable), 'serial', sized=False)
+    assert all(r['pid'] == os.getpid() for r in records)
+    assert len(profiler.calls) == 1
+    assert profiler.calls[0]['func_bytes'] == -1
+
+    # sizes measured on request
+    profiler = MultitaskProfiler(measure_sizes=True)
+    multitask(adder, iterable, xy, None, profiler=profiler)
+    check_records(profiler, len(iterable), 'serial')
+    assert profiler.calls[0]['func_bytes'] > xy.nbytes
+
+    skip = [False] * len(iterable)
+    skip[0] = True
+    profiler.clear()
+    result = multitask(adder, iterable, xy, None, skip=skip,
+                       profiler=profiler)
+    assert np.allclose(result, expected[1:])
+    assert profiler.n_tasks == len(iterable) - 1
+
+
+def test_parallel(adder_data):
+    xy, iterable, expected = adder_data
+    with MultitaskProfiler() as profiler:
+        assert get_active_profiler() is profiler
+        result = multitask(adder, iterable, xy, None, jobs=2,
+                           force_threading=True)
+        assert np.allclose(result, expected)
+        result = multitask(adder, iterable, xy, None, jobs=2,
+                           force_processes=True)
+        assert np.allclose(result, expected)
+    assert get_active_profiler() is None
+
+    check_records(profiler, len(iterable), 'threading', sized=False)
+    records = check_records(profiler, len(iterable), 'loky')
+    assert all(r['pid'] != os.getpid() for r in records)
+    assert [c['jobs'] for c in profiler.calls] == [2, 2]
+    assert 'MultitaskProfiler (2 calls, 20 tasks)' in str(profiler)
+
+    # Not recorded outside of the context
+    multitask(adder, iterable, xy, None)
+    assert profiler.n_tasks == 2 * len(iterable)
+
+
+def test_pool(adder_data):
+    xy, iterable, expected = adder_data
+    profiler = MultitaskProfiler(measure_sizes=False)
+    with MultitaskPool(jobs=2, force_threading=True):
+        result = multitask(adder, iterable, xy, None, jobs=2,
+                           force_threading=True, profiler=profiler)
+    assert np.allclose(result, expected)
+    assert profiler.n_tasks == len(iterable)
+    assert all(r['backend'] == 'pool-threads' for r in profiler.records)
+    assert all(r['arg_bytes'] == -1 for r in profiler.records)
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_unpicklable_results(jobs):
+    profiler = MultitaskProfiler(measure_sizes=True)
+    result = multitask(make_lock, range(3), None, None, jobs=jobs,
+                       force_threading=True, profiler=profiler)
+    assert len(result) == 3
+    assert all(isinstance(x, type(threading.Lock())) for x in result)
+    assert profiler.n_tasks == 3
+    assert all(r['arg_bytes'] > 0 for r in profiler.records)
+    assert all(r['result_bytes'] == -1 for r in profiler.records)
+
+    # Not pickled by default for serial and thread backends
+    with MultitaskProfiler() as profiler:
+        result = multitask(make_lock, range(3), None, None, jobs=jobs,
+                           force_threading=True)
+    assert len(result) == 3
+    assert all(r['result_bytes'] == -1 for r in profiler.records)
+
+
+def test_callback_and_logger(adder_data, capsys):
+    records = []
+    result = multitask(log_message, range(4), None, None, jobs=2,
+                       force_threading=True, logger=log,
+                       profiler=records.append)
+    assert result == list(range(4))
+    assert len(records) == 4
+    assert 'task 3' in capsys.readouterr().out
+
+
+def test_export(adder_data, tmpdir):
+    xy, iterable, expected = adder_data
+    profiler = MultitaskProfiler()
+    assert profiler.table() == ''
+    multitask(adder, iterable, xy, None, profiler=profiler)
+    multitask(adder, iterable, xy, None, jobs=2, force_threading=True,
+              profiler=profiler)
+
+    table = profiler.table().splitlines()
+    assert len(table) == 2 + 2 * len(iterable)
+    assert 'queue_wait' in table[0]
+    workers = profiler.worker_summary()
+    assert sum(w['n_tasks'] for w in workers) == 2 * len(iterable)
+    assert 'busy' in profiler.table(per_worker=True)
+
+    filename = profiler.to_chrome_trace(str(tmpdir.join('trace.json')))
+    with open(filename) as f:
+        trace = json.load(f)
+    events = trace['traceEvents']
+    tasks = [e for e in events if e['ph'] == 'X' and e['cat'] != 'multitask']
+    calls = [e for e in events if e.get('cat') == 'multitask']
+    assert len(tasks) == 2 * len(iterable)
+    assert len(calls) == 2
+    assert all(e['dur'] >= 0 for e in tasks)
+    assert any(e['ph'] == 'M' for e in events)
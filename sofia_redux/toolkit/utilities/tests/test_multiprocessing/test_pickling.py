@@ -1,7 +1,8 @@
 # Licensed under a 3-clause BSD style license - see LICENSE.rst
 
 from sofia_redux.toolkit.utilities.multiprocessing import (
-    pickle_object, unpickle_file, pickle_list, unpickle_list)
+    pickle_object, unpickle_file, pickle_list, unpickle_list,
+    SharedArrayStore, release_shared_arrays)
 
 import numpy as np
 import os
@@ -96,3 +97,31 @@ def test_unpickle_list():
         assert not os.path.isfile(pickle_files[i])
 
     shutil.rmtree(pickle_directory)
+
+
+def test_shared_array_store(tmpdir):
+    test_file = str(tmpdir.mkdir('pickling_tests').join('shared.p'))
+    big = rand.random((100, 200))
+    fortran = np.asfortranarray(rand.random((50, 60)))
+    small = np.arange(10)
+    obj = {'big': big, 'fortran': fortran, 'small': small, 'value': 1}
+
+    with SharedArrayStore(min_bytes=1024) as store:
+        out_file = store.pickle_object(obj, test_file)
+        assert out_file == test_file
+        assert store.n_arrays == 2
+        assert store.shared_bytes == big.nbytes + fortran.nbytes
+        assert store.pickled_bytes == os.path.getsize(test_file)
+        assert store.pickled_bytes < big.nbytes
+
+        result, _ = unpickle_file(out_file)
+        assert result['value'] == 1
+        assert np.allclose(result['big'], big)
+        assert not result['big'].flags.owndata
+        assert np.allclose(result['fortran'], fortran)
+        assert result['fortran'].flags.f_contiguous
+        del result
+        release_shared_arrays()
+
+    assert store.n_arrays == 0
+    store.close()  # does nothing